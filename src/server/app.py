@@ -39,6 +39,12 @@ app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
     'pool_pre_ping': True
 }
 
+# Póker: segundos entre volcados del estado en memoria a la BD (0 = escritura directa)
+app.config['POKER_SNAPSHOT_SEGUNDOS'] = float(os.environ.get('POKER_SNAPSHOT_SEGUNDOS', 1.0))
+
+# Caballos: segundos entre difusiones agrupadas de apuestas y cuotas a la sala (0 = en cada apuesta)
+app.config['CABALLOS_CUOTAS_SEGUNDOS'] = float(os.environ.get('CABALLOS_CUOTAS_SEGUNDOS', 0.5))
+
 # Registrar el helper en el entorno Jinja
 app.jinja_env.globals["get_headings"] = get_headings
 
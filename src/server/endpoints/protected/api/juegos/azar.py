@@ -0,0 +1,115 @@
+# server/endpoints/protected/api/juegos/azar.py
+"""
+Servicio de azar compartido por los juegos.
+
+``FlujoAleatorio`` reparte uniformes en [0, 1) desde un búfer que se rellena
+por bloques: con semilla sale de un ``Generator`` PCG64 de NumPy (reproducible,
+para tests y simulaciones); sin ella, de ``os.urandom`` (CSPRNG del sistema),
+que es el modo por defecto en producción.
+
+``TablaAlias`` precalcula una sola vez la tabla de alias de Walker (método de
+Vose) de una distribución fija; cada extracción cuesta un uniforme y una
+comparación, y ``extraer(n)`` saca ``n`` resultados de golpe con NumPy.
+
+El flujo por defecto (``flujo()``) lee ``AZAR_SEMILLA`` del entorno la primera
+vez; ``sembrar`` lo sustituye por uno reproducible.
+"""
+
+import os
+import threading
+
+import numpy as np
+
+BLOQUE = 4096
+_ESCALA_53 = 2.0 ** -53
+
+
+class FlujoAleatorio:
+    """Uniformes en [0, 1): PCG64 con ``semilla``, CSPRNG del sistema sin ella."""
+
+    def __init__(self, semilla=None, bloque: int = BLOQUE):
+        self.seguro = semilla is None
+        self._rng = None if self.seguro else np.random.default_rng(int(semilla))
+        self._bloque = bloque
+        self._buffer = np.empty(0)
+        self._pos = 0
+        self._lock = threading.Lock()
+
+    def _generar(self, n: int) -> np.ndarray:
+        if self.seguro:
+            # 53 bits aleatorios por uniforme, igual que ``Generator.random``
+            enteros = np.frombuffer(os.urandom(8 * n), dtype=np.uint64)
+            return (enteros >> np.uint64(11)) * _ESCALA_53
+        return self._rng.random(n)
+
+    def uniformes(self, n: int) -> np.ndarray:
+        """``n`` uniformes; las peticiones pequeñas se sirven del búfer."""
+        if n > self._bloque:
+            return self._generar(n)
+        with self._lock:
+            if self._pos + n > len(self._buffer):
+                self._buffer = self._generar(self._bloque)
+                self._pos = 0
+            salida = self._buffer[self._pos:self._pos + n]
+            self._pos += n
+        return salida
+
+
+class TablaAlias:
+    """Tabla de alias de Walker para extraer ``valores`` con probabilidad proporcional a ``pesos``."""
+
+    def __init__(self, valores, pesos):
+        pesos = np.asarray(pesos, dtype=float)
+        if len(valores) != len(pesos) or len(pesos) == 0:
+            raise ValueError("valores y pesos deben tener la misma longitud (> 0)")
+        if (pesos < 0).any() or pesos.sum() <= 0:
+            raise ValueError("los pesos deben ser no negativos y no todos cero")
+
+        k = len(pesos)
+        escalados = pesos * k / pesos.sum()
+        prob = np.ones(k)
+        alias = np.arange(k)
+        pequenos = [i for i in range(k) if escalados[i] < 1.0]
+        grandes = [i for i in range(k) if escalados[i] >= 1.0]
+        while pequenos and grandes:
+            s, g = pequenos.pop(), grandes.pop()
+            prob[s], alias[s] = escalados[s], g
+            escalados[g] -= 1.0 - escalados[s]
+            (pequenos if escalados[g] < 1.0 else grandes).append(g)
+        # lo que quede tiene probabilidad 1 salvo error de redondeo
+
+        self.valores = np.asarray(valores)
+        self.probabilidades = pesos / pesos.sum()
+        self._prob = prob
+        self._alias = alias
+
+    def extraer(self, n: int, fuente=None) -> np.ndarray:
+        """``n`` extracciones independientes (un uniforme por extracción)."""
+        u = (fuente or flujo()).uniformes(n) * len(self._prob)
+        columna = np.minimum(u.astype(np.int64), len(self._prob) - 1)
+        elegida = np.where(u - columna < self._prob[columna], columna, self._alias[columna])
+        return self.valores[elegida]
+
+    def extraer_uno(self, fuente=None):
+        return self.extraer(1, fuente)[0].item()
+
+
+_flujo = None
+_flujo_lock = threading.Lock()
+
+
+def flujo() -> FlujoAleatorio:
+    """Flujo por defecto: CSPRNG salvo que ``AZAR_SEMILLA`` fije una semilla."""
+    global _flujo
+    if _flujo is None:
+        with _flujo_lock:
+            if _flujo is None:
+                _flujo = FlujoAleatorio(os.environ.get('AZAR_SEMILLA') or None)
+    return _flujo
+
+
+def sembrar(semilla=None) -> FlujoAleatorio:
+    """Sustituye el flujo por defecto (reproducible con ``semilla``; CSPRNG con ``None``)."""
+    global _flujo
+    _flujo = FlujoAleatorio(semilla)
+    return _flujo
@@ -0,0 +1,195 @@
+# server/endpoints/protected/api/juegos/carrera.py
+"""
+Modelo determinista de la carrera de caballos.
+
+El servidor decide el ganador (``elegir_ganador``, con los pesos de
+velocidad/resistencia) y busca una semilla cuya carrera simulada acabe con ese
+caballo delante. Al cliente solo se le envían ``semilla`` y ``duracion``: con
+``static/js/carrera_caballos.js``, que es el mismo modelo fotograma a
+fotograma, reproduce exactamente la carrera que el servidor ya ha liquidado.
+
+Para que Python y JavaScript den el mismo resultado bit a bit, el azar de la
+carrera sale de mulberry32 (aritmética entera de 32 bits) y el modelo solo usa
+sumas, productos y divisiones de coma flotante en el mismo orden en los dos
+lados.
+
+Las cuotas tampoco están fijadas a mano: ``carta`` simula con NumPy el mismo
+modelo para cualquier campo de hasta ``MAX_CABALLOS`` caballos, saca la
+probabilidad de victoria de cada uno y le da el multiplicador justo menos
+``MARGEN_CABALLOS``. El resultado se guarda por composición del campo, así que
+cada carta nueva cuesta una simulación la primera vez y nada las siguientes.
+"""
+
+import os
+
+import numpy as np
+
+from .azar import TablaAlias, flujo
+
+DURACION_MS = 4000
+FPS = 30
+MAX_INTENTOS = 20_000   # de media basta con tantas carreras como caballos
+_MASCARA_32 = 0xFFFFFFFF
+
+MAX_CABALLOS = 12
+MARGEN_CABALLOS = float(os.environ.get('CABALLOS_MARGEN', 0.05))
+MULTIPLICADOR_MAXIMO = 100.0
+SIMULACIONES_CUOTAS = 400_000
+SEMILLA_CUOTAS = 21     # cuotas reproducibles entre procesos
+BLOQUE_CUOTAS = 100_000
+
+# Cuotas ya calculadas: {(campo, margen): (probabilidades, multiplicadores)}
+_cuotas = {}
+
+
+def fotogramas(duracion_ms: int) -> int:
+    return duracion_ms * FPS // 1000
+
+
+def probabilidades_victoria(campo, carreras: int = SIMULACIONES_CUOTAS, rng=None,
+                            duracion_ms: int = DURACION_MS) -> np.ndarray:
+    """
+    Probabilidad de victoria de cada caballo del ``campo`` (pares
+    ``(velocidad, resistencia)``) simulando ``carreras`` carreras del modelo de
+    ``simular_carrera`` a la vez. El recorrido de un caballo es su ritmo por
+    la suma de ``fatiga * (0.5 + u)`` en cada fotograma; esa suma de más de
+    cien uniformes se saca de una normal con su media y varianza exactas en vez de
+    fotograma a fotograma.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    velocidad = np.array([v for v, _ in campo], dtype=float)
+    resistencia = np.array([r for _, r in campo], dtype=float)
+    n = fotogramas(duracion_ms)
+    fatiga = 1.0 - np.outer(np.arange(n) / n, 1.0 - resistencia)     # (fotograma, caballo)
+    media = fatiga.sum(axis=0)
+    desviacion = np.sqrt((fatiga ** 2).sum(axis=0) / 12)
+    base = 0.6 + 0.4 * velocidad
+
+    victorias = np.zeros(len(campo), dtype=np.int64)
+    hechas = 0
+    while hechas < carreras:
+        b = min(BLOQUE_CUOTAS, carreras - hechas)
+        forma = 0.75 + 0.5 * rng.random((b, len(campo)))
+        recorrido = base * forma * (media + desviacion * rng.standard_normal((b, len(campo))))
+        victorias += np.bincount(recorrido.argmax(axis=1), minlength=len(campo))
+        hechas += b
+    return victorias / carreras
+
+
+def cuotas(campo, margen: float = MARGEN_CABALLOS) -> tuple:
+    """
+    ``(probabilidades, multiplicadores)`` del campo: el multiplicador justo
+    ``(1 - margen) / p`` redondeado a la baja al céntimo (y como mucho
+    ``MULTIPLICADOR_MAXIMO``). Se calcula una vez por campo y margen.
+    """
+    campo = tuple((float(v), float(r)) for v, r in campo)
+    if not 1 <= len(campo) <= MAX_CABALLOS:
+        raise ValueError(f"El campo debe tener entre 1 y {MAX_CABALLOS} caballos")
+    clave = (campo, margen)
+    if clave not in _cuotas:
+        probs = probabilidades_victoria(campo, rng=np.random.default_rng(SEMILLA_CUOTAS))
+        with np.errstate(divide='ignore'):
+            justos = np.floor((1.0 - margen) / probs * 100) / 100
+        multiplicadores = np.minimum(justos, MULTIPLICADOR_MAXIMO)
+        _cuotas[clave] = (tuple(probs.tolist()), tuple(multiplicadores.tolist()))
+    return _cuotas[clave]
+
+
+def carta(caballos: dict, margen: float = MARGEN_CABALLOS) -> dict:
+    """Copia de ``caballos`` con la ``probabilidad`` y el ``multiplicador`` de cada uno."""
+    orden = sorted(caballos)
+    probs, multiplicadores = cuotas([(caballos[c]['velocidad'], caballos[c]['resistencia']) for c in orden], margen)
+    return {
+        c: {**caballos[c], 'probabilidad': p, 'multiplicador': m}
+        for c, p, m in zip(orden, probs, multiplicadores)
+    }
+
+
+CABALLOS = carta({
+    1: {
+        'id': 1,
+        'nombre': 'Relámpago',
+        'velocidad': 0.85,
+        'resistencia': 0.70,
+        'emoji': '🐎'
+    },
+    2: {
+        'id': 2,
+        'nombre': 'Trueno',
+        'velocidad': 0.75,
+        'resistencia': 0.80,
+        'emoji': '🐴'
+    },
+    3: {
+        'id': 3,
+        'nombre': 'Centella',
+        'velocidad': 0.65,
+        'resistencia': 0.85,
+        'emoji': '🏇'
+    },
+    4: {
+        'id': 4,
+        'nombre': 'Azabache',
+        'velocidad': 0.45,
+        'resistencia': 0.95,
+        'emoji': '🎠'
+    }
+})
+
+# Probabilidad de victoria de cada caballo y lo que cobra quien acierta, apuesta incluida
+PROBABILIDADES_CABALLOS = {n: c['probabilidad'] for n, c in CABALLOS.items()}
+MULTIPLICADORES_CABALLOS = {n: c['multiplicador'] for n, c in CABALLOS.items()}
+TABLA_CABALLOS = TablaAlias(list(PROBABILIDADES_CABALLOS), list(PROBABILIDADES_CABALLOS.values()))
+
+
+def elegir_ganador():
+    """Elegir ganador con las probabilidades de victoria del modelo."""
+    return TABLA_CABALLOS.extraer_uno()
+
+
+def _mulberry32(semilla: int):
+    """Uniformes en [0, 1) de mulberry32, idénticos a los de ``carrera_caballos.js``."""
+    a = semilla & _MASCARA_32
+    while True:
+        a = (a + 0x6D2B79F5) & _MASCARA_32
+        t = ((a ^ (a >> 15)) * (1 | a)) & _MASCARA_32
+        t = ((t + (((t ^ (t >> 7)) * (61 | t)) & _MASCARA_32)) & _MASCARA_32) ^ t
+        yield (t ^ (t >> 14)) / 4294967296
+
+
+def simular_carrera(semilla: int, duracion_ms: int = DURACION_MS, caballos: dict = None) -> dict:
+    """
+    Recorrido de cada caballo en cada fotograma, en fracción de pista (el
+    ganador llega a 1.0 en el último). Cada caballo saca al salir un estado de
+    forma y en cada paso avanza según su velocidad, con un ruido y un
+    cansancio que crece con lo recorrido y que la resistencia amortigua.
+    """
+    caballos = caballos or CABALLOS
+    u = _mulberry32(semilla)
+    n = fotogramas(duracion_ms)
+    orden = sorted(caballos)
+    ritmo = {c: (0.6 + 0.4 * caballos[c]['velocidad']) * (0.75 + 0.5 * next(u)) for c in orden}
+    distancia = {c: 0.0 for c in orden}
+    recorrido = []
+    for f in range(n):
+        avance = f / n
+        for c in orden:
+            fatiga = 1.0 - (1.0 - caballos[c]['resistencia']) * avance
+            distancia[c] += ritmo[c] * fatiga * (0.5 + next(u))
+        recorrido.append([distancia[c] for c in orden])
+
+    meta = max(distancia.values())
+    ganador = next(c for c in orden if distancia[c] == meta)
+    return {
+        'ganador': ganador,
+        'posiciones': [[d / meta for d in fila] for fila in recorrido],
+    }
+
+
+def preparar_carrera(ganador: int, duracion_ms: int = DURACION_MS, caballos: dict = None) -> int:
+    """Semilla (32 bits) cuya carrera simulada (con ``caballos``, por defecto ``CABALLOS``) gana ``ganador``."""
+    for _ in range(MAX_INTENTOS):
+        semilla = int(flujo().uniformes(1)[0] * 2 ** 32)
+        if simular_carrera(semilla, duracion_ms, caballos)['ganador'] == ganador:
+            return semilla
+    raise RuntimeError(f"Sin semilla para el caballo {ganador} tras {MAX_INTENTOS} intentos")
@@ -0,0 +1,68 @@
+# server/endpoints/protected/api/juegos/historial_ruleta.py
+"""
+Historial de números de una mesa de ruleta (o de un jugador en la ruleta
+individual): buffer circular con los últimos ``HISTORIAL_MAX`` resultados y
+contadores de frecuencia que se actualizan al entrar y salir cada número, de
+modo que la interfaz recibe historial, calientes y fríos sin recorrer
+``Apuesta.resultado``.
+"""
+
+from collections import deque
+
+from .motor_ruleta import N_CASILLAS, ROJOS
+
+HISTORIAL_MAX = 100
+N_DESTACADOS = 5
+
+
+def _categorias(n: int) -> tuple:
+    """Contadores a los que suma el número ``n``."""
+    if n == 0:
+        return ('verde',)
+    return (
+        'rojo' if n in ROJOS else 'negro',
+        'par' if n % 2 == 0 else 'impar',
+        'bajo' if n <= 18 else 'alto',
+        f'docena_{(n - 1) // 12 + 1}',
+        f'columna_{(n - 1) % 3 + 1}',
+    )
+
+
+CATEGORIAS_NUMERO = [_categorias(n) for n in range(N_CASILLAS)]
+CATEGORIAS = tuple(dict.fromkeys(c for cats in CATEGORIAS_NUMERO for c in cats))
+
+
+class HistorialRuleta:
+    def __init__(self, capacidad: int = HISTORIAL_MAX):
+        self.numeros = deque(maxlen=capacidad)
+        self.frecuencias = [0] * N_CASILLAS
+        self.categorias = dict.fromkeys(CATEGORIAS, 0)
+
+    def _sumar(self, n: int, delta: int):
+        self.frecuencias[n] += delta
+        for categoria in CATEGORIAS_NUMERO[n]:
+            self.categorias[categoria] += delta
+
+    def registrar(self, n: int):
+        """Añade un resultado; si el buffer está lleno, descuenta el más antiguo."""
+        if len(self.numeros) == self.numeros.maxlen:
+            self._sumar(self.numeros[0], -1)
+        self.numeros.append(n)
+        self._sumar(n, 1)
+
+    def calientes(self, k: int = N_DESTACADOS) -> list:
+        # 37 casillas fijas: ordenar es coste constante. Solo cuentan los que han salido
+        salidos = [n for n in range(N_CASILLAS) if self.frecuencias[n] > 0]
+        return sorted(salidos, key=lambda n: (-self.frecuencias[n], n))[:k]
+
+    def frios(self, k: int = N_DESTACADOS) -> list:
+        return sorted(range(N_CASILLAS), key=lambda n: (self.frecuencias[n], n))[:k]
+
+    def serializar(self) -> dict:
+        return {
+            'ultimos': list(reversed(self.numeros)),  # el más reciente primero
+            'tiradas': len(self.numeros),
+            'frecuencias': dict(self.categorias),
+            'calientes': self.calientes(),
+            'frios': self.frios() if self.numeros else [],
+        }
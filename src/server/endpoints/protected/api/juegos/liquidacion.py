@@ -0,0 +1,82 @@
+# server/endpoints/protected/api/juegos/liquidacion.py
+"""
+Abono de saldos y suma de estadísticas en lote.
+
+Todas las liquidaciones multijugador (mesa pública de ruleta, blackjack,
+póker, jornadas de quiniela) acaban igual: sumar a cada usuario lo que cobra y
+acumular su fila de Estadistica. ``abonar_y_sumar`` lo hace con un número fijo
+de sentencias sea cual sea el número de usuarios: ``UPDATE ... SET balance =
+balance + :pago`` en lote, una lectura de saldos, una consulta ``IN`` de
+estadísticas, ``UPDATE ... SET x = x + :delta`` en lote para las que existen e
+inserción en lote de las nuevas. Cada juego sigue registrando sus Apuestas.
+"""
+
+from sqlalchemy import bindparam, func, insert, update
+
+from models import db, Estadistica, User
+
+
+def abonar_y_sumar(juego: str, tipo_juego: str, sumas: dict) -> dict:
+    """
+    Aplica ``{user_id: {'pago', 'jugadas', 'ganadas', 'apostado', 'ganancia'}}``
+    (euros; ``pago`` es lo que se suma al saldo, ``jugadas`` vale 1 si no se da
+    y el resto 0). Las estadísticas solo se suman a usuarios que existen.
+    Devuelve ``{user_id: balance}`` de esos usuarios (sin commit).
+    """
+    if not sumas:
+        return {}
+    db.session.flush()  # que ningún cambio pendiente pise los UPDATE en lote
+    tabla_users = User.__table__
+    pagos = [{'b_uid': uid, 'b_pago': s['pago']} for uid, s in sumas.items() if s.get('pago')]
+    if pagos:
+        db.session.execute(
+            update(tabla_users)
+            .where(tabla_users.c.id == bindparam('b_uid'))
+            .values(balance=func.coalesce(tabla_users.c.balance, 0.0) + bindparam('b_pago')),
+            pagos
+        )
+    balances = {
+        uid: float(balance or 0.0)
+        for uid, balance in db.session.query(User.id, User.balance).filter(User.id.in_(list(sumas)))
+    }
+    sumas = {uid: s for uid, s in sumas.items() if uid in balances}
+    if not sumas:
+        return balances
+
+    existentes = {}
+    for stats_id, uid in (
+        db.session.query(Estadistica.id, Estadistica.user_id)
+        .filter(Estadistica.user_id.in_(list(sumas)), Estadistica.juego == juego,
+                Estadistica.tipo_juego == tipo_juego)
+        .order_by(Estadistica.id)
+    ):
+        existentes.setdefault(uid, stats_id)
+
+    def _deltas(s):
+        return {'b_jugadas': s.get('jugadas', 1), 'b_ganadas': s.get('ganadas', 0),
+                'b_apostado': s.get('apostado', 0.0), 'b_ganancia': s.get('ganancia', 0.0)}
+
+    tabla_stats = Estadistica.__table__
+    cambios = [{'b_sid': existentes[uid], **_deltas(s)} for uid, s in sumas.items() if uid in existentes]
+    if cambios:
+        db.session.execute(
+            update(tabla_stats)
+            .where(tabla_stats.c.id == bindparam('b_sid'))
+            .values(
+                partidas_jugadas=tabla_stats.c.partidas_jugadas + bindparam('b_jugadas'),
+                partidas_ganadas=tabla_stats.c.partidas_ganadas + bindparam('b_ganadas'),
+                apuesta_total=tabla_stats.c.apuesta_total + bindparam('b_apostado'),
+                ganancia_total=tabla_stats.c.ganancia_total + bindparam('b_ganancia'),
+            ),
+            cambios
+        )
+    nuevas = []
+    for uid, s in sumas.items():
+        if uid not in existentes:
+            d = _deltas(s)
+            nuevas.append({'user_id': uid, 'juego': juego, 'tipo_juego': tipo_juego,
+                           'partidas_jugadas': d['b_jugadas'], 'partidas_ganadas': d['b_ganadas'],
+                           'apuesta_total': d['b_apostado'], 'ganancia_total': d['b_ganancia']})
+    if nuevas:
+        db.session.execute(insert(Estadistica), nuevas)
+    return balances
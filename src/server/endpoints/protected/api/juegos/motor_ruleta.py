@@ -0,0 +1,256 @@
+# server/endpoints/protected/api/juegos/motor_ruleta.py
+"""
+Motor de liquidación de la ruleta, compartido por la ruleta individual y la
+multijugador (HTTP y Socket.IO).
+
+Cada apuesta se compila una sola vez en ``(mascara, cuota, cantidad)``, donde
+la máscara de 37 bits marca los números (0-36) con los que gana, y de ahí en
+un vector de 37 casillas con lo que cobra si sale cada número. Las apuestas de un mismo jugador se
+suman en una fila, de modo que liquidar cualquier número de jugadores y
+apuestas para un resultado es quedarse con una columna de la matriz
+(``matriz @ e_resultado``), sin recorrer las apuestas una a una.
+
+Al colocar la apuesta se valida con ``validar_apuestas`` contra la geometría
+del paño europeo; desde ahí solo se guardan y liquidan esas tuplas de enteros.
+
+Todas las cantidades van en céntimos (enteros), como las envía el cliente.
+"""
+
+from functools import lru_cache
+
+import numpy as np
+
+N_CASILLAS = 37
+PAGOS = {
+    'straight': 35, 'split': 17, 'street': 11,
+    'corner': 8, 'line': 5, 'dozen': 2, 'column': 2, 'even': 1
+}
+ROJOS = frozenset({1, 3, 5, 7, 9, 12, 14, 16, 18, 19, 21, 23, 25, 27, 30, 32, 34, 36})
+
+# Apuestas sencillas (type 'even'): se identifican por la etiqueta exacta
+APUESTAS_SIMPLES = {
+    'rojo': ROJOS,
+    'negro': frozenset(n for n in range(1, 37) if n not in ROJOS),
+    'par': frozenset(range(2, 37, 2)),
+    'impar': frozenset(range(1, 37, 2)),
+    '1-18': frozenset(range(1, 19)),
+    '19-36': frozenset(range(19, 37)),
+}
+
+
+def _normalizar_etiqueta(label) -> str:
+    # El cliente usa guion largo en los rangos ('1–18')
+    return str(label or '').strip().lower().replace('–', '-').replace('—', '-')
+
+
+def _enteros(valores) -> list:
+    try:
+        return [int(n) for n in valores]
+    except (TypeError, ValueError):
+        salida = []
+        for n in valores:
+            try:
+                salida.append(int(n))
+            except (TypeError, ValueError):
+                continue
+        return salida
+
+
+def numeros_apuesta(bet: dict) -> frozenset:
+    """Números con los que gana la apuesta."""
+    if bet.get('type') == 'even':
+        return APUESTAS_SIMPLES.get(_normalizar_etiqueta(bet.get('label')), frozenset())
+    return frozenset(n for n in _enteros(bet.get('set') or []) if 0 <= n < N_CASILLAS)
+
+
+def mascara(numeros) -> int:
+    """Máscara de 37 bits: el bit ``n`` está activo si la apuesta gana con ``n``."""
+    valor = 0
+    for n in numeros:
+        valor |= 1 << n
+    return valor
+
+
+_MASCARAS_SIMPLES = {etiqueta: mascara(numeros) for etiqueta, numeros in APUESTAS_SIMPLES.items()}
+
+
+@lru_cache(maxsize=1024)
+def _mascara_conjunto(numeros: tuple) -> int:
+    # Hay pocas geometrías distintas (plenos, caballos, calles...): se memorizan
+    return mascara({n for n in _enteros(numeros) if 0 <= n < N_CASILLAS})
+
+
+def compilar_apuesta(bet: dict) -> tuple:
+    """``(mascara, cuota, cantidad)`` de una apuesta del cliente."""
+    tipo = bet.get('type')
+    if tipo == 'even':
+        bits = _MASCARAS_SIMPLES.get(_normalizar_etiqueta(bet.get('label')), 0)
+    else:
+        numeros = bet.get('set') or ()
+        try:
+            bits = _mascara_conjunto(tuple(numeros))
+        except TypeError:
+            bits = mascara({n for n in _enteros(numeros) if 0 <= n < N_CASILLAS})
+    try:
+        cantidad = int(bet.get('amount', 0))
+    except (TypeError, ValueError):
+        cantidad = 0
+    return bits, PAGOS.get(tipo, 0), cantidad
+
+
+# Límites de una colocación: número de apuestas y céntimos por apuesta
+MAX_APUESTAS = 200
+MAX_CANTIDAD = 10_000_000
+
+
+class ApuestaInvalida(ValueError):
+    """Apuesta que no corresponde a ninguna jugada legal del paño."""
+
+
+def _geometria() -> dict:
+    """Máscaras legales de cada tipo de apuesta en el paño europeo (3 x 12 + el 0)."""
+    filas = [(3 * k + 1, 3 * k + 2, 3 * k + 3) for k in range(12)]
+    caballos = [(n, n + 1) for n in range(1, 36) if n % 3] + [(n, n + 3) for n in range(1, 34)]
+    esquinas = [(n, n + 1, n + 3, n + 4) for n in range(1, 33) if n % 3]
+    return {
+        'straight': [(n,) for n in range(N_CASILLAS)],
+        'split': caballos + [(0, 1), (0, 2), (0, 3)],
+        'street': filas + [(0, 1, 2), (0, 2, 3)],
+        'corner': esquinas + [(0, 1, 2, 3)],
+        'line': [filas[k] + filas[k + 1] for k in range(11)],
+        'dozen': [tuple(range(12 * k + 1, 12 * k + 13)) for k in range(3)],
+        'column': [tuple(range(k, 37, 3)) for k in (1, 2, 3)],
+    }
+
+
+GEOMETRIA = {tipo: frozenset(mascara(j) for j in jugadas) for tipo, jugadas in _geometria().items()}
+
+
+def validar_apuesta(bet, min_cell: int = 1) -> tuple:
+    """
+    Compila una apuesta recibida al colocarla. Lanza ``ApuestaInvalida`` si el
+    tipo, los números o la cantidad no forman una jugada legal.
+    """
+    if not isinstance(bet, dict):
+        raise ApuestaInvalida('Formato de apuesta no válido')
+    tipo = bet.get('type')
+    if tipo not in PAGOS:
+        raise ApuestaInvalida(f'Tipo de apuesta desconocido: {tipo}')
+
+    cantidad = bet.get('amount')
+    if isinstance(cantidad, float) and cantidad.is_integer():
+        cantidad = int(cantidad)
+    if isinstance(cantidad, bool) or not isinstance(cantidad, int):
+        raise ApuestaInvalida('La cantidad debe ser un número entero de céntimos')
+    # el mínimo de la mesa nunca baja de 1 céntimo, venga de donde venga
+    if cantidad < 1:
+        raise ApuestaInvalida('La cantidad debe ser positiva')
+    if cantidad < min_cell:
+        raise ApuestaInvalida(f'Apuesta mínima por casilla: {min_cell}¢')
+    if cantidad > MAX_CANTIDAD:
+        raise ApuestaInvalida(f'Apuesta máxima por casilla: {MAX_CANTIDAD}¢')
+
+    if tipo == 'even':
+        bits = _MASCARAS_SIMPLES.get(_normalizar_etiqueta(bet.get('label')))
+        if bits is None:
+            raise ApuestaInvalida(f'Apuesta sencilla desconocida: {bet.get("label")}')
+        return bits, PAGOS[tipo], cantidad
+
+    numeros = bet.get('set')
+    if not isinstance(numeros, (list, tuple)) or not all(
+        isinstance(n, int) and not isinstance(n, bool) for n in numeros
+    ):
+        raise ApuestaInvalida('Los números de la apuesta deben ser una lista de enteros')
+    bits = mascara(n for n in numeros if 0 <= n < N_CASILLAS)
+    if len(set(numeros)) != len(numeros) or bits not in GEOMETRIA[tipo]:
+        raise ApuestaInvalida(f'Jugada no válida para {tipo}: {list(numeros)}')
+    return bits, PAGOS[tipo], cantidad
+
+
+def validar_apuestas(bets, min_cell: int = 1) -> list:
+    """Valida y compila todas las apuestas de una colocación."""
+    if not isinstance(bets, list) or not bets:
+        raise ApuestaInvalida('No hay apuestas para procesar')
+    if len(bets) > MAX_APUESTAS:
+        raise ApuestaInvalida(f'Máximo {MAX_APUESTAS} apuestas por jugada')
+    return [validar_apuesta(bet, min_cell) for bet in bets]
+
+
+def total_apostado(compiladas) -> int:
+    """Céntimos apostados en una lista de apuestas compiladas."""
+    return sum(cantidad for _, _, cantidad in compiladas)
+
+
+class TablaPagos:
+    """
+    Apuestas compiladas por jugador: ``devuelto[i, n]`` es lo que recibe el
+    jugador ``claves[i]`` (apuesta incluida) si sale ``n`` y ``ganancia[i, n]``
+    la parte que es beneficio; ``apostado[i]`` es su apuesta total.
+    """
+
+    def __init__(self, claves, apostado, devuelto, ganancia):
+        self.claves = claves
+        self.apostado = apostado
+        self.devuelto = devuelto
+        self.ganancia = ganancia
+
+    def liquidar(self, resultado: int) -> dict:
+        """``{clave: {'apostado', 'ganancia', 'devuelto'}}`` en céntimos para un resultado."""
+        columna = np.zeros(N_CASILLAS, dtype=np.int64)
+        columna[resultado] = 1
+        devuelto = self.devuelto @ columna
+        ganancia = self.ganancia @ columna
+        return {
+            clave: {
+                'apostado': int(self.apostado[i]),
+                'ganancia': int(ganancia[i]),
+                'devuelto': int(devuelto[i]),
+            }
+            for i, clave in enumerate(self.claves)
+        }
+
+
+_BITS = np.arange(N_CASILLAS, dtype=np.int64)
+
+
+def compilar(apuestas_por_jugador: dict) -> TablaPagos:
+    """
+    Compila ``{clave: [apuesta, ...]}``. Cada apuesta puede venir tal cual la
+    manda el cliente (``{'type', 'amount', 'set', 'label'}``) o ya compilada
+    como ``(mascara, cuota, cantidad)``, también como lista tras pasar por JSON;
+    las de un mismo jugador vienen todas en la misma forma.
+    """
+    claves = list(apuestas_por_jugador)
+    compiladas, inicios = [], []
+    for clave in claves:
+        inicios.append(len(compiladas))
+        bets = apuestas_por_jugador[clave] or ()
+        if bets and isinstance(bets[0], dict):
+            compiladas.extend(compilar_apuesta(a) for a in bets)
+        else:
+            compiladas.extend(bets)
+
+    n_apuestas = len(compiladas)
+    datos = np.array(compiladas, dtype=np.int64).reshape(n_apuestas, 3)
+    cuotas = datos[:, 1]
+    cantidades = datos[:, 2]
+    # Vector de 37 casillas de cada apuesta a partir de su máscara
+    acierta = (datos[:, :1] >> _BITS) & 1
+
+    # Las apuestas de cada jugador son contiguas: se suman por tramos
+    ganancia = np.zeros((len(claves), N_CASILLAS), dtype=np.int64)
+    devuelto = np.zeros((len(claves), N_CASILLAS), dtype=np.int64)
+    apostado = np.zeros(len(claves), dtype=np.int64)
+    fines = inicios[1:] + [n_apuestas]
+    con_apuestas = [i for i in range(len(claves)) if inicios[i] < fines[i]]
+    if con_apuestas:
+        tramos = np.asarray([inicios[i] for i in con_apuestas])
+        ganancia[con_apuestas] = np.add.reduceat(acierta * (cantidades * cuotas)[:, None], tramos)
+        devuelto[con_apuestas] = np.add.reduceat(acierta * (cantidades * (cuotas + 1))[:, None], tramos)
+        apostado[con_apuestas] = np.add.reduceat(cantidades, tramos)
+    return TablaPagos(claves, apostado, devuelto, ganancia)
+
+
+def liquidar(apuestas_por_jugador: dict, resultado: int) -> dict:
+    """Atajo: compila y liquida en una sola llamada."""
+    return compilar(apuestas_por_jugador).liquidar(resultado)
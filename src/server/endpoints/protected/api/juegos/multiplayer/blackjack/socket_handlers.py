@@ -2,9 +2,11 @@ import time, random
 from collections import deque
 from flask_login import current_user
 from flask_socketio import join_room, leave_room, emit
-from models import db, User, SalaMultijugador, Apuesta, Estadistica
-from flask import request
-from sqlalchemy import func
+from models import db, User, SalaMultijugador, Apuesta, Estadistica, ContadorJuego
+from flask import current_app, request
+from sqlalchemy import bindparam, case, delete, func, insert, update
+from ...liquidacion import abonar_y_sumar
+from ...rondas import abrir_ronda, retener, liquidar_ronda
 
 
 # ================== Estado en memoria por sala ==================
@@ -19,6 +21,9 @@ salas_blackjack = {}
 #   'fase': 'esperando_apuestas|turnos|crupier|fin',
 #   'deadline_ts': float|None,
 #   'votos_revancha': set(uid),
+#   'ronda_id': int|None,       # RondaJuego con las retenciones de la mano
+#   'seq': int,                 # último delta enviado
+#   '_proyeccion': dict,        # estado público enviado con ese delta
 #   '_timer_activo': bool
 # }
 
@@ -63,38 +68,23 @@ def avanzar_turno(st):
     st['turno_idx'] = None
     st['fase'] = 'crupier'
 
-def serializar_stats(stats_obj, extras=None):
-    """Devuelve un diccionario con las estadisticas normalizadas."""
-    extras = extras or {}
-    if not stats_obj:
-        base = {
-            "partidas_jugadas": 0,
-            "partidas_ganadas": 0,
-            "apuesta_total": 0.0,
-            "ganancia_total": 0.0,
-        }
-    else:
-        base = {
-            "partidas_jugadas": stats_obj.partidas_jugadas or 0,
-            "partidas_ganadas": stats_obj.partidas_ganadas or 0,
-            "apuesta_total": float(stats_obj.apuesta_total or 0),
-            "ganancia_total": float(stats_obj.ganancia_total or 0),
-        }
-
-    empates = extras.get("empates", 0)
-    perdidas = extras.get("perdidas")
-    if perdidas is None:
-        perdidas = max(0, base["partidas_jugadas"] - base["partidas_ganadas"] - empates)
-
-    base.update({
-        "victorias": base["partidas_ganadas"],
-        "ganadas": base["partidas_ganadas"],
-        "derrotas": perdidas,
-        "perdidas": perdidas,
+def serializar_stats(contador=None):
+    """Devuelve un diccionario con las estadisticas normalizadas a partir de un ContadorJuego."""
+    victorias = contador.victorias if contador else 0
+    derrotas = contador.derrotas if contador else 0
+    empates = contador.empates if contador else 0
+    return {
+        "partidas_jugadas": victorias + derrotas + empates,
+        "partidas_ganadas": victorias,
+        "apuesta_total": float(contador.apostado) if contador else 0.0,
+        "ganancia_total": float(contador.pagado) if contador else 0.0,
+        "victorias": victorias,
+        "ganadas": victorias,
+        "derrotas": derrotas,
+        "perdidas": derrotas,
         "empates": empates,
-        "blackjacks": extras.get("blackjacks", 0),
-    })
-    return base
+        "blackjacks": contador.naturales if contador else 0,
+    }
 
 def _stats_base():
     """Estadisticas en cero para una sala recien creada (no arrastrar de otras salas)."""
@@ -123,83 +113,245 @@ def _refrescar_aliases(stats_dict):
 def refrescar_estadisticas_jugadores(st):
     """
     Carga las estadisticas consolidadas de blackjack para los jugadores de la sala
-    y las deja en memoria para emitirlas al cliente.
+    (lectura por clave primaria de ContadorJuego) y las deja en memoria para emitirlas al cliente.
     """
     uids = list(st["jugadores"].keys())
     if not uids:
         st["estadisticas_jugadores"] = {}
         return st["estadisticas_jugadores"]
 
-    conteos = {uid: {"empates": 0, "perdidas": 0, "blackjacks": 0} for uid in uids}
-    rows = db.session.query(
-        Apuesta.user_id,
-        Apuesta.resultado,
-        func.count(Apuesta.id)
-    ).filter(
-        Apuesta.user_id.in_(uids),
-        Apuesta.juego.in_(["blackjack", "blackjack_multijugador"]),
-        Apuesta.tipo_juego == 'multiplayer'
-    ).group_by(Apuesta.user_id, Apuesta.resultado).all()
-
-    for uid, res, count in rows:
-        res_low = (res or "").lower()
-        if "empate" in res_low:
-            conteos[uid]["empates"] = count
-        elif "perd" in res_low:
-            conteos[uid]["perdidas"] = count
-        elif "blackjack" in res_low:
-            conteos[uid]["blackjacks"] = count
-
-    stats_db = Estadistica.query.filter(
-        Estadistica.user_id.in_(uids),
-        Estadistica.juego == "blackjack",
-        Estadistica.tipo_juego == 'multiplayer'
-
-    ).all()
-    stats_map = {s.user_id: s for s in stats_db}
-
-    payload = {
-        uid: serializar_stats(stats_map.get(uid), conteos.get(uid, {}))
-        for uid in uids
+    contadores = {
+        c.user_id: c for c in ContadorJuego.query.filter(
+            ContadorJuego.user_id.in_(uids),
+            ContadorJuego.juego == "blackjack",
+            ContadorJuego.tipo_juego == 'multiplayer'
+        )
     }
+    payload = {uid: serializar_stats(contadores.get(uid)) for uid in uids}
     st["estadisticas_jugadores"] = payload
     for uid, stats in payload.items():
         if uid in st["jugadores"]:
             st["jugadores"][uid]["estadisticas"] = stats
     return payload
 
-def emitir_estado(sala_id):
-    st = salas_blackjack[sala_id]
-    room = f"blackjack_sala_{sala_id}"
+_CAMPOS_CONTADOR = ("victorias", "derrotas", "empates", "naturales", "apostado", "pagado")
+
+def sumar_contadores(incrementos, juego="blackjack", tipo_juego='multiplayer'):
+    """
+    Suma ``{uid: {campo: incremento}}`` a ContadorJuego dentro de la transacción
+    en curso: una consulta por clave primaria, ``UPDATE ... SET x = x + :d`` en
+    lote para las filas existentes e inserción en lote para las nuevas.
+    """
+    if not incrementos:
+        return
+    existentes = {
+        uid for (uid,) in db.session.query(ContadorJuego.user_id).filter(
+            ContadorJuego.user_id.in_(list(incrementos)),
+            ContadorJuego.juego == juego,
+            ContadorJuego.tipo_juego == tipo_juego
+        )
+    }
+    tabla = ContadorJuego.__table__
+    actualizar = [
+        {"b_uid": uid, **{f"d_{c}": inc.get(c, 0) for c in _CAMPOS_CONTADOR}}
+        for uid, inc in incrementos.items() if uid in existentes
+    ]
+    if actualizar:
+        db.session.execute(
+            update(tabla)
+            .where(tabla.c.user_id == bindparam("b_uid"), tabla.c.juego == juego, tabla.c.tipo_juego == tipo_juego)
+            .values({c: tabla.c[c] + bindparam(f"d_{c}") for c in _CAMPOS_CONTADOR}),
+            actualizar
+        )
+    nuevos = [
+        {"user_id": uid, "juego": juego, "tipo_juego": tipo_juego, **{c: inc.get(c, 0) for c in _CAMPOS_CONTADOR}}
+        for uid, inc in incrementos.items() if uid not in existentes
+    ]
+    if nuevos:
+        db.session.execute(insert(ContadorJuego), nuevos)
+
+# Nombres con los que se ha guardado el blackjack multijugador en Apuesta/Estadistica
+JUEGOS_BLACKJACK = ("blackjack", "blackjack_multijugador")
+
+def reconstruir_contadores(user_ids=None):
+    """
+    Recalcula desde el historial los ContadorJuego de blackjack multijugador
+    (también los de ``blackjack_multijugador``) y los sustituye, así que se
+    puede repetir sin contar dos veces. Con Apuesta: un GROUP BY por usuario
+    que clasifica ``resultado`` igual que la consulta anterior a ContadorJuego
+    (empate / perd... / el resto, victorias; "blackjack" cuenta como natural).
+    Quien solo tenga Estadistica toma de ahí victorias, derrotas y totales.
+    Devuelve el número de usuarios reconstruidos (sin commit).
+    """
+    resultado = func.lower(func.coalesce(Apuesta.resultado, ""))
+    es_empate = resultado.like("%empate%")
+    es_derrota = resultado.like("%perd%")
+    consulta = db.session.query(
+        Apuesta.user_id,
+        func.sum(case((es_empate, 0), (es_derrota, 0), else_=1)),
+        func.sum(case((es_empate, 0), (es_derrota, 1), else_=0)),
+        func.sum(case((es_empate, 1), else_=0)),
+        func.sum(case((resultado.like("%blackjack%"), 1), else_=0)),
+        func.sum(Apuesta.cantidad),
+        func.sum(Apuesta.ganancia),
+    ).filter(
+        Apuesta.juego.in_(JUEGOS_BLACKJACK),
+        Apuesta.tipo_juego == 'multiplayer'
+    )
+    if user_ids is not None:
+        consulta = consulta.filter(Apuesta.user_id.in_(list(user_ids)))
+    filas = {
+        uid: dict(zip(_CAMPOS_CONTADOR, (int(v or 0), int(d or 0), int(e or 0), int(n or 0),
+                                         float(a or 0.0), float(p or 0.0))))
+        for uid, v, d, e, n, a, p in consulta.group_by(Apuesta.user_id)
+    }
+
+    consulta = db.session.query(
+        Estadistica.user_id,
+        func.sum(Estadistica.partidas_jugadas),
+        func.sum(Estadistica.partidas_ganadas),
+        func.sum(Estadistica.apuesta_total),
+        func.sum(Estadistica.ganancia_total),
+    ).filter(
+        Estadistica.juego.in_(JUEGOS_BLACKJACK),
+        Estadistica.tipo_juego == 'multiplayer'
+    )
+    if user_ids is not None:
+        consulta = consulta.filter(Estadistica.user_id.in_(list(user_ids)))
+    for uid, jugadas, ganadas, apostado, pagado in consulta.group_by(Estadistica.user_id):
+        if uid not in filas:
+            filas[uid] = {"victorias": int(ganadas or 0), "derrotas": max(0, int(jugadas or 0) - int(ganadas or 0)),
+                          "empates": 0, "naturales": 0,
+                          "apostado": float(apostado or 0.0), "pagado": float(pagado or 0.0)}
+
+    if not filas:
+        return 0
+    db.session.execute(
+        delete(ContadorJuego)
+        .where(ContadorJuego.user_id.in_(list(filas)), ContadorJuego.juego == "blackjack",
+               ContadorJuego.tipo_juego == 'multiplayer')
+    )
+    db.session.execute(insert(ContadorJuego), [
+        {"user_id": uid, "juego": "blackjack", "tipo_juego": 'multiplayer', **campos}
+        for uid, campos in filas.items()
+    ])
+    return len(filas)
+
+# ================== Protocolo de eventos ==================
+# Al unirse, cada cliente recibe una foto completa ("estado_blackjack") con
+# el número de secuencia actual. A partir de ahí solo se envían deltas
+# ("blackjack_delta"): {"seq": n, "cambios": [...]}, con n consecutivo por
+# sala. Tipos de cambio:
+#   {"tipo": "carta", "uid": uid|None (crupier), "carta": [...], "total": int|None}
+#   {"tipo": "jugador", "uid": uid, "campos": {...}}  (o "sale": True)
+#   {"tipo": "turno", "turno_actual": uid|None, "deadline_ts": float|None}
+#   {"tipo": "mesa", "campos": {...}}  (fase, dealer, dealer_total, orden_turnos, votos_revancha)
+# Si un cliente detecta un hueco en la secuencia pide otra foto con "snapshot_blackjack".
+
+def _proyeccion(st):
+    """Parte pública del estado, con copias para poder compararla con la siguiente."""
     stats_por_jugador = st.get("estadisticas_jugadores", {})
-    stats_payload = {str(uid): stats for uid, stats in stats_por_jugador.items()}
-    emit("estado_blackjack", {
+    return {
         "jugadores": {
-            str(uid): {
+            uid: {
                 "username": j["username"],
                 "balance": j["balance"],
                 "apuesta": j["apuesta"],
-                "mano": j["mano"],
+                "mano": list(j["mano"]),
                 "estado": j["estado"],
-                "total": valor_mano(j["mano"]),
-                "estadisticas": stats_por_jugador.get(uid) or stats_por_jugador.get(str(uid))
+                "estadisticas": dict(stats_por_jugador[uid]) if stats_por_jugador.get(uid) else None,
             } for uid, j in st["jugadores"].items()
         },
-        "dealer": st["dealer"],
-        "dealer_total": valor_mano(st["dealer"]) if st["fase"] in ("crupier","fin") else None,
-        "orden_turnos": st["orden_turnos"],
+        "dealer": list(st["dealer"]),
+        "dealer_total": valor_mano(st["dealer"]) if st["fase"] in ("crupier", "fin") else None,
+        "orden_turnos": list(st["orden_turnos"]),
         "turno_actual": (st["orden_turnos"][st["turno_idx"]] if st["turno_idx"] is not None else None),
         "fase": st["fase"],
         "deadline_ts": st["deadline_ts"],
-        "votos_revancha": list(st["votos_revancha"]),
-        "estadisticas_jugadores": stats_payload,
-        "stats_jugadores": stats_payload,
-        "estadisticas": stats_payload,
-        "stats": stats_payload,
-        "resumen_estadisticas": stats_payload,
-        "resumen": stats_payload,
-        "resumen_stats": stats_payload,
-    }, room=room)
+        "votos_revancha": sorted(st["votos_revancha"]),
+    }
+
+def _cartas_nuevas(uid, antes, ahora):
+    """Cartas añadidas al final de una mano, o None si la mano se ha sustituido."""
+    if ahora[:len(antes)] != antes:
+        return None
+    return [
+        {"tipo": "carta", "uid": uid, "carta": carta,
+         "total": valor_mano(ahora[:i + 1]) if uid is not None else None}
+        for i, carta in enumerate(ahora[len(antes):], start=len(antes))
+    ]
+
+def _calcular_cambios(antes, ahora):
+    cambios = []
+    for uid in antes["jugadores"]:
+        if uid not in ahora["jugadores"]:
+            cambios.append({"tipo": "jugador", "uid": uid, "sale": True})
+
+    for uid, j in ahora["jugadores"].items():
+        previo = antes["jugadores"].get(uid)
+        if previo is None:
+            campos = dict(j, total=valor_mano(j["mano"]))
+            cambios.append({"tipo": "jugador", "uid": uid, "campos": campos})
+            continue
+        campos = {k: v for k, v in j.items() if k != "mano" and previo[k] != v}
+        cartas = _cartas_nuevas(uid, previo["mano"], j["mano"])
+        if cartas is None:
+            campos["mano"] = j["mano"]
+            campos["total"] = valor_mano(j["mano"])
+            cartas = []
+        if campos:
+            cambios.append({"tipo": "jugador", "uid": uid, "campos": campos})
+        cambios.extend(cartas)
+
+    mesa = {}
+    cartas_dealer = _cartas_nuevas(None, antes["dealer"], ahora["dealer"])
+    if cartas_dealer is None:
+        mesa["dealer"] = ahora["dealer"]
+    else:
+        cambios.extend(cartas_dealer)
+    for clave in ("fase", "dealer_total", "orden_turnos", "votos_revancha"):
+        if antes[clave] != ahora[clave]:
+            mesa[clave] = ahora[clave]
+    if mesa:
+        cambios.append({"tipo": "mesa", "campos": mesa})
+
+    if antes["turno_actual"] != ahora["turno_actual"] or antes["deadline_ts"] != ahora["deadline_ts"]:
+        cambios.append({"tipo": "turno", "turno_actual": ahora["turno_actual"], "deadline_ts": ahora["deadline_ts"]})
+    return cambios
+
+def serializar_estado(st):
+    """Foto completa de la sala (lo que recibe un cliente al unirse o tras un hueco)."""
+    proyeccion = st.get("_proyeccion") or _proyeccion(st)
+    jugadores = {
+        str(uid): dict(j, total=valor_mano(j["mano"]))
+        for uid, j in proyeccion["jugadores"].items()
+    }
+    return dict(
+        proyeccion,
+        jugadores=jugadores,
+        estadisticas_jugadores={uid: j["estadisticas"] for uid, j in jugadores.items() if j["estadisticas"]},
+        seq=st.get("seq", 0),
+    )
+
+def emitir_snapshot(sala_id, to):
+    st = salas_blackjack[sala_id]
+    socketio = current_app.extensions["socketio"]
+    socketio.emit("estado_blackjack", serializar_estado(st), to=to)
+
+def emitir_estado(sala_id):
+    """Publica en la sala lo que ha cambiado desde el último envío, como un delta numerado."""
+    st = salas_blackjack[sala_id]
+    ahora = _proyeccion(st)
+    antes = st.get("_proyeccion")
+    st["_proyeccion"] = ahora
+    if antes is None:
+        return
+    cambios = _calcular_cambios(antes, ahora)
+    if not cambios:
+        return
+    st["seq"] = st.get("seq", 0) + 1
+    socketio = current_app.extensions["socketio"]
+    socketio.emit("blackjack_delta", {"seq": st["seq"], "cambios": cambios}, to=f"blackjack_sala_{sala_id}")
 
 # ================== Temporizador de turnos ==================
 def start_timer_if_needed(socketio, sala_id, app):
@@ -232,6 +384,65 @@ def start_timer_if_needed(socketio, sala_id, app):
     socketio.start_background_task(_loop)
 
 # ================== Liquidación ==================
+def room_jugador(sala_id, uid):
+    """Room privada de un jugador dentro de la sala (eventos solo para él)."""
+    return f"blackjack_sala_{sala_id}_jugador_{uid}"
+
+def resolver_mano(mano, apuesta_monto, dealer_val, dealer_bj):
+    """
+    Pago total de una mano frente al crupier, con la apuesta ya descontada al principio:
+    - perdida: 0
+    - empate: 1× apuesta (se devuelve)
+    - ganada: 2× apuesta (apuesta + beneficio)
+    - blackjack natural: 2.5× apuesta (3:2)
+    """
+    pj = valor_mano(mano)
+    if pj > 21:
+        return 0.0
+    if es_blackjack(mano):
+        return apuesta_monto if dealer_bj else apuesta_monto * 2.5  # push si ambos blackjack
+    if dealer_val > 21 or pj > dealer_val:
+        return apuesta_monto * 2.0
+    if pj == dealer_val:
+        return apuesta_monto
+    return 0.0
+
+def aplicar_liquidacion(pagos):
+    """
+    Aplica en bloque la liquidación ``{uid: {"apuesta", "pago", "resultado", "natural"}}``
+    con un número fijo de sentencias sea cual sea el número de jugadores: saldos
+    y Estadistica con ``abonar_y_sumar``, inserción en lote de Apuesta y suma en
+    lote de ContadorJuego. Devuelve el balance final de cada usuario existente.
+    """
+    if not pagos:
+        return {}
+    balances = abonar_y_sumar("blackjack", "multiplayer", {
+        uid: {"pago": p["pago"], "ganadas": 1 if p["resultado"] == "ganada" else 0,
+              "apostado": p["apuesta"], "ganancia": p["pago"]}
+        for uid, p in pagos.items()
+    })
+    pagos = {uid: p for uid, p in pagos.items() if uid in balances}
+    if not pagos:
+        return balances
+
+    db.session.execute(insert(Apuesta), [
+        {"user_id": uid, "juego": "blackjack", "tipo_juego": 'multiplayer',
+         "cantidad": p["apuesta"], "resultado": p["resultado"], "ganancia": p["pago"]}
+        for uid, p in pagos.items()
+    ])
+
+    sumar_contadores({
+        uid: {
+            "victorias": 1 if p["resultado"] == "ganada" else 0,
+            "derrotas": 1 if p["resultado"] == "perdida" else 0,
+            "empates": 1 if p["resultado"] == "empate" else 0,
+            "naturales": 1 if p["natural"] else 0,
+            "apostado": p["apuesta"],
+            "pagado": p["pago"],
+        } for uid, p in pagos.items()
+    })
+    return balances
+
 def ejecutar_crupier_y_resolver(sala_id):
     st = salas_blackjack[sala_id]
     st["fase"] = "crupier"
@@ -242,94 +453,50 @@ def ejecutar_crupier_y_resolver(sala_id):
     dealer_val = valor_mano(st["dealer"])
     dealer_bj = es_blackjack(st["dealer"])
 
-    # Payouts con apuesta ya descontada al principio:
-    # - perdida: 0
-    # - empate: 1× apuesta (se devuelve)
-    # - ganada: 2× apuesta (apuesta + beneficio)
-    # - blackjack natural: 2.5× apuesta (3:2)
+    # Primero se calcula todo en memoria...
+    pagos = {}
     for uid, j in st["jugadores"].items():
         apuesta_monto = j["apuesta"]
         if apuesta_monto <= 0:
             continue
-        pj = valor_mano(j["mano"])
-        pago_total = 0.0
-
-        if pj > 21:
-            pago_total = 0.0
-        elif es_blackjack(j["mano"]):
-            if dealer_bj:
-                pago_total = apuesta_monto  # push si ambos blackjack
-            else:
-                pago_total = apuesta_monto * 2.5  # 3:2
-        elif dealer_val > 21 or pj > dealer_val:
-            pago_total = apuesta_monto * 2.0
-        elif pj == dealer_val:
-            pago_total = apuesta_monto
-        else:
-            pago_total = 0.0
-
-        # Actualizar saldo real en DB y en memoria
-        user = User.query.get(uid)
-        if user:
-            user.balance = (user.balance or 0) + pago_total
-            db.session.add(user)
-            # Mantener memoria alineada con DB para el header
-            j["balance"] = float(user.balance)
-            
-            # Registrar apuesta y estadisticas consolidando en blackjack
-            resultado = "perdida"
-            if pago_total > apuesta_monto:
-                resultado = "ganada"
-            elif pago_total == apuesta_monto:
-                resultado = "empate"
-
-            apuesta_db = Apuesta(
-                user_id=uid,
-                juego="blackjack",
-                tipo_juego='multiplayer',
-                cantidad=apuesta_monto,
-                resultado=resultado,
-                ganancia=pago_total
-            )
-            db.session.add(apuesta_db)
-
-            stats = Estadistica.query.filter_by(user_id=uid, juego="blackjack", tipo_juego='multiplayer').first()
-            if not stats:
-                stats = Estadistica(
-                    user_id=uid,
-                    juego="blackjack",
-                    tipo_juego='multiplayer',
-                    partidas_jugadas=0,
-                    partidas_ganadas=0,
-                    ganancia_total=0.0,
-                    apuesta_total=0.0
-                )
-                db.session.add(stats)
-
-            stats.partidas_jugadas += 1
-            stats.apuesta_total += apuesta_monto
-            stats.ganancia_total += pago_total
-            if pago_total > apuesta_monto:
-                stats.partidas_ganadas += 1
-
-            # Estadisticas en memoria POR SALA (reiniciadas cuando la sala es nueva)
-            stats_mem = st.setdefault("estadisticas_jugadores", {}).setdefault(uid, _stats_base())
-            stats_mem["partidas_jugadas"] += 1
-            stats_mem["apuesta_total"] += apuesta_monto
-            stats_mem["ganancia_total"] += pago_total
-            if pago_total > apuesta_monto:
-                stats_mem["partidas_ganadas"] += 1
-            elif pago_total == apuesta_monto:
-                stats_mem["empates"] = stats_mem.get("empates", 0) + 1
-            _refrescar_aliases(stats_mem)
-            st["jugadores"][uid]["estadisticas"] = stats_mem
-
-            emit("balance_update", {"balance": float(user.balance)}, room=f"blackjack_sala_{sala_id}")
-
-
+        pago_total = resolver_mano(j["mano"], apuesta_monto, dealer_val, dealer_bj)
+        resultado = "perdida"
+        if pago_total > apuesta_monto:
+            resultado = "ganada"
+        elif pago_total == apuesta_monto:
+            resultado = "empate"
+        pagos[uid] = {"apuesta": apuesta_monto, "pago": pago_total,
+                      "resultado": resultado, "natural": es_blackjack(j["mano"])}
         j["apuesta"] = 0.0
 
+    # ...y después se aplica en bloque
+    balances = aplicar_liquidacion(pagos)
+    if st.get("ronda_id"):
+        liquidar_ronda(st.pop("ronda_id"), {uid: {"pago": p["pago"]} for uid, p in pagos.items()}, dealer_val)
     db.session.commit()
+
+    socketio = current_app.extensions["socketio"]
+    for uid, p in pagos.items():
+        if uid not in balances:
+            continue
+        j = st["jugadores"][uid]
+        # Mantener memoria alineada con DB para el header
+        j["balance"] = balances[uid]
+
+        # Estadisticas en memoria POR SALA (reiniciadas cuando la sala es nueva)
+        stats_mem = st.setdefault("estadisticas_jugadores", {}).setdefault(uid, _stats_base())
+        stats_mem["partidas_jugadas"] += 1
+        stats_mem["apuesta_total"] += p["apuesta"]
+        stats_mem["ganancia_total"] += p["pago"]
+        if p["resultado"] == "ganada":
+            stats_mem["partidas_ganadas"] += 1
+        elif p["resultado"] == "empate":
+            stats_mem["empates"] = stats_mem.get("empates", 0) + 1
+        _refrescar_aliases(stats_mem)
+        j["estadisticas"] = stats_mem
+
+        socketio.emit("balance_update", {"balance": balances[uid]}, to=room_jugador(sala_id, uid))
+
     st["fase"] = "fin"
 
 # ================== Registro de handlers ==================
@@ -352,6 +519,7 @@ def register_blackjack_handlers(socketio, app):
             "deadline_ts": None,
             "votos_revancha": set(),
             "estadisticas_jugadores": {},
+            "seq": 0,
             "_timer_activo": False
         })
 
@@ -361,6 +529,7 @@ def register_blackjack_handlers(socketio, app):
             return
 
         join_room(room)
+        join_room(room_jugador(sala_id, current_user.id))
 
         if current_user.id not in st["jugadores"]:
             st["jugadores"][current_user.id] = {
@@ -376,13 +545,24 @@ def register_blackjack_handlers(socketio, app):
         st["estadisticas_jugadores"].setdefault(current_user.id, _stats_base())
         st["jugadores"][current_user.id]["estadisticas"] = st["estadisticas_jugadores"][current_user.id]
 
+        # Primero el delta para los que ya estaban; luego la foto para quien entra
         emitir_estado(sala_id)
+        emitir_snapshot(sala_id, request.sid)
+
+    @socketio.on("snapshot_blackjack")
+    def snapshot(data):
+        sala_id = int(data["sala_id"])
+        st = salas_blackjack.get(sala_id)
+        if not st or current_user.id not in st["jugadores"]:
+            return
+        emitir_snapshot(sala_id, request.sid)
 
     @socketio.on("leave_sala_blackjack")
     def leave_sala(data):
         sala_id = int(data["sala_id"])
         room = f"blackjack_sala_{sala_id}"
         leave_room(room)
+        leave_room(room_jugador(sala_id, current_user.id))
 
         st = salas_blackjack.get(sala_id)
         if not st:
@@ -417,12 +597,16 @@ def register_blackjack_handlers(socketio, app):
             emit("error_blackjack", {"msg": "Saldo insuficiente."}, to=f"blackjack_sala_{sala_id}")
             return
 
-        # Descontar apuesta del saldo REAL y sincronizar memoria
+        # Descontar apuesta del saldo REAL, retenerla en la ronda y sincronizar memoria
         user.balance = float(user.balance) - cantidad
         db.session.add(user)
+        if not st.get("ronda_id"):
+            st["ronda_id"] = abrir_ronda("blackjack", "multiplayer", sala_id).id
+        retener(st["ronda_id"], user.id, cantidad)
         db.session.commit()
 
-        j["apuesta"] = cantidad
+        # Cada apuesta ya se ha cobrado y retenido: una segunda se suma a la primera
+        j["apuesta"] += cantidad
         j["balance"] = float(user.balance)
         j["estado"] = "jugando"
 
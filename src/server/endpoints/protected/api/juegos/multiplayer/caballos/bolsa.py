@@ -0,0 +1,71 @@
+# server/endpoints/protected/api/juegos/multiplayer/caballos/bolsa.py
+"""
+Bolsa común (apuestas mutuas) de una carrera multijugador.
+
+Todo lo apostado va a una bolsa; al acabar, la bolsa menos el margen de la
+casa se reparte entre quienes acertaron en proporción a lo que apostaron. La
+cuota de cada caballo es por tanto ``bolsa * (1 - margen) / total_del_caballo``
+y cambia con cada apuesta: la bolsa lleva el total acumulado de cada caballo y
+cada apuesta lo actualiza en O(1), sin recorrer las apuestas de la sala.
+
+Los totales se llevan en céntimos enteros: con coma flotante, mover apuestas de
+un caballo a otro deja restos (``0.1 + 0.2 - 0.3``) y un caballo sin apuestas
+parecería tenerlas. Si nadie acertó, se devuelve a cada uno lo apostado.
+"""
+
+import math
+
+
+def _centimos(cantidad: float) -> int:
+    return int(round(cantidad * 100))
+
+
+class BolsaApuestas:
+    def __init__(self, caballos, margen: float):
+        self.margen = margen
+        self._totales = {c: 0 for c in caballos}   # céntimos por caballo
+        self._total = 0                            # céntimos en la bolsa
+
+    @property
+    def totales(self) -> dict:
+        return {c: t / 100 for c, t in self._totales.items()}
+
+    @property
+    def total(self) -> float:
+        return self._total / 100
+
+    def apostar(self, caballo: int, cantidad: float, previa: float = 0.0, caballo_previo=None):
+        """
+        Suma ``cantidad`` al ``caballo``. Lo que el usuario ya tenía en la bolsa
+        (``previa`` por ``caballo_previo``) pasa a correr por el nuevo caballo.
+        """
+        if caballo_previo is not None and previa:
+            self._totales[caballo_previo] -= _centimos(previa)
+            self._totales[caballo] += _centimos(previa)
+        self._totales[caballo] += _centimos(cantidad)
+        self._total += _centimos(cantidad)
+
+    def cuota(self, caballo: int):
+        """Multiplicador actual del caballo (apuesta incluida); ``None`` si nadie le ha apostado."""
+        if self._totales[caballo] <= 0:
+            return None
+        return self._total * (1 - self.margen) / self._totales[caballo]
+
+    def cuotas(self) -> dict:
+        return {c: self.cuota(c) for c in self._totales}
+
+    def pago(self, caballo: int, cantidad: float, ganador: int) -> float:
+        """Lo que cobra una apuesta de ``cantidad`` por ``caballo``, redondeado a la baja al céntimo."""
+        if self._totales[ganador] <= 0:
+            return cantidad
+        if caballo != ganador:
+            return 0.0
+        return math.floor(cantidad * self.cuota(ganador) * 100) / 100
+
+    def resumen(self) -> dict:
+        """Lo que se difunde a la sala: bolsa, totales y cuotas por caballo."""
+        return {
+            'bolsa': self.total,
+            'totales': self.totales,
+            'cuotas': self.cuotas(),
+        }
@@ -2,6 +2,7 @@ from flask import Blueprint, render_template, abort
 from flask_login import login_required, current_user
 from models import SalaMultijugador, UsuarioSala
 from .socket_handlers import register_caballos_handlers
+from ...carrera import CABALLOS
 
 bp = Blueprint('api_multijugador_caballos', __name__)
 
@@ -27,4 +28,4 @@ def sala_caballos(sala_id):
         abort(404)
     
     return render_template("pages/casino/juegos/multiplayer/caballos.html",
-                           sala=sala, user=current_user, multijugador=True, realtime_required=True)
\ No newline at end of file
+                           sala=sala, user=current_user, caballos=CABALLOS, multijugador=True, realtime_required=True)
\ No newline at end of file
@@ -1,31 +1,65 @@
-from flask import request
+from flask import request, current_app
 from flask_login import current_user
 from flask_socketio import join_room, emit, rooms
 from models import db, User, Apuesta, SalaMultijugador, Estadistica
-import random
+from ...rondas import abrir_ronda, retener, liquidar_ronda
+from ...carrera import CABALLOS, DURACION_MS, MARGEN_CABALLOS, MULTIPLICADORES_CABALLOS, elegir_ganador, preparar_carrera
+from .bolsa import BolsaApuestas
 import threading
 import time
 
 salas_caballos = {}
 
+# 'fija': cada caballo paga su multiplicador; 'mutua': se reparte la bolsa común
+MODOS_CABALLOS = ('fija', 'mutua')
+
+
+def estado_sala(sala_id: int) -> dict:
+    return salas_caballos.setdefault(sala_id, {
+        'jugadores': [], 'apuestas': {}, 'estado': 'esperando',
+        'modo': 'fija', 'bolsa': BolsaApuestas(CABALLOS, MARGEN_CABALLOS),
+    })
+
+
+def estado_publico(st: dict) -> dict:
+    """Lo que se difunde a la sala; en modo mutua incluye bolsa y cuotas en vivo."""
+    datos = {'jugadores': st['jugadores'], 'apuestas': st['apuestas'], 'estado': st['estado'], 'modo': st['modo']}
+    if st['modo'] == 'mutua':
+        datos.update(st['bolsa'].resumen())
+    return datos
+
+
+def _intervalo_estado() -> float:
+    if current_app.testing:
+        return 0.0
+    return float(current_app.config.get('CABALLOS_CUOTAS_SEGUNDOS', 0.5) or 0.0)
+
+
+def programar_estado(socketio, sala_id: int):
+    """
+    Difunde el estado de la sala tras una apuesta. Las apuestas que llegan
+    dentro de la misma ventana de ``CABALLOS_CUOTAS_SEGUNDOS`` se agrupan en
+    un único envío a la sala con los totales y cuotas del final de la ventana.
+    """
+    room_name = f'caballos_sala_{sala_id}'
+    st = estado_sala(sala_id)
+    intervalo = _intervalo_estado()
+    if intervalo <= 0:
+        socketio.emit('estado_sala_actualizado', estado_publico(st), room=room_name)
+        return
+    if st.get('difusion_programada'):
+        return
+    st['difusion_programada'] = True
+
+    def _difundir():
+        socketio.sleep(intervalo)
+        actual = salas_caballos.get(sala_id)
+        if actual is None:
+            return
+        actual['difusion_programada'] = False
+        socketio.emit('estado_sala_actualizado', estado_publico(actual), room=room_name)
 
-def elegir_ganador():
-    """Elegir ganador con probabilidades basadas en singleplayer."""
-    puntuaciones = {
-        1: 0.85 * 0.7 + 0.70 * 0.3,
-        2: 0.75 * 0.7 + 0.80 * 0.3,
-        3: 0.65 * 0.7 + 0.85 * 0.3,
-        4: 0.45 * 0.7 + 0.95 * 0.3,
-    }
-    total = sum(puntuaciones.values())
-    probs = [puntuaciones[i] / total for i in range(1, 5)]
-    r = random.random()
-    acum = 0
-    for i, p in enumerate(probs, start=1):
-        acum += p
-        if r <= acum:
-            return i
-    return 4
+    socketio.start_background_task(_difundir)
 
 
 def register_caballos_handlers(socketio, app):
@@ -36,10 +70,28 @@ def register_caballos_handlers(socketio, app):
         sala_id = int(data.get('sala_id'))
         room_name = f'caballos_sala_{sala_id}'
         join_room(room_name)
-        st = salas_caballos.setdefault(sala_id, {'jugadores': [], 'apuestas': {}, 'estado': 'esperando'})
+        st = estado_sala(sala_id)
         if current_user.id not in [j['id'] for j in st['jugadores']]:
             st['jugadores'].append({'id': current_user.id, 'username': current_user.username, 'balance': current_user.balance})
-        emit('estado_sala_actualizado', {'jugadores': st['jugadores'], 'apuestas': st['apuestas'], 'estado': st['estado']}, room=room_name)
+        emit('estado_sala_actualizado', estado_publico(st), room=room_name)
+
+    @socketio.on('caballos_cambiar_modo')
+    def handle_cambiar_modo(data):
+        sala_id = int(data.get('sala_id'))
+        modo = data.get('modo')
+        sala = SalaMultijugador.query.get(sala_id)
+        if sala and sala.creador_id and sala.creador_id != current_user.id:
+            emit('error_general', {'message': 'Solo el creador puede cambiar el modo'}, room=request.sid)
+            return
+        if modo not in MODOS_CABALLOS:
+            emit('error_general', {'message': 'Modo no válido'}, room=request.sid)
+            return
+        st = estado_sala(sala_id)
+        if st['apuestas']:
+            emit('error_general', {'message': 'No se puede cambiar el modo con apuestas en curso'}, room=request.sid)
+            return
+        st['modo'] = modo
+        emit('estado_sala_actualizado', estado_publico(st), room=f'caballos_sala_{sala_id}')
 
     @socketio.on('caballos_place_bet')
     def handle_place_bet(data):
@@ -47,19 +99,33 @@ def register_caballos_handlers(socketio, app):
         caballo = int(data.get('caballo'))
         cantidad = float(data.get('cantidad', 0))
         room_name = f'caballos_sala_{sala_id}'
-        st = salas_caballos.setdefault(sala_id, {'jugadores': [], 'apuestas': {}, 'estado': 'esperando'})
+        st = estado_sala(sala_id)
+        if caballo not in CABALLOS:
+            emit('error_apuesta', {'message': 'Caballo no válido'}, room=request.sid)
+            return
+        if cantidad <= 0:
+            emit('error_apuesta', {'message': 'Cantidad inválida'}, room=request.sid)
+            return
         if cantidad > current_user.balance:
             emit('error_apuesta', {'message': 'Fondos insuficientes'}, room=request.sid)
             return
-        # Deduce la apuesta inmediatamente
+        # Deduce la apuesta inmediatamente y la retiene en la ronda de la sala
         current_user.balance -= cantidad
+        if not st.get('ronda_id'):
+            st['ronda_id'] = abrir_ronda('caballos', 'multiplayer', sala_id).id
+        retener(st['ronda_id'], current_user.id, cantidad, detalle={'caballo': caballo})
         db.session.commit()
-        st['apuestas'][current_user.id] = {'caballo': caballo, 'cantidad': cantidad, 'username': current_user.username}
-        # Notificar nuevo estado a la sala
-        emit('estado_sala_actualizado', {'jugadores': st['jugadores'], 'apuestas': st['apuestas'], 'estado': st['estado']}, room=room_name)
+        # Lo ya retenido sigue en juego: se suma y corre por el último caballo elegido
+        anterior = st['apuestas'].get(current_user.id, {})
+        previa = anterior.get('cantidad', 0)
+        st['bolsa'].apostar(caballo, cantidad, previa, anterior.get('caballo'))
+        st['apuestas'][current_user.id] = {'caballo': caballo, 'cantidad': previa + cantidad, 'username': current_user.username}
+        emit('apuesta_registrada', {'caballo': caballo, 'cantidad': previa + cantidad, 'balance': current_user.balance}, room=request.sid)
+        # Notificar nuevo estado a la sala (agrupado con las apuestas que lleguen a la vez)
+        programar_estado(socketio, sala_id)
 
         # Si todos han apostado, notificar a la sala
-        if len(st['apuestas']) == len(st['jugadores']):
+        if len(st['apuestas']) == len(st['jugadores']) and st['estado'] != 'listo_para_iniciar':
             st['estado'] = 'listo_para_iniciar'
             emit('todos_apostaron', {}, room=room_name)
 
@@ -91,23 +157,33 @@ def register_caballos_handlers(socketio, app):
 
         # Procesar resultados y actualizar DB
         resultados = {}
+        pagos = {}
         for uid, apuesta in st['apuestas'].items():
             user = User.query.get(uid)
             if not user:
                 print(f"⚠️  Usuario {uid} no encontrado")
                 continue
                 
+            if st['modo'] == 'mutua':
+                # Parte de la bolsa proporcional a lo apostado (o la devolución si nadie acertó)
+                ganancia = st['bolsa'].pago(apuesta['caballo'], apuesta['cantidad'], ganador)
+            elif apuesta['caballo'] == ganador:
+                ganancia = apuesta['cantidad'] * MULTIPLICADORES_CABALLOS.get(apuesta['caballo'], 1)
+            else:
+                ganancia = 0
+            user.balance += ganancia
             if apuesta['caballo'] == ganador:
-                mult = {1: 1.5, 2: 2.0, 3: 3.0, 4: 6.0}.get(apuesta['caballo'], 1)
-                ganancia = apuesta['cantidad'] * mult
-                user.balance += ganancia
                 resultado = 'ganada'
                 print(f"✅ Usuario {uid} ({user.username}) ganó {ganancia} (caballo {apuesta['caballo']})")
+            elif ganancia:
+                resultado = 'devuelta'
+                print(f"↩️ Usuario {uid} ({user.username}) recupera {ganancia}: nadie acertó (caballo {apuesta['caballo']})")
             else:
-                ganancia = 0
                 resultado = 'perdida'
                 print(f"❌ Usuario {uid} ({user.username}) perdió (caballo {apuesta['caballo']})")
             
+            pagos[uid] = {'pago': ganancia}
+
             # Registrar apuesta
             apuesta_db = Apuesta(
                 user_id=uid, 
@@ -152,37 +228,26 @@ def register_caballos_handlers(socketio, app):
                 'ganancia': ganancia
             }
 
+        # Cerrar la ronda: retenciones liquidadas en bloque
+        if st.get('ronda_id'):
+            liquidar_ronda(st.pop('ronda_id'), pagos, ganador)
+
         db.session.commit()  # Guardar todos los cambios de una vez
         st['estado'] = 'finalizada'
-
-        # Emitir inicio de carrera con duración (ms) para sincronizar animación en clientes
-        duracion_ms = 4000
-        emit('start_race', {'ganador': ganador, 'duracion': duracion_ms}, room=room_name)
-        print(f"✅ Emitido start_race: ganador={ganador}, duracion={duracion_ms}ms, room={room_name}")
-
-        # Capturar socketio en variable local para el thread
-        _socketio = socketio
-        _room_name = room_name
-        _ganador = ganador
-        _resultados = resultados
-        _duracion_ms = duracion_ms
-        
-        # Enviar resultados después de la duración usando start_background_task
-        def delayed_emit():
-            print(f"⏳ Esperando {_duracion_ms}ms antes de emitir race_result...")
-            _socketio.sleep(_duracion_ms / 1000.0)
-            print(f"✅ A punto de emitir race_result a room {_room_name}")
-            
-            try:
-                _socketio.emit('race_result', {
-                    'ganador': _ganador, 
-                    'resultados': _resultados,
-                    'sala_id': sala_id
-                }, room=_room_name)
-                print(f"✅ race_result emitido exitosamente al room {_room_name}")
-            except Exception as e:
-                print(f"❌ Error al emitir race_result: {e}")
-                import traceback
-                traceback.print_exc()
-
-        _socketio.start_background_task(delayed_emit)
+        # La carrera siguiente empieza con apuestas y bolsa vacías
+        bolsa = st['bolsa'].resumen() if st['modo'] == 'mutua' else None
+        st['apuestas'] = {}
+        st['bolsa'] = BolsaApuestas(CABALLOS, MARGEN_CABALLOS)
+
+        # Los clientes reproducen la carrera a partir de la semilla; el resultado ya
+        # está liquidado y cada cliente lo muestra cuando su animación llega a meta
+        semilla = preparar_carrera(ganador, DURACION_MS)
+        emit('start_race', {'semilla': semilla, 'duracion': DURACION_MS}, room=room_name)
+        emit('race_result', {
+            'ganador': ganador,
+            'resultados': resultados,
+            'sala_id': sala_id,
+            'bolsa': bolsa
+        }, room=room_name)
+        emit('estado_sala_actualizado', estado_publico(st), room=room_name)
+        print(f"✅ Emitidos start_race y race_result: ganador={ganador}, semilla={semilla}, room={room_name}")
@@ -1,10 +1,12 @@
 from flask import Blueprint, render_template, request, jsonify, redirect, url_for
 from flask_login import login_required, current_user
-from models import db, SalaMultijugador, UsuarioSala, Apuesta, Estadistica
+from models import db, SalaMultijugador, UsuarioSala, User
 from flask_socketio import emit
 # Importar y registrar los socket handlers cuando se carga este blueprint
-from .socket_handlers import register_coinflip_handlers
+from .socket_handlers import register_coinflip_handlers, salas_coinflip, MULTIPLICADOR_COINFLIP
+from ...rondas import abrir_ronda, retener, retenciones, liquidar_ronda
 from flask import current_app
+import json
 import random
 from datetime import datetime
 
@@ -77,20 +79,15 @@ def apostar(sala_id):
     if current_user.balance < cantidad:
         return jsonify({"error": "Fondos insuficientes"}), 400
 
-    # Restar la apuesta
+    # Restar la apuesta y retenerla en la ronda de la sala, con la elección
+    # y una Apuesta pendiente asociada
     current_user.balance -= cantidad
 
-    # Crear registro de la apuesta (resultado pendiente)
-    apuesta = Apuesta(
-        user_id=current_user.id,
-        juego='coinflip',
-        tipo_juego='multiplayer',
-        cantidad=cantidad,
-        resultado='pendiente',
-        ganancia=0.0
-    )
-    
-    db.session.add(apuesta)
+    st = salas_coinflip.setdefault(sala_id, {'jugadores': [], 'apuestas': [], 'estado': 'esperando'})
+    if not st.get('ronda_id'):
+        st['ronda_id'] = abrir_ronda('coinflip', 'multiplayer', sala_id).id
+    retencion = retener(st['ronda_id'], current_user.id, cantidad, detalle={'eleccion': eleccion}, pendiente=True)
+    apuesta_id = retencion.apuesta_id
     db.session.commit()
 
     # Emitir evento a la sala
@@ -99,12 +96,12 @@ def apostar(sala_id):
         'username': current_user.username,
         'eleccion': eleccion,
         'cantidad': cantidad,
-        'apuesta_id': apuesta.id
+        'apuesta_id': apuesta_id
     }, room=f'coinflip_sala_{sala_id}')
 
     return jsonify({
         'success': True,
-        'apuesta_id': apuesta.id,
+        'apuesta_id': apuesta_id,
         'nuevo_balance': current_user.balance
     })
 
@@ -142,34 +139,37 @@ def procesar_resultados(sala_id):
     
     sala = SalaMultijugador.query.get_or_404(sala_id)
     
-    # Obtener todas las apuestas pendientes de esta sala
-    # (En una implementación real, necesitarías relacionar apuestas con sala)
-    apuestas_pendientes = Apuesta.query.filter_by(
-        juego='coinflip', 
-        tipo_juego='multiplayer',
-        resultado='pendiente'
-    ).all()
-    
+    # Las retenciones de la ronda de esta sala dicen quién apostó y a qué
+    st = salas_coinflip.setdefault(sala_id, {'jugadores': [], 'apuestas': [], 'estado': 'esperando'})
+    ronda_id = st.get('ronda_id')
+    abiertas = retenciones(ronda_id) if ronda_id else {}
+    usuarios = {u.id: u for u in User.query.filter(User.id.in_(list(abiertas)))} if abiertas else {}
+
     resultados = []
-    
-    for apuesta in apuestas_pendientes:
-        gano = (apuesta.user.eleccion == resultado)  # Necesitarías almacenar la elección
-        ganancia = apuesta.cantidad * 2 if gano else 0
-        
+    pagos = {}
+
+    for uid, retencion in abiertas.items():
+        eleccion = json.loads(retencion.detalle).get('eleccion') if retencion.detalle else None
+        gano = (eleccion == resultado)
+        ganancia = retencion.cantidad * MULTIPLICADOR_COINFLIP if gano else 0
+        pagos[uid] = {'pago': ganancia, 'ganancia': ganancia, 'resultado': 'ganada' if gano else 'perdida'}
+
+        usuario = usuarios.get(uid)
+        if not usuario:
+            continue
         if gano:
-            apuesta.user.balance += ganancia
-        
-        apuesta.ganancia = ganancia
-        apuesta.resultado = 'ganada' if gano else 'perdida'
-        
+            usuario.balance += ganancia
+
         resultados.append({
-            'usuario_id': apuesta.user.id,
-            'username': apuesta.user.username,
+            'usuario_id': usuario.id,
+            'username': usuario.username,
             'gano': gano,
             'ganancia': ganancia,
-            'nuevo_balance': apuesta.user.balance
+            'nuevo_balance': usuario.balance
         })
-    
+
+    if ronda_id:
+        liquidar_ronda(st.pop('ronda_id'), pagos, resultado)
     db.session.commit()
     
     # Emitir resultados
@@ -179,15 +179,15 @@ def procesar_resultados(sala_id):
     }, room=f'coinflip_sala_{sala_id}')
     
     # ⚠️ IMPORTANTE: Resetear para nueva ronda
-    salas_coinflip[sala_id]['apuestas'] = []
-    salas_coinflip[sala_id]['estado'] = 'esperando'
+    st['apuestas'] = []
+    st['estado'] = 'esperando'
     
     # Emitir estado actualizado
     emit('estado_sala_actualizado', {
         'sala_id': sala_id,
-        'jugadores': salas_coinflip[sala_id]['jugadores'],
-        'apuestas': salas_coinflip[sala_id]['apuestas'],  # ← Vacías
-        'estado': salas_coinflip[sala_id]['estado']       # ← 'esperando'
+        'jugadores': st['jugadores'],
+        'apuestas': st['apuestas'],  # ← Vacías
+        'estado': st['estado']       # ← 'esperando'
     }, room=f'coinflip_sala_{sala_id}')
     
     return jsonify({
@@ -2,12 +2,15 @@ from flask import request
 from flask_login import current_user
 from flask_socketio import join_room, leave_room, emit
 from models import db, SalaMultijugador, UsuarioSala, User, Apuesta, Estadistica
+from ...rondas import abrir_ronda, retener, liquidar_ronda
 from datetime import datetime
 import random
 import time
 
 # Diccionario para rastrear jugadores por sala
 salas_coinflip = {}
+# Quien acierta cobra el doble de lo apostado (apuesta incluida)
+MULTIPLICADOR_COINFLIP = 2
 
 def register_coinflip_handlers(socketio, app):
     @socketio.on('connect')
@@ -105,24 +108,29 @@ def register_coinflip_handlers(socketio, app):
             print(f"❌ Sala {sala_id} no encontrada para apuesta")
             return
         
+        # Verificar si el usuario ya apostó: la nueva apuesta sustituye a la
+        # anterior, así que solo se retiene (o devuelve) la diferencia
+        apuesta_existente = next(
+            (a for a in salas_coinflip[sala_id]['apuestas'] 
+             if a['usuario_id'] == current_user.id), 
+            None
+        )
+        diferencia = cantidad - (apuesta_existente['cantidad'] if apuesta_existente else 0)
+
         # Verificar fondos del usuario
-        if current_user.balance < cantidad:
+        if cantidad <= 0 or current_user.balance < diferencia:
             emit('error_apuesta', {
-                'message': 'Fondos insuficientes'
+                'message': 'Fondos insuficientes' if cantidad > 0 else 'Cantidad inválida'
             }, room=request.sid)
             return
         
-        # Restar apuesta del balance
-        current_user.balance -= cantidad
+        # Restar apuesta del balance y retenerla en la ronda de la sala
+        current_user.balance -= diferencia
+        if not salas_coinflip[sala_id].get('ronda_id'):
+            salas_coinflip[sala_id]['ronda_id'] = abrir_ronda('coinflip', 'multiplayer', sala_id).id
+        retener(salas_coinflip[sala_id]['ronda_id'], current_user.id, diferencia, detalle={'eleccion': eleccion})
         db.session.commit()
         
-        # Verificar si el usuario ya apostó
-        apuesta_existente = next(
-            (a for a in salas_coinflip[sala_id]['apuestas'] 
-             if a['usuario_id'] == current_user.id), 
-            None
-        )
-        
         if apuesta_existente:
             # Actualizar apuesta existente
             apuesta_existente['cantidad'] = cantidad
@@ -206,10 +214,11 @@ def register_coinflip_handlers(socketio, app):
             # Usar el contexto de la aplicación
             with app.app_context():
                 resultados = []
+                pagos = {}
                 
                 for apuesta in salas_coinflip[sala_id]['apuestas']:
                     gano = apuesta['eleccion'] == resultado
-                    ganancia = apuesta['cantidad'] * 2 if gano else 0
+                    ganancia = apuesta['cantidad'] * MULTIPLICADOR_COINFLIP if gano else 0
                     
                     # Actualizar balance del usuario en la base de datos
                     usuario = User.query.get(apuesta['usuario_id'])
@@ -220,6 +229,8 @@ def register_coinflip_handlers(socketio, app):
                         else:
                             print(f"😢 {usuario.username} perdió ${apuesta['cantidad']}")
                         
+                        pagos[usuario.id] = {'pago': ganancia}
+
                         # Registrar apuesta en base de datos
                         apuesta_db = Apuesta(
                             user_id=usuario.id,
@@ -261,6 +272,10 @@ def register_coinflip_handlers(socketio, app):
                             'nuevo_balance': usuario.balance
                         })
                 
+                # Cerrar la ronda: retenciones liquidadas en bloque
+                if salas_coinflip[sala_id].get('ronda_id'):
+                    liquidar_ronda(salas_coinflip[sala_id].pop('ronda_id'), pagos, resultado)
+
                 # Guardar cambios en la base de datos
                 db.session.commit()
                 
@@ -0,0 +1,120 @@
+# server/endpoints/protected/api/juegos/multiplayer/poker/equity.py
+"""
+Cálculo de equity (probabilidad de ganar / empatar) con NumPy.
+
+Reutiliza las tablas de ``evaluador`` convertidas a arrays para evaluar miles de
+manos de 7 cartas de una sola vez:
+
+- la parte sin color se resuelve con ``searchsorted`` sobre los productos de
+  primos ordenados;
+- el color se resuelve indexando un array de 2**15 posiciones con la máscara de
+  valores de cada palo (0 si ese palo no tiene 5 cartas).
+
+Cuando quedan pocas cartas por salir se enumeran todas las combinaciones del
+board; si no, se hace Monte Carlo por lotes. Los resultados se cachean por
+(manos, board, rivales ocultos), de modo que los sondeos repetidos durante una
+misma ronda de apuestas no recalculan nada.
+"""
+
+from functools import lru_cache
+from itertools import combinations
+from math import comb
+
+import numpy as np
+
+from .evaluador import _BIT_CARTA, _PRIMO_CARTA, _TABLA_COLOR, _TABLA_PRIMOS
+
+LIMITE_ENUMERACION = 20000  # máximo de boards a enumerar de forma exacta
+SIMULACIONES_MONTE_CARLO = 20000
+
+_PRIMO_NP = np.array(_PRIMO_CARTA, dtype=np.int64)
+_BIT_NP = np.array(_BIT_CARTA, dtype=np.int64)
+_PALO_NP = np.arange(52, dtype=np.int64) & 3
+
+_CLAVES_PRIMOS = np.array(sorted(_TABLA_PRIMOS), dtype=np.int64)
+_RANGOS_PRIMOS = np.array([_TABLA_PRIMOS[int(k)] for k in _CLAVES_PRIMOS], dtype=np.int64)
+
+
+def _array_color() -> np.ndarray:
+    rangos = np.zeros(1 << 15, dtype=np.int64)
+    for mascara, rango in _TABLA_COLOR.items():
+        rangos[mascara] = rango
+    return rangos
+
+
+_RANGOS_COLOR = _array_color()
+
+
+def evaluar_lote(cartas: np.ndarray) -> np.ndarray:
+    """Rangos enteros (como ``evaluador.evaluar_rango``) de un array (N, 7) de cartas codificadas."""
+    cartas = np.asarray(cartas, dtype=np.int64)
+    productos = _PRIMO_NP[cartas].prod(axis=1)
+    rangos = _RANGOS_PRIMOS[np.searchsorted(_CLAVES_PRIMOS, productos)]
+    bits = _BIT_NP[cartas]
+    palos = _PALO_NP[cartas]
+    for palo in range(4):
+        mascara = np.where(palos == palo, bits, 0).sum(axis=1)
+        np.maximum(rangos, _RANGOS_COLOR[mascara], out=rangos)
+    return rangos
+
+
+def _boards_posibles(restantes: np.ndarray, faltan: int, ocultas: int, rng):
+    """
+    Devuelve (boards, huecos): las cartas que completan el board y las de los
+    rivales ocultos para cada simulación, enumeradas o muestreadas.
+    """
+    total = faltan + ocultas
+    if total == 0:
+        vacio = np.empty((1, 0), dtype=np.int64)
+        return vacio, vacio
+    if ocultas == 0 and comb(len(restantes), faltan) <= LIMITE_ENUMERACION:
+        indices = np.array(list(combinations(range(len(restantes)), faltan)), dtype=np.int64)
+        return restantes[indices], np.empty((len(indices), 0), dtype=np.int64)
+    aleatorios = rng.random((SIMULACIONES_MONTE_CARLO, len(restantes)))
+    indices = np.argpartition(aleatorios, total - 1, axis=1)[:, :total]
+    extraidas = restantes[indices]
+    return extraidas[:, :faltan], extraidas[:, faltan:]
+
+
+@lru_cache(maxsize=2048)
+def calcular_equity(manos: tuple[tuple[int, int], ...], board: tuple[int, ...],
+                    rivales_ocultos: int = 0, semilla: int | None = None) -> tuple[dict, ...]:
+    """
+    Equity de cada mano de ``manos`` frente al resto y a ``rivales_ocultos``
+    manos desconocidas, dado el ``board`` visible (0, 3, 4 o 5 cartas).
+
+    Devuelve una tupla de dicts ``{'gana', 'empata', 'equity'}`` alineada con
+    ``manos``: ``gana`` y ``empata`` son frecuencias (0..1) y ``equity`` suma
+    las victorias más la parte proporcional de los botes repartidos.
+    """
+    rng = np.random.default_rng(semilla)
+    usadas = {c for mano in manos for c in mano} | set(board)
+    restantes = np.array([c for c in range(52) if c not in usadas], dtype=np.int64)
+    faltan = 5 - len(board)
+    boards, huecos = _boards_posibles(restantes, faltan, 2 * rivales_ocultos, rng)
+    n = len(boards)
+    board_fijo = np.broadcast_to(np.array(board, dtype=np.int64), (n, len(board)))
+
+    rangos = []
+    for mano in manos:
+        privadas = np.broadcast_to(np.array(mano, dtype=np.int64), (n, 2))
+        rangos.append(evaluar_lote(np.hstack((privadas, board_fijo, boards))))
+    for r in range(rivales_ocultos):
+        rangos.append(evaluar_lote(np.hstack((huecos[:, 2 * r:2 * r + 2], board_fijo, boards))))
+    rangos = np.vstack(rangos)
+
+    mejores = rangos.max(axis=0)
+    ganadores = rangos == mejores
+    n_ganadores = ganadores.sum(axis=0)
+
+    resultado = []
+    for idx in range(len(manos)):
+        gana = ganadores[idx] & (n_ganadores == 1)
+        empata = ganadores[idx] & (n_ganadores > 1)
+        reparto = np.where(empata, 1.0 / n_ganadores, 0.0)
+        resultado.append({
+            'gana': round(float(gana.mean()), 4),
+            'empata': round(float(empata.mean()), 4),
+            'equity': round(float(gana.mean() + reparto.mean()), 4),
+        })
+    return tuple(resultado)
@@ -0,0 +1,182 @@
+# server/endpoints/protected/api/juegos/multiplayer/poker/evaluador.py
+"""
+Evaluador de manos de póker basado en tablas precalculadas.
+
+Las cartas se codifican como enteros 0..51 (``indice_valor * 4 + indice_palo``)
+y el rango de una mano es un único entero comparable:
+
+    categoria << 20 | v0 << 16 | v1 << 12 | v2 << 8 | v3 << 4 | v4
+
+donde ``categoria`` es la clave de ``HAND_NAMES`` (0 = carta alta ... 8 =
+escalera de color) y ``v0..v4`` son los valores (2..14) que desempatan dentro
+de la categoría, en el mismo orden que las tuplas de ``_puntuar_combinacion``.
+Así el orden entre enteros es exactamente el orden entre esas tuplas.
+
+Las tablas se construyen una sola vez al importar el módulo:
+
+- ``_TABLA_COLOR``: máscara de 13 bits de los valores de un mismo palo (con 5
+  o más cartas) -> rango del mejor color / escalera de color.
+- ``_TABLA_PRIMOS``: producto de primos de los valores de 5, 6 o 7 cartas ->
+  rango de la mejor mano sin color (el producto identifica el multiconjunto).
+"""
+
+from itertools import combinations, combinations_with_replacement
+
+PALOS = ['♠', '♥', '♦', '♣']
+VALORES = ['2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A']
+VALOR_MAP = {v: idx + 2 for idx, v in enumerate(VALORES)}  # 2 -> 2 ... A -> 14
+
+PRIMOS = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+
+_CODIGO_CARTA = {
+    (v, p): idx_v * 4 + idx_p
+    for idx_v, v in enumerate(VALORES)
+    for idx_p, p in enumerate(PALOS)
+}
+_PRIMO_CARTA = tuple(PRIMOS[c >> 2] for c in range(52))
+_BIT_CARTA = tuple(1 << ((c >> 2) + 2) for c in range(52))  # bit del valor 2..14
+
+
+# ===========================
+#   CODIFICACIÓN
+# ===========================
+
+def carta_a_int(carta: dict) -> int:
+    return _CODIGO_CARTA[(carta['valor'], carta['palo'])]
+
+
+def int_a_carta(codigo: int) -> dict:
+    return {'valor': VALORES[codigo >> 2], 'palo': PALOS[codigo & 3]}
+
+
+def categoria(rango: int) -> int:
+    """Devuelve la categoría (clave de ``HAND_NAMES``) de un rango entero."""
+    return rango >> 20
+
+
+def _codificar(cat: int, valores) -> int:
+    rango = cat
+    for i in range(5):
+        rango = (rango << 4) | (valores[i] if i < len(valores) else 0)
+    return rango
+
+
+def _escalera_en_mascara(mascara: int) -> int | None:
+    """Carta más alta de una escalera en la máscara de valores (5 para A-2-3-4-5)."""
+    for alta in range(14, 5, -1):
+        ventana = 0b11111 << (alta - 4)
+        if mascara & ventana == ventana:
+            return alta
+    rueda = (1 << 14) | 0b111100
+    if mascara & rueda == rueda:
+        return 5
+    return None
+
+
+# ===========================
+#   CONSTRUCCIÓN DE TABLAS
+# ===========================
+
+def _mejor_con_color(mascara: int) -> int:
+    alta = _escalera_en_mascara(mascara)
+    if alta:
+        return _codificar(8, (alta,))
+    valores = [v for v in range(14, 1, -1) if mascara & (1 << v)]
+    return _codificar(5, valores[:5])
+
+
+def _mejor_sin_color(valores: tuple[int, ...]) -> int:
+    conteos = {}
+    for v in valores:
+        conteos[v] = conteos.get(v, 0) + 1
+    orden = sorted(conteos.items(), key=lambda x: (-x[1], -x[0]))
+    distintos = sorted(conteos, reverse=True)
+
+    if orden[0][1] == 4:
+        kicker = max(v for v in distintos if v != orden[0][0])
+        return _codificar(7, (orden[0][0], kicker))
+
+    if orden[0][1] == 3 and orden[1][1] >= 2:
+        return _codificar(6, (orden[0][0], orden[1][0]))
+
+    mascara = 0
+    for v in distintos:
+        mascara |= 1 << v
+    alta = _escalera_en_mascara(mascara)
+    if alta:
+        return _codificar(4, (alta,))
+
+    if orden[0][1] == 3:
+        kickers = [v for v in distintos if v != orden[0][0]][:2]
+        return _codificar(3, [orden[0][0]] + kickers)
+
+    if orden[0][1] == 2 and orden[1][1] == 2:
+        p1, p2 = orden[0][0], orden[1][0]
+        kicker = max(v for v in distintos if v not in (p1, p2))
+        return _codificar(2, (p1, p2, kicker))
+
+    if orden[0][1] == 2:
+        kickers = [v for v in distintos if v != orden[0][0]][:3]
+        return _codificar(1, [orden[0][0]] + kickers)
+
+    return _codificar(0, distintos[:5])
+
+
+def _construir_tablas():
+    tabla_color = {}
+    for n in (5, 6, 7):
+        for bits in combinations(range(2, 15), n):
+            mascara = 0
+            for v in bits:
+                mascara |= 1 << v
+            tabla_color[mascara] = _mejor_con_color(mascara)
+
+    tabla_primos = {}
+    for n in (5, 6, 7):
+        for indices in combinations_with_replacement(range(13), n):
+            if any(indices.count(i) > 4 for i in set(indices)):
+                continue
+            producto = 1
+            for i in indices:
+                producto *= PRIMOS[i]
+            tabla_primos[producto] = _mejor_sin_color(tuple(i + 2 for i in indices))
+    return tabla_color, tabla_primos
+
+
+_TABLA_COLOR, _TABLA_PRIMOS = _construir_tablas()
+
+
+# ===========================
+#   EVALUACIÓN
+# ===========================
+
+def evaluar_rango(codigos) -> int:
+    """Rango entero de la mejor mano de 5 cartas contenida en 5, 6 o 7 cartas codificadas."""
+    mascaras = [0, 0, 0, 0]
+    producto = 1
+    for c in codigos:
+        producto *= _PRIMO_CARTA[c]
+        mascaras[c & 3] |= _BIT_CARTA[c]
+    for m in mascaras:
+        rango = _TABLA_COLOR.get(m)
+        if rango is not None:
+            return rango
+    return _TABLA_PRIMOS[producto]
+
+
+def evaluar_mejor_mano(cartas: list[dict]) -> tuple[int, list[dict], int]:
+    """
+    Devuelve ``(rango, mejor_mano, categoria)``. ``mejor_mano`` es la primera
+    combinación de 5 cartas (en el orden de ``itertools.combinations``) que
+    alcanza el rango, igual que hacía ``_evaluar_mejor_mano``.
+    """
+    if len(cartas) < 5:
+        return 0, list(cartas), 0
+    codigos = [carta_a_int(c) for c in cartas]
+    rango = evaluar_rango(codigos)
+    if len(cartas) == 5:
+        return rango, list(cartas), rango >> 20
+    for idx in combinations(range(len(cartas)), 5):
+        if evaluar_rango([codigos[i] for i in idx]) == rango:
+            return rango, [cartas[i] for i in idx], rango >> 20
+    return rango, list(cartas[:5]), rango >> 20
@@ -0,0 +1,146 @@
+# server/endpoints/protected/api/juegos/multiplayer/poker/historial.py
+"""
+Historial de manos de póker: registro append-only y reconstrucción (replay).
+
+Cada acción de la mano (reparto, ciegas, apuestas, calles descubiertas y
+premios) se guarda como una fila compacta de ``AccionPoker``: asiento, código
+de acción, cantidad y cartas como bytes (un byte por carta, codificación de
+``evaluador.carta_a_int``). Las filas se acumulan en la mesa y se insertan de
+golpe junto al snapshot del estado, así que el historial nunca obliga a
+reescribir ``datos_juego`` y el snapshot no necesita guardar lo ya jugado.
+
+``reconstruir_mano`` rehace cualquier calle de cualquier mano a partir de las
+filas, sin consultar el estado de la mesa.
+"""
+
+from sqlalchemy import insert
+
+from models import db, AccionPoker
+from .evaluador import carta_a_int, int_a_carta
+
+ACCIONES = (
+    'reparto',   # cartas privadas + stack al empezar la mano
+    'ciega',
+    'check',
+    'call',
+    'raise',
+    'fold',
+    'flop',      # cartas del board al descubrir cada calle
+    'turn',
+    'river',
+    'gana',
+    'devuelve',  # exceso no igualado que vuelve al stack
+)
+CODIGO_ACCION = {nombre: codigo for codigo, nombre in enumerate(ACCIONES)}
+CALLES = ('preflop', 'flop', 'turn', 'river')
+
+
+def registrar_accion(mesa, accion: str, user_id: int | None = None,
+                     cantidad: float = 0.0, cartas: list[dict] | None = None):
+    """Añade una fila al historial pendiente de la mano en curso de ``mesa``."""
+    estado = mesa.estado
+    seq = int(estado.get('n_acciones', 0) or 0)
+    estado['n_acciones'] = seq + 1
+    mesa.acciones_pendientes.append({
+        'partida_id': mesa.partida_id,
+        'mano': int(estado.get('mano', 0) or 0),
+        'seq': seq,
+        'user_id': user_id,
+        'accion': CODIGO_ACCION[accion],
+        'cantidad': round(float(cantidad or 0.0), 2),
+        'cartas': bytes(carta_a_int(c) for c in cartas) if cartas else None,
+    })
+
+
+def volcar_acciones(mesa) -> list[dict]:
+    """
+    Inserta en la sesión (un único INSERT multi-fila) las acciones pendientes
+    y devuelve las filas volcadas, por si el commit falla y hay que reencolarlas.
+    """
+    filas, mesa.acciones_pendientes = mesa.acciones_pendientes, []
+    if filas:
+        db.session.execute(insert(AccionPoker), filas)
+    return filas
+
+
+def filas_mano(partida_id: int, mano: int) -> list[AccionPoker]:
+    return (
+        AccionPoker.query
+        .filter_by(partida_id=partida_id, mano=mano)
+        .order_by(AccionPoker.seq)
+        .all()
+    )
+
+
+def reconstruir_mano(filas: list[AccionPoker], calle: str | None = None) -> dict:
+    """
+    Rehace la mano a partir de sus filas. Con ``calle`` se detiene al final de
+    esa calle (antes de descubrir la siguiente); sin ella, reproduce la mano entera.
+    """
+    jugadores = {}
+    board = []
+    acciones = []
+    bote = 0.0
+    calle_actual = 'preflop'
+
+    for fila in filas:
+        nombre = ACCIONES[fila.accion]
+        cartas = [int_a_carta(c) for c in (fila.cartas or b'')]
+        cantidad = float(fila.cantidad or 0.0)
+
+        if nombre in CALLES:
+            if calle is not None and CALLES.index(nombre) > CALLES.index(calle):
+                break
+            calle_actual = nombre
+            board.extend(cartas)
+            for j in jugadores.values():
+                j['apuesta_calle'] = 0.0
+            continue
+
+        uid = str(fila.user_id)
+        if nombre == 'reparto':
+            jugadores[uid] = {
+                'user_id': fila.user_id,
+                'cartas': cartas,
+                'stack_inicial': cantidad,
+                'stack': cantidad,
+                'apuesta_calle': 0.0,
+                'total_aportado': 0.0,
+                'ganancia': 0.0,
+                'estado': 'activo',
+            }
+            continue
+
+        j = jugadores.get(uid)
+        if j is None:
+            continue
+        if nombre in ('ciega', 'call', 'raise'):
+            j['stack'] = round(j['stack'] - cantidad, 2)
+            j['apuesta_calle'] += cantidad
+            j['total_aportado'] += cantidad
+            bote += cantidad
+            if j['stack'] <= 1e-6:
+                j['estado'] = 'all_in'
+        elif nombre == 'fold':
+            j['estado'] = 'retirado'
+        elif nombre in ('gana', 'devuelve'):
+            j['stack'] = round(j['stack'] + cantidad, 2)
+            bote -= cantidad
+            if nombre == 'gana':
+                j['ganancia'] += cantidad
+
+        acciones.append({
+            'seq': fila.seq,
+            'calle': calle_actual,
+            'user_id': fila.user_id,
+            'accion': nombre,
+            'cantidad': cantidad,
+        })
+
+    return {
+        'calle': calle_actual,
+        'cartas_comunitarias': board,
+        'bote': round(max(bote, 0.0), 2),
+        'jugadores': jugadores,
+        'acciones': acciones,
+    }
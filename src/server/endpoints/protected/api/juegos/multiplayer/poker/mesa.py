@@ -0,0 +1,332 @@
+# server/endpoints/protected/api/juegos/multiplayer/poker/mesa.py
+"""
+Estado en memoria de las mesas de póker multijugador.
+
+Mientras una mesa está viva, el dict de estado que vive aquí es la fuente de
+verdad: las acciones lo modifican directamente en lugar de hacer
+``json.loads`` + ``json.dumps`` + ``commit`` por clic. Cada cambio incrementa
+``version`` y el estado se vuelca como snapshot versionado en
+``PartidaMultijugador.datos_juego``:
+
+- de forma diferida y agrupada (un volcado por ventana de
+  ``POKER_SNAPSHOT_SEGUNDOS``) para las acciones dentro de una mano;
+- de forma inmediata, en la misma transacción que los saldos, cuando se mueve
+  dinero de la cuenta (stack, fin de mano, abandono de mesa).
+
+Las acciones de cada mano no se acumulan en el snapshot: van a un historial
+append-only (``historial.py``) que se inserta en la misma transacción.
+
+Cada versión se empuja por Socket.IO a la sala personal de cada asiento
+(``room_asiento``) ya saneada para ese jugador, con ``seq`` = versión, de modo
+que los clientes no necesitan volver a pedir ``/estado`` tras cada acción.
+
+Tras un reinicio la mesa se reconstruye desde el último snapshot. Esto asume un
+único proceso servidor (como en ``gunicorn_config.py``). En modo TESTING o con
+``POKER_SNAPSHOT_SEGUNDOS = 0`` se usa escritura directa: el estado se lee de
+la base de datos en cada petición y se guarda en cada cambio.
+"""
+
+import json
+from datetime import datetime
+
+from flask import current_app
+
+from models import db, SalaMultijugador, PartidaMultijugador
+from .historial import volcar_acciones
+
+mesas_poker = {}
+
+
+def room_mesa(sala_id: int) -> str:
+    """Sala Socket.IO de la mesa (la misma que usan el chat y el resto de salas)."""
+    return f"sala_{sala_id}"
+
+
+def room_asiento(sala_id: int, user_id: int) -> str:
+    """Sala Socket.IO personal de un jugador en una mesa (todas sus pestañas)."""
+    return f"sala_{sala_id}_poker_{user_id}"
+
+
+class MesaPoker:
+    def __init__(self, sala_id: int, partida_id: int, estado: dict):
+        self.sala_id = sala_id
+        self.partida_id = partida_id
+        self.estado = estado
+        self.version = int(estado.get('version', 0) or 0)
+        self.version_guardada = self.version
+        self.volcado_programado = False
+        self.acciones_pendientes = []  # filas de historial aún no insertadas
+        # Caché de la proyección pública y de las vistas serializadas de esta versión
+        self._proyeccion_version = None
+        self._publica = None
+        self._resto_json = None
+        self._jugadores_json = {}
+        self._vistas_json = {}
+
+
+# ===========================
+#   CARGA DESDE SNAPSHOT
+# ===========================
+
+def _obtener_o_crear_partida(sala: SalaMultijugador) -> PartidaMultijugador:
+    partida = (
+        PartidaMultijugador.query
+        .filter_by(sala_id=sala.id, estado='activa')
+        .order_by(PartidaMultijugador.fecha_inicio.desc())
+        .first()
+    )
+
+    if partida is None:
+        partida = PartidaMultijugador(
+            sala_id=sala.id,
+            estado='activa',
+            datos_juego=json.dumps({
+                'juego': 'poker',
+                'fase': 'terminada',  # al entrar, que no se considere mano activa
+                'cartas_comunitarias': [],
+                'cartas_comunitarias_visibles': [],
+                'jugadores': {},
+                'bote': 0.0,
+                'apuesta_ronda': 0.0,
+                'ganador': None,
+                'version': 0,
+                'ultima_actualizacion': datetime.utcnow().isoformat()
+            })
+        )
+        db.session.add(partida)
+        db.session.commit()
+
+    return partida
+
+
+def _cargar_estado(partida: PartidaMultijugador):
+    try:
+        estado = json.loads(partida.datos_juego or '{}')
+    except json.JSONDecodeError:
+        estado = {}
+
+    # sane defaults
+    if not isinstance(estado, dict):
+        estado = {}
+    estado.setdefault('juego', 'poker')
+    estado.setdefault('fase', 'terminada')
+    estado.setdefault('cartas_comunitarias', [])
+    estado.setdefault('cartas_comunitarias_visibles', [])
+    estado.setdefault('jugadores', {})
+    estado.setdefault('bote', 0.0)
+    estado.setdefault('apuesta_ronda', 0.0)
+    estado.setdefault('ganador', None)
+    estado.setdefault('version', 0)
+
+    # Si no hay jugadores registrados o el estado está vacío, forzar fase terminada
+    if not estado.get('jugadores'):
+        estado['fase'] = 'terminada'
+        estado['bote'] = 0.0
+        estado['apuesta_ronda'] = 0.0
+        estado['cartas_comunitarias_visibles'] = []
+        estado['cartas_comunitarias'] = []
+
+    return estado
+
+
+def _intervalo_snapshot() -> float:
+    if current_app.testing:
+        return 0.0
+    return float(current_app.config.get('POKER_SNAPSHOT_SEGUNDOS', 1.0) or 0.0)
+
+
+def descartar_mesa(sala_id: int, mesa: MesaPoker | None = None):
+    """
+    Saca de memoria la mesa de la sala (solo si es ``mesa``, cuando se indica),
+    p. ej. al borrar la sala: un ``sala_id`` reutilizado no debe heredar sus stacks.
+    """
+    if mesa is None or mesas_poker.get(sala_id) is mesa:
+        mesas_poker.pop(sala_id, None)
+
+
+def _mesa_vigente(mesa: MesaPoker, sala_id: int) -> bool:
+    """La partida de la mesa en memoria sigue activa y es de esta sala."""
+    partida = db.session.get(PartidaMultijugador, mesa.partida_id)
+    return partida is not None and partida.sala_id == sala_id and partida.estado == 'activa'
+
+
+def obtener_mesa(sala: SalaMultijugador) -> MesaPoker:
+    """Devuelve la mesa viva de la sala, cargándola del último snapshot si hace falta."""
+    mesa = mesas_poker.get(sala.id)
+    if mesa is not None:
+        if _mesa_vigente(mesa, sala.id):
+            return mesa
+        print(f"⚠️ Póker: la partida {mesa.partida_id} de la mesa en memoria de la sala {sala.id} "
+              f"ya no está activa; se vuelve a cargar")
+        descartar_mesa(sala.id, mesa)
+    partida = _obtener_o_crear_partida(sala)
+    mesa = MesaPoker(sala.id, partida.id, _cargar_estado(partida))
+    if _intervalo_snapshot() > 0:
+        mesas_poker[sala.id] = mesa
+    return mesa
+
+
+def obtener_mesa_por_id(sala_id: int) -> MesaPoker | None:
+    sala = SalaMultijugador.query.get(sala_id)
+    if sala is None:
+        descartar_mesa(sala_id)
+        return None
+    return obtener_mesa(sala)
+
+
+# ===========================
+#   VOLCADO DE SNAPSHOTS
+# ===========================
+
+def _escribir_snapshot(mesa: MesaPoker):
+    """
+    Escribe el estado actual en la partida y el historial pendiente, y hace
+    commit (incluye lo pendiente en la sesión).
+    """
+    version = mesa.version
+    partida = PartidaMultijugador.query.get(mesa.partida_id)
+    if partida is None:
+        # Sin partida no hay dónde guardar estado ni historial; el resto de la
+        # sesión (saldos) se guarda igual
+        print(f"⚠️ Póker: la partida {mesa.partida_id} de la sala {mesa.sala_id} ya no existe; "
+              f"se descartan la mesa en memoria y {len(mesa.acciones_pendientes)} acciones sin guardar")
+        mesa.acciones_pendientes.clear()
+        descartar_mesa(mesa.sala_id, mesa)
+        db.session.commit()
+        return
+    if version > mesa.version_guardada:
+        partida.datos_juego = json.dumps(mesa.estado)
+    acciones = volcar_acciones(mesa)
+    try:
+        db.session.commit()
+    except Exception:
+        mesa.acciones_pendientes[:0] = acciones
+        raise
+    mesa.version_guardada = max(mesa.version_guardada, version)
+
+
+def _programar_volcado(mesa: MesaPoker, intervalo: float):
+    if mesa.volcado_programado:
+        return
+    socketio = current_app.extensions.get('socketio')
+    if not socketio:
+        _escribir_snapshot(mesa)
+        return
+    app = current_app._get_current_object()
+    sala_id = mesa.sala_id
+    mesa.volcado_programado = True
+
+    def _volcar():
+        socketio.sleep(intervalo)
+        with app.app_context():
+            actual = mesas_poker.get(sala_id)
+            if actual is None:
+                return
+            actual.volcado_programado = False
+            try:
+                _escribir_snapshot(actual)
+            except Exception as e:
+                db.session.rollback()
+                print(f"❌ Error volcando snapshot de póker (sala {sala_id}): {e}")
+
+    socketio.start_background_task(_volcar)
+
+
+def marcar_cambio(mesa: MesaPoker, inmediato: bool = False):
+    """
+    Registra una nueva versión del estado. Con ``inmediato`` (o en modo de
+    escritura directa) el snapshot se guarda ya, junto con el resto de cambios
+    pendientes en la sesión; si no, se agrupa con los siguientes cambios.
+    """
+    mesa.version += 1
+    mesa.estado['version'] = mesa.version
+    mesa.estado['ultima_actualizacion'] = datetime.utcnow().isoformat()
+    intervalo = _intervalo_snapshot()
+    if inmediato or intervalo <= 0:
+        _escribir_snapshot(mesa)
+    else:
+        _programar_volcado(mesa, intervalo)
+
+
+# ===========================
+#   VISTAS POR ASIENTO
+# ===========================
+
+FASES_PUBLICAS = ('showdown', 'terminada')  # fases en las que las cartas de todos son visibles
+
+
+def _proyectar(mesa: MesaPoker):
+    """
+    Construye (una vez por versión) la parte pública del estado: sin el
+    ``saldo_cuenta`` de nadie, sin cartas privadas ni board por descubrir
+    mientras la mano sigue en juego. También deja serializados el resto del
+    estado y cada jugador público para que las vistas solo tengan que
+    sustituir el asiento del espectador.
+    """
+    if mesa._proyeccion_version == mesa.version:
+        return
+    estado = mesa.estado
+    ocultar = estado.get('fase') not in FASES_PUBLICAS
+    publica = {k: v for k, v in estado.items() if k != 'jugadores'}
+    if ocultar:
+        publica['cartas_comunitarias'] = list(estado.get('cartas_comunitarias_visibles') or [])
+    jugadores = {}
+    for uid, info in (estado.get('jugadores') or {}).items():
+        jugadores[uid] = {
+            k: v for k, v in info.items()
+            if k != 'saldo_cuenta' and not (ocultar and k == 'cartas')
+        }
+    mesa._resto_json = json.dumps(publica)
+    publica['jugadores'] = jugadores
+    mesa._publica = publica
+    mesa._jugadores_json = {uid: json.dumps(info) for uid, info in jugadores.items()}
+    mesa._vistas_json = {}
+    mesa._proyeccion_version = mesa.version
+
+
+def vista_para_usuario(mesa: MesaPoker, user_id: int) -> dict:
+    """Vista saneada para un jugador: la proyección pública con su propio asiento completo."""
+    _proyectar(mesa)
+    uid = str(user_id)
+    vista = dict(mesa._publica)
+    propio = (mesa.estado.get('jugadores') or {}).get(uid)
+    if propio is not None:
+        vista['jugadores'] = dict(mesa._publica['jugadores'])
+        vista['jugadores'][uid] = propio
+    return vista
+
+
+def vista_json(mesa: MesaPoker, user_id: int) -> str:
+    """``vista_para_usuario`` ya serializada, cacheada por (versión, jugador)."""
+    _proyectar(mesa)
+    uid = str(user_id)
+    cacheada = mesa._vistas_json.get(uid)
+    if cacheada is not None:
+        return cacheada
+    propio = (mesa.estado.get('jugadores') or {}).get(uid)
+    partes = []
+    for otro, info_json in mesa._jugadores_json.items():
+        if otro == uid and propio is not None:
+            info_json = json.dumps(propio)
+        partes.append(f'{json.dumps(otro)}: {info_json}')
+    jugadores_json = '{' + ', '.join(partes) + '}'
+    resto = mesa._resto_json
+    if resto == '{}':
+        vista = '{"jugadores": ' + jugadores_json + '}'
+    else:
+        vista = resto[:-1] + ', "jugadores": ' + jugadores_json + '}'
+    mesa._vistas_json[uid] = vista
+    return vista
+
+
+def emitir_estado(mesa: MesaPoker):
+    """Envía a cada asiento su vista saneada de la versión actual de la mesa."""
+    socketio = current_app.extensions.get('socketio')
+    if not socketio:
+        return
+    for uid in list(mesa.estado.get('jugadores') or {}):
+        socketio.emit('poker_estado_actualizado', {
+            'sala_id': mesa.sala_id,
+            'seq': mesa.version,
+            'estado': vista_para_usuario(mesa, uid)
+        }, room=room_asiento(mesa.sala_id, int(uid)))
@@ -0,0 +1,175 @@
+# server/endpoints/protected/api/juegos/multiplayer/poker/preflop.py
+"""
+Equity preflop precalculada entre las 169 clases de mano inicial.
+
+Las clases se ordenan como la cuadrícula habitual de 13x13 con los valores de
+mayor a menor (A, K, ..., 2): la diagonal son las parejas, por encima las
+manos del mismo palo (``AKs``) y por debajo las de distinto palo (``AKo``).
+El índice de una clase es ``fila * 13 + columna``.
+
+La matriz ``equity[a, b]`` (equity de la clase ``a`` frente a la ``b``,
+contando los empates como medio bote) se genera offline con
+``utils/generar_equity_preflop.py``: Monte Carlo con semilla fija sobre
+``equity.evaluar_lote``, que ordena las manos igual que ``_evaluar_mejor_mano``.
+Se guarda en ``data/equity_preflop.bin`` (cabecera de 16 bytes + float32
+169x169) y se mapea en memoria al importar el módulo, de modo que las páginas
+se comparten entre procesos y las consultas no cuestan CPU.
+"""
+
+import struct
+from pathlib import Path
+
+import numpy as np
+
+from .equity import evaluar_lote
+
+N_CLASES = 169
+RUTA_MATRIZ = Path(__file__).resolve().parent / 'data' / 'equity_preflop.bin'
+
+_MAGIA = b'EQPF'
+_VERSION = 1
+_CABECERA = struct.Struct('<4sHHII')  # magia, versión, nº de clases, muestras, semilla
+
+_NOMBRES_VALOR = 'AKQJT98765432'
+_LOTE_RIVALES = 16  # enfrentamientos por lote al generar (acota la memoria)
+
+# Nº de combinaciones de cartas de cada clase (6 parejas, 4 suited, 12 offsuit)
+COMBOS_CLASE = np.array(
+    [6 if f == c else (4 if f < c else 12) for f in range(13) for c in range(13)],
+    dtype=np.float64
+)
+
+
+# ===========================
+#          CLASES
+# ===========================
+
+def clase_de_codigos(c1: int, c2: int) -> int:
+    """Índice de clase de dos cartas codificadas (``evaluador.carta_a_int``)."""
+    f1, f2 = 12 - (c1 >> 2), 12 - (c2 >> 2)
+    alta, baja = min(f1, f2), max(f1, f2)
+    if alta == baja:
+        return alta * 13 + alta
+    if (c1 & 3) == (c2 & 3):
+        return alta * 13 + baja
+    return baja * 13 + alta
+
+
+def nombre_clase(clase: int) -> str:
+    fila, col = divmod(clase, 13)
+    if fila == col:
+        return _NOMBRES_VALOR[fila] * 2
+    if fila < col:
+        return _NOMBRES_VALOR[fila] + _NOMBRES_VALOR[col] + 's'
+    return _NOMBRES_VALOR[col] + _NOMBRES_VALOR[fila] + 'o'
+
+
+def combos_de_clase(clase: int) -> list[tuple[int, int]]:
+    """Todas las parejas de cartas codificadas que pertenecen a la clase."""
+    fila, col = divmod(clase, 13)
+    v1, v2 = 12 - fila, 12 - col
+    if fila == col:
+        return [(v1 * 4 + p1, v1 * 4 + p2) for p1 in range(4) for p2 in range(p1 + 1, 4)]
+    if fila < col:
+        return [(v1 * 4 + p, v2 * 4 + p) for p in range(4)]
+    return [(v2 * 4 + p1, v1 * 4 + p2) for p1 in range(4) for p2 in range(4) if p1 != p2]
+
+
+# ===========================
+#    GENERACIÓN (OFFLINE)
+# ===========================
+
+def _equity_enfrentamientos(clase: int, rivales: list[int], muestras: int, rng) -> np.ndarray:
+    """Equity Monte Carlo de ``clase`` frente a cada clase de ``rivales`` (vectorizado)."""
+    propios = np.array(combos_de_clase(clase), dtype=np.int64)
+    n = len(rivales) * muestras
+    mano_a = propios[rng.integers(0, len(propios), n)]
+    mano_b = np.empty((n, 2), dtype=np.int64)
+    for i, rival in enumerate(rivales):
+        combos = np.array(combos_de_clase(rival), dtype=np.int64)
+        a = mano_a[i * muestras:(i + 1) * muestras]
+        b = mano_b[i * muestras:(i + 1) * muestras]
+        b[:] = combos[rng.integers(0, len(combos), muestras)]
+        # Rechazo: volver a sortear la mano rival mientras comparta cartas con la propia
+        while True:
+            choque = np.flatnonzero((b[:, :, None] == a[:, None, :]).any(axis=(1, 2)))
+            if len(choque) == 0:
+                break
+            b[choque] = combos[rng.integers(0, len(combos), len(choque))]
+
+    claves = rng.random((n, 52))
+    usadas = np.hstack((mano_a, mano_b))
+    np.put_along_axis(claves, usadas, 2.0, axis=1)
+    board = np.argpartition(claves, 5, axis=1)[:, :5]
+
+    rango_a = evaluar_lote(np.hstack((mano_a, board)))
+    rango_b = evaluar_lote(np.hstack((mano_b, board)))
+    puntos = np.where(rango_a > rango_b, 1.0, np.where(rango_a == rango_b, 0.5, 0.0))
+    return puntos.reshape(len(rivales), muestras).mean(axis=1)
+
+
+def calcular_matriz(muestras: int = 10000, semilla: int = 169, progreso=None) -> np.ndarray:
+    """
+    Genera la matriz 169x169 de forma reproducible (misma semilla y nº de
+    muestras -> mismos bytes). Solo se calcula ``a < b``; la diagonal es 0.5 y
+    ``equity[b, a] = 1 - equity[a, b]``.
+    """
+    rng = np.random.default_rng(semilla)
+    matriz = np.full((N_CLASES, N_CLASES), 0.5, dtype=np.float64)
+    for clase in range(N_CLASES - 1):
+        rivales = list(range(clase + 1, N_CLASES))
+        fila = np.concatenate([
+            _equity_enfrentamientos(clase, rivales[i:i + _LOTE_RIVALES], muestras, rng)
+            for i in range(0, len(rivales), _LOTE_RIVALES)
+        ])
+        matriz[clase, clase + 1:] = fila
+        matriz[clase + 1:, clase] = 1.0 - fila
+        if progreso:
+            progreso(clase + 1, N_CLASES - 1)
+    return matriz.astype(np.float32)
+
+
+def guardar_matriz(matriz: np.ndarray, muestras: int, semilla: int, ruta: Path = RUTA_MATRIZ):
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    with open(ruta, 'wb') as f:
+        f.write(_CABECERA.pack(_MAGIA, _VERSION, N_CLASES, muestras, semilla))
+        f.write(np.ascontiguousarray(matriz, dtype='<f4').tobytes())
+
+
+# ===========================
+#    CARGA Y CONSULTAS
+# ===========================
+
+def cargar_matriz(ruta: Path = RUTA_MATRIZ):
+    """Mapea la matriz en memoria (solo lectura). Devuelve None si no existe o no es válida."""
+    try:
+        with open(ruta, 'rb') as f:
+            magia, version, n, _, _ = _CABECERA.unpack(f.read(_CABECERA.size))
+    except (OSError, struct.error):
+        return None
+    if magia != _MAGIA or version != _VERSION or n != N_CLASES:
+        return None
+    return np.memmap(ruta, dtype='<f4', mode='r', offset=_CABECERA.size, shape=(N_CLASES, N_CLASES))
+
+
+MATRIZ = cargar_matriz()
+if MATRIZ is None:
+    print(f"⚠️  No se encontró la tabla de equity preflop ({RUTA_MATRIZ}); "
+          "ejecuta utils/generar_equity_preflop.py")
+    _FUERZA = None
+else:
+    # Equity frente a una mano al azar: media ponderada por nº de combinaciones
+    _FUERZA = (np.asarray(MATRIZ, dtype=np.float64) @ COMBOS_CLASE) / COMBOS_CLASE.sum()
+
+
+def equity_preflop(clase_a: int, clase_b: int) -> float | None:
+    if MATRIZ is None:
+        return None
+    return float(MATRIZ[clase_a, clase_b])
+
+
+def fuerza_preflop(clase: int) -> float | None:
+    """Equity aproximada de la clase frente a una mano aleatoria."""
+    if _FUERZA is None:
+        return None
+    return float(_FUERZA[clase])
@@ -1,11 +1,19 @@
 from flask import Blueprint, jsonify, request, render_template, abort, current_app
 from flask_login import login_required, current_user
-from models import db, SalaMultijugador, UsuarioSala, PartidaMultijugador, User, Estadistica, Apuesta
-import json
+from models import db, SalaMultijugador, UsuarioSala, User, Apuesta
+from sqlalchemy import insert
+from sqlalchemy.orm.attributes import set_committed_value
+import math
 import random
 from datetime import datetime
 from itertools import combinations
 from .socket_handlers import register_poker_handlers
+from .evaluador import PALOS, VALORES, VALOR_MAP, carta_a_int, evaluar_mejor_mano
+from .equity import calcular_equity
+from .preflop import clase_de_codigos, fuerza_preflop, nombre_clase
+from .mesa import MesaPoker, emitir_estado, marcar_cambio, obtener_mesa, room_mesa, vista_json
+from .historial import CALLES, filas_mano, reconstruir_mano, registrar_accion
+from ...liquidacion import abonar_y_sumar
 
 # ⚠️ IMPORTANTE:
 # Este blueprint NO tiene url_prefix, igual que ruleta.
@@ -19,9 +27,6 @@ def on_register(state):
     if socketio:
         register_poker_handlers(socketio, state.app)
 
-PALOS = ['♠', '♥', '♦', '♣']
-VALORES = ['2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A']
-VALOR_MAP = {v: idx + 2 for idx, v in enumerate(VALORES)}  # 2 -> 2 ... A -> 14
 HAND_NAMES = {
     8: 'Escalera de color',
     7: 'Póker',
@@ -105,6 +110,10 @@ def _puntuar_combinacion(cartas: tuple[dict, ...]):
 
 
 def _evaluar_mejor_mano(cartas: list[dict]):
+    """
+    Implementación de referencia (recorre las 21 combinaciones). El showdown usa
+    ``evaluador.evaluar_mejor_mano``, que debe ordenar las manos exactamente igual.
+    """
     if len(cartas) < 5:
         return (0, []), cartas
     mejor_rank = None
@@ -117,96 +126,27 @@ def _evaluar_mejor_mano(cartas: list[dict]):
     return mejor_rank, list(mejor_combo or [])
 
 
-def _obtener_o_crear_partida(sala: SalaMultijugador) -> PartidaMultijugador:
-    partida = (
-        PartidaMultijugador.query
-        .filter_by(sala_id=sala.id, estado='activa')
-        .order_by(PartidaMultijugador.fecha_inicio.desc())
-        .first()
-    )
-
-    if partida is None:
-        partida = PartidaMultijugador(
-            sala_id=sala.id,
-            estado='activa',
-            datos_juego=json.dumps({
-                'juego': 'poker',
-                'fase': 'terminada',  # al entrar, que no se considere mano activa
-                'cartas_comunitarias': [],
-                'cartas_comunitarias_visibles': [],
-                'jugadores': {},
-                'bote': 0.0,
-                'apuesta_ronda': 0.0,
-                'ganador': None,
-                'ultima_actualizacion': datetime.utcnow().isoformat()
-            })
-        )
-        db.session.add(partida)
-        db.session.commit()
-
-    return partida
-
-
-def _cargar_estado(partida: PartidaMultijugador):
-    try:
-        estado = json.loads(partida.datos_juego or '{}')
-    except json.JSONDecodeError:
-        estado = {}
-
-    # sane defaults
-    if not isinstance(estado, dict):
-        estado = {}
-    estado.setdefault('juego', 'poker')
-    estado.setdefault('fase', 'terminada')
-    estado.setdefault('cartas_comunitarias', [])
-    estado.setdefault('cartas_comunitarias_visibles', [])
-    estado.setdefault('jugadores', {})
-    estado.setdefault('bote', 0.0)
-    estado.setdefault('apuesta_ronda', 0.0)
-    estado.setdefault('ganador', None)
-
-    # Si no hay jugadores registrados o el estado está vacío, forzar fase terminada
-    if not estado.get('jugadores'):
-        estado['fase'] = 'terminada'
-        estado['bote'] = 0.0
-        estado['apuesta_ronda'] = 0.0
-        estado['cartas_comunitarias_visibles'] = []
-        estado['cartas_comunitarias'] = []
-
-    return estado
-
-
-
-def _guardar_estado(partida: PartidaMultijugador, estado: dict):
-    estado['ultima_actualizacion'] = datetime.utcnow().isoformat()
-    partida.datos_juego = json.dumps(estado)
-    db.session.commit()
-    _emit_estado_actualizado(partida.sala_id)
-
-
-def _emit_estado_actualizado(sala_id: int):
-    socketio = current_app.extensions.get('socketio')
-    if not socketio:
-        return
-    room = f"poker_{sala_id}"
-    socketio.emit('poker_estado_actualizado', {'sala_id': sala_id}, room=room)
+def _guardar_estado(mesa: MesaPoker, inmediato: bool = False):
+    marcar_cambio(mesa, inmediato)
+    emitir_estado(mesa)
 
 
-def _emit_hand_summary(sala_id: int, bote: float, ganadores: list[dict]):
+def _emit_hand_summary(sala_id: int, bote: float, ganadores: list[dict], equity_all_in: dict | None = None):
     """
     Envía un resumen de mano al chat de mesa (Socket.IO) con ganadores,
-    bote repartido y mano con la que ganaron.
+    bote repartido y mano con la que ganaron. Si la mano se decidió con un
+    all-in antes del river, incluye la equity de cada jugador en ese momento.
     """
     socketio = current_app.extensions.get('socketio')
     if not socketio:
         return
-    room = f"poker_{sala_id}"
     socketio.emit('poker_hand_summary', {
         'sala_id': sala_id,
         'bote': round(float(bote or 0.0), 2),
         'ganadores': ganadores,
+        'equity_all_in': equity_all_in,
         'timestamp': datetime.utcnow().isoformat()
-    }, room=room)
+    }, room=room_mesa(sala_id))
 
 
 def _asegurar_jugador_en_estado(estado: dict, usuario: User):
@@ -404,16 +344,54 @@ def _actualizar_turno_despues_accion(estado: dict, fase_anterior: str):
         _avanzar_turno(estado)
 
 
-def _sanitizar_estado_para_usuario(estado: dict, user_id: int) -> dict:
-    estado_copia = json.loads(json.dumps(estado))  # copia profunda
+def _equity_jugadores_vivos(estado: dict) -> dict:
+    """
+    Equity exacta (o Monte Carlo si quedan muchas cartas) de cada jugador vivo
+    con el board visible, conociendo las cartas de todos. Solo debe enseñarse
+    cuando las cartas ya son públicas (all-in o fin de mano).
+    """
+    vivos = [j for j in (estado.get('jugadores') or {}).values()
+             if j.get('estado') in ('activo', 'all_in') and len(j.get('cartas') or []) == 2]
+    if len(vivos) < 2:
+        return {}
+    manos = tuple(tuple(carta_a_int(c) for c in j['cartas']) for j in vivos)
+    board = tuple(carta_a_int(c) for c in estado.get('cartas_comunitarias_visibles') or [])
+    equities = calcular_equity(manos, board)
+    return {str(j['user_id']): dict(eq, username=j.get('username')) for j, eq in zip(vivos, equities)}
 
-    jugadores = estado_copia.get('jugadores', {})
-    for uid, info in jugadores.items():
-        if int(uid) != int(user_id):
-            if estado_copia.get('fase') not in ('showdown', 'terminada'):
-                info.pop('cartas', None)
-            info.pop('saldo_cuenta', None)
-    return estado_copia
+
+def _equity_para_usuario(estado: dict, user_id: int) -> dict:
+    """
+    Equity del jugador frente a sus rivales vivos. Mientras la mano está en
+    juego las cartas de los rivales son secretas, así que se simulan como
+    manos desconocidas; en showdown se usan las cartas reales de todos.
+    """
+    fase = estado.get('fase')
+    if fase in ('showdown', 'terminada'):
+        return estado.get('equity_all_in') or {}
+    jugadores = estado.get('jugadores') or {}
+    yo = jugadores.get(str(user_id))
+    if not yo or yo.get('estado') not in ('activo', 'all_in') or len(yo.get('cartas') or []) != 2:
+        return {}
+    rivales = sum(1 for uid, j in jugadores.items()
+                  if uid != str(user_id) and j.get('estado') in ('activo', 'all_in'))
+    if rivales == 0:
+        return {}
+    mano = tuple(carta_a_int(c) for c in yo['cartas'])
+    board = tuple(carta_a_int(c) for c in estado.get('cartas_comunitarias_visibles') or [])
+    equity, = calcular_equity((mano,), board, rivales)
+    return {str(user_id): dict(equity)}
+
+
+def _pista_preflop(estado: dict, user_id: int) -> dict | None:
+    """Clase de la mano inicial y su equity frente a una mano al azar (tabla precalculada)."""
+    if estado.get('fase') != 'preflop':
+        return None
+    yo = (estado.get('jugadores') or {}).get(str(user_id))
+    if not yo or len(yo.get('cartas') or []) != 2:
+        return None
+    clase = clase_de_codigos(*(carta_a_int(c) for c in yo['cartas']))
+    return {'clase': nombre_clase(clase), 'fuerza': fuerza_preflop(clase)}
 
 
 def _asegurar_usuario_en_sala(sala_id: int):
@@ -498,6 +476,10 @@ def _auto_avanzar_si_todos_all_in(estado: dict, sala_id: int | None = None):
     if not apuestas_igualadas():
         return
 
+    # Equity en el momento del all-in (antes de descubrir el resto del board)
+    if estado.get('fase') != 'river':
+        estado['equity_all_in'] = _equity_jugadores_vivos(estado)
+
     # Avanzar automáticamente hasta el river y resolver
     while estado.get('fase') in ('preflop', 'flop', 'turn'):
         fase_actual = estado.get('fase')
@@ -549,10 +531,11 @@ def _finalizar_con_ganador(estado: dict, ganador: dict | None, sala_id: int | No
     resultados = []
     for datos in participantes:
         cartas_totales = (datos.get('cartas') or []) + comunitarias
-        rank, mejor_mano = _evaluar_mejor_mano(cartas_totales)
+        rank, mejor_mano, categoria = evaluar_mejor_mano(cartas_totales)
         resultados.append({
             'jugador': datos,
             'rank': rank,
+            'categoria': categoria,
             'mano': mejor_mano
         })
 
@@ -561,6 +544,8 @@ def _finalizar_con_ganador(estado: dict, ganador: dict | None, sala_id: int | No
         estado['ganador'] = []
         return
 
+    creditos = {}  # user_id -> importe a sumar al balance de la cuenta
+
     # Sidepot simple para HU: si hay 2 jugadores y uno estaba corto (all-in), el pote máximo que puede ganar es su aporte * 2
     if len(participantes) == 2:
         aporte_a = float(participantes[0].get('total_aportado', 0.0) or 0.0)
@@ -572,9 +557,8 @@ def _finalizar_con_ganador(estado: dict, ganador: dict | None, sala_id: int | No
             # Reembolsa el exceso al jugador que aportó más
             mayor = participantes[0] if aporte_a > aporte_b else participantes[1]
             mayor['stack'] = float(mayor.get('stack', 0.0)) + exceso
-            user_mayor = User.query.get(mayor['user_id'])
-            if user_mayor:
-                user_mayor.balance = float(getattr(user_mayor, 'balance', 0.0) or 0.0) + exceso
+            mayor['devuelto'] = exceso
+            creditos[mayor['user_id']] = creditos.get(mayor['user_id'], 0.0) + exceso
             bote = cap
             estado['bote'] = bote
 
@@ -615,7 +599,7 @@ def _finalizar_con_ganador(estado: dict, ganador: dict | None, sala_id: int | No
             jugador['cartas_visibles'] = jugador.get('cartas_visibles')
         jugador['ha_actuado'] = True
         jugador['mano_ganadora'] = res['mano']
-        jugador['mano_texto'] = HAND_NAMES.get(res['rank'][0], 'Mejor mano')
+        jugador['mano_texto'] = HAND_NAMES.get(res['categoria'], 'Mejor mano')
         jugador['apuesta_actual'] = 0.0
 
         premio = winnings.get(jugador['user_id'], 0.0)
@@ -638,10 +622,7 @@ def _finalizar_con_ganador(estado: dict, ganador: dict | None, sala_id: int | No
                 'mano': res['mano'],
                 'rango': jugador['mano_texto']
             })
-            user = User.query.get(jugador['user_id'])
-            if user:
-                user.balance = float(getattr(user, 'balance', 0.0) or 0.0) + premio
-                jugador['saldo_cuenta'] = user.balance
+            creditos[jugador['user_id']] = creditos.get(jugador['user_id'], 0.0) + premio
         else:
             jugador['es_ganador'] = False
             jugador['ultima_ganancia'] = 0.0
@@ -653,7 +634,7 @@ def _finalizar_con_ganador(estado: dict, ganador: dict | None, sala_id: int | No
     estado['turno_actual'] = None
 
     if sala_id is not None and ganadores_payload:
-        _emit_hand_summary(sala_id, bote, ganadores_payload)
+        _emit_hand_summary(sala_id, bote, ganadores_payload, estado.get('equity_all_in'))
 
     for datos in jugadores.values():
         if datos['user_id'] not in participantes_ids:
@@ -661,30 +642,32 @@ def _finalizar_con_ganador(estado: dict, ganador: dict | None, sala_id: int | No
             datos['mano_ganadora'] = None
             datos['mano_texto'] = None
             datos['ultima_ganancia'] = 0.0
-        stats = (
-            Estadistica.query
-            .filter_by(user_id=datos['user_id'], juego='poker')
-            .first()
-        )
-        if not stats:
-            stats = Estadistica(
-                user_id=datos['user_id'],
-                juego='poker',
-                tipo_juego='multiplayer',
-                partidas_jugadas=0,
-                partidas_ganadas=0,
-                ganancia_total=0.0,
-                apuesta_total=0.0
-            )
-            db.session.add(stats)
-        stats.partidas_jugadas += 1
-        stats.apuesta_total += float(datos.get('total_aportado', 0.0) or 0.0)
-        if datos.get('es_ganador'):
-            stats.partidas_ganadas += 1
-            stats.ganancia_total += float(datos.get('ultima_ganancia', 0.0) or 0.0)
 
+    saldos = _liquidar_mano(jugadores, creditos)
+    for datos in jugadores.values():
+        if datos.get('es_ganador') and datos['user_id'] in saldos:
+            datos['saldo_cuenta'] = saldos[datos['user_id']]
+
+
+def _liquidar_mano(jugadores: dict, creditos: dict) -> dict:
+    """
+    Liquida la mano en bloque, con un número fijo de sentencias sea cual sea
+    el número de jugadores: saldos y estadísticas con ``abonar_y_sumar`` e
+    inserción en lote de las apuestas. Devuelve el balance resultante de cada
+    usuario existente.
+    """
+    sumas, apuestas = {}, []
+    for datos in jugadores.values():
+        uid = int(datos['user_id'])
         apuesta_total = float(datos.get('total_aportado', 0.0) or 0.0)
         ganancia_total = float(datos.get('ultima_ganancia', 0.0) or 0.0)
+        ganada = bool(datos.get('es_ganador'))
+        sumas[uid] = {
+            'ganadas': 1 if ganada else 0,
+            'ganancia': ganancia_total if ganada else 0.0,
+            'apostado': apuesta_total,
+        }
+
         if apuesta_total > 0 or ganancia_total > 0:
             neto = ganancia_total - apuesta_total
             if neto > 1e-6:
@@ -693,43 +676,83 @@ def _finalizar_con_ganador(estado: dict, ganador: dict | None, sala_id: int | No
                 resultado = 'perdida'
             else:
                 resultado = 'empate'
-            apuesta = Apuesta(
-                user_id=datos['user_id'],
-                juego='poker',
-                tipo_juego='multiplayer',
-                cantidad=apuesta_total,
-                ganancia=ganancia_total,
-                resultado=resultado
-            )
-            db.session.add(apuesta)
+            apuestas.append({
+                'user_id': uid,
+                'juego': 'poker',
+                'tipo_juego': 'multiplayer',
+                'cantidad': apuesta_total,
+                'ganancia': ganancia_total,
+                'resultado': resultado
+            })
+    for uid, delta in creditos.items():
+        sumas.setdefault(uid, {'jugadas': 0})['pago'] = delta
 
+    balances = abonar_y_sumar('poker', 'multiplayer', sumas)
+    for uid in creditos:
+        user = db.session.identity_map.get(db.session.identity_key(User, uid))
+        if user is not None and uid in balances:
+            # Sincroniza la instancia (p. ej. current_user) sin volver a leerla
+            set_committed_value(user, 'balance', balances[uid])
+    if apuestas:
+        db.session.execute(insert(Apuesta), apuestas)
 
+    return balances
 
-def _accion_generica(sala_id: int, tipo: str, cantidad: float | None = None):
-    sala, usuario_sala, resp, code = _asegurar_usuario_en_sala(sala_id)
-    if resp is not None:
-        return resp, code
 
-    partida = _obtener_o_crear_partida(sala)
-    estado = _cargar_estado(partida)
+def _registrar_calles_y_premios(mesa: MesaPoker, visibles_antes: int):
+    """
+    Añade al historial las calles descubiertas por la última acción (una o
+    varias si hubo all-in) y, si la mano ha terminado, los premios. Si la mano
+    se gana porque los demás se retiran, el board restante no llega a repartirse.
+    """
+    estado = mesa.estado
+    jugadores = estado.get('jugadores') or {}
+    comunitarias = estado.get('cartas_comunitarias') or []
+    terminada = estado.get('fase') == 'terminada'
+    visibles = len(estado.get('cartas_comunitarias_visibles') or [])
+    vivos = [j for j in jugadores.values() if j.get('estado') in ('activo', 'all_in')]
+    if terminada and len(vivos) <= 1:
+        visibles = visibles_antes
+
+    for desde, hasta, calle in ((0, 3, 'flop'), (3, 4, 'turn'), (4, 5, 'river')):
+        if visibles_antes < hasta <= visibles:
+            registrar_accion(mesa, calle, cartas=comunitarias[desde:hasta])
+
+    if terminada:
+        for j in jugadores.values():
+            if j.get('devuelto'):
+                registrar_accion(mesa, 'devuelve', j['user_id'], j['devuelto'])
+            if j.get('ultima_ganancia'):
+                registrar_accion(mesa, 'gana', j['user_id'], j['ultima_ganancia'])
+
+
+def _aplicar_accion(mesa: MesaPoker, sala: SalaMultijugador, usuario: User,
+                    tipo: str, cantidad: float | None = None) -> tuple[dict, int]:
+    """
+    Valida y aplica una acción de apuesta del jugador sobre la mesa.
+    Devuelve (respuesta, código HTTP) para que la usen tanto las rutas HTTP
+    como el canal ``poker_action`` de Socket.IO.
+    """
+    sala_id = sala.id
+    estado = mesa.estado
 
     fase_actual = estado.get('fase')
     if fase_actual not in ('preflop', 'flop', 'turn', 'river'):
         if fase_actual == 'terminada':
-            return jsonify({'error': 'La mano ya ha finalizado'}), 400
-        return jsonify({'error': 'No se pueden realizar acciones en este momento'}), 400
+            return {'error': 'La mano ya ha finalizado'}, 400
+        return {'error': 'No se pueden realizar acciones en este momento'}, 400
 
     jugadores = estado.setdefault('jugadores', {})
-    _asegurar_jugador_en_estado(estado, current_user)
-    j = jugadores.get(str(current_user.id))
+    _asegurar_jugador_en_estado(estado, usuario)
+    j = jugadores.get(str(usuario.id))
 
     if j.get('estado') != 'activo':
-        return jsonify({'error': 'Ya no participas en esta mano'}), 400
+        return {'error': 'Ya no participas en esta mano'}, 400
     if estado.get('ganador'):
-        return jsonify({'error': 'La mano ya ha finalizado'}), 400
+        return {'error': 'La mano ya ha finalizado'}, 400
     turno_actual = estado.get('turno_actual')
-    if turno_actual is not None and turno_actual != current_user.id:
-        return jsonify({'error': 'No es tu turno'}), 400
+    if turno_actual is not None and turno_actual != usuario.id:
+        return {'error': 'No es tu turno'}, 400
 
     apuesta_ronda = float(estado.setdefault('apuesta_ronda', 0.0) or 0.0)
     apuesta_actual = float(j.get('apuesta_actual', 0.0) or 0.0)
@@ -758,19 +781,21 @@ def _accion_generica(sala_id: int, tipo: str, cantidad: float | None = None):
 
     mensaje = 'Acción realizada'
     tipo = tipo.lower()
+    aporte = 0.0
 
     if tipo == 'call':
         required = max(0.0, apuesta_ronda - apuesta_actual)
         if required <= 1e-6:
             j['ultima_accion'] = 'Check (auto)'
             mensaje = 'No había nada que igualar, se toma como check'
+            tipo = 'check'
         else:
             try:
-                aportado = comprometer(required)
+                aportado = aporte = comprometer(required)
             except ValueError as exc:
                 if 'stack' in str(exc):
-                    return jsonify({'error': 'No te quedan fichas en la mesa'}), 400
-                return jsonify({'error': 'No tienes saldo suficiente para igualar'}), 400
+                    return {'error': 'No te quedan fichas en la mesa'}, 400
+                return {'error': 'No tienes saldo suficiente para igualar'}, 400
             if aportado + 1e-6 < required:
                 j['ultima_accion'] = f'All-in {aportado:.2f}€'
                 mensaje = 'Te has puesto all-in'
@@ -780,7 +805,7 @@ def _accion_generica(sala_id: int, tipo: str, cantidad: float | None = None):
 
     elif tipo == 'check':
         if apuesta_ronda - apuesta_actual > 1e-6:
-            return jsonify({'error': 'No puedes hacer check, hay una apuesta activa'}), 400
+            return {'error': 'No puedes hacer check, hay una apuesta activa'}, 400
         j['ultima_accion'] = 'Check'
         mensaje = 'Has hecho check'
 
@@ -790,22 +815,20 @@ def _accion_generica(sala_id: int, tipo: str, cantidad: float | None = None):
         mensaje = 'Te has retirado'
 
     elif tipo == 'raise':
-        if cantidad is None or cantidad <= 0:
-            return jsonify({'error': 'Indica cuánto quieres subir'}), 400
+        if cantidad is None or not math.isfinite(cantidad) or cantidad <= 0:
+            return {'error': 'Indica cuánto quieres subir'}, 400
         subida = float(cantidad)
         apuesta_minima = getattr(sala, 'apuesta_minima', None) or 10.0
         if subida < apuesta_minima:
-            return jsonify({'error': f'La subida mínima es de {apuesta_minima:.2f}€'}), 400
+            return {'error': f'La subida mínima es de {apuesta_minima:.2f}€'}, 400
         total_a_pagar = max(0.0, apuesta_ronda - apuesta_actual) + subida
-        try:
-            aportado = comprometer(total_a_pagar)
-        except ValueError as exc:
-            clave = str(exc)
-            if 'balance' in clave:
-                return jsonify({'error': 'Saldo insuficiente para subir'}), 400
-            return jsonify({'error': 'No te queda stack en la mesa'}), 400
-        if aportado + 1e-6 < total_a_pagar:
-            return jsonify({'error': 'No te queda stack suficiente para hacer raise'}), 400
+        # Validar antes de tocar el estado: la mesa en memoria es la fuente de verdad
+        stack_disponible = float(j.get('stack', 0.0) or 0.0)
+        if stack_disponible <= 0:
+            return {'error': 'No te queda stack en la mesa'}, 400
+        if stack_disponible + 1e-6 < total_a_pagar:
+            return {'error': 'No te queda stack suficiente para hacer raise'}, 400
+        aporte = comprometer(total_a_pagar)
         estado['apuesta_ronda'] = float(apuesta_ronda + subida)
         j['ultima_accion'] = f'Raise {subida:.2f}€'
         mensaje = 'Has subido la apuesta'
@@ -814,22 +837,35 @@ def _accion_generica(sala_id: int, tipo: str, cantidad: float | None = None):
                 info['ha_actuado'] = False
 
     else:
-        return jsonify({'error': 'Acción no soportada'}), 400
+        return {'error': 'Acción no soportada'}, 400
 
     j['ha_actuado'] = True
+    registrar_accion(mesa, tipo, usuario.id, aporte)
 
     fase_antes = estado.get('fase')
+    visibles_antes = len(estado.get('cartas_comunitarias_visibles') or [])
     _resolver_si_todos_han_actuado(estado, sala_id)
     _actualizar_turno_despues_accion(estado, fase_antes)
     _auto_avanzar_si_todos_all_in(estado, sala_id)
     _forzar_turno_para_pagar_si_falta(estado)
-    _guardar_estado(partida, estado)
+    _registrar_calles_y_premios(mesa, visibles_antes)
+    # Al terminar la mano se han movido saldos: snapshot inmediato en la misma transacción
+    _guardar_estado(mesa, inmediato=estado.get('fase') == 'terminada')
 
-    return jsonify({
+    return {
         'mensaje': mensaje,
         'estado': estado.get('fase'),
-        'nuevo_balance': round(float(getattr(current_user, 'balance', 0.0)), 2)
-    })
+        'nuevo_balance': round(float(getattr(usuario, 'balance', 0.0)), 2)
+    }, 200
+
+
+def _accion_generica(sala_id: int, tipo: str, cantidad: float | None = None):
+    sala, usuario_sala, resp, code = _asegurar_usuario_en_sala(sala_id)
+    if resp is not None:
+        return resp, code
+
+    respuesta, code = _aplicar_accion(obtener_mesa(sala), sala, current_user, tipo, cantidad)
+    return jsonify(respuesta), code
 
 
 # ===========================
@@ -843,8 +879,8 @@ def estado(sala_id):
     if resp is not None:
         return resp, code
 
-    partida = _obtener_o_crear_partida(sala)
-    estado = _cargar_estado(partida)
+    mesa = obtener_mesa(sala)
+    estado = mesa.estado
     # Si la fase es una mano activa pero sin apuestas/cartas visibles, la consideramos terminada para permitir buy-in
     fase = estado.get('fase')
     if fase in ('preflop', 'flop', 'turn', 'river') and not estado.get('ganador'):
@@ -857,13 +893,61 @@ def estado(sala_id):
             for info in (estado.get('jugadores') or {}).values():
                 info['apuesta_actual'] = 0.0
                 info['total_aportado'] = info.get('total_aportado') or 0.0
-            _guardar_estado(partida, estado)
+            _guardar_estado(mesa)
     # Aseguramos que el jugador actual exista en el estado con stack inicial 0
     ya_estaba = str(current_user.id) in (estado.get('jugadores') or {})
     _asegurar_jugador_en_estado(estado, current_user)
     if not ya_estaba:
-        _guardar_estado(partida, estado)
-    return jsonify(_sanitizar_estado_para_usuario(estado, current_user.id))
+        _guardar_estado(mesa)
+    return current_app.response_class(vista_json(mesa, current_user.id), mimetype='application/json')
+
+
+@bp.route('/api/multijugador/poker/equity/<int:sala_id>', methods=['GET'])
+@login_required
+def equity(sala_id):
+    sala, usuario_sala, resp, code = _asegurar_usuario_en_sala(sala_id)
+    if resp is not None:
+        return resp, code
+
+    estado = obtener_mesa(sala).estado
+    return jsonify({
+        'sala_id': sala_id,
+        'fase': estado.get('fase'),
+        'equity': _equity_para_usuario(estado, current_user.id),
+        'preflop': _pista_preflop(estado, current_user.id)
+    })
+
+
+@bp.route('/api/multijugador/poker/historial/<int:sala_id>/<int:mano>', methods=['GET'])
+@login_required
+def historial_mano(sala_id, mano):
+    """Replay de una mano terminada; ``?calle=flop`` la detiene al final de esa calle."""
+    sala, usuario_sala, resp, code = _asegurar_usuario_en_sala(sala_id)
+    if resp is not None:
+        return resp, code
+
+    calle = request.args.get('calle')
+    if calle is not None and calle not in CALLES:
+        return jsonify({'error': 'Calle no válida'}), 400
+
+    mesa = obtener_mesa(sala)
+    estado = mesa.estado
+    if mano == estado.get('mano') and estado.get('fase') != 'terminada':
+        return jsonify({'error': 'La mano sigue en juego'}), 400
+
+    filas = filas_mano(mesa.partida_id, mano)
+    if not filas:
+        return jsonify({'error': 'Mano no encontrada'}), 404
+
+    replay = reconstruir_mano(filas, calle)
+    ids = [j['user_id'] for j in replay['jugadores'].values()]
+    nombres = dict(db.session.query(User.id, User.username).filter(User.id.in_(ids)).all())
+    for j in replay['jugadores'].values():
+        j['username'] = nombres.get(j['user_id'], f"Usuario {j['user_id']}")
+
+    replay['sala_id'] = sala_id
+    replay['mano'] = mano
+    return jsonify(replay)
 
 
 @bp.route('/api/multijugador/poker/stack/<int:sala_id>', methods=['POST'])
@@ -873,8 +957,8 @@ def ajustar_stack(sala_id):
     if resp is not None:
         return resp, code
 
-    partida = _obtener_o_crear_partida(sala)
-    estado = _cargar_estado(partida)
+    mesa = obtener_mesa(sala)
+    estado = mesa.estado
     jugador_estado = _asegurar_jugador_en_estado(estado, current_user)
 
     data = request.get_json() or {}
@@ -900,10 +984,10 @@ def ajustar_stack(sala_id):
         jugador_estado['saldo_cuenta'] = float(current_user.balance)
         jugador_estado['ultima_accion'] = f'Stack mesa: {nuevo_stack:.2f}€'
         db.session.add(current_user)
-        _guardar_estado(partida, estado)
+        _guardar_estado(mesa, inmediato=True)
     else:
         jugador_estado['saldo_cuenta'] = float(current_user.balance)
-        _guardar_estado(partida, estado)
+        _guardar_estado(mesa)
 
     return jsonify({
         'mensaje': 'Stack actualizado',
@@ -924,8 +1008,8 @@ def iniciar_mano(sala_id):
     if sala.creador_id != current_user.id:
         return jsonify({'error': 'Solo el creador de la sala puede iniciar una mano'}), 403
 
-    partida = _obtener_o_crear_partida(sala)
-    estado_previo = _cargar_estado(partida)
+    mesa = obtener_mesa(sala)
+    estado_previo = mesa.estado
     jugadores_previos = estado_previo.get('jugadores', {}) if isinstance(estado_previo, dict) else {}
 
     mazo = _crear_mazo()
@@ -1008,8 +1092,15 @@ def iniciar_mano(sala_id):
         'turno_idx': None,
         'turno_actual': None,
         'small_blind': round(small_blind, 2),
-        'big_blind': round(big_blind, 2)
+        'big_blind': round(big_blind, 2),
+        'mano': int(estado_previo.get('mano', 0) or 0) + 1,
+        'n_acciones': 0,
+        'version': mesa.version
     }
+    mesa.estado = estado
+    for uid in orden_turnos:
+        j = jugadores_estado[str(uid)]
+        registrar_accion(mesa, 'reparto', uid, j['stack'], j['cartas'])
 
     sb_jugador = jugadores_estado.get(str(orden_turnos[sb_index]))
     bb_jugador = jugadores_estado.get(str(orden_turnos[bb_index]))
@@ -1017,20 +1108,23 @@ def iniciar_mano(sala_id):
         aporte_sb = _apostar_blind(sb_jugador, estado['small_blind'], estado)
         if aporte_sb:
             sb_jugador['ultima_accion'] = f'Ciega pequeña {aporte_sb:.2f}€'
+            registrar_accion(mesa, 'ciega', sb_jugador['user_id'], aporte_sb)
     if bb_jugador and bb_jugador is not sb_jugador:
         aporte_bb = _apostar_blind(bb_jugador, estado['big_blind'], estado)
         if aporte_bb:
             bb_jugador['ultima_accion'] = f'Ciega grande {aporte_bb:.2f}€'
+            registrar_accion(mesa, 'ciega', bb_jugador['user_id'], aporte_bb)
         estado['apuesta_ronda'] = max(estado['apuesta_ronda'], aporte_bb)
     elif bb_jugador and bb_jugador is sb_jugador:
         aporte_bb = _apostar_blind(bb_jugador, estado['big_blind'], estado)
         if aporte_bb:
             bb_jugador['ultima_accion'] = f'Ciega grande {aporte_bb:.2f}€'
+            registrar_accion(mesa, 'ciega', bb_jugador['user_id'], aporte_bb)
         estado['apuesta_ronda'] = max(estado['apuesta_ronda'], aporte_bb)
 
     _establecer_turno_para_fase(estado, 'preflop')
 
-    _guardar_estado(partida, estado)
+    _guardar_estado(mesa, inmediato=True)
 
     return jsonify({'mensaje': 'Nueva mano de póker iniciada'})
 
@@ -1,23 +1,37 @@
 # server/endpoints/protected/api/juegos/multiplayer/poker/socket_handlers.py
 
+import math
 from datetime import datetime
 
 from flask import request
 from flask_login import current_user
 from flask_socketio import join_room, leave_room, emit
 
-from models import SalaMultijugador, UsuarioSala, PartidaMultijugador, User, db
-import json
+from models import SalaMultijugador, UsuarioSala, User, db
+from .mesa import (
+    emitir_estado,
+    marcar_cambio,
+    obtener_mesa,
+    obtener_mesa_por_id,
+    room_asiento,
+    room_mesa,
+    vista_para_usuario,
+)
+
+# Alias aceptados en ``poker_action`` (los mismos que exponen las rutas HTTP)
+TIPOS_ACCION = {
+    'raise': 'raise', 'apostar': 'raise',
+    'call': 'call',
+    'check': 'check', 'pasar': 'check',
+    'fold': 'fold', 'retirarse': 'fold',
+}
 
 
 def register_poker_handlers(socketio, app):
     """
-    Registra eventos Socket.IO específicos de póker (chat + señales ligeras).
+    Registra eventos Socket.IO específicos de póker (unión a la mesa, vista por asiento y acciones).
     Se invoca una única vez desde el blueprint mediante @bp.record_once.
     """
-    def _room_name(sala_id: int) -> str:
-        return f"sala_{sala_id}"
-
     def _usuario_pertenece(sala_id: int, user_id: int) -> bool:
         return UsuarioSala.query.filter_by(
             sala_id=sala_id,
@@ -25,18 +39,10 @@ def register_poker_handlers(socketio, app):
         ).first() is not None
 
     def _return_stack_to_balance(sala_id: int, user_id: int):
-        partida = (
-            PartidaMultijugador.query
-            .filter_by(sala_id=sala_id, estado='activa')
-            .order_by(PartidaMultijugador.fecha_inicio.desc())
-            .first()
-        )
-        if not partida:
-            return
-        try:
-            estado = json.loads(partida.datos_juego or '{}')
-        except json.JSONDecodeError:
+        mesa = obtener_mesa_por_id(sala_id)
+        if mesa is None:
             return
+        estado = mesa.estado
         jugadores = estado.get('jugadores') or {}
         jug = jugadores.get(str(user_id))
         if not jug:
@@ -52,10 +58,8 @@ def register_poker_handlers(socketio, app):
         jug['stack'] = 0.0
         jug['saldo_cuenta'] = nuevo_balance
         jug['ultima_accion'] = 'Sale de la mesa'
-        estado['jugadores'][str(user_id)] = jug
-        partida.datos_juego = json.dumps(estado)
-        db.session.commit()
-        socketio.emit('poker_estado_actualizado', {'sala_id': sala_id}, room=_room_name(sala_id))
+        marcar_cambio(mesa, inmediato=True)
+        emitir_estado(mesa)
 
     @socketio.on('poker_join')
     def poker_join(data):
@@ -76,7 +80,16 @@ def register_poker_handlers(socketio, app):
             emit('poker_error', {'error': 'No perteneces a esta sala'}, room=request.sid)
             return
 
-        join_room(_room_name(sala_id))
+        join_room(room_mesa(sala_id))
+        join_room(room_asiento(sala_id, current_user.id))
+
+        # Vista inicial del asiento; las siguientes llegan con cada versión
+        mesa = obtener_mesa(sala)
+        emit('poker_estado_actualizado', {
+            'sala_id': sala_id,
+            'seq': mesa.version,
+            'estado': vista_para_usuario(mesa, current_user.id)
+        }, room=request.sid)
 
     @socketio.on('poker_leave')
     def poker_leave(data):
@@ -88,5 +101,50 @@ def register_poker_handlers(socketio, app):
         except (TypeError, ValueError):
             return
         _return_stack_to_balance(sala_id, current_user.id)
-        leave_room(_room_name(sala_id))
+        leave_room(room_asiento(sala_id, current_user.id))
+        leave_room(room_mesa(sala_id))
+
+    @socketio.on('poker_action')
+    def poker_action(data):
+        """
+        Canal de acciones por Socket.IO: aplica la acción y devuelve en el ack
+        la nueva vista personal, sin la ida y vuelta extra de ``/estado``.
+        Las rutas HTTP (``/apostar``, ``/call``, ...) siguen como respaldo.
+        """
+        # Import diferido: routes importa este módulo al registrarse
+        from .routes import _aplicar_accion
+
+        if not current_user.is_authenticated:
+            return {'ok': False, 'error': 'No autenticado'}
+        data = data or {}
+        try:
+            sala_id = int(data.get('sala_id'))
+        except (TypeError, ValueError):
+            return {'ok': False, 'error': 'Sala no válida'}
+
+        tipo = TIPOS_ACCION.get(str(data.get('tipo') or '').lower())
+        if tipo is None:
+            return {'ok': False, 'error': 'Acción no soportada'}
+        cantidad = None
+        if tipo == 'raise':
+            try:
+                cantidad = float(data.get('cantidad', 0))
+            except (TypeError, ValueError):
+                return {'ok': False, 'error': 'Cantidad no válida'}
+            # float() acepta "nan" e "inf": NaN pasaría todas las comparaciones y dejaría el bote en NaN
+            if not math.isfinite(cantidad) or cantidad <= 0:
+                return {'ok': False, 'error': 'Cantidad no válida'}
+
+        sala = SalaMultijugador.query.get(sala_id)
+        if not sala or sala.juego != 'poker':
+            return {'ok': False, 'error': 'Sala no encontrada'}
+        if not _usuario_pertenece(sala_id, current_user.id):
+            return {'ok': False, 'error': 'No perteneces a esta sala'}
 
+        mesa = obtener_mesa(sala)
+        respuesta, code = _aplicar_accion(mesa, sala, current_user, tipo, cantidad)
+        respuesta['ok'] = code == 200
+        respuesta['sala_id'] = sala_id
+        respuesta['seq'] = mesa.version
+        respuesta['vista'] = vista_para_usuario(mesa, current_user.id)
+        return respuesta
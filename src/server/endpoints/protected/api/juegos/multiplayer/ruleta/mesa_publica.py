@@ -0,0 +1,303 @@
+# server/endpoints/protected/api/juegos/multiplayer/ruleta/mesa_publica.py
+"""
+Mesas públicas de ruleta: una mesa siempre abierta por nivel de apuesta que
+gira cada ``CADENCIA_SEGUNDOS`` sin límite de jugadores (a diferencia de las
+salas de 2-4 plazas de ``SalaMultijugador``).
+
+Las apuestas de cada ronda se acumulan en memoria, ya compiladas por el motor
+(``validar_apuestas``), y el saldo se retiene al apostar con un UPDATE
+condicional y una fila de ``Retencion`` en la ronda de la mesa. En cada giro se liquidan todas de una vez (``liquidar``) y se
+aplican en bloque con un número fijo de sentencias. El resultado se emite una
+sola vez a la sala de la mesa y el pago de cada jugador a su sala personal
+(``room_usuario``).
+
+El estado vive en un único proceso servidor, como en el resto de juegos
+multijugador. El bucle de cada mesa arranca con el primer jugador que se une y
+se detiene tras ``RONDAS_VACIAS_MAX`` giros seguidos sin apuestas. En modo
+TESTING no se arranca: los giros se lanzan con ``girar_mesa``.
+"""
+
+import random
+import time
+
+from flask import current_app, request
+from flask_login import current_user
+from flask_socketio import join_room, leave_room, emit
+from sqlalchemy import bindparam, func, insert, update
+
+from models import db, User, Apuesta
+from ...motor_ruleta import liquidar, validar_apuestas, total_apostado, ApuestaInvalida
+from ...historial_ruleta import HistorialRuleta
+from ...liquidacion import abonar_y_sumar
+from ...rondas import abrir_ronda, retener, liquidar_ronda
+
+CADENCIA_SEGUNDOS = 30
+RONDAS_VACIAS_MAX = 20
+
+# Niveles de apuesta: mínimo por casilla y máximo por jugador y ronda, en céntimos
+NIVELES = {
+    'bronce': {'nombre': 'Mesa Bronce', 'min_cell': 20, 'max_ronda': 5_000},
+    'plata': {'nombre': 'Mesa Plata', 'min_cell': 100, 'max_ronda': 50_000},
+    'oro': {'nombre': 'Mesa Oro', 'min_cell': 500, 'max_ronda': 500_000},
+}
+
+mesas_publicas = {}
+
+
+def room_mesa_publica(nivel: str) -> str:
+    """Sala Socket.IO de la mesa pública (resultados y estado de ronda)."""
+    return f"ruleta_publica_{nivel}"
+
+
+def room_usuario(user_id: int) -> str:
+    """Sala Socket.IO personal de un jugador (todas sus pestañas y mesas)."""
+    return f"ruleta_publica_usuario_{user_id}"
+
+
+def obtener_mesa(nivel: str) -> dict:
+    mesa = mesas_publicas.get(nivel)
+    if mesa is None:
+        mesa = mesas_publicas[nivel] = {
+            'nivel': nivel,
+            'ronda': 1,
+            'ronda_id': None,  # RondaJuego de la ronda en curso (con la primera apuesta)
+            'apuestas': {},   # uid -> [(mascara, cuota, cantidad), ...]
+            'apostado': {},   # uid -> céntimos apostados en la ronda
+            'cierre_ts': time.time() + CADENCIA_SEGUNDOS,
+            'ultimo_resultado': None,
+            'historial': HistorialRuleta(),
+            'rondas_vacias': 0,
+            'bucle_activo': False,
+        }
+    return mesa
+
+
+def serializar_mesa(mesa: dict) -> dict:
+    nivel = NIVELES[mesa['nivel']]
+    return {
+        'nivel': mesa['nivel'],
+        'nombre': nivel['nombre'],
+        'min_cell': nivel['min_cell'],
+        'max_ronda': nivel['max_ronda'],
+        'ronda': mesa['ronda'],
+        'segundos_restantes': max(0, int(round(mesa['cierre_ts'] - time.time()))),
+        'apostantes': len(mesa['apostado']),
+        'total_apostado': sum(mesa['apostado'].values()),
+        'ultimo_resultado': mesa['ultimo_resultado'],
+        'historial': mesa['historial'].serializar(),
+    }
+
+
+def colocar_apuestas(nivel: str, user_id: int, bets) -> dict:
+    """
+    Valida las apuestas, retiene su importe del saldo y las suma a la ronda en
+    curso. Lanza ``ApuestaInvalida`` si la jugada, el límite de la mesa o el
+    saldo no lo permiten.
+    """
+    config = NIVELES[nivel]
+    mesa = obtener_mesa(nivel)
+    compiladas = validar_apuestas(bets, config['min_cell'])
+    total_cents = total_apostado(compiladas)
+    if mesa['apostado'].get(user_id, 0) + total_cents > config['max_ronda']:
+        raise ApuestaInvalida(f"Máximo por ronda en esta mesa: {config['max_ronda'] / 100:.2f}€")
+
+    # Retención atómica: solo descuenta si hay saldo suficiente
+    total_euros = total_cents / 100.0
+    tabla_users = User.__table__
+    retenido = db.session.execute(
+        update(tabla_users)
+        .where(tabla_users.c.id == user_id, tabla_users.c.balance >= total_euros)
+        .values(balance=tabla_users.c.balance - total_euros)
+    ).rowcount
+    if not retenido:
+        db.session.rollback()
+        raise ApuestaInvalida('Fondos insuficientes')
+    if not mesa['ronda_id']:
+        mesa['ronda_id'] = abrir_ronda('ruleta', 'multiplayer').id
+    retener(mesa['ronda_id'], user_id, total_euros)
+    balance = db.session.query(User.balance).filter(User.id == user_id).scalar()
+    db.session.commit()
+
+    ronda = mesa['ronda']
+    mesa['apuestas'].setdefault(user_id, []).extend(compiladas)
+    mesa['apostado'][user_id] = mesa['apostado'].get(user_id, 0) + total_cents
+    return {
+        'nivel': nivel,
+        'ronda': ronda,
+        'importe': total_cents,
+        'apostado_ronda': mesa['apostado'][user_id],
+        'balance': balance,
+    }
+
+
+def aplicar_liquidacion(liquidacion: dict, resultado: int) -> dict:
+    """
+    Aplica en bloque ``{uid: {'apostado', 'ganancia', 'devuelto'}}`` (céntimos):
+    saldos y estadísticas con ``abonar_y_sumar`` e inserción en lote de Apuesta.
+    Devuelve el balance final de cada usuario.
+    """
+    if not liquidacion:
+        return {}
+    balances = abonar_y_sumar('ruleta', 'multiplayer', {
+        uid: {'pago': imp['devuelto'] / 100.0, 'ganadas': 1 if imp['ganancia'] > 0 else 0,
+              'apostado': imp['apostado'] / 100.0, 'ganancia': imp['ganancia'] / 100.0}
+        for uid, imp in liquidacion.items()
+    })
+    liquidacion = {uid: imp for uid, imp in liquidacion.items() if uid in balances}
+    if liquidacion:
+        db.session.execute(insert(Apuesta), [
+            {'user_id': uid, 'juego': 'ruleta', 'tipo_juego': 'multiplayer',
+             'cantidad': imp['apostado'] / 100.0, 'ganancia': imp['ganancia'] / 100.0,
+             'resultado': f"Número {resultado} - Ganancia: {imp['ganancia'] / 100.0:.2f}€"}
+            for uid, imp in liquidacion.items()
+        ])
+    return balances
+
+
+def devolver_ronda(ronda_id, apostado: dict):
+    """
+    Devuelve al saldo lo apostado ``{uid: céntimos}`` en una ronda que no se
+    pudo liquidar y cierra sus retenciones con ese pago, para que no quede
+    dinero retenido sin apuestas detrás.
+    """
+    if not apostado:
+        return
+    try:
+        tabla_users = User.__table__
+        db.session.execute(
+            update(tabla_users)
+            .where(tabla_users.c.id == bindparam('b_uid'))
+            .values(balance=func.coalesce(tabla_users.c.balance, 0.0) + bindparam('b_pago')),
+            [{'b_uid': uid, 'b_pago': cents / 100.0} for uid, cents in apostado.items()]
+        )
+        if ronda_id:
+            liquidar_ronda(ronda_id, {uid: {'pago': cents / 100.0, 'resultado': 'devuelta'}
+                                      for uid, cents in apostado.items()}, 'devuelta')
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ No se pudo devolver lo apostado en la ronda {ronda_id}: {e}")
+
+
+def girar_mesa(nivel: str, resultado: int = None) -> int:
+    """
+    Cierra la ronda en curso, la liquida en bloque y abre la siguiente. Emite
+    el resultado a la mesa y a cada apostante su pago en su sala personal.
+    """
+    mesa = obtener_mesa(nivel)
+    apuestas = mesa['apuestas']
+    ronda = mesa['ronda']
+    ronda_id = mesa['ronda_id']
+    apostado = mesa['apostado']
+    total = sum(apostado.values())
+    # La siguiente ronda se abre antes de tocar la base de datos: lo que llegue
+    # durante la liquidación ya cuenta para ella. Si la liquidación falla, se
+    # devuelve lo retenido en la ronda cerrada (ver ``devolver_ronda``)
+    mesa.update(apuestas={}, apostado={}, ronda=ronda + 1, ronda_id=None,
+                cierre_ts=time.time() + CADENCIA_SEGUNDOS)
+    mesa['rondas_vacias'] = 0 if apuestas else mesa['rondas_vacias'] + 1
+
+    if resultado is None:
+        resultado = random.randint(0, 36)
+    liquidacion = liquidar(apuestas, resultado)
+    try:
+        balances = aplicar_liquidacion(liquidacion, resultado)
+        if ronda_id:
+            liquidar_ronda(ronda_id, {uid: {'pago': imp['devuelto'] / 100.0}
+                                      for uid, imp in liquidacion.items()}, resultado)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        devolver_ronda(ronda_id, apostado)
+        raise
+    mesa['ultimo_resultado'] = resultado
+    mesa['historial'].registrar(resultado)
+
+    socketio = current_app.extensions['socketio']
+    socketio.emit('ruleta_publica_resultado', {
+        'nivel': nivel,
+        'ronda': ronda,
+        'resultado': resultado,
+        'apostantes': len(liquidacion),
+        'total_apostado': total,
+        'total_pagado': sum(imp['devuelto'] for imp in liquidacion.values()),
+        'mesa': serializar_mesa(mesa),
+    }, to=room_mesa_publica(nivel))
+    for uid, imp in liquidacion.items():
+        socketio.emit('ruleta_publica_pago', {
+            'nivel': nivel,
+            'ronda': ronda,
+            'resultado': resultado,
+            'apostado': imp['apostado'],
+            'ganancia': imp['ganancia'],
+            'devuelto': imp['devuelto'],
+            'balance': balances.get(uid),
+        }, to=room_usuario(uid))
+    return resultado
+
+
+def _asegurar_bucle(socketio, app, nivel: str):
+    mesa = obtener_mesa(nivel)
+    if mesa['bucle_activo'] or app.config.get('TESTING'):
+        return
+    mesa['bucle_activo'] = True
+    mesa['rondas_vacias'] = 0
+    if mesa['cierre_ts'] <= time.time():
+        mesa['cierre_ts'] = time.time() + CADENCIA_SEGUNDOS
+
+    def _bucle():
+        try:
+            while mesa['rondas_vacias'] < RONDAS_VACIAS_MAX:
+                espera = mesa['cierre_ts'] - time.time()
+                if espera > 0:
+                    socketio.sleep(min(espera, 1.0))
+                    continue
+                with app.app_context():
+                    try:
+                        girar_mesa(nivel)
+                    except Exception as e:
+                        print(f"❌ Error en el giro de la mesa pública {nivel}: {e}")
+                        mesa['cierre_ts'] = time.time() + CADENCIA_SEGUNDOS
+        finally:
+            mesa['bucle_activo'] = False
+
+    socketio.start_background_task(_bucle)
+
+
+def register_mesa_publica_handlers(socketio, app):
+    print("✅ Registrando handlers de Ruleta pública")
+
+    @socketio.on('unirse_ruleta_publica')
+    def handle_unirse(data):
+        if not current_user.is_authenticated:
+            return
+        nivel = (data or {}).get('nivel')
+        if nivel not in NIVELES:
+            emit('error', {'message': 'Mesa no encontrada'}, room=request.sid)
+            return
+        join_room(room_mesa_publica(nivel))
+        join_room(room_usuario(current_user.id))
+        _asegurar_bucle(socketio, app, nivel)
+        emit('ruleta_publica_estado', serializar_mesa(obtener_mesa(nivel)), room=request.sid)
+
+    @socketio.on('salir_ruleta_publica')
+    def handle_salir(data):
+        nivel = (data or {}).get('nivel')
+        if nivel in NIVELES:
+            leave_room(room_mesa_publica(nivel))
+
+    @socketio.on('ruleta_publica_apostar')
+    def handle_apostar(data):
+        if not current_user.is_authenticated:
+            return
+        data = data or {}
+        nivel = data.get('nivel')
+        if nivel not in NIVELES:
+            emit('error_apuesta', {'message': 'Mesa no encontrada'}, room=request.sid)
+            return
+        try:
+            aceptada = colocar_apuestas(nivel, current_user.id, data.get('apuestas'))
+        except ApuestaInvalida as e:
+            emit('error_apuesta', {'message': str(e)}, room=request.sid)
+            return
+        emit('ruleta_publica_apuesta_aceptada', aceptada, to=room_usuario(current_user.id))
@@ -1,7 +1,9 @@
 from flask import Blueprint, request, jsonify, render_template
 from flask_login import login_required, current_user
-from models import db, SalaMultijugador, UsuarioSala, PartidaMultijugador, Apuesta, Estadistica, User
+from models import db, SalaMultijugador, UsuarioSala, PartidaMultijugador, Estadistica, User
 from datetime import datetime
+from ...motor_ruleta import liquidar, validar_apuestas, total_apostado, ApuestaInvalida
+from ...rondas import abrir_ronda, retener, liquidar_ronda
 import json, random
 
 bp = Blueprint('api_multijugador_ruleta', __name__)
@@ -38,8 +40,23 @@ def sala_ruleta(sala_id):
 
     return render_template('pages/casino/juegos/multiplayer/ruleta.html', sala=sala, user=current_user, multijugador=True, realtime_required=True)
 
+@bp.route('/ruleta/publica')
+@login_required
+def mesas_publicas_home():
+    """Mesas públicas de ruleta: siempre abiertas, sin sala ni límite de jugadores."""
+    return render_template('pages/casino/juegos/multiplayer/ruleta_publica.html', user=current_user,
+                           niveles=NIVELES, realtime_required=True)
+
+
+@bp.route('/ruleta/publica/mesas', methods=['GET'])
+@login_required
+def estado_mesas_publicas():
+    """Estado de la ronda en curso de cada mesa pública."""
+    return jsonify([serializar_mesa(obtener_mesa(nivel)) for nivel in NIVELES])
+
 # Registrar handlers de Socket.IO cuando el blueprint se registre (patrón igual a coinflip)
-from .socket_handlers import register_ruleta_handlers
+from .socket_handlers import register_ruleta_handlers, salas_ruleta, historial_sala
+from .mesa_publica import register_mesa_publica_handlers, NIVELES, obtener_mesa, serializar_mesa
 
 
 @bp.record_once
@@ -47,6 +64,7 @@ def on_register(state):
     socketio = state.app.extensions.get('socketio')
     if socketio:
         register_ruleta_handlers(socketio, state.app)
+        register_mesa_publica_handlers(socketio, state.app)
         print("✅ Handlers de Ruleta multijugador registrados desde blueprint")
     else:
         print("❌ SocketIO no encontrado al registrar handlers de Ruleta")
@@ -162,6 +180,12 @@ def place_secret_bet():
     if not sala or sala.juego != 'ruleta':
         return jsonify({'error': 'Sala no encontrada'}), 404
 
+    # validar y compilar antes de tocar balance o partida
+    try:
+        compiladas = validar_apuestas(bets)
+    except ApuestaInvalida as e:
+        return jsonify({'error': str(e)}), 400
+
     # buscar o crear PartidaMultijugador activa para la sala
     partida = PartidaMultijugador.query.filter_by(sala_id=sala.id, estado='activa').order_by(PartidaMultijugador.id.desc()).first()
     if not partida:
@@ -169,11 +193,7 @@ def place_secret_bet():
         db.session.add(partida)
         db.session.commit()
 
-    # calcular total cents
-    total_cents = 0
-    for b in bets:
-        amt = int(b.get('amount', 0))
-        total_cents += amt
+    total_cents = total_apostado(compiladas)
 
     total_euros = total_cents / 100.0
     if total_euros > current_user.balance:
@@ -187,18 +207,21 @@ def place_secret_bet():
     if 'created_at' not in partida_data:
         partida_data['created_at'] = datetime.utcnow().isoformat()
     bets_map = partida_data.get('bets', {})
+    # lo ya retenido en la partida sigue en juego: las apuestas nuevas se suman
+    previa = bets_map.get(str(current_user.id), {'bets': [], 'amount_cents': 0})
     bets_map[str(current_user.id)] = {
-        'bets': bets,
-        'amount_cents': total_cents,
+        'bets': previa['bets'] + compiladas,
+        'amount_cents': previa['amount_cents'] + total_cents,
         'has_spun': False,
         'submitted_at': datetime.utcnow().isoformat()
     }
     partida_data['bets'] = bets_map
-    _save_partida(partida, partida_data)
 
-    # crear registro Apuesta pendiente
-    apuesta = Apuesta(user_id=current_user.id, juego='ruleta', tipo_juego='multiplayer', cantidad=total_euros, ganancia=0, resultado='PENDIENTE')
-    db.session.add(apuesta)
+    # retener en la ronda de la partida (con su Apuesta pendiente)
+    if not partida_data.get('ronda_id'):
+        partida_data['ronda_id'] = abrir_ronda('ruleta', 'multiplayer', sala.id).id
+    retener(partida_data['ronda_id'], current_user.id, total_euros, pendiente=True)
+    _save_partida(partida, partida_data)
     db.session.commit()
 
     return jsonify({'ok': True, 'balance': int(current_user.balance * 100), 'message': 'Apuesta secreta registrada'})
@@ -251,57 +274,25 @@ def spin_room():
     # efectuar giro
     result_number = random.randint(0, 36)
 
-    # payout logic similar a api_ruleta
-    PAYOUT = {
-        'straight': 35, 'split': 17, 'street': 11,
-        'corner': 8, 'line': 5, 'dozen': 2, 'column': 2, 'even': 1
-    }
-    REDS = {1,3,5,7,9,12,14,16,18,19,21,23,25,27,30,32,34,36}
-
     results_public = {}
+    pagos = {}
+    liquidacion = liquidar({uid: info.get('bets', []) for uid, info in bets_map.items()}, result_number)
     # procesar cada apuesta
-    for uid, info in bets_map.items():
-        inner_bets = info.get('bets', [])
-        total_bet_cents = 0
-        total_win_cents = 0
-        total_returned_cents = 0
-        for bet in inner_bets:
-            tipo = bet.get('type')
-            cantidad = int(bet.get('amount', 0))
-            numeros = set(bet.get('set', []))
-            label = bet.get('label', '').lower()
-            total_bet_cents += cantidad
-            gana = False
-            if tipo == 'even':
-                if ('rojo' in label and result_number in REDS) \
-                or ('negro' in label and result_number not in REDS and result_number != 0) \
-                or ('par' in label and result_number % 2 == 0 and result_number != 0) \
-                or ('impar' in label and result_number % 2 == 1) \
-                or ('1-18' in label and 1 <= result_number <= 18) \
-                or ('19-36' in label and 19 <= result_number <= 36):
-                    gana = True
-            elif result_number in numeros:
-                gana = True
-
-            if gana:
-                total_win_cents += cantidad * PAYOUT.get(tipo, 0)
-                total_returned_cents += cantidad
-
-        total_bet_euros = total_bet_cents / 100.0
-        total_win_euros = total_win_cents / 100.0
-        total_returned_euros = total_returned_cents / 100.0
-        total_payout_euros = total_win_euros + total_returned_euros
+    for uid, importes in liquidacion.items():
+        total_bet_euros = importes['apostado'] / 100.0
+        total_win_euros = importes['ganancia'] / 100.0
+        total_payout_euros = importes['devuelto'] / 100.0
 
         # actualizar balance (la apuesta ya se descontó en /place)
         user = User.query.get(int(uid))
         if user:
             user.balance += total_payout_euros
 
-        # actualizar Apuesta pendiente
-        apuesta = Apuesta.query.filter_by(user_id=int(uid), juego='ruleta', tipo_juego='multiplayer', resultado='PENDIENTE').order_by(Apuesta.id.desc()).first()
-        if apuesta:
-            apuesta.ganancia = total_win_euros
-            apuesta.resultado = f'Número {result_number} - Ganancia: {total_win_euros:.2f}€'
+        pagos[int(uid)] = {
+            'pago': total_payout_euros,
+            'ganancia': total_win_euros,
+            'resultado': f'Número {result_number} - Ganancia: {total_win_euros:.2f}€',
+        }
 
         stats = Estadistica.query.filter_by(user_id=int(uid), juego='ruleta', tipo_juego='multiplayer').first()
         if not stats:
@@ -319,11 +310,16 @@ def spin_room():
             'payout_euros': total_payout_euros
         }
 
+    # cerrar la ronda: retenciones y Apuestas pendientes en bloque
+    if partida_data.get('ronda_id'):
+        liquidar_ronda(partida_data['ronda_id'], pagos, result_number)
+
     # finalizar partida
     partida.estado = 'finalizada'
     partida.datos_juego = json.dumps({'result': result_number, 'results': results_public})
     sala.estado = 'esperando'
     db.session.commit()
+    historial_sala(salas_ruleta.setdefault(sala.id, {'jugadores': [], 'estado': 'esperando', 'apuestas': []})).registrar(result_number)
 
     # devolver solo info del usuario que solicita
     my_result = results_public.get(str(current_user.id), {'bet_total_euros': 0, 'win_euros': 0, 'payout_euros': 0})
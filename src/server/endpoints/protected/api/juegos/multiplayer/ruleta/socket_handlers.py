@@ -1,8 +1,11 @@
 from flask import request
 from flask_login import current_user
 from flask_socketio import join_room, leave_room, emit
-from models import db, SalaMultijugador, UsuarioSala, User, Apuesta, Estadistica
+from models import db, SalaMultijugador, UsuarioSala, User, Estadistica
 from datetime import datetime
+from ...motor_ruleta import liquidar, validar_apuestas, total_apostado, ApuestaInvalida
+from ...historial_ruleta import HistorialRuleta
+from ...rondas import abrir_ronda, retener, liquidar_ronda
 import random, time
 import threading
 
@@ -11,6 +14,22 @@ salas_ruleta = {}
 # Paleta de colores disponibles
 AVAILABLE_COLORS = ['#FF6B6B', '#4ECDC4', '#FFE66D', '#95E1D3', '#F38181', '#A8EDEA']
 
+def historial_sala(st):
+    """Historial de números de la sala (se crea con el primer giro o consulta)."""
+    return st.setdefault('historial', HistorialRuleta())
+
+
+def estado_sala(sala_id, st):
+    """Payload de ``estado_sala_actualizado``."""
+    return {
+        'sala_id': sala_id,
+        'jugadores': st['jugadores'],
+        'apuestas_count': len(st['apuestas']),
+        'estado': st['estado'],
+        'historial': historial_sala(st).serializar(),
+    }
+
+
 def register_ruleta_handlers(socketio, app):
     print("✅ Registrando handlers de Ruleta multijugador")
 
@@ -24,48 +43,24 @@ def register_ruleta_handlers(socketio, app):
 
         # realizar giro (mismo algoritmo que antes)
         result_number = random.randint(0,36)
-        REDS = {1,3,5,7,9,12,14,16,18,19,21,23,25,27,30,32,34,36}
-        PAYOUT = {'straight':35,'split':17,'street':11,'corner':8,'line':5,'dozen':2,'column':2,'even':1}
+        liquidacion = liquidar({a['usuario_id']: a.get('bets', []) for a in st.get('apuestas', [])}, result_number)
 
         results = []
+        pagos = {}
         for a in st.get('apuestas', []):
-            inner_bets = a.get('bets', [])
-            total_bet_cents = 0
-            total_win_cents = 0
-            total_returned_cents = 0
-            for bet in inner_bets:
-                tipo = bet.get('type')
-                cantidad = int(bet.get('amount',0))
-                numeros = set(bet.get('set',[]))
-                label = bet.get('label','').lower()
-                total_bet_cents += cantidad
-                gana = False
-                if tipo == 'even':
-                    if ('rojo' in label and result_number in REDS) \
-                    or ('negro' in label and result_number not in REDS and result_number != 0) \
-                    or ('par' in label and result_number % 2 == 0 and result_number != 0) \
-                    or ('impar' in label and result_number % 2 == 1) \
-                    or ('1-18' in label and 1 <= result_number <= 18) \
-                    or ('19-36' in label and 19 <= result_number <= 36):
-                        gana = True
-                elif result_number in numeros:
-                    gana = True
-                if gana:
-                    total_win_cents += cantidad * PAYOUT.get(tipo,0)
-                    total_returned_cents += cantidad
-
-            total_bet_euros = total_bet_cents / 100.0
-            total_win_euros = total_win_cents / 100.0
-            total_returned_euros = total_returned_cents / 100.0
-            total_payout_euros = total_win_euros + total_returned_euros
+            importes = liquidacion[a['usuario_id']]
+            total_bet_euros = importes['apostado'] / 100.0
+            total_win_euros = importes['ganancia'] / 100.0
+            total_payout_euros = importes['devuelto'] / 100.0
 
             user = User.query.get(a['usuario_id'])
             if user:
                 user.balance += total_payout_euros
-            apuesta_db = Apuesta.query.filter_by(user_id=a['usuario_id'], juego='ruleta', resultado='PENDIENTE').order_by(Apuesta.id.desc()).first()
-            if apuesta_db:
-                apuesta_db.ganancia = total_win_euros
-                apuesta_db.resultado = f'Número {result_number} - Ganancia: {total_win_euros:.2f}€'
+            pagos[a['usuario_id']] = {
+                'pago': total_payout_euros,
+                'ganancia': total_win_euros,
+                'resultado': f'Número {result_number} - Ganancia: {total_win_euros:.2f}€',
+            }
             stats = Estadistica.query.filter_by(user_id=a['usuario_id'], juego='ruleta').first()
             if not stats:
                 stats = Estadistica(user_id=a['usuario_id'], juego='ruleta', tipo_juego='multiplayer', partidas_jugadas=0, partidas_ganadas=0, ganancia_total=0.0, apuesta_total=0.0)
@@ -85,8 +80,13 @@ def register_ruleta_handlers(socketio, app):
                 'nuevo_balance': User.query.get(a['usuario_id']).balance if User.query.get(a['usuario_id']) else None
             })
 
+        # cerrar la ronda: retenciones y Apuestas pendientes en bloque
+        if st.get('ronda_id'):
+            liquidar_ronda(st.pop('ronda_id'), pagos, result_number)
+
         # commit DB
         db.session.commit()
+        historial_sala(st).registrar(result_number)
 
         # actualizar balances en el estado en memoria (jugadores)
         uid_to_newbal = {r['usuario_id']: r.get('nuevo_balance') for r in results}
@@ -118,7 +118,7 @@ def register_ruleta_handlers(socketio, app):
 
         # emitir evento con resultado y lista de resultados detallados
         socketio.emit('ruleta_girada', {'result': result_number, 'results': results}, room=room_name)
-        socketio.emit('estado_sala_actualizado', {'sala_id': sala_id, 'jugadores': st['jugadores'], 'apuestas_count': len(st['apuestas']), 'estado': st['estado']}, room=room_name)
+        socketio.emit('estado_sala_actualizado', estado_sala(sala_id, st), room=room_name)
 
     def start_spin_countdown(sala_id, seconds=15):
         st = salas_ruleta.setdefault(sala_id, {'jugadores': [], 'estado': 'esperando', 'apuestas': []})
@@ -195,7 +195,7 @@ def register_ruleta_handlers(socketio, app):
 
         # emitir colores actuales junto con estado para que clientes conozcan su color
         colors_list = [{'usuario_id': uid, 'color': col} for uid, col in st['color_map'].items()]
-        emit('estado_sala_actualizado', {'sala_id': sala_id, 'jugadores': st['jugadores'], 'apuestas_count': len(st['apuestas']), 'estado': st['estado']}, room=room_name)
+        emit('estado_sala_actualizado', estado_sala(sala_id, st), room=room_name)
         emit('players_colors_update', {'colors': colors_list, 'jugadores': st['jugadores']}, room=room_name)
         emit('user_joined_ruleta', {'user_id': current_user.id, 'username': current_user.username}, room=room_name)
 
@@ -255,7 +255,7 @@ def register_ruleta_handlers(socketio, app):
             # Limpiar color del mapa
             if 'color_map' in st and current_user.id in st['color_map']:
                 del st['color_map'][current_user.id]
-            emit('estado_sala_actualizado', {'sala_id': sala_id, 'jugadores': st['jugadores'], 'apuestas_count': len(st['apuestas']), 'estado': st['estado']}, room=room_name)
+            emit('estado_sala_actualizado', estado_sala(sala_id, st), room=room_name)
             emit('user_left_ruleta', {'user_id': current_user.id, 'username': current_user.username}, room=room_name)
 
     @socketio.on('ruleta_place_bet')
@@ -271,37 +271,38 @@ def register_ruleta_handlers(socketio, app):
             emit('error', {'message': 'Sala no encontrada'}, room=request.sid)
             return
 
-        # calcular total desde apuestas (cantidad en céntimos puede venir en 'amount' o 'value')
-        total_cents = 0
-        for bet in apuestas:
-            try:
-                total_cents += int(bet.get('amount', bet.get('value', 0)))
-            except Exception:
-                pass
+        # validar y compilar las apuestas; en memoria solo se guardan las compiladas
+        try:
+            compiladas = validar_apuestas(apuestas)
+        except ApuestaInvalida as e:
+            emit('error_apuesta', {'message': str(e)}, room=request.sid)
+            return
+        total_cents = total_apostado(compiladas)
         total_euros = total_cents / 100.0
         
         if total_euros > current_user.balance:
             emit('error_apuesta', {'message': 'Fondos insuficientes'}, room=request.sid)
             return
-        # descontar balance y guardar apuesta en DB y en memoria (secreta)
+        st = salas_ruleta.setdefault(sala_id, {'jugadores': [], 'estado': 'esperando', 'apuestas': []})
+        room_name = f'ruleta_sala_{sala_id}'
+        # descontar balance y retenerlo en la ronda de la sala; la retención lleva
+        # la Apuesta pendiente que recoge la vista de estadísticas
         current_user.balance -= total_euros
-        # crear registro de apuesta en la base de datos para que la vista de estadísticas lo recoja
-        apuesta_db = Apuesta(user_id=current_user.id, juego='ruleta', tipo_juego='multiplayer', cantidad=total_euros, resultado='PENDIENTE', ganancia=0.0)
-        db.session.add(apuesta_db)
+        if not st.get('ronda_id'):
+            st['ronda_id'] = abrir_ronda('ruleta', 'multiplayer', sala_id).id
+        apuesta_id = retener(st['ronda_id'], current_user.id, total_euros, pendiente=True).apuesta_id
         db.session.commit()
 
-        st = salas_ruleta.setdefault(sala_id, {'jugadores': [], 'estado': 'esperando', 'apuestas': []})
-        room_name = f'ruleta_sala_{sala_id}'
-        # actualizar/apilar la apuesta secreta (no emitir detalles a otros)
+        # apilar la apuesta secreta (no emitir detalles a otros): lo ya retenido sigue en juego
         existing = next((a for a in st['apuestas'] if a['usuario_id'] == current_user.id), None)
         if existing:
-            existing['bets'] = apuestas
-            existing['amount_cents'] = total_cents
+            existing['bets'] = existing['bets'] + compiladas
+            existing['amount_cents'] += total_cents
             existing['submitted_at'] = datetime.utcnow().isoformat()
             existing['has_spun'] = False
-            existing['apuesta_id'] = apuesta_db.id
+            existing['apuesta_id'] = apuesta_id
         else:
-            st['apuestas'].append({'usuario_id': current_user.id, 'bets': apuestas, 'amount_cents': total_cents, 'submitted_at': datetime.utcnow().isoformat(), 'has_spun': False, 'apuesta_id': apuesta_db.id})
+            st['apuestas'].append({'usuario_id': current_user.id, 'bets': compiladas, 'amount_cents': total_cents, 'submitted_at': datetime.utcnow().isoformat(), 'has_spun': False, 'apuesta_id': apuesta_id})
 
         print(f"[ruleta] handle_place: usuario={current_user.username} sala={sala_id} total_cents={total_cents} apuestas_count={len(apuestas)}")
         # notificar estado (sin revelar apuestas)
@@ -312,10 +313,10 @@ def register_ruleta_handlers(socketio, app):
             'sala_id': sala_id,
             'user_id': current_user.id,
             'username': current_user.username,
-            'bet_id': apuesta_db.id,
+            'bet_id': apuesta_id,
             'summary': {'labels': labels, 'amount_cents': total_cents}
         }, room=room_name)
-        emit('estado_sala_actualizado', {'sala_id': sala_id, 'jugadores': st['jugadores'], 'apuestas_count': len(st['apuestas']), 'estado': st['estado']}, room=room_name)
+        emit('estado_sala_actualizado', estado_sala(sala_id, st), room=room_name)
 
     @socketio.on('ruleta_spin')
     def handle_spin(data):
@@ -382,7 +383,7 @@ def register_ruleta_handlers(socketio, app):
             except Exception as e:
                 print('Error starting countdown from spin (1 bettor):', e)
             emit('spin_ack', {'ok': True, 'spun': False, 'players_ready': ready_count, 'players_needed': 2}, room=request.sid)
-            emit('estado_sala_actualizado', {'sala_id': sala_id, 'jugadores': st['jugadores'], 'apuestas_count': len(st['apuestas']), 'estado': st['estado']}, room=room_name)
+            emit('estado_sala_actualizado', estado_sala(sala_id, st), room=room_name)
             return
 
         # Si hay 2+ apostadores pero falta alguno por pulsar, arrancar countdown compartido
@@ -395,7 +396,7 @@ def register_ruleta_handlers(socketio, app):
                 print('Error starting countdown from spin:', e)
             emit('spin_ack', {'ok': True, 'spun': False, 'players_ready': ready_count, 'players_needed': total_bettors}, room=request.sid)
             socketio.emit('spin_wait', {'players_ready': ready_count, 'players_needed': total_bettors}, room=room_name)
-            emit('estado_sala_actualizado', {'sala_id': sala_id, 'jugadores': st['jugadores'], 'apuestas_count': len(st['apuestas']), 'estado': st['estado']}, room=room_name)
+            emit('estado_sala_actualizado', estado_sala(sala_id, st), room=room_name)
             return
 
         # cancelar contador si estaba corriendo y ejecutar el giro
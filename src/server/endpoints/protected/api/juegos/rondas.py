@@ -0,0 +1,111 @@
+# server/endpoints/protected/api/juegos/rondas.py
+"""
+Rondas de juego y retenciones de saldo.
+
+Cada giro, mano, carrera o lanzamiento abre una ``RondaJuego``; lo que cada
+usuario apuesta en ella queda en ``Retencion`` con clave ``(ronda_id, user_id)``.
+Al liquidar ya no hace falta buscar la última Apuesta 'PENDIENTE' de cada
+usuario: la ronda sabe quién tiene dinero retenido y la liquidación es una
+actualización en lote por esa clave, más otra de las Apuestas asociadas.
+"""
+
+import json
+from datetime import datetime
+
+from sqlalchemy import and_, bindparam, update
+
+from models import db, Apuesta, RondaJuego, Retencion
+
+
+def abrir_ronda(juego: str, tipo_juego: str, sala_id=None) -> RondaJuego:
+    """Crea la ronda y la vuelca para tener ``id`` (sin commit)."""
+    ronda = RondaJuego(juego=juego, tipo_juego=tipo_juego, sala_id=sala_id, estado='abierta')
+    db.session.add(ronda)
+    db.session.flush()
+    return ronda
+
+
+def retener(ronda_id: int, user_id: int, cantidad: float, detalle=None, pendiente=False) -> Retencion:
+    """
+    Suma ``cantidad`` (euros, ya descontados del saldo) a la retención del usuario
+    en la ronda. Con ``pendiente=True`` la retención lleva una Apuesta
+    'PENDIENTE' asociada, única por ronda y usuario, que se actualiza al liquidar.
+    """
+    retencion = db.session.get(Retencion, (ronda_id, user_id))
+    if retencion is None:
+        retencion = Retencion(ronda_id=ronda_id, user_id=user_id, cantidad=0.0, estado='retenida')
+        db.session.add(retencion)
+    retencion.cantidad += cantidad
+    if detalle is not None:
+        retencion.detalle = json.dumps(detalle)
+
+    if pendiente:
+        apuesta = db.session.get(Apuesta, retencion.apuesta_id) if retencion.apuesta_id else None
+        if apuesta is None:
+            ronda = db.session.get(RondaJuego, ronda_id)
+            apuesta = Apuesta(user_id=user_id, juego=ronda.juego, tipo_juego=ronda.tipo_juego,
+                              cantidad=0.0, ganancia=0.0, resultado='PENDIENTE')
+            db.session.add(apuesta)
+            db.session.flush()
+            retencion.apuesta_id = apuesta.id
+        apuesta.cantidad += cantidad
+    db.session.flush()
+    return retencion
+
+
+def retenciones(ronda_id: int) -> dict:
+    """Retenciones aún abiertas de la ronda: ``{user_id: Retencion}``."""
+    return {
+        r.user_id: r
+        for r in Retencion.query.filter_by(ronda_id=ronda_id, estado='retenida')
+    }
+
+
+def liquidar_ronda(ronda_id: int, pagos: dict, resultado=None) -> dict:
+    """
+    Cierra la ronda con ``pagos`` ``{user_id: {'pago', 'ganancia', 'resultado'}}``
+    (``ganancia`` y ``resultado`` solo hacen falta si hay Apuesta pendiente).
+    Las retenciones sin entrada en ``pagos`` se dan por perdidas. El saldo lo
+    abona cada juego; aquí solo se cierran retenciones, Apuestas y ronda, con un
+    número fijo de sentencias. Devuelve ``{user_id: {'cantidad', 'pago', 'detalle'}}``
+    de las retenciones liquidadas.
+    """
+    db.session.flush()
+    abiertas = retenciones(ronda_id)
+    if abiertas:
+        tabla = Retencion.__table__
+        db.session.execute(
+            update(tabla)
+            .where(and_(tabla.c.ronda_id == bindparam('b_ronda'), tabla.c.user_id == bindparam('b_uid')))
+            .values(pago=bindparam('b_pago'), estado='liquidada'),
+            [{'b_ronda': ronda_id, 'b_uid': uid, 'b_pago': pagos.get(uid, {}).get('pago', 0.0)}
+             for uid in abiertas]
+        )
+        apuestas = [
+            {'b_id': r.apuesta_id, 'b_ganancia': pagos.get(uid, {}).get('ganancia', 0.0),
+             'b_resultado': pagos.get(uid, {}).get('resultado', 'perdida')}
+            for uid, r in abiertas.items() if r.apuesta_id
+        ]
+        if apuestas:
+            tabla_apuestas = Apuesta.__table__
+            db.session.execute(
+                update(tabla_apuestas)
+                .where(tabla_apuestas.c.id == bindparam('b_id'))
+                .values(ganancia=bindparam('b_ganancia'), resultado=bindparam('b_resultado')),
+                apuestas
+            )
+    db.session.execute(
+        update(RondaJuego.__table__)
+        .where(RondaJuego.__table__.c.id == ronda_id)
+        .values(estado='liquidada', resultado=None if resultado is None else str(resultado),
+                fecha_fin=datetime.utcnow())
+    )
+    liquidadas = {
+        uid: {'cantidad': r.cantidad, 'pago': pagos.get(uid, {}).get('pago', 0.0),
+              'detalle': json.loads(r.detalle) if r.detalle else None}
+        for uid, r in abiertas.items()
+    }
+    # que las filas ya cargadas en la sesión no oculten los UPDATE en lote
+    for r in abiertas.values():
+        db.session.expire(r)
+    return liquidadas
@@ -0,0 +1,278 @@
+# server/endpoints/protected/api/juegos/rtp.py
+"""
+Verificación por Monte Carlo del RTP (retorno al jugador) de cada juego.
+
+Las tablas de pagos se leen de las constantes del propio servidor
+(``motor_ruleta``, las probabilidades y multiplicadores de caballos, las
+probabilidades y ``calcular_ganancia`` de la quiniela, ``resolver_mano`` del
+blackjack y el multiplicador de coinflip), de modo que un cambio en el código
+que mueva el RTP lo mueve también aquí. Cada ronda se simula en bloques de
+NumPy y de cada variante se obtiene RTP, varianza y error típico por unidad
+apostada.
+
+``RTP_ESPERADO`` fija el valor de referencia y la desviación admitida de cada
+variante; ``verificar`` marca las que se salen. Lo usan ``utils/rtp.py``
+(informe por consola) y los tests.
+"""
+
+import math
+import time
+
+import numpy as np
+
+from .carrera import MARGEN_CABALLOS, MULTIPLICADORES_CABALLOS, PROBABILIDADES_CABALLOS
+from .motor_ruleta import GEOMETRIA, N_CASILLAS, PAGOS, _MASCARAS_SIMPLES
+from .multiplayer.blackjack.socket_handlers import nueva_baraja, resolver_mano
+from .multiplayer.coinflip.socket_handlers import MULTIPLICADOR_COINFLIP
+from .singleplayer.quiniela.routes import PROB_EMPATE, PROB_LOCAL, PROB_VISITANTE, calcular_ganancia
+
+BLOQUE = 500_000
+PARTIDOS_QUINIELA = 15
+PLANTA_BLACKJACK = 17   # el jugador simulado pide carta como el crupier
+MAX_CARTAS_BLACKJACK = 24
+
+
+# ===========================
+#          RULETA
+# ===========================
+
+def _mascaras_ruleta() -> dict:
+    """Todas las jugadas legales de cada tipo, con su cuota."""
+    mascaras = {tipo: sorted(jugadas) for tipo, jugadas in GEOMETRIA.items()}
+    mascaras['even'] = sorted(_MASCARAS_SIMPLES.values())
+    return {tipo: (np.array(m, dtype=np.int64), PAGOS[tipo]) for tipo, m in mascaras.items()}
+
+
+def _ruleta(n: int, rng) -> dict:
+    """Un giro por ronda y, de cada tipo, una jugada legal al azar a 1 unidad."""
+    resultados = rng.integers(0, N_CASILLAS, n)
+    retornos = {}
+    for tipo, (mascaras, cuota) in _mascaras_ruleta().items():
+        jugada = mascaras[rng.integers(0, len(mascaras), n)]
+        retornos[tipo] = ((jugada >> resultados) & 1) * float(cuota + 1)
+    return retornos
+
+
+def _ruleta_teorico() -> dict:
+    return {
+        tipo: float(np.mean([bin(int(m)).count('1') for m in mascaras])) * (cuota + 1) / N_CASILLAS
+        for tipo, (mascaras, cuota) in _mascaras_ruleta().items()
+    }
+
+
+# ===========================
+#         COINFLIP
+# ===========================
+
+def _coinflip(n: int, rng) -> dict:
+    return {'cara': (rng.integers(0, 2, n) == 0) * float(MULTIPLICADOR_COINFLIP)}
+
+
+def _coinflip_teorico() -> dict:
+    return {'cara': MULTIPLICADOR_COINFLIP / 2}
+
+
+# ===========================
+#         CABALLOS
+# ===========================
+
+def _prob_caballos():
+    caballos = sorted(PROBABILIDADES_CABALLOS)
+    pesos = np.array([PROBABILIDADES_CABALLOS[c] for c in caballos])
+    return caballos, pesos / pesos.sum()
+
+
+def _caballos(n: int, rng) -> dict:
+    caballos, probs = _prob_caballos()
+    ganador = rng.choice(len(caballos), n, p=probs)
+    return {
+        str(c): (ganador == i) * float(MULTIPLICADORES_CABALLOS[c])
+        for i, c in enumerate(caballos)
+    }
+
+
+def _caballos_teorico() -> dict:
+    caballos, probs = _prob_caballos()
+    return {str(c): float(p) * MULTIPLICADORES_CABALLOS[c] for c, p in zip(caballos, probs)}
+
+
+# ===========================
+#         QUINIELA
+# ===========================
+
+def _prob_acierto_quiniela() -> dict:
+    """Probabilidad de acertar cada partido según la estrategia del apostante."""
+    return {
+        'favorito': max(PROB_LOCAL, PROB_EMPATE, PROB_VISITANTE),   # siempre el '1'
+        'aleatoria': (PROB_LOCAL + PROB_EMPATE + PROB_VISITANTE) / 3,
+    }
+
+
+def _pagos_quiniela(partidos: int = PARTIDOS_QUINIELA) -> np.ndarray:
+    return np.array([calcular_ganancia(k, partidos, 1.0) for k in range(partidos + 1)], dtype=float)
+
+
+def _quiniela(n: int, rng) -> dict:
+    pagos = _pagos_quiniela()
+    return {
+        estrategia: pagos[rng.binomial(PARTIDOS_QUINIELA, p, n)]
+        for estrategia, p in _prob_acierto_quiniela().items()
+    }
+
+
+def _quiniela_teorico() -> dict:
+    pagos = _pagos_quiniela()
+    n = PARTIDOS_QUINIELA
+    return {
+        estrategia: sum(math.comb(n, k) * p ** k * (1 - p) ** (n - k) * pagos[k] for k in range(n + 1))
+        for estrategia, p in _prob_acierto_quiniela().items()
+    }
+
+
+# ===========================
+#         BLACKJACK
+# ===========================
+
+# Estados de la mano del jugador en la tabla de pagos: 0-21 total, 22 pasado, 23 natural
+PASADO, NATURAL = 22, 23
+
+
+def _mano_sintetica(estado: int) -> list:
+    """Mano con el estado pedido, en el formato (valor, palo, puntos) del servidor."""
+    if estado == NATURAL:
+        return [('A', '♠', 11), ('K', '♠', 10)]
+    if estado == PASADO:
+        return [('10', '♠', 10), ('10', '♥', 10), ('5', '♠', 5)]
+    if estado == 21:
+        return [('10', '♠', 10), ('9', '♠', 9), ('2', '♠', 2)]
+    alta = min(10, estado - 2)
+    return [(str(alta), '♠', alta), (str(estado - alta), '♥', estado - alta)]
+
+
+def _tabla_blackjack() -> np.ndarray:
+    """Pago por unidad de ``resolver_mano`` para cada (estado jugador, valor crupier, natural crupier)."""
+    tabla = np.zeros((NATURAL + 1, 27, 2))
+    for estado in list(range(4, 22)) + [PASADO, NATURAL]:
+        mano = _mano_sintetica(estado)
+        for dealer_val in range(17, 27):
+            tabla[estado, dealer_val, 0] = resolver_mano(mano, 1.0, dealer_val, False)
+        tabla[estado, 21, 1] = resolver_mano(mano, 1.0, 21, True)
+    return tabla
+
+
+def _valor(total, ases):
+    """``valor_mano`` vectorizado: cada as cuenta 1 en vez de 11 mientras la mano se pase."""
+    rebajas = np.minimum(ases, (np.maximum(total - 21, 0) + 9) // 10)
+    return total - 10 * rebajas
+
+
+def _blackjack(n: int, rng) -> dict:
+    puntos = np.array([c[2] for c in nueva_baraja()], dtype=np.int16)
+    claves = rng.random((n, len(puntos)), dtype=np.float32)
+    cartas = puntos[np.argsort(claves, axis=1)[:, :MAX_CARTAS_BLACKJACK]]
+    filas = np.arange(n)
+
+    # Reparto como en ``iniciar``: dos al crupier y después dos al jugador
+    crupier = cartas[:, 0] + cartas[:, 1]
+    ases_crupier = (cartas[:, 0] == 11).astype(np.int16) + (cartas[:, 1] == 11)
+    jugador = cartas[:, 2] + cartas[:, 3]
+    ases_jugador = (cartas[:, 2] == 11).astype(np.int16) + (cartas[:, 3] == 11)
+    natural_crupier = _valor(crupier, ases_crupier) == 21
+    natural_jugador = _valor(jugador, ases_jugador) == 21
+    siguiente = np.full(n, 4)
+
+    for total, ases, limite in ((jugador, ases_jugador, PLANTA_BLACKJACK), (crupier, ases_crupier, 17)):
+        pide = filas
+        while len(pide):
+            pide = pide[_valor(total[pide], ases[pide]) < limite]
+            carta = cartas[pide, siguiente[pide]]
+            total[pide] += carta
+            ases[pide] += carta == 11
+            siguiente[pide] += 1
+
+    valor_jugador = _valor(jugador, ases_jugador)
+    estado = np.where(natural_jugador, NATURAL, np.where(valor_jugador > 21, PASADO, valor_jugador))
+    valor_crupier = _valor(crupier, ases_crupier)
+    return {f'planta_{PLANTA_BLACKJACK}': _tabla_blackjack()[estado, valor_crupier, natural_crupier.astype(int)]}
+
+
+# ===========================
+#        VERIFICACIÓN
+# ===========================
+
+SIMULADORES = {
+    'ruleta': (_ruleta, _ruleta_teorico),
+    'coinflip': (_coinflip, _coinflip_teorico),
+    'caballos': (_caballos, _caballos_teorico),
+    'quiniela': (_quiniela, _quiniela_teorico),
+    'blackjack': (_blackjack, None),
+}
+
+# (RTP de referencia, desviación admitida) por juego y variante
+RTP_ESPERADO = {
+    **{('ruleta', tipo): (36 / 37, 0.001) for tipo in PAGOS},
+    ('coinflip', 'cara'): (1.0, 0.001),
+    **{('caballos', str(c)): (1 - MARGEN_CABALLOS, 0.005) for c in MULTIPLICADORES_CABALLOS},
+    ('quiniela', 'favorito'): (0.199, 0.005),
+    ('quiniela', 'aleatoria'): (0.020, 0.005),
+    ('blackjack', f'planta_{PLANTA_BLACKJACK}'): (0.947, 0.010),
+}
+
+
+def simular(juego: str, rondas: int, rng=None, bloque: int = BLOQUE) -> list:
+    """
+    Simula ``rondas`` rondas del juego en bloques y devuelve una fila por
+    variante con RTP, varianza y error típico del retorno por unidad apostada
+    (más el RTP exacto cuando se puede calcular).
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    simulador, teorico = SIMULADORES[juego]
+    suma, cuadrados = {}, {}
+    inicio = time.perf_counter()
+    hechas = 0
+    while hechas < rondas:
+        n = min(bloque, rondas - hechas)
+        for variante, retornos in simulador(n, rng).items():
+            suma[variante] = suma.get(variante, 0.0) + float(retornos.sum())
+            cuadrados[variante] = cuadrados.get(variante, 0.0) + float(np.square(retornos).sum())
+        hechas += n
+    segundos = time.perf_counter() - inicio
+    exactos = teorico() if teorico else {}
+
+    filas = []
+    for variante in suma:
+        rtp = suma[variante] / rondas
+        varianza = max(cuadrados[variante] / rondas - rtp * rtp, 0.0)
+        filas.append({
+            'juego': juego,
+            'variante': variante,
+            'rondas': rondas,
+            'rtp': rtp,
+            'varianza': varianza,
+            'error_tipico': math.sqrt(varianza / rondas),
+            'teorico': exactos.get(variante),
+            'segundos': segundos,
+        })
+    return filas
+
+
+def verificar(rondas: int = 1_000_000, semilla=None, juegos=None) -> list:
+    """
+    Filas de ``simular`` para cada juego con el valor esperado y ``ok``: el
+    RTP exacto (o el simulado, admitiendo 4 errores típicos) dentro de la
+    desviación de ``RTP_ESPERADO``.
+    """
+    rng = np.random.default_rng(semilla)
+    filas = []
+    for juego in juegos or SIMULADORES:
+        for fila in simular(juego, rondas, rng):
+            esperado, tolerancia = RTP_ESPERADO.get((juego, fila['variante']), (None, None))
+            if esperado is None:
+                ok = None
+            elif fila['teorico'] is not None:
+                ok = abs(fila['teorico'] - esperado) <= tolerancia
+            else:
+                ok = abs(fila['rtp'] - esperado) <= tolerancia + 4 * fila['error_tipico']
+            fila.update(esperado=esperado, tolerancia=tolerancia, ok=ok)
+            filas.append(fila)
+    return filas
@@ -1,46 +1,10 @@
 from flask import request, jsonify, Blueprint
 from flask_login import login_required, current_user
 from models import db, Apuesta, Estadistica
-import random
+from ...carrera import CABALLOS, DURACION_MS, elegir_ganador, preparar_carrera
 
 bp = Blueprint('api_caballos', __name__, url_prefix='/api/caballos')
 
-# Configuración que coincide con tu HTML
-CABALLOS = {
-    1: { 
-        'id': 1,
-        'nombre': 'Relámpago', 
-        'multiplicador': 1.5, 
-        'velocidad': 0.85, 
-        'resistencia': 0.70,
-        'emoji': '🐎'
-    },
-    2: { 
-        'id': 2,
-        'nombre': 'Trueno', 
-        'multiplicador': 2.0, 
-        'velocidad': 0.75, 
-        'resistencia': 0.80,
-        'emoji': '🐴'
-    },
-    3: { 
-        'id': 3,
-        'nombre': 'Centella', 
-        'multiplicador': 3.0, 
-        'velocidad': 0.65, 
-        'resistencia': 0.85,
-        'emoji': '🏇'
-    },
-    4: { 
-        'id': 4,
-        'nombre': 'Azabache', 
-        'multiplicador': 6.0, 
-        'velocidad': 0.45, 
-        'resistencia': 0.95,
-        'emoji': '🎠'
-    }
-}
-
 @bp.route('/apostar', methods=['POST'])
 @login_required
 def apostar():
@@ -53,14 +17,11 @@ def apostar():
         if not data:
             return jsonify({'error': 'Datos JSON requeridos'}), 400
             
-        # Obtener datos EXACTAMENTE como los envía tu frontend
+        # El cliente solo elige caballo y cantidad: el resultado lo decide el servidor
         cantidad = data.get('cantidad')
-        resultado = data.get('resultado')  # 'ganada' o 'perdida'
-        ganancia = data.get('ganancia')
         caballo_apostado = data.get('caballo_apostado')  # ID del caballo
-        caballo_ganador = data.get('caballo_ganador')    # ID del caballo ganador
         
-        print(f"🔍 Procesando: cantidad={cantidad}, resultado={resultado}, ganancia={ganancia}")
+        print(f"🔍 Procesando: cantidad={cantidad}, caballo={caballo_apostado}")
         
         # Validaciones
         if cantidad is None:
@@ -68,9 +29,7 @@ def apostar():
             
         try:
             cantidad = float(cantidad)
-            ganancia = float(ganancia) if ganancia is not None else 0.0
             caballo_apostado = int(caballo_apostado) if caballo_apostado else None
-            caballo_ganador = int(caballo_ganador) if caballo_ganador else None
         except (ValueError, TypeError) as e:
             print(f"❌ Error en conversión de datos: {e}")
             return jsonify({'error': 'Datos inválidos'}), 400
@@ -84,10 +43,17 @@ def apostar():
         #  Verificar que el caballo apostado existe
         if caballo_apostado not in CABALLOS:
             return jsonify({'error': 'Caballo apostado no válido'}), 400
-            
-        #  Verificar que el caballo ganador existe (si se proporciona)
-        if caballo_ganador and caballo_ganador not in CABALLOS:
-            return jsonify({'error': 'Caballo ganador no válido'}), 400
+        
+        #  Correr la carrera en el servidor: ganador y semilla para reproducirla
+        caballo_ganador = elegir_ganador()
+        semilla = preparar_carrera(caballo_ganador, DURACION_MS)
+        if caballo_ganador == caballo_apostado:
+            resultado = 'ganada'
+            ganancia = cantidad * CABALLOS[caballo_apostado]['multiplicador']
+        else:
+            resultado = 'perdida'
+            ganancia = 0.0
+        print(f"🐴 Ganador: {caballo_ganador} (semilla {semilla}) -> {resultado}")
         
         print(f"🔍 Validaciones pasadas. Actualizando balance...")
         
@@ -146,18 +112,16 @@ def apostar():
         db.session.commit()
         print("✅ Commit exitoso")
         
-        #  Preparar respuesta
+        #  Preparar respuesta: el cliente anima la carrera con semilla y duración
         respuesta = {
             'resultado': resultado,
             'ganancia': ganancia,
-            'nuevo_balance': current_user.balance
+            'nuevo_balance': current_user.balance,
+            'semilla': semilla,
+            'duracion': DURACION_MS,
+            'caballo_apostado': CABALLOS[caballo_apostado],
+            'caballo_ganador': CABALLOS[caballo_ganador]
         }
-        
-        #  Añadir información de caballos si está disponible
-        if caballo_apostado:
-            respuesta['caballo_apostado'] = CABALLOS[caballo_apostado]
-        if caballo_ganador:
-            respuesta['caballo_ganador'] = CABALLOS[caballo_ganador]
             
         print(f"✅ Enviando respuesta: {respuesta}")
         
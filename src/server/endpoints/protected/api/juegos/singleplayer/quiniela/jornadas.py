@@ -0,0 +1,198 @@
+# server/endpoints/protected/api/juegos/singleplayer/quiniela/jornadas.py
+"""
+Jornadas de quiniela comunes.
+
+Mientras la jornada está abierta (hasta ``cierre``) cada boleto se cobra al
+momento, deja una Apuesta 'PENDIENTE' y se guarda empaquetado con
+``sistemas.codificar``. Al cerrar se saca un único juego de resultados y
+``liquidar_jornada`` corrige todos los boletos en un solo proceso: los lee por
+bloques de ``BLOQUE_BOLETOS`` a una matriz de NumPy (boleto × signo), saca
+aciertos y premio de todo el bloque a la vez y los escribe con UPDATE en lote.
+Saldos y estadísticas se suman por usuario al final, así que el número de
+sentencias depende del número de bloques, no del de boletos.
+"""
+
+import json
+import math
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import bindparam, update
+
+from models import db, Apuesta, BoletoQuiniela, JornadaQuiniela, User
+from ...liquidacion import abonar_y_sumar
+from . import routes, sistemas
+
+BLOQUE_BOLETOS = 50_000
+MINUTOS_JORNADA = 60
+
+
+def abrir_jornada(liga_id: str, num_partidos: int = 15, minutos: float = MINUTOS_JORNADA) -> JornadaQuiniela:
+    """Sortea los partidos de la jornada y la deja abierta ``minutos`` (sin commit)."""
+    if liga_id not in routes.LIGAS_EQUIPOS:
+        raise ValueError('Liga no encontrada')
+    if not 1 <= num_partidos <= sistemas.MAX_PARTIDOS:
+        raise ValueError(f"La jornada debe tener entre 1 y {sistemas.MAX_PARTIDOS} partidos")
+    jornada = JornadaQuiniela(
+        liga=liga_id,
+        partidos=json.dumps(routes.sortear_partidos(liga_id, num_partidos)),
+        estado='abierta',
+        cierre=datetime.utcnow() + timedelta(minutes=minutos),
+    )
+    db.session.add(jornada)
+    db.session.flush()
+    return jornada
+
+
+def comprar_boleto(usuario: User, jornada: JornadaQuiniela, pronosticos, cantidad: float) -> BoletoQuiniela:
+    """
+    Valida y cobra un boleto de la jornada (``cantidad`` por columna) y lo
+    guarda con su Apuesta 'PENDIENTE' (sin commit). Lanza ``ValueError`` si no
+    se puede jugar.
+    """
+    if jornada.estado != 'abierta' or datetime.utcnow() >= jornada.cierre:
+        raise ValueError('La jornada está cerrada')
+    if len(pronosticos) != len(json.loads(jornada.partidos)):
+        raise ValueError('Hay que dar un pronóstico por partido')
+    if not math.isfinite(cantidad) or cantidad <= 0:  # float() acepta "nan" e "inf"
+        raise ValueError('Cantidad no válida')
+    codificado = sistemas.codificar(pronosticos)
+    signos_1, signos_x, signos_2 = codificado.tolist()
+    columnas = int(sistemas.columnas(codificado))
+    coste = cantidad * columnas
+    if coste > usuario.balance:
+        raise ValueError('Fondos insuficientes')
+
+    usuario.balance -= coste
+    apuesta = Apuesta(user_id=usuario.id, juego='quiniela', tipo_juego='multiplayer',
+                      cantidad=coste, ganancia=0.0, resultado='PENDIENTE')
+    db.session.add(apuesta)
+    db.session.flush()
+    boleto = BoletoQuiniela(
+        jornada_id=jornada.id, user_id=usuario.id, apuesta_id=apuesta.id,
+        signos_1=signos_1, signos_x=signos_x, signos_2=signos_2,
+        cantidad=cantidad, columnas=columnas,
+    )
+    db.session.add(boleto)
+    db.session.flush()
+    return boleto
+
+
+def _corregir_bloque(s1, sx, s2, cantidad, resultados: np.ndarray, premio_por_columna: np.ndarray):
+    """Aciertos y ganancia de cada boleto de un bloque, a partir de sus máscaras y precio por columna."""
+    boletos = np.array([s1, sx, s2], dtype=np.uint64).T
+    partidos = len(premio_por_columna) - 1
+    aciertos = sistemas.aciertos(boletos, resultados)
+    ganancias = sistemas.distribucion_aciertos(boletos, resultados, partidos) @ premio_por_columna
+    return aciertos, ganancias * np.asarray(cantidad, dtype=float)
+
+
+def liquidar_jornada(jornada_id: int, bloque: int = BLOQUE_BOLETOS) -> dict:
+    """
+    Saca los resultados de la jornada, corrige y paga todos sus boletos y la
+    marca como liquidada (sin commit). Devuelve un resumen con ``resultados``,
+    ``boletos``, ``premiados`` y ``pagado``.
+    """
+    db.session.flush()  # que ningún cambio pendiente pise los UPDATE en lote
+    tabla_jornadas = JornadaQuiniela.__table__
+    # se reclama la jornada antes de tocar nada: si otro proceso ya la está
+    # liquidando, el UPDATE condicional no encuentra fila y no se paga dos veces
+    reclamada = db.session.execute(
+        update(tabla_jornadas)
+        .where(tabla_jornadas.c.id == jornada_id, tabla_jornadas.c.estado == 'abierta')
+        .values(estado='liquidada')
+    )
+    if reclamada.rowcount != 1:
+        raise ValueError('La jornada no existe o ya está liquidada')
+    jornada = db.session.get(JornadaQuiniela, jornada_id)
+    partidos = len(json.loads(jornada.partidos))
+    resultados = routes.generar_resultados_reales(partidos)
+    codificados = sistemas.codificar(resultados)
+    # calcular_ganancia es proporcional a la apuesta: premio de una columna de 1€ por aciertos
+    premio_por_columna = np.array([routes.calcular_ganancia(k, partidos, 1.0) for k in range(partidos + 1)],
+                                  dtype=float)
+
+    tabla_boletos = BoletoQuiniela.__table__
+    tabla_apuestas = Apuesta.__table__
+    por_usuario = {}  # uid -> [boletos, premiados, apostado, pagado]
+    ultimo = 0
+    while True:
+        filas = (
+            db.session.query(BoletoQuiniela.id, BoletoQuiniela.user_id, BoletoQuiniela.apuesta_id,
+                             BoletoQuiniela.signos_1, BoletoQuiniela.signos_x, BoletoQuiniela.signos_2,
+                             BoletoQuiniela.cantidad, BoletoQuiniela.columnas)
+            .filter(BoletoQuiniela.jornada_id == jornada_id, BoletoQuiniela.id > ultimo)
+            .order_by(BoletoQuiniela.id)
+            .limit(bloque)
+            .all()
+        )
+        if not filas:
+            break
+        ids, uids, apuesta_ids, s1, sx, s2, cantidad, columnas = zip(*filas)
+        ultimo = ids[-1]
+        aciertos, ganancias = _corregir_bloque(s1, sx, s2, cantidad, codificados, premio_por_columna)
+        costes = np.asarray(cantidad, dtype=float) * np.asarray(columnas)
+
+        db.session.execute(
+            update(tabla_boletos)
+            .where(tabla_boletos.c.id == bindparam('b_id'))
+            .values(aciertos=bindparam('b_aciertos'), ganancia=bindparam('b_ganancia')),
+            [{'b_id': i, 'b_aciertos': a, 'b_ganancia': g}
+             for i, a, g in zip(ids, aciertos.tolist(), ganancias.tolist())]
+        )
+        apuestas = [
+            {'b_id': i, 'b_ganancia': g, 'b_resultado': f"{a}/{partidos} aciertos"}
+            for i, a, g in zip(apuesta_ids, aciertos.tolist(), ganancias.tolist()) if i is not None
+        ]
+        if apuestas:
+            db.session.execute(
+                update(tabla_apuestas)
+                .where(tabla_apuestas.c.id == bindparam('b_id'))
+                .values(ganancia=bindparam('b_ganancia'), resultado=bindparam('b_resultado')),
+                apuestas
+            )
+
+        # sumas por usuario del bloque
+        usuarios, inversa = np.unique(np.asarray(uids), return_inverse=True)
+        sumas = zip(usuarios.tolist(), np.bincount(inversa).tolist(),
+                    np.bincount(inversa, weights=ganancias > costes).tolist(),
+                    np.bincount(inversa, weights=costes).tolist(),
+                    np.bincount(inversa, weights=ganancias).tolist())
+        for uid, jugados, premiados, apostado, pagado in sumas:
+            suma = por_usuario.setdefault(uid, [0, 0, 0.0, 0.0])
+            suma[0] += jugados
+            suma[1] += int(premiados)
+            suma[2] += apostado
+            suma[3] += pagado
+
+    abonar_y_sumar('quiniela', 'multiplayer', {
+        uid: {'pago': pagado, 'jugadas': jugados, 'ganadas': premiados, 'apostado': apostado, 'ganancia': pagado}
+        for uid, (jugados, premiados, apostado, pagado) in por_usuario.items()
+    })
+    db.session.execute(
+        update(tabla_jornadas)
+        .where(tabla_jornadas.c.id == jornada_id)
+        .values(resultados=''.join(resultados), fecha_liquidacion=datetime.utcnow())
+    )
+    # que las filas ya cargadas en la sesión no oculten los UPDATE en lote
+    db.session.expire_all()
+    return {
+        'resultados': resultados,
+        'boletos': sum(s[0] for s in por_usuario.values()),
+        'premiados': sum(s[1] for s in por_usuario.values()),
+        'pagado': sum(s[3] for s in por_usuario.values()),
+    }
+
+
+def liquidar_vencidas(bloque: int = BLOQUE_BOLETOS) -> list:
+    """Liquida (con un commit por jornada) las jornadas abiertas cuyo cierre ya pasó."""
+    vencidas = [
+        j.id for j in JornadaQuiniela.query
+        .filter(JornadaQuiniela.estado == 'abierta', JornadaQuiniela.cierre <= datetime.utcnow())
+        .order_by(JornadaQuiniela.cierre)
+    ]
+    resumenes = []
+    for jornada_id in vencidas:
+        resumenes.append({'jornada': jornada_id, **liquidar_jornada(jornada_id, bloque)})
+        db.session.commit()
+    return resumenes
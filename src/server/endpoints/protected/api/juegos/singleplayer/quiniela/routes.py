@@ -1,6 +1,10 @@
 from flask import request, jsonify, Blueprint
 from flask_login import login_required, current_user
-from models import db, Apuesta, Estadistica
+from models import db, Apuesta, BoletoQuiniela, Estadistica, JornadaQuiniela
+from ...azar import TablaAlias
+from . import jornadas, sistemas
+import json
+import math
 import random
 
 bp = Blueprint('api_quiniela', __name__, url_prefix='/api/quiniela')
@@ -95,36 +99,41 @@ def generar_partidos():
         if liga_id not in LIGAS_EQUIPOS:
             return jsonify({'error': 'Liga no encontrada'}), 400
         
-        liga = LIGAS_EQUIPOS[liga_id]
-        equipos = liga['equipos'].copy()
-        random.shuffle(equipos)  # Mezclar equipos para emparejamientos aleatorios
-        
-        partidos = []
-        for i in range(0, min(num_partidos * 2, len(equipos)), 2):
-            if i + 1 < len(equipos):
-                partidos.append({
-                    'local': equipos[i],
-                    'visitante': equipos[i + 1]
-                })
-        
-        # Si no hay suficientes equipos, generar partidos adicionales
-        while len(partidos) < num_partidos:
-            local = random.choice(equipos)
-            visitante = random.choice([e for e in equipos if e != local])
-            partidos.append({
-                'local': local,
-                'visitante': visitante
-            })
+        partidos = sortear_partidos(liga_id, num_partidos)
         
         return jsonify({
-            'partidos': partidos[:num_partidos],
-            'liga': liga['nombre'],
-            'total_partidos': len(partidos[:num_partidos])
+            'partidos': partidos,
+            'liga': LIGAS_EQUIPOS[liga_id]['nombre'],
+            'total_partidos': len(partidos)
         })
         
     except Exception as e:
         return jsonify({'error': f'Error generando partidos: {str(e)}'}), 500
 
+def sortear_partidos(liga_id, num_partidos):
+    """Empareja al azar equipos de la liga; si no llegan, añade partidos de relleno"""
+    equipos = LIGAS_EQUIPOS[liga_id]['equipos'].copy()
+    random.shuffle(equipos)  # Mezclar equipos para emparejamientos aleatorios
+    
+    partidos = []
+    for i in range(0, min(num_partidos * 2, len(equipos)), 2):
+        if i + 1 < len(equipos):
+            partidos.append({
+                'local': equipos[i],
+                'visitante': equipos[i + 1]
+            })
+    
+    # Si no hay suficientes equipos, generar partidos adicionales
+    while len(partidos) < num_partidos:
+        local = random.choice(equipos)
+        visitante = random.choice([e for e in equipos if e != local])
+        partidos.append({
+            'local': local,
+            'visitante': visitante
+        })
+    
+    return partidos[:num_partidos]
+
 @bp.route('/apostar', methods=['POST'])
 @login_required
 def apostar():
@@ -133,31 +142,41 @@ def apostar():
         if not data:
             return jsonify({'error': 'Datos JSON requeridos'}), 400
             
-        cantidad = float(data['cantidad'])
-        pronosticos = data['pronosticos']  # Array de pronósticos [1, X, 2, ...]
+        cantidad = float(data['cantidad'])  # Precio por columna
+        pronosticos = data['pronosticos']  # Pronósticos por partido ['1', 'X', '1X', '1X2', ...]
         partidos_data = data['partidos']   # Datos de los partidos
+        if not math.isfinite(cantidad) or cantidad <= 0:  # float() acepta "nan" e "inf"
+            return jsonify({'error': 'Cantidad no válida'}), 400
+        
+        try:
+            boleto = sistemas.codificar(pronosticos)
+        except (TypeError, ValueError) as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # Un boleto con dobles y triples juega todas sus columnas
+        columnas = int(sistemas.columnas(boleto))
+        coste = cantidad * columnas
         
         # Verificar fondos
-        if cantidad > current_user.balance:
+        if coste > current_user.balance:
             return jsonify({'error': 'Fondos insuficientes'}), 400
         
         # Generar resultados reales aleatorios
         resultados_reales = generar_resultados_reales(len(pronosticos))
         
         # Calcular aciertos y ganancia
-        aciertos = calcular_aciertos(pronosticos, resultados_reales)
-        ganancia = calcular_ganancia(aciertos, len(pronosticos), cantidad)
+        aciertos, distribucion, ganancia = corregir_boleto(boleto, resultados_reales, cantidad)
         
         # Actualizar balance
-        current_user.balance = current_user.balance - cantidad + ganancia
+        current_user.balance = current_user.balance - coste + ganancia
         
         # Registrar apuesta
         apuesta = Apuesta(
             user_id=current_user.id,
             juego='quiniela',
             tipo_juego='singleplayer',
-            cantidad=cantidad,
-            resultado=f"{aciertos}/{len(pronosticos)} aciertos",
+            cantidad=coste,
+            resultado=f"{aciertos}/{len(pronosticos)} aciertos" + (f" ({columnas} columnas)" if columnas > 1 else ""),
             ganancia=ganancia
         )
         db.session.add(apuesta)
@@ -177,10 +196,10 @@ def apostar():
             db.session.add(stats)
         
         stats.partidas_jugadas += 1
-        stats.apuesta_total += cantidad
+        stats.apuesta_total += coste
         stats.ganancia_total += ganancia
         
-        if ganancia > cantidad:
+        if ganancia > coste:
             stats.partidas_ganadas += 1
         
         db.session.commit()
@@ -190,6 +209,9 @@ def apostar():
             'aciertos': aciertos,
             'total_partidos': len(pronosticos),
             'resultados_reales': resultados_reales,
+            'columnas': columnas,
+            'coste': coste,
+            'distribucion': distribucion,
             'ganancia': ganancia,
             'mensaje': f'Quiniela: {aciertos}/{len(pronosticos)} aciertos'
         })
@@ -198,23 +220,103 @@ def apostar():
         db.session.rollback()
         return jsonify({'error': f'Error interno del servidor: {str(e)}'}), 500
 
+def _jornada_json(jornada):
+    return {
+        'id': jornada.id,
+        'liga': LIGAS_EQUIPOS.get(jornada.liga, {}).get('nombre', jornada.liga),
+        'partidos': json.loads(jornada.partidos),
+        'estado': jornada.estado,
+        'cierre': jornada.cierre.isoformat(),
+        'resultados': list(jornada.resultados) if jornada.resultados else None
+    }
+
+@bp.route('/jornadas', methods=['GET'])
+@login_required
+def listar_jornadas():
+    """Jornadas comunes abiertas a boletos"""
+    abiertas = (JornadaQuiniela.query
+                .filter_by(estado='abierta')
+                .order_by(JornadaQuiniela.cierre)
+                .all())
+    return jsonify({'jornadas': [_jornada_json(j) for j in abiertas]})
+
+@bp.route('/jornadas/<int:jornada_id>/boletos', methods=['POST'])
+@login_required
+def comprar_boleto(jornada_id):
+    """Jugar un boleto (con dobles y triples si se quiere) en una jornada abierta"""
+    jornada = db.session.get(JornadaQuiniela, jornada_id)
+    if jornada is None:
+        return jsonify({'error': 'Jornada no encontrada'}), 404
+    
+    data = request.get_json(silent=True) or {}
+    try:
+        boleto = jornadas.comprar_boleto(current_user, jornada, data.get('pronosticos') or [],
+                                         float(data.get('cantidad', 0)))
+    except (TypeError, ValueError) as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    db.session.commit()
+    
+    return jsonify({
+        'boleto_id': boleto.id,
+        'columnas': boleto.columnas,
+        'coste': boleto.cantidad * boleto.columnas,
+        'cierre': jornada.cierre.isoformat(),
+        'nuevo_balance': current_user.balance
+    })
+
+@bp.route('/jornadas/<int:jornada_id>/boletos', methods=['GET'])
+@login_required
+def mis_boletos(jornada_id):
+    """Boletos del usuario en la jornada y, si ya se liquidó, sus aciertos y premios"""
+    jornada = db.session.get(JornadaQuiniela, jornada_id)
+    if jornada is None:
+        return jsonify({'error': 'Jornada no encontrada'}), 404
+    
+    boletos = (BoletoQuiniela.query
+               .filter_by(jornada_id=jornada_id, user_id=current_user.id)
+               .order_by(BoletoQuiniela.id)
+               .all())
+    partidos = len(json.loads(jornada.partidos))
+    return jsonify({
+        'jornada': _jornada_json(jornada),
+        'boletos': [{
+            'id': b.id,
+            'pronosticos': sistemas.decodificar([b.signos_1, b.signos_x, b.signos_2], partidos),
+            'columnas': b.columnas,
+            'coste': b.cantidad * b.columnas,
+            'aciertos': b.aciertos,
+            'ganancia': b.ganancia
+        } for b in boletos]
+    })
+
+# Probabilidad de cada resultado de un partido
+PROB_LOCAL = 0.45      # victoria local
+PROB_EMPATE = 0.35     # empate
+PROB_VISITANTE = 0.20  # victoria visitante
+
+TABLA_RESULTADOS = TablaAlias(['1', 'X', '2'], [PROB_LOCAL, PROB_EMPATE, PROB_VISITANTE])
+
 def generar_resultados_reales(num_partidos):
-    """Genera resultados aleatorios para los partidos"""
-    resultados = []
-    for _ in range(num_partidos):
-        rand = random.random()
-        if rand < 0.45:  # 45% probabilidad de victoria local
-            resultados.append('1')
-        elif rand < 0.80:  # 35% probabilidad de empate
-            resultados.append('X')
-        else:  # 20% probabilidad de victoria visitante
-            resultados.append('2')
-    return resultados
+    """Genera resultados aleatorios para los partidos (todos de una vez)"""
+    return TABLA_RESULTADOS.extraer(num_partidos).tolist()
 
 def calcular_aciertos(pronosticos, resultados):
     """Calcula cuántos aciertos hay"""
     return sum(1 for p, r in zip(pronosticos, resultados) if p == r)
 
+def corregir_boleto(boleto, resultados, apuesta):
+    """
+    Aciertos de la mejor columna, columnas por número de aciertos
+    ({aciertos: columnas}) y ganancia total de un boleto empaquetado con
+    ``sistemas.codificar``, a ``apuesta`` por columna.
+    """
+    total_partidos = len(resultados)
+    distribucion = sistemas.distribucion_aciertos(boleto, sistemas.codificar(resultados), total_partidos)[0]
+    por_aciertos = {k: int(n) for k, n in enumerate(distribucion) if n}
+    ganancia = sum(n * calcular_ganancia(k, total_partidos, apuesta) for k, n in por_aciertos.items())
+    return int(sistemas.aciertos(boleto, sistemas.codificar(resultados))), por_aciertos, ganancia
+
 def calcular_ganancia(aciertos, total_partidos, apuesta):
     """Calcula la ganancia basada en los aciertos"""
     if aciertos == total_partidos:  # Pleno
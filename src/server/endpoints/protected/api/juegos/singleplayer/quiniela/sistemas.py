@@ -0,0 +1,115 @@
+# server/endpoints/protected/api/juegos/singleplayer/quiniela/sistemas.py
+"""
+Boletos de quiniela con dobles y triples (apuestas múltiples o "sistemas").
+
+Un pronóstico de partido es cualquier combinación no vacía de signos ('1',
+'X', '2', '1X', 'X2', '1X2'...). El boleto se guarda empaquetado en tres
+máscaras de bits, una por signo: el bit ``i`` de la máscara de '1' indica que
+el partido ``i`` lleva el '1'. Los resultados reales se empaquetan igual (un
+solo signo por partido).
+
+Un boleto con ``d`` dobles y ``t`` triples equivale a ``2**d * 3**t`` columnas
+sencillas, pero nunca se generan: con un AND entre boleto y resultados y un
+popcount se sabe cuántos partidos simples, dobles y triples están cubiertos, y
+el número de columnas con ``k`` aciertos sale de desarrollar
+``x**s * (1 + x)**d_ok * 2**d_ko * (2 + x)**t_ok * 3**t_ko``. Todo va en
+arrays de NumPy, así que se puede corregir un boleto o miles de una vez.
+"""
+
+import math
+
+import numpy as np
+
+SIGNOS = ('1', 'X', '2')
+MAX_PARTIDOS = 32   # 3**32 columnas aún caben en un int64
+
+# Coeficientes binomiales C(n, k) para n, k <= MAX_PARTIDOS
+_BINOMIALES = np.array(
+    [[math.comb(n, k) for k in range(MAX_PARTIDOS + 1)] for n in range(MAX_PARTIDOS + 1)],
+    dtype=np.int64,
+)
+
+
+def codificar(pronosticos) -> np.ndarray:
+    """
+    Empaqueta un boleto (lista de pronósticos por partido, p. ej.
+    ``['1', '1X', 'X2', '1X2']``) en ``[máscara_1, máscara_X, máscara_2]``.
+    """
+    if not 1 <= len(pronosticos) <= MAX_PARTIDOS:
+        raise ValueError(f"El boleto debe tener entre 1 y {MAX_PARTIDOS} partidos")
+    mascaras = [0, 0, 0]
+    for i, pronostico in enumerate(pronosticos):
+        signos = ''.join(pronostico).upper()
+        if not signos or len(set(signos)) != len(signos) or not set(signos) <= set(SIGNOS):
+            raise ValueError(f"Pronóstico no válido en el partido {i + 1}: {pronostico!r}")
+        for s in signos:
+            mascaras[SIGNOS.index(s)] |= 1 << i
+    return np.array(mascaras, dtype=np.uint64)
+
+
+def decodificar(mascaras, partidos: int) -> list:
+    """Inversa de ``codificar``: ``[máscara_1, máscara_X, máscara_2]`` -> ``['1', '1X', ...]``."""
+    return [''.join(s for s, m in zip(SIGNOS, mascaras) if int(m) >> i & 1) for i in range(partidos)]
+
+
+def _popcount(mascaras: np.ndarray) -> np.ndarray:
+    return np.bitwise_count(mascaras).astype(np.int64)
+
+
+def _clases(boletos: np.ndarray):
+    """Máscaras de partidos simples, dobles y triples de cada boleto."""
+    b1, bx, b2 = boletos[..., 0], boletos[..., 1], boletos[..., 2]
+    triples = b1 & bx & b2
+    dobles = ((b1 & bx) | (b1 & b2) | (bx & b2)) & ~triples
+    simples = (b1 | bx | b2) & ~(dobles | triples)
+    return simples, dobles, triples
+
+
+def columnas(boletos: np.ndarray) -> np.ndarray:
+    """Columnas sencillas que cubre cada boleto (``2**dobles * 3**triples``)."""
+    _, dobles, triples = _clases(boletos)
+    return 2 ** _popcount(dobles) * 3 ** _popcount(triples)
+
+
+def _cubiertos(boletos: np.ndarray, resultados: np.ndarray) -> np.ndarray:
+    """Máscara de partidos cuyo resultado real lleva el boleto."""
+    cruce = boletos & resultados
+    return cruce[..., 0] | cruce[..., 1] | cruce[..., 2]
+
+
+def aciertos(boletos: np.ndarray, resultados: np.ndarray) -> np.ndarray:
+    """Partidos cubiertos de cada boleto: los aciertos de su mejor columna."""
+    return _popcount(_cubiertos(boletos, resultados))
+
+
+def distribucion_aciertos(boletos: np.ndarray, resultados: np.ndarray, partidos: int) -> np.ndarray:
+    """
+    Matriz ``(boletos, partidos + 1)``: en la posición ``[b, k]``, cuántas
+    columnas del boleto ``b`` tienen exactamente ``k`` aciertos.
+
+    Un doble cubierto aporta una columna que acierta y otra que falla
+    (``1 + x``); uno no cubierto, dos que fallan (``2``). Un triple siempre está
+    cubierto (``2 + x``). Los simples acertados solo desplazan el resultado.
+    """
+    boletos = np.atleast_2d(boletos)
+    simples, dobles, triples = _clases(boletos)
+    cubiertos = _cubiertos(boletos, resultados)
+    s_ok = _popcount(simples & cubiertos)
+    d_ok = _popcount(dobles & cubiertos)
+    d_ko = _popcount(dobles & ~cubiertos)
+    t_ok = _popcount(triples)
+
+    k = np.arange(partidos + 1)
+    # (1 + x)**d_ok * 2**d_ko  y  (2 + x)**t_ok, coeficiente a coeficiente
+    por_dobles = _BINOMIALES[d_ok][:, :partidos + 1] * (2 ** d_ko)[:, None]
+    exponente = t_ok[:, None] - k
+    por_triples = np.where(exponente >= 0,
+                           _BINOMIALES[t_ok][:, :partidos + 1] * 2 ** np.maximum(exponente, 0), 0)
+
+    producto = np.zeros((len(boletos), 2 * partidos + 1), dtype=np.int64)
+    for i in range(partidos + 1):
+        producto[:, i:i + partidos + 1] += por_dobles[:, i:i + 1] * por_triples
+
+    # los simples acertados desplazan cada fila s_ok posiciones
+    origen = k - s_ok[:, None]
+    return np.where(origen >= 0, np.take_along_axis(producto, np.maximum(origen, 0), axis=1), 0)
@@ -1,10 +1,44 @@
 from flask import request, jsonify, Blueprint
 from flask_login import login_required, current_user
-from models import db, Apuesta, Estadistica
+from models import db, Estadistica, RondaJuego, Retencion
+from ...motor_ruleta import liquidar, validar_apuestas, total_apostado, ApuestaInvalida
+from ...historial_ruleta import HistorialRuleta
+from ...rondas import abrir_ronda, retener, liquidar_ronda
+import json
 import random
 
 bp = Blueprint('api_ruleta', __name__, url_prefix='/api/ruleta')
 
+# Apuesta mínima por casilla (céntimos) de la ruleta individual; no la decide el cliente
+MIN_CELL = 20
+# Últimos números y frecuencias de cada usuario
+historiales = {}
+
+
+def _retencion_abierta(user_id):
+    """
+    Retención del usuario en su ronda de ruleta individual aún sin girar, o
+    ``None``. Lo cobrado en /place y las apuestas compiladas (en ``detalle``)
+    viven en la base de datos, así que sobreviven a reinicios y se comparten
+    entre procesos.
+    """
+    return (
+        Retencion.query
+        .join(RondaJuego, RondaJuego.id == Retencion.ronda_id)
+        .filter(Retencion.user_id == user_id, Retencion.estado == 'retenida',
+                RondaJuego.juego == 'ruleta', RondaJuego.tipo_juego == 'singleplayer',
+                RondaJuego.estado == 'abierta')
+        .order_by(RondaJuego.id.desc())
+        .first()
+    )
+
+
+def _apuestas_retenidas(retencion) -> list:
+    """Apuestas compiladas ``[mascara, cuota, cantidad]`` guardadas en la retención."""
+    if retencion is None or not retencion.detalle:
+        return []
+    return json.loads(retencion.detalle).get('apuestas', [])
+
 @bp.route('/state', methods=['GET'])
 @login_required
 def get_state():
@@ -24,6 +58,7 @@ def get_state():
             db.session.add(stats)
             db.session.commit()
 
+        historial = historiales.get(current_user.id) or HistorialRuleta()
         return jsonify({
             'ok': True,
             'balance': int(current_user.balance * 100),
@@ -32,7 +67,8 @@ def get_state():
                 'partidas_ganadas': stats.partidas_ganadas,
                 'ganancia_total': stats.ganancia_total,
                 'apuesta_total': stats.apuesta_total
-            }
+            },
+            'historial': historial.serializar()
         })
     except Exception as e:
         return jsonify({'error': f'Error obteniendo estado: {str(e)}'}), 400
@@ -45,32 +81,24 @@ def place_bets():
     try:
         data = request.get_json()
         bets = data.get('bets', [])
-        min_cell = data.get('min_cell', 20)
 
-        if not bets:
-            return jsonify({'error': 'No hay apuestas para procesar'}), 400
+        try:
+            compiladas = validar_apuestas(bets, MIN_CELL)
+        except ApuestaInvalida as e:
+            return jsonify({'error': str(e)}), 400
 
-        total_bet_cents = sum(bet['amount'] for bet in bets)
+        total_bet_cents = total_apostado(compiladas)
         total_bet_euros = total_bet_cents / 100
 
-        for bet in bets:
-            if bet['amount'] < min_cell:
-                return jsonify({'error': f'Apuesta mínima por casilla: {min_cell}¢'}), 400
-
         if total_bet_euros > current_user.balance:
             return jsonify({'error': 'Fondos insuficientes'}), 400
 
         current_user.balance -= total_bet_euros
 
-        apuesta = Apuesta(
-            user_id=current_user.id,
-            juego='ruleta',
-            tipo_juego='singleplayer',
-            cantidad=total_bet_euros,
-            ganancia=0,
-            resultado='PENDIENTE'
-        )
-        db.session.add(apuesta)
+        retencion = _retencion_abierta(current_user.id)
+        ronda_id = retencion.ronda_id if retencion else abrir_ronda('ruleta', 'singleplayer').id
+        apuestas = _apuestas_retenidas(retencion) + [list(c) for c in compiladas]
+        retener(ronda_id, current_user.id, total_bet_euros, detalle={'apuestas': apuestas}, pendiente=True)
         db.session.commit()
 
         return jsonify({
@@ -88,49 +116,21 @@ def place_bets():
 def spin_ruleta():
     """Realiza un giro de ruleta y actualiza estadísticas"""
     try:
-        data = request.get_json()
-        bets = data.get('bets', [])
+        # Solo se liquidan las apuestas validadas, compiladas y cobradas en
+        # /place; las que vengan en el cuerpo de la petición se ignoran
+        retencion = _retencion_abierta(current_user.id)
+        bets = _apuestas_retenidas(retencion)
+        if not bets:
+            return jsonify({'error': 'No hay apuestas colocadas: usa /place antes de girar'}), 400
 
         # El servidor decide el número ganador para asegurar integridad.
         # Ignoramos cualquier 'result' enviado por el cliente.
         result_number = random.randint(0, 36)
 
-        if not bets:
-            return jsonify({'error': 'No hay apuestas para liquidar'}), 400
-
-        PAYOUT = {
-            'straight': 35, 'split': 17, 'street': 11,
-            'corner': 8, 'line': 5, 'dozen': 2, 'column': 2, 'even': 1
-        }
-
-        REDS = {1,3,5,7,9,12,14,16,18,19,21,23,25,27,30,32,34,36}
-
-        total_bet_cents = sum(bet['amount'] for bet in bets)
-        total_win_cents = 0
-        total_returned_cents = 0
-
-        # Calcular resultado
-        for bet in bets:
-            tipo = bet['type']
-            cantidad = bet['amount']
-            numeros = set(bet['set'])
-            label = bet.get('label', '').lower()
-
-            gana = False
-            if tipo == 'even':
-                if ('rojo' in label and result_number in REDS) \
-                or ('negro' in label and result_number not in REDS and result_number != 0) \
-                or ('par' in label and result_number % 2 == 0 and result_number != 0) \
-                or ('impar' in label and result_number % 2 == 1) \
-                or ('1-18' in label and 1 <= result_number <= 18) \
-                or ('19-36' in label and 19 <= result_number <= 36):
-                    gana = True
-            elif result_number in numeros:
-                gana = True
-
-            if gana:
-                total_win_cents += cantidad * PAYOUT.get(tipo, 0)
-                total_returned_cents += cantidad
+        liquidacion = liquidar({current_user.id: bets}, result_number)[current_user.id]
+        total_bet_cents = liquidacion['apostado']
+        total_win_cents = liquidacion['ganancia']
+        total_returned_cents = liquidacion['devuelto'] - liquidacion['ganancia']
 
         # Conversión a euros
         total_bet_euros = total_bet_cents / 100
@@ -169,16 +169,16 @@ def spin_ruleta():
         if total_win_euros > 0:
             stats.partidas_ganadas += 1
 
-        # Actualizar apuesta
-        apuesta = Apuesta.query.filter_by(
-            user_id=current_user.id, juego='ruleta', resultado='PENDIENTE'
-        ).order_by(Apuesta.id.desc()).first()
-
-        if apuesta:
-            apuesta.ganancia = total_win_euros
-            apuesta.resultado = f'Número {result_number} - Ganancia: {total_win_euros:.2f}€'
+        # Cerrar la ronda de /place (retención y Apuesta pendiente)
+        liquidar_ronda(retencion.ronda_id, {current_user.id: {
+            'pago': total_payout_euros,
+            'ganancia': total_win_euros,
+            'resultado': f'Número {result_number} - Ganancia: {total_win_euros:.2f}€',
+        }}, result_number)
 
         db.session.commit()
+        historial = historiales.setdefault(current_user.id, HistorialRuleta())
+        historial.registrar(result_number)
 
         net_euros = total_payout_euros - total_bet_euros
 
@@ -195,7 +195,8 @@ def spin_ruleta():
             'mensaje': f'¡Sale el número {result_number}! Cobras {total_payout_euros:.2f}€ ({"beneficio" if net_euros >= 0 else "pérdida"} {net_euros:+.2f}€) sobre apuesta {total_bet_euros:.2f}€',
             'payout': total_payout_euros,
             'net': net_euros,
-            'bet': total_bet_euros
+            'bet': total_bet_euros,
+            'historial': historial.serializar()
         })
     except Exception as e:
         db.session.rollback()
@@ -1,7 +1,8 @@
 # routes.py - Versión actualizada con edición y eliminación
 from flask import Blueprint, render_template, request, flash, redirect, url_for, request, jsonify
 from flask_login import login_required, current_user
-from models import db, User, Apuesta, Estadistica, SalaMultijugador, UsuarioSala, IngresoFondos
+from models import db, User, Apuesta, Estadistica, SalaMultijugador, UsuarioSala, IngresoFondos, RondaJuego, Retencion, BoletoQuiniela, AccionPoker, ContadorJuego
+from endpoints.protected.api.juegos.multiplayer.poker.mesa import descartar_mesa
 from endpoints.protected.ui.admin.utils import require_admin
 from datetime import datetime, timedelta
 from endpoints.protected.ui.general.estadisticas.routes import obtener_pagina_transacciones
@@ -145,12 +146,21 @@ def eliminar_usuario(user_id):
         username = usuario.username
         
         # Eliminar en cascada
+        # 0. Eliminar lo que apunta a sus apuestas: retenciones en rondas...
+        Retencion.query.filter_by(user_id=user_id).delete()
+        # y sus boletos de quiniela
+        BoletoQuiniela.query.filter_by(user_id=user_id).delete()
+
         # 1. Eliminar apuestas del usuario
         Apuesta.query.filter_by(user_id=user_id).delete()
         
-        # 2. Eliminar estadísticas del usuario
+        # 2. Eliminar estadísticas y contadores del usuario
         Estadistica.query.filter_by(user_id=user_id).delete()
+        ContadorJuego.query.filter_by(user_id=user_id).delete()
         
+        # 2b. Anonimizar sus acciones de póker: el historial de la mano es de todos
+        AccionPoker.query.filter_by(user_id=user_id).update({AccionPoker.user_id: None})
+
         # 3. Eliminar relaciones con salas multijugador
         UsuarioSala.query.filter_by(usuario_id=user_id).delete()
         
@@ -159,8 +169,11 @@ def eliminar_usuario(user_id):
         for sala in salas_creadas:
             # Eliminar jugadores de estas salas
             UsuarioSala.query.filter_by(sala_id=sala.id).delete()
+            # Conservar las rondas jugadas en la sala, sin sala
+            RondaJuego.query.filter_by(sala_id=sala.id).update({RondaJuego.sala_id: None})
             # Eliminar la sala
             db.session.delete(sala)
+            descartar_mesa(sala.id)  # la mesa de póker en memoria, si la hay
         
         # 5. Finalmente eliminar el usuario
         db.session.delete(usuario)
@@ -1,6 +1,7 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
 from flask_login import login_required, current_user
-from models import db, SalaMultijugador, UsuarioSala
+from models import db, SalaMultijugador, UsuarioSala, RondaJuego
+from endpoints.protected.api.juegos.multiplayer.poker.mesa import descartar_mesa
 from datetime import datetime, timedelta
 
 bp = Blueprint('salas_espera', __name__)
@@ -45,10 +46,17 @@ def limpiar_salas_antiguas():
     ).all()
     
     salas_a_eliminar = salas_terminadas + salas_vacias
+
+    # Las rondas jugadas en la sala se conservan (con sus retenciones), sin sala
+    if salas_a_eliminar:
+        RondaJuego.query.filter(
+            RondaJuego.sala_id.in_([sala.id for sala in salas_a_eliminar])
+        ).update({RondaJuego.sala_id: None}, synchronize_session=False)
     
     for sala in salas_a_eliminar:
         print(f"🧹 Limpieza: eliminando sala vacía {sala.id}")
         db.session.delete(sala)
+        descartar_mesa(sala.id)  # la mesa de póker en memoria, si la hay
     
     if salas_a_eliminar or usuarios_desconectados:
         db.session.commit()
@@ -1,9 +1,10 @@
 from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, Blueprint, render_template
 from flask_login import LoginManager, login_user, logout_user, login_required, current_user
+from endpoints.protected.api.juegos.carrera import CABALLOS
 
 bp = Blueprint('caballos', __name__)
 
 @bp.route('/caballos')
 @login_required
 def home():
-    return render_template('pages/casino/juegos/singleplayer/caballos.html')
\ No newline at end of file
+    return render_template('pages/casino/juegos/singleplayer/caballos.html', caballos=CABALLOS)
\ No newline at end of file
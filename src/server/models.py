@@ -63,6 +63,76 @@ class Estadistica(db.Model):
     partidas_ganadas = db.Column(db.Integer, default=0, nullable=False)  
     ganancia_total = db.Column(db.Float, default=0.0, nullable=False) 
     apuesta_total = db.Column(db.Float, default=0.0, nullable=False)
+
+class ContadorJuego(db.Model):
+    """Contadores de resultados por (usuario, juego, modo), sumados al liquidar cada ronda"""
+    __tablename__ = 'contadores_juego'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), primary_key=True)
+    juego = db.Column(db.String(50), primary_key=True)
+    tipo_juego = db.Column(db.String(20), primary_key=True)
+    victorias = db.Column(db.Integer, default=0, nullable=False)
+    derrotas = db.Column(db.Integer, default=0, nullable=False)
+    empates = db.Column(db.Integer, default=0, nullable=False)
+    naturales = db.Column(db.Integer, default=0, nullable=False)  # blackjack natural (2 cartas)
+    apostado = db.Column(db.Float, default=0.0, nullable=False)
+    pagado = db.Column(db.Float, default=0.0, nullable=False)
+
+class RondaJuego(db.Model):
+    """Ronda de un juego (giro, mano, carrera, lanzamiento) a la que se asocian las retenciones"""
+    __tablename__ = 'rondas_juego'
+
+    id = db.Column(db.Integer, primary_key=True)
+    juego = db.Column(db.String(50), nullable=False, index=True)
+    tipo_juego = db.Column(db.String(20), nullable=False)
+    sala_id = db.Column(db.Integer, db.ForeignKey('sala_multijugador.id', ondelete='SET NULL'))  # la ronda sobrevive a la sala
+    estado = db.Column(db.String(20), default='abierta', nullable=False)  # abierta | liquidada
+    resultado = db.Column(db.String(50))
+    fecha_inicio = db.Column(db.DateTime, default=datetime.utcnow)
+    fecha_fin = db.Column(db.DateTime)
+
+class Retencion(db.Model):
+    """Dinero retenido a un usuario en una ronda hasta su liquidación"""
+    __tablename__ = 'retenciones'
+
+    ronda_id = db.Column(db.Integer, db.ForeignKey('rondas_juego.id'), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), primary_key=True)
+    cantidad = db.Column(db.Float, default=0.0, nullable=False)
+    pago = db.Column(db.Float)  # total devuelto al saldo al liquidar
+    estado = db.Column(db.String(20), default='retenida', nullable=False)  # retenida | liquidada
+    apuesta_id = db.Column(db.Integer, db.ForeignKey('apuesta.id', ondelete='SET NULL'))  # Apuesta pendiente asociada, si la hay
+    detalle = db.Column(db.Text)  # JSON con datos del juego (p. ej. la elección en coinflip)
+
+class JornadaQuiniela(db.Model):
+    """Jornada de quiniela común: admite boletos hasta ``cierre`` y se liquida de una vez"""
+    __tablename__ = 'jornadas_quiniela'
+
+    id = db.Column(db.Integer, primary_key=True)
+    liga = db.Column(db.String(50), nullable=False)
+    partidos = db.Column(db.Text, nullable=False)  # JSON [{"local", "visitante"}, ...]
+    estado = db.Column(db.String(20), default='abierta', nullable=False, index=True)  # abierta | liquidada
+    cierre = db.Column(db.DateTime, nullable=False)
+    resultados = db.Column(db.String(32))  # un signo por partido ('1X2...') al liquidar
+    fecha_creacion = db.Column(db.DateTime, default=datetime.utcnow)
+    fecha_liquidacion = db.Column(db.DateTime)
+
+class BoletoQuiniela(db.Model):
+    """Boleto de una jornada, empaquetado en una máscara de bits por signo (ver quiniela/sistemas.py)"""
+    __tablename__ = 'boletos_quiniela'
+
+    id = db.Column(db.Integer, primary_key=True)
+    jornada_id = db.Column(db.Integer, db.ForeignKey('jornadas_quiniela.id'), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False)
+    apuesta_id = db.Column(db.Integer, db.ForeignKey('apuesta.id', ondelete='SET NULL'))  # Apuesta 'PENDIENTE' asociada
+    signos_1 = db.Column(db.BigInteger, nullable=False)
+    signos_x = db.Column(db.BigInteger, nullable=False)
+    signos_2 = db.Column(db.BigInteger, nullable=False)
+    cantidad = db.Column(db.Float, nullable=False)  # precio por columna
+    columnas = db.Column(db.BigInteger, nullable=False)  # hasta 3**MAX_PARTIDOS, no cabe en int4
+    aciertos = db.Column(db.SmallInteger)  # al liquidar
+    ganancia = db.Column(db.Float)         # al liquidar
+    fecha = db.Column(db.DateTime, default=datetime.utcnow)
+
 class TipoJuego(Enum):
     SINGLEPLAYER = 'singleplayer'
     MULTIJUGADOR = 'multijugador'
@@ -123,6 +193,23 @@ class PartidaMultijugador(db.Model):
     
     # 'partida_sala' está definido en SalaMultijugador.partidas
 
+class AccionPoker(db.Model):
+    """Historial append-only de póker: una fila compacta por acción o reparto de cartas"""
+    __tablename__ = 'acciones_poker'
+
+    id = db.Column(db.Integer, primary_key=True)
+    partida_id = db.Column(db.Integer, db.ForeignKey('partida_multijugador.id'), nullable=False)
+    mano = db.Column(db.Integer, nullable=False)       # nº de mano dentro de la partida
+    seq = db.Column(db.SmallInteger, nullable=False)   # orden dentro de la mano
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='SET NULL'))  # None para el board
+    accion = db.Column(db.SmallInteger, nullable=False)  # código, ver poker/historial.py
+    cantidad = db.Column(db.Float, default=0.0)
+    cartas = db.Column(db.LargeBinary(7))  # un byte por carta (0-51)
+
+    __table_args__ = (
+        db.UniqueConstraint('partida_id', 'mano', 'seq', name='unique_accion_poker'),
+    )
+
 class DepositoLimite(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, unique=True)
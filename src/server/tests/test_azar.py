@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from endpoints.protected.api.juegos import azar
+from endpoints.protected.api.juegos.azar import FlujoAleatorio, TablaAlias
+from endpoints.protected.api.juegos.multiplayer.caballos import socket_handlers as caballos_handlers
+from endpoints.protected.api.juegos.singleplayer.quiniela import routes as quiniela_routes
+
+
+@pytest.mark.parametrize("pesos", [[0.45, 0.35, 0.20], [1, 0, 3, 2, 5, 0.5], [7]])
+def test_tabla_alias_reproduce_los_pesos(pesos):
+    tabla = TablaAlias(list(range(len(pesos))), pesos)
+    n = 400_000
+    frecuencias = np.bincount(tabla.extraer(n, FlujoAleatorio(3)), minlength=len(pesos)) / n
+    esperadas = np.array(pesos, dtype=float) / sum(pesos)
+    error = np.sqrt(esperadas * (1 - esperadas) / n)
+    assert np.all(np.abs(frecuencias - esperadas) <= 5 * error + 1e-12)
+
+
+def test_flujo_con_semilla_es_reproducible_y_no_depende_del_lote():
+    a, b = FlujoAleatorio(42), FlujoAleatorio(42, bloque=7)
+    seguidos = np.concatenate([a.uniformes(1) for _ in range(20)])
+    assert np.array_equal(seguidos, np.random.default_rng(42).random(20))
+    assert np.array_equal(np.concatenate([b.uniformes(3) for _ in range(2)]), seguidos[:6])
+    assert not np.array_equal(FlujoAleatorio(43).uniformes(20), seguidos)
+
+
+def test_flujo_seguro_da_uniformes_distintos_en_rango():
+    flujo = FlujoAleatorio()
+    assert flujo.seguro
+    u = flujo.uniformes(10_000)
+    assert ((u >= 0) & (u < 1)).all()
+    assert abs(u.mean() - 0.5) < 0.02
+    assert not np.array_equal(u[:8], FlujoAleatorio().uniformes(8))
+
+
+def test_juegos_usan_el_flujo_por_defecto(monkeypatch):
+    monkeypatch.setattr(azar, "_flujo", None)
+    azar.sembrar(5)
+    ganadores = [caballos_handlers.elegir_ganador() for _ in range(50)]
+    resultados = quiniela_routes.generar_resultados_reales(15)
+    azar.sembrar(5)
+    assert [caballos_handlers.elegir_ganador() for _ in range(50)] == ganadores
+    assert quiniela_routes.generar_resultados_reales(15) == resultados
+    assert set(ganadores) <= {1, 2, 3, 4} and all(type(g) is int for g in ganadores)
+    assert set(resultados) <= {"1", "X", "2"}
@@ -2,11 +2,15 @@
 from collections import deque
 
 import pytest
+from sqlalchemy import event
 from flask_socketio import SocketIOTestClient
 
 from app import app as flask_app, socketio
-from models import db, User, SalaMultijugador
-from endpoints.protected.api.juegos.multiplayer.blackjack.socket_handlers import salas_blackjack, valor_mano
+from models import db, User, SalaMultijugador, ContadorJuego, Apuesta, Estadistica
+from endpoints.protected.api.juegos.multiplayer.blackjack.socket_handlers import (
+    salas_blackjack, valor_mano, refrescar_estadisticas_jugadores, sumar_contadores, ejecutar_crupier_y_resolver,
+    reconstruir_contadores,
+)
 
 
 # Helpers
@@ -238,3 +242,208 @@ def test_no_permite_mas_de_cuatro_jugadores(app, sala_y_clients):
             for u in extras:
                 db.session.delete(User.query.get(u.id))
             db.session.commit()
+
+
+def _emit(app, client, evento, datos):
+    # Contexto propio por evento: Flask-Login cachea el usuario en ``g``
+    with app.app_context():
+        client.emit(evento, datos)
+
+
+def _eventos(client, nombre):
+    return [evt["args"][0] for evt in client.get_received() if evt["name"] == nombre]
+
+
+def test_join_envia_foto_y_despues_deltas_numerados(app, dos_usuarios):
+    user1, user2 = dos_usuarios
+    sala = _crear_sala_blackjack(app, creador_id=user1.id)
+    c1 = _socket_client_para_usuario(app, user1)
+    c2 = _socket_client_para_usuario(app, user2)
+    try:
+        _emit(app, c1, "join_sala_blackjack", {"sala_id": sala.id})
+        foto, = _eventos(c1, "estado_blackjack")
+        assert foto["seq"] == 0
+        assert set(foto["jugadores"]) == {str(user1.id)}
+        for alias in ("stats", "resumen", "resumen_stats", "estadisticas"):
+            assert alias not in foto
+
+        _emit(app, c2, "join_sala_blackjack", {"sala_id": sala.id})
+        delta, = _eventos(c1, "blackjack_delta")
+        assert delta["seq"] == 1
+        tipos = {c["tipo"] for c in delta["cambios"]}
+        assert "jugador" in tipos
+        foto2, = _eventos(c2, "estado_blackjack")
+        assert foto2["seq"] == 1
+
+        _emit(app, c1, "apostar_blackjack", {"sala_id": sala.id, "cantidad": 10})
+        _emit(app, c2, "apostar_blackjack", {"sala_id": sala.id, "cantidad": 10})
+        _emit(app, c1, "iniciar_ronda_blackjack", {"sala_id": sala.id})
+        _emit(app, c1, "hit_blackjack", {"sala_id": sala.id})
+
+        deltas = _eventos(c2, "blackjack_delta")
+        assert [d["seq"] for d in deltas] == list(range(2, 2 + len(deltas)))
+        cartas = [c for d in deltas for c in d["cambios"] if c["tipo"] == "carta"]
+        # Reparto inicial (2 por jugador + 2 del crupier) y la carta pedida
+        assert len(cartas) == 7
+        ultima = cartas[-1]
+        assert ultima["uid"] == user1.id
+        assert ultima["total"] == valor_mano(salas_blackjack[sala.id]["jugadores"][user1.id]["mano"])
+        assert any(c["tipo"] == "turno" for d in deltas for c in d["cambios"])
+    finally:
+        c1.disconnect()
+        c2.disconnect()
+        _limpiar_sala_db(app, sala.id)
+
+
+def test_snapshot_bajo_demanda_coincide_con_la_secuencia(app, sala_y_clients):
+    sala, (c1, c2), (user1, user2) = sala_y_clients
+    _emit(app, c1, "apostar_blackjack", {"sala_id": sala.id, "cantidad": 5})
+    c1.get_received()
+
+    _emit(app, c1, "snapshot_blackjack", {"sala_id": sala.id})
+    foto, = _eventos(c1, "estado_blackjack")
+    st = salas_blackjack[sala.id]
+    assert foto["seq"] == st["seq"]
+    assert foto["jugadores"][str(user1.id)]["apuesta"] == 5
+    assert foto["jugadores"][str(user1.id)]["estado"] == "jugando"
+
+
+def test_liquidacion_suma_contadores_por_usuario(app, dos_usuarios):
+    user1, user2 = dos_usuarios
+    sala = _crear_sala_blackjack(app, creador_id=user1.id)
+    c1 = _socket_client_para_usuario(app, user1)
+    c2 = _socket_client_para_usuario(app, user2)
+    try:
+        _emit(app, c1, "join_sala_blackjack", {"sala_id": sala.id})
+        _emit(app, c2, "join_sala_blackjack", {"sala_id": sala.id})
+        # Crupier 10+7, jugador 1 natural (A+K), jugador 2 con 10+5 se planta y pierde
+        salas_blackjack[sala.id]["mazo"] = deque([
+            ("10", "S", 10), ("7", "H", 7),
+            ("A", "C", 11), ("K", "D", 10),
+            ("10", "C", 10), ("5", "H", 5),
+        ])
+        _emit(app, c1, "apostar_blackjack", {"sala_id": sala.id, "cantidad": 10})
+        _emit(app, c2, "apostar_blackjack", {"sala_id": sala.id, "cantidad": 20})
+        _emit(app, c1, "iniciar_ronda_blackjack", {"sala_id": sala.id})
+        c1.get_received()
+        c2.get_received()
+        _emit(app, c1, "stand_blackjack", {"sala_id": sala.id})
+        _emit(app, c2, "stand_blackjack", {"sala_id": sala.id})
+        assert salas_blackjack[sala.id]["fase"] == "fin"
+
+        # Cada jugador recibe solo su propio saldo
+        assert _eventos(c1, "balance_update") == [{"balance": pytest.approx(165.0)}]
+        assert _eventos(c2, "balance_update") == [{"balance": pytest.approx(100.0)}]
+
+        with app.app_context():
+            filas = {c.user_id: c for c in ContadorJuego.query.filter_by(juego="blackjack", tipo_juego="multiplayer")}
+            assert filas[user1.id].victorias == 1 and filas[user1.id].naturales == 1
+            assert filas[user1.id].pagado == pytest.approx(25.0)
+            assert filas[user2.id].derrotas == 1 and filas[user2.id].apostado == pytest.approx(20.0)
+
+            # Segunda liquidación: se suma sobre la fila existente
+            sumar_contadores({user1.id: {"empates": 1, "apostado": 5.0, "pagado": 5.0}})
+            db.session.commit()
+
+        with app.app_context():
+            stats = refrescar_estadisticas_jugadores(salas_blackjack[sala.id])
+            assert stats[user1.id]["partidas_jugadas"] == 2
+            assert stats[user1.id]["empates"] == 1
+            assert stats[user1.id]["blackjacks"] == 1
+            assert stats[user1.id]["apuesta_total"] == pytest.approx(15.0)
+            assert stats[user2.id]["derrotas"] == 1
+    finally:
+        c1.disconnect()
+        c2.disconnect()
+        with app.app_context():
+            ids = [user1.id, user2.id]
+            ContadorJuego.query.filter(ContadorJuego.user_id.in_(ids)).delete()
+            Apuesta.query.filter(Apuesta.user_id.in_(ids)).delete()
+            Estadistica.query.filter(Estadistica.user_id.in_(ids)).delete()
+            db.session.commit()
+        _limpiar_sala_db(app, sala.id)
+
+
+def test_reconstruir_contadores_desde_historial_incluye_nombre_antiguo(app, dos_usuarios):
+    user1, user2 = dos_usuarios
+    try:
+        with app.app_context():
+            for juego, resultado, cantidad, ganancia in [
+                ("blackjack_multijugador", "perdida", 10.0, 0.0),
+                ("blackjack_multijugador", "Empate", 10.0, 10.0),
+                ("blackjack_multijugador", "Ganada (blackjack)", 10.0, 25.0),
+                ("blackjack", "ganada", 5.0, 10.0),
+            ]:
+                db.session.add(Apuesta(user_id=user1.id, juego=juego, tipo_juego="multiplayer",
+                                       cantidad=cantidad, ganancia=ganancia, resultado=resultado))
+            # user2 solo tiene la Estadistica agregada
+            db.session.add(Estadistica(user_id=user2.id, juego="blackjack", tipo_juego="multiplayer",
+                                       partidas_jugadas=5, partidas_ganadas=2,
+                                       apuesta_total=50.0, ganancia_total=40.0))
+            db.session.commit()
+
+            # dos pasadas: la segunda sustituye, no suma
+            for _ in range(2):
+                assert reconstruir_contadores([user1.id, user2.id]) == 2
+                db.session.commit()
+
+            filas = {c.user_id: c for c in ContadorJuego.query.filter_by(juego="blackjack", tipo_juego="multiplayer")}
+            c1, c2 = filas[user1.id], filas[user2.id]
+            assert (c1.victorias, c1.derrotas, c1.empates, c1.naturales) == (2, 1, 1, 1)
+            assert (c1.apostado, c1.pagado) == (pytest.approx(35.0), pytest.approx(45.0))
+            assert (c2.victorias, c2.derrotas, c2.apostado) == (2, 3, pytest.approx(50.0))
+    finally:
+        with app.app_context():
+            ids = [user1.id, user2.id]
+            ContadorJuego.query.filter(ContadorJuego.user_id.in_(ids)).delete()
+            Apuesta.query.filter(Apuesta.user_id.in_(ids)).delete()
+            Estadistica.query.filter(Estadistica.user_id.in_(ids)).delete()
+            db.session.commit()
+
+
+def _sentencias_liquidacion(app, n_jugadores):
+    usuarios = [_crear_usuario(app, f"bj_liq_{n_jugadores}_{i}", balance=100.0) for i in range(n_jugadores)]
+    ids = [u.id for u in usuarios]
+    salas_blackjack[999] = {
+        "jugadores": {
+            uid: {"username": f"u{uid}", "balance": 90.0, "apuesta": 10.0, "estado": "plantado",
+                  "mano": [("10", "S", 10), ("9", "H", 9)] if i % 2 else [("10", "S", 10), ("5", "H", 5)]}
+            for i, uid in enumerate(ids)
+        },
+        "dealer": [("10", "C", 10), ("8", "D", 8)],
+        "mazo": deque(),
+        "estadisticas_jugadores": {},
+        "fase": "turnos",
+    }
+    sentencias = []
+
+    def contar(conn, cursor, statement, parameters, context, executemany):
+        sentencias.append(statement)
+
+    try:
+        with app.app_context():
+            event.listen(db.engine, "before_cursor_execute", contar)
+            try:
+                ejecutar_crupier_y_resolver(999)
+            finally:
+                event.remove(db.engine, "before_cursor_execute", contar)
+        with app.app_context():
+            balances = [db.session.get(User, uid).balance for uid in ids]
+    finally:
+        with app.app_context():
+            ContadorJuego.query.filter(ContadorJuego.user_id.in_(ids)).delete()
+            Apuesta.query.filter(Apuesta.user_id.in_(ids)).delete()
+            Estadistica.query.filter(Estadistica.user_id.in_(ids)).delete()
+            User.query.filter(User.id.in_(ids)).delete()
+            db.session.commit()
+    return len(sentencias), balances
+
+
+def test_liquidacion_en_bloque_no_depende_del_numero_de_jugadores(app):
+    n2, balances2 = _sentencias_liquidacion(app, 2)
+    n4, balances4 = _sentencias_liquidacion(app, 4)
+    assert n2 == n4
+    # 15 pierde frente a 18; 19 gana (2× la apuesta)
+    assert balances4 == [pytest.approx(100.0), pytest.approx(120.0)] * 2
+    assert salas_blackjack[999]["fase"] == "fin"
+    assert all(j["apuesta"] == 0 for j in salas_blackjack[999]["jugadores"].values())
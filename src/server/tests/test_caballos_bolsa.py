@@ -0,0 +1,131 @@
+import pytest
+
+from app import socketio
+from models import db, SalaMultijugador, UsuarioSala, User
+from endpoints.protected.api.juegos.multiplayer.caballos import socket_handlers as caballos_handlers
+from endpoints.protected.api.juegos.multiplayer.caballos.bolsa import BolsaApuestas
+
+
+def test_bolsa_lleva_totales_y_cuotas_incrementales():
+    bolsa = BolsaApuestas([1, 2, 3, 4], margen=0.1)
+    bolsa.apostar(1, 30)
+    bolsa.apostar(2, 10)
+    bolsa.apostar(2, 20)
+    assert bolsa.totales == {1: 30, 2: 30, 3: 0, 4: 0}
+    assert bolsa.cuotas() == {1: pytest.approx(1.8), 2: pytest.approx(1.8), 3: None, 4: None}
+
+    # una apuesta que cambia de caballo se lleva lo ya apostado
+    bolsa.apostar(3, 10, previa=30, caballo_previo=1)
+    assert bolsa.totales == {1: 0, 2: 30, 3: 40, 4: 0}
+    assert bolsa.total == 70
+    assert bolsa.cuota(3) == pytest.approx(70 * 0.9 / 40)
+
+
+def test_bolsa_reparte_por_proporcion_y_devuelve_si_nadie_acierta():
+    bolsa = BolsaApuestas([1, 2, 3, 4], margen=0.05)
+    for caballo, cantidad in [(1, 10), (1, 30), (2, 60)]:
+        bolsa.apostar(caballo, cantidad)
+    pagos = [bolsa.pago(c, x, ganador=1) for c, x in [(1, 10), (1, 30), (2, 60)]]
+    assert pagos == [23.75, 71.25, 0.0]
+    assert sum(pagos) <= bolsa.total * 0.95
+    assert bolsa.pago(1, 10, ganador=4) == 10
+
+
+@pytest.fixture
+def sala_caballos(app, test_user):
+    with app.app_context():
+        sala = SalaMultijugador(nombre="Bolsa", juego="caballos", capacidad=4,
+                                creador_id=test_user.id, apuesta_minima=1.0)
+        db.session.add(sala)
+        db.session.commit()
+        db.session.add(UsuarioSala(usuario_id=test_user.id, sala_id=sala.id, estado="conectado"))
+        db.session.commit()
+        yield sala.id
+
+
+def _cliente(app, client, user):
+    resp = client.post("/login", data={"username": user.username, "password": "password123"}, follow_redirects=True)
+    assert resp.status_code == 200
+    sio = socketio.test_client(app, flask_test_client=client, namespace="/")
+    return sio
+
+
+def _eventos(sio, nombre):
+    return [e["args"][0] for e in sio.get_received() if e["name"] == nombre]
+
+
+def test_rafaga_de_apuestas_se_difunde_una_vez(app, client, sala_caballos, test_user, monkeypatch):
+    caballos_handlers.salas_caballos.clear()
+    tareas = []
+    monkeypatch.setattr(caballos_handlers, "_intervalo_estado", lambda: 0.5)
+    monkeypatch.setattr(socketio, "sleep", lambda secs: None)
+    monkeypatch.setattr(socketio, "start_background_task", lambda fn, *a, **k: tareas.append(fn))
+
+    sio = _cliente(app, client, test_user)
+    sio.emit("join_caballos_room", {"sala_id": sala_caballos})
+    sio.emit("caballos_cambiar_modo", {"sala_id": sala_caballos, "modo": "mutua"})
+    sio.get_received()
+
+    for i in range(40):
+        sio.emit("caballos_place_bet", {"sala_id": sala_caballos, "caballo": 1 + i % 2, "cantidad": 1})
+    recibidos = [e["name"] for e in sio.get_received()]
+    # cada apostante recibe su confirmación; a la sala solo le llega la difusión agrupada
+    assert recibidos.count("apuesta_registrada") == 40
+    assert "estado_sala_actualizado" not in recibidos
+    assert len(tareas) == 1
+
+    tareas[0]()
+    estado, = _eventos(sio, "estado_sala_actualizado")
+    assert estado["modo"] == "mutua"
+    assert estado["bolsa"] == 40
+    # todo el dinero del usuario corre por el último caballo elegido
+    assert estado["totales"] == {"1": 0, "2": 40, "3": 0, "4": 0}
+    assert estado["cuotas"]["2"] == pytest.approx(1 - caballos_handlers.MARGEN_CABALLOS)
+
+
+def test_carrera_en_modo_mutuo_paga_segun_la_bolsa(app, client, sala_caballos, test_user, monkeypatch):
+    caballos_handlers.salas_caballos.clear()
+    monkeypatch.setattr(caballos_handlers, "elegir_ganador", lambda: 3)
+
+    sio = _cliente(app, client, test_user)
+    sio.emit("join_caballos_room", {"sala_id": sala_caballos})
+    sio.emit("caballos_cambiar_modo", {"sala_id": sala_caballos, "modo": "mutua"})
+    with app.app_context():
+        otro = User(username="bolsa_rival", email="bolsa_rival@example.com", balance=100.0)
+        otro.set_password("password123")
+        db.session.add(otro)
+        db.session.commit()
+        otro_id = otro.id
+    # la apuesta del rival entra directamente en la sala
+    st = caballos_handlers.salas_caballos[sala_caballos]
+    st["apuestas"][otro_id] = {"caballo": 1, "cantidad": 30.0, "username": "bolsa_rival"}
+    st["bolsa"].apostar(1, 30.0)
+
+    sio.emit("caballos_place_bet", {"sala_id": sala_caballos, "caballo": 3, "cantidad": 10})
+    sio.emit("caballos_cambiar_modo", {"sala_id": sala_caballos, "modo": "fija"})
+    assert _eventos(sio, "error_general")[-1]["message"].startswith("No se puede cambiar el modo")
+
+    balance = db.session.get(User, test_user.id).balance
+    sio.emit("iniciar_carrera", {"sala_id": sala_caballos})
+    resultado, = _eventos(sio, "race_result")
+
+    assert resultado["bolsa"]["bolsa"] == 40
+    mios = resultado["resultados"][str(test_user.id)]
+    assert mios["ganancia"] == pytest.approx(40 * (1 - caballos_handlers.MARGEN_CABALLOS), abs=0.01)
+    assert resultado["resultados"][str(otro_id)]["ganancia"] == 0
+    assert st["apuestas"] == {} and st["bolsa"].total == 0
+    with app.app_context():
+        assert db.session.get(User, test_user.id).balance == pytest.approx(balance + mios["ganancia"])
+        User.query.filter_by(id=otro_id).delete()
+        db.session.commit()
+
+
+def test_bolsa_sin_restos_al_mover_apuestas_devuelve_si_el_ganador_queda_vacio():
+    bolsa = BolsaApuestas([1, 2, 3, 4], margen=0.05)
+    bolsa.apostar(1, 0.1)
+    bolsa.apostar(1, 0.2)
+    bolsa.apostar(2, 0.0, previa=0.1, caballo_previo=1)
+    bolsa.apostar(3, 0.0, previa=0.2, caballo_previo=1)
+    assert bolsa.totales[1] == 0
+    assert bolsa.cuota(1) is None
+    assert bolsa.pago(2, 0.1, ganador=1) == 0.1
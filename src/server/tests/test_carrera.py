@@ -0,0 +1,100 @@
+import json
+import shutil
+import subprocess
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from endpoints.protected.api.juegos import azar, carrera
+
+SCRIPT_CARRERA = Path(__file__).resolve().parents[2] / "static" / "js" / "carrera_caballos.js"
+
+
+def test_mulberry32_coincide_con_la_referencia():
+    # Primeros valores de mulberry32(0) según la implementación de referencia en JS
+    u = carrera._mulberry32(0)
+    assert [next(u) for _ in range(3)] == [
+        0.26642920868471265, 0.0003297457005828619, 0.2232720274478197,
+    ]
+
+
+def test_simular_carrera_es_determinista_y_acaba_en_meta():
+    a = carrera.simular_carrera(1234)
+    assert a == carrera.simular_carrera(1234)
+    assert len(a["posiciones"]) == carrera.fotogramas(carrera.DURACION_MS)
+    final = a["posiciones"][-1]
+    assert max(final) == 1.0 and final[a["ganador"] - 1] == 1.0
+    # nadie retrocede
+    for c in range(len(carrera.CABALLOS)):
+        serie = [fila[c] for fila in a["posiciones"]]
+        assert serie == sorted(serie)
+
+
+def test_todos_los_caballos_pueden_ganar_el_modelo():
+    ganadores = {carrera.simular_carrera(s)["ganador"] for s in range(400)}
+    assert ganadores == set(carrera.CABALLOS)
+
+
+@pytest.mark.parametrize("ganador", [1, 2, 3, 4])
+def test_preparar_carrera_da_semilla_del_ganador(ganador, monkeypatch):
+    monkeypatch.setattr(azar, "_flujo", azar.FlujoAleatorio(ganador))
+    semilla = carrera.preparar_carrera(ganador)
+    assert 0 <= semilla < 2 ** 32
+    assert carrera.simular_carrera(semilla)["ganador"] == ganador
+
+
+def test_probabilidades_vectorizadas_coinciden_con_las_carreras_reales():
+    n = 3000
+    reales = np.bincount([carrera.simular_carrera(s)["ganador"] - 1 for s in range(n)], minlength=4) / n
+    probs = np.array(carrera.cuotas([(c["velocidad"], c["resistencia"]) for c in carrera.CABALLOS.values()])[0])
+    assert np.all(np.abs(reales - probs) <= 4 * np.sqrt(probs * (1 - probs) / n))
+
+
+def test_cuotas_de_un_campo_de_doce_con_margen(monkeypatch):
+    monkeypatch.setattr(carrera, "_cuotas", {})
+    rng = np.random.default_rng(3)
+    campo = [(rng.uniform(0.4, 0.9), rng.uniform(0.6, 0.97)) for _ in range(carrera.MAX_CABALLOS)]
+    probs, multiplicadores = carrera.cuotas(campo, margen=0.1)
+    assert len(probs) == len(multiplicadores) == 12
+    assert sum(probs) == pytest.approx(1.0)
+    for p, m in zip(probs, multiplicadores):
+        assert m <= carrera.MULTIPLICADOR_MAXIMO
+        if p * carrera.MULTIPLICADOR_MAXIMO > 0.9:
+            assert 0.9 - 0.01 * p <= p * m <= 0.9
+    # el mejor caballo es el favorito de las apuestas
+    assert multiplicadores[int(np.argmax(probs))] == min(multiplicadores)
+
+
+def test_cuotas_se_calculan_una_vez_por_campo(monkeypatch):
+    monkeypatch.setattr(carrera, "_cuotas", {})
+    llamadas = []
+    original = carrera.probabilidades_victoria
+    monkeypatch.setattr(carrera, "probabilidades_victoria", lambda *a, **k: llamadas.append(1) or original(*a, **k))
+    campo = [(0.8, 0.7), (0.6, 0.9), (0.7, 0.8)]
+    primera = carrera.cuotas(campo)
+    assert carrera.cuotas(campo) is primera
+    assert carrera.cuotas(campo, margen=0.2) != primera
+    assert len(llamadas) == 2
+    with pytest.raises(ValueError):
+        carrera.cuotas([(0.5, 0.5)] * (carrera.MAX_CABALLOS + 1))
+
+
+def test_carta_nueva_se_puede_correr(monkeypatch):
+    monkeypatch.setattr(azar, "_flujo", azar.FlujoAleatorio(9))
+    nueva = carrera.carta({i: {"id": i, "velocidad": 0.5 + 0.05 * i, "resistencia": 0.95 - 0.03 * i} for i in range(1, 7)})
+    assert all(c["multiplicador"] > 1 for c in nueva.values())
+    semilla = carrera.preparar_carrera(6, caballos=nueva)
+    assert carrera.simular_carrera(semilla, caballos=nueva)["ganador"] == 6
+
+
+@pytest.mark.skipif(shutil.which("node") is None, reason="node no disponible")
+def test_cliente_js_reproduce_la_misma_carrera():
+    semillas = [0, 7, 2 ** 31, 2 ** 32 - 1]
+    script = (
+        f"{SCRIPT_CARRERA.read_text(encoding='utf-8')}\n"
+        f"const caballos = {json.dumps(carrera.CABALLOS)};\n"
+        f"console.log(JSON.stringify({semillas}.map(s => simularCarrera(s, {carrera.DURACION_MS}, caballos))));"
+    )
+    salida = json.loads(subprocess.run(["node", "-e", script], capture_output=True, text=True, check=True).stdout)
+    assert salida == [carrera.simular_carrera(s) for s in semillas]
@@ -0,0 +1,58 @@
+import random
+
+from endpoints.protected.api.juegos.historial_ruleta import HistorialRuleta, CATEGORIAS_NUMERO
+
+
+def _recontar(numeros):
+    frecuencias = [0] * 37
+    categorias = {}
+    for n in numeros:
+        frecuencias[n] += 1
+        for c in CATEGORIAS_NUMERO[n]:
+            categorias[c] = categorias.get(c, 0) + 1
+    return frecuencias, categorias
+
+
+def test_buffer_circular_mantiene_contadores():
+    rng = random.Random(3)
+    historial = HistorialRuleta(capacidad=20)
+    tirados = []
+    for _ in range(150):
+        n = rng.randint(0, 36)
+        tirados.append(n)
+        historial.registrar(n)
+        frecuencias, categorias = _recontar(tirados[-20:])
+        assert historial.frecuencias == frecuencias
+        assert {c: v for c, v in historial.categorias.items() if v} == categorias
+    assert list(historial.numeros) == tirados[-20:]
+    assert historial.serializar()['ultimos'][0] == tirados[-1]
+
+
+def test_categorias_y_destacados():
+    historial = HistorialRuleta()
+    for n in (0, 17, 17, 36, 5):
+        historial.registrar(n)
+    datos = historial.serializar()
+    assert datos['tiradas'] == 5
+    assert datos['ultimos'] == [5, 36, 17, 17, 0]
+    f = datos['frecuencias']
+    assert (f['verde'], f['rojo'], f['negro']) == (1, 2, 2)
+    assert (f['par'], f['impar']) == (1, 3)
+    assert (f['docena_1'], f['docena_2'], f['docena_3']) == (1, 2, 1)
+    assert (f['columna_1'], f['columna_2'], f['columna_3']) == (0, 3, 1)
+    assert datos['calientes'][0] == 17
+    assert 17 not in datos['frios'] and datos['frios'][0] == 1
+
+
+def test_historial_vacio():
+    datos = HistorialRuleta().serializar()
+    assert datos == {'ultimos': [], 'tiradas': 0, 'frecuencias': datos['frecuencias'], 'calientes': [], 'frios': []}
+    assert not any(datos['frecuencias'].values())
+
+
+def test_calientes_solo_incluye_numeros_que_han_salido():
+    historial = HistorialRuleta()
+    for n in (7, 7, 3):
+        historial.registrar(n)
+    assert historial.calientes() == [7, 3]
+    assert historial.serializar()['calientes'] == [7, 3]
@@ -43,4 +43,27 @@ def test_horse_race_invalid_horse(client, test_user):
         'ganancia': 0
     })
 
-    assert response.status_code == 400
\ No newline at end of file
+    assert response.status_code == 400
+def test_horse_race_resultado_lo_decide_el_servidor(client, test_user, monkeypatch):
+    """The client's resultado/ganancia are ignored; the seed replays the server's race"""
+    from endpoints.protected.api.juegos import carrera
+    from endpoints.protected.api.juegos.singleplayer.caballos import routes as caballos_routes
+
+    monkeypatch.setattr(caballos_routes, 'elegir_ganador', lambda: 2)
+    login_user(test_user)
+    balance = test_user.balance
+    response = client.post('/api/caballos/apostar', json={
+        'cantidad': 100,
+        'caballo_apostado': 1,
+        'caballo_ganador': 1,
+        'resultado': 'ganada',
+        'ganancia': 1000
+    })
+
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data['resultado'] == 'perdida'
+    assert data['ganancia'] == 0
+    assert data['caballo_ganador']['id'] == 2
+    assert data['nuevo_balance'] == pytest.approx(balance - 100)
+    assert carrera.simular_carrera(data['semilla'], data['duracion'])['ganador'] == 2
@@ -3,6 +3,7 @@ from flask_socketio import SocketIOTestClient
 
 from app import socketio
 from models import db, SalaMultijugador, UsuarioSala, User, Apuesta
+from endpoints.protected.api.juegos.carrera import simular_carrera
 from endpoints.protected.api.juegos.multiplayer.caballos import socket_handlers as caballos_handlers
 
 
@@ -98,6 +99,9 @@ def test_iniciar_carrera_emits_results_and_creates_apuestas(
 
     names = [e["name"] for e in events]
     assert "start_race" in names
+    salida = next(e for e in events if e["name"] == "start_race")["args"][0]
+    assert set(salida) == {"semilla", "duracion"}
+    assert simular_carrera(salida["semilla"], salida["duracion"])["ganador"] == 1
     race_result_events = [e for e in events if e["name"] == "race_result"]
     assert race_result_events, "race_result should be emitted after iniciar_carrera"
     resultados = race_result_events[0]["args"][0]["resultados"]
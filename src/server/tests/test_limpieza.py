@@ -0,0 +1,182 @@
+"""Borrado de salas y usuarios con las claves foráneas activas (como en PostgreSQL)."""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from models import (db, User, Apuesta, SalaMultijugador, RondaJuego, Retencion, BoletoQuiniela, JornadaQuiniela,
+                    PartidaMultijugador, AccionPoker, ContadorJuego)
+from endpoints.protected.api.juegos.rondas import abrir_ronda, retener
+from endpoints.protected.api.juegos.multiplayer.poker import mesa as mesa_poker
+from endpoints.protected.api.juegos.singleplayer.quiniela import jornadas
+from endpoints.protected.ui.general.salas_espera.routes import limpiar_salas_antiguas
+
+
+def _activar_claves(dbapi_connection, connection_record):
+    dbapi_connection.execute("PRAGMA foreign_keys=ON")
+
+
+@pytest.fixture
+def claves_foraneas(app):
+    """SQLite no comprueba las claves foráneas salvo con ``PRAGMA foreign_keys=ON`` en cada conexión."""
+    with app.app_context():
+        db.session.remove()
+        event.listen(db.engine, "connect", _activar_claves)
+        db.engine.dispose()
+    yield
+    with app.app_context():
+        db.session.remove()
+        event.remove(db.engine, "connect", _activar_claves)
+        db.engine.dispose()
+
+
+@pytest.fixture
+def jugador(app, claves_foraneas):
+    with app.app_context():
+        user = User(username="limpieza_jugador", email="limpieza@example.com", balance=100.0)
+        user.set_password("password123")
+        db.session.add(user)
+        db.session.commit()
+        uid = user.id
+    yield uid
+    with app.app_context():
+        Retencion.query.filter_by(user_id=uid).delete()
+        Apuesta.query.filter_by(user_id=uid).delete()
+        User.query.filter_by(id=uid).delete()
+        db.session.commit()
+
+
+@pytest.fixture
+def admin_id(app, claves_foraneas):
+    with app.app_context():
+        admin = User(username="admin", email="admin_limpieza@example.com", balance=0.0)
+        admin.set_password("password123")
+        db.session.add(admin)
+        db.session.commit()
+        uid = admin.id
+    yield uid
+    with app.app_context():
+        User.query.filter_by(id=uid).delete()
+        db.session.commit()
+
+
+def _sala_con_ronda(creador_id, **campos):
+    """Sala con una ronda jugada en la que ``creador_id`` tiene dinero retenido."""
+    sala = SalaMultijugador(nombre="Sala limpieza", juego="blackjack", creador_id=creador_id, **campos)
+    db.session.add(sala)
+    db.session.flush()
+    ronda_id = abrir_ronda("blackjack", "multiplayer", sala.id).id
+    retener(ronda_id, creador_id, 5.0, pendiente=True)
+    db.session.commit()
+    return sala.id, ronda_id
+
+
+def _eliminar_usuario(app, admin_id, uid):
+    cliente = app.test_client()
+    with cliente.session_transaction() as sess:
+        sess["_user_id"] = str(admin_id)
+        sess["_fresh"] = True
+    with app.app_context():
+        respuesta = cliente.post(f"/admin/usuarios/{uid}/eliminar")
+    assert respuesta.status_code == 302
+    assert "/login" not in respuesta.headers["Location"]
+    with app.app_context():
+        assert db.session.get(User, uid) is None
+
+
+def test_limpiar_salas_antiguas_conserva_las_rondas_sin_sala(app, jugador):
+    with app.app_context():
+        sala_id, ronda_id = _sala_con_ronda(jugador, estado="terminada",
+                                            fecha_creacion=datetime.utcnow() - timedelta(hours=2))
+
+        limpiar_salas_antiguas()
+
+        assert db.session.get(SalaMultijugador, sala_id) is None
+        ronda = db.session.get(RondaJuego, ronda_id)
+        assert ronda is not None and ronda.sala_id is None
+        Retencion.query.filter_by(ronda_id=ronda_id).delete()
+        RondaJuego.query.filter_by(id=ronda_id).delete()
+        db.session.commit()
+
+
+def test_limpiar_salas_antiguas_descarta_la_mesa_de_poker_en_memoria(app, jugador):
+    with app.app_context():
+        sala = SalaMultijugador(nombre="Póker limpieza", juego="poker", creador_id=jugador, estado="terminada",
+                                fecha_creacion=datetime.utcnow() - timedelta(hours=2))
+        db.session.add(sala)
+        db.session.commit()
+        sala_id = sala.id
+        mesa_poker.mesas_poker[sala_id] = mesa_poker.MesaPoker(sala_id, 0, {"jugadores": {}})
+
+        limpiar_salas_antiguas()
+
+        assert sala_id not in mesa_poker.mesas_poker
+
+
+def test_eliminar_usuario_con_rondas_y_salas(app, jugador, admin_id):
+    with app.app_context():
+        sala_id, ronda_id = _sala_con_ronda(jugador)
+
+    try:
+        _eliminar_usuario(app, admin_id, jugador)
+
+        with app.app_context():
+            assert db.session.get(SalaMultijugador, sala_id) is None
+            assert Retencion.query.filter_by(ronda_id=ronda_id).count() == 0
+            assert db.session.get(RondaJuego, ronda_id).sala_id is None
+    finally:
+        with app.app_context():
+            RondaJuego.query.filter_by(id=ronda_id).delete()
+            db.session.commit()
+
+
+def test_eliminar_usuario_con_boletos_de_quiniela(app, jugador, admin_id):
+    with app.app_context():
+        jornada = jornadas.abrir_jornada("espana", num_partidos=2)
+        jornadas.comprar_boleto(db.session.get(User, jugador), jornada, ["1", "X2"], 1.0)
+        db.session.commit()
+        jornada_id = jornada.id
+
+    try:
+        _eliminar_usuario(app, admin_id, jugador)
+
+        with app.app_context():
+            assert BoletoQuiniela.query.filter_by(jornada_id=jornada_id).count() == 0
+    finally:
+        with app.app_context():
+            BoletoQuiniela.query.filter_by(jornada_id=jornada_id).delete()
+            JornadaQuiniela.query.filter_by(id=jornada_id).delete()
+            db.session.commit()
+
+
+def test_eliminar_usuario_conserva_el_historial_de_poker_sin_usuario(app, jugador, admin_id):
+    with app.app_context():
+        partida = PartidaMultijugador(estado="activa")
+        db.session.add(partida)
+        db.session.flush()
+        db.session.add(AccionPoker(partida_id=partida.id, mano=1, seq=0, user_id=jugador, accion=1, cantidad=2.0))
+        db.session.commit()
+        partida_id = partida.id
+
+    try:
+        _eliminar_usuario(app, admin_id, jugador)
+
+        with app.app_context():
+            accion, = AccionPoker.query.filter_by(partida_id=partida_id).all()
+            assert (accion.user_id, accion.cantidad) == (None, 2.0)
+    finally:
+        with app.app_context():
+            AccionPoker.query.filter_by(partida_id=partida_id).delete()
+            PartidaMultijugador.query.filter_by(id=partida_id).delete()
+            db.session.commit()
+
+
+def test_eliminar_usuario_borra_sus_contadores(app, jugador, admin_id):
+    with app.app_context():
+        db.session.add(ContadorJuego(user_id=jugador, juego="blackjack", tipo_juego="multiplayer", victorias=3))
+        db.session.commit()
+
+    _eliminar_usuario(app, admin_id, jugador)
+
+    with app.app_context():
+        assert ContadorJuego.query.filter_by(user_id=jugador).count() == 0
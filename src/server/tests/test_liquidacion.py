@@ -0,0 +1,73 @@
+import pytest
+from sqlalchemy import event
+
+from models import db, User, Estadistica
+from endpoints.protected.api.juegos.liquidacion import abonar_y_sumar
+
+
+@pytest.fixture
+def usuarios(app):
+    with app.app_context():
+        creados = []
+        for i in range(4):
+            user = User(username=f"liquida_{i}", email=f"liquida_{i}@example.com", balance=100.0)
+            user.set_password("password123")
+            db.session.add(user)
+            creados.append(user)
+        db.session.commit()
+        ids = [u.id for u in creados]
+    yield ids
+    with app.app_context():
+        Estadistica.query.filter(Estadistica.user_id.in_(ids)).delete()
+        User.query.filter(User.id.in_(ids)).delete()
+        db.session.commit()
+
+
+def _sentencias(fn):
+    sentencias = []
+
+    def contar(conn, cursor, statement, parameters, context, executemany):
+        sentencias.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", contar)
+    try:
+        fn()
+    finally:
+        event.remove(db.engine, "before_cursor_execute", contar)
+    return len(sentencias)
+
+
+def test_abonar_y_sumar_abona_saldos_y_acumula_estadisticas(app, usuarios):
+    a, b, _, _ = usuarios
+    with app.app_context():
+        db.session.add(Estadistica(user_id=a, juego="ruleta", tipo_juego="multiplayer", partidas_jugadas=3,
+                                   partidas_ganadas=1, apuesta_total=30.0, ganancia_total=12.0))
+        db.session.commit()
+
+        balances = abonar_y_sumar("ruleta", "multiplayer", {
+            a: {"pago": 25.0, "ganadas": 1, "apostado": 10.0, "ganancia": 15.0},
+            b: {"apostado": 5.0},
+            999_999: {"pago": 50.0},  # usuarios que ya no existen se ignoran
+        })
+        db.session.commit()
+
+        assert balances == {a: pytest.approx(125.0), b: pytest.approx(100.0)}
+        fila_a = Estadistica.query.filter_by(user_id=a, juego="ruleta").one()
+        assert (fila_a.partidas_jugadas, fila_a.partidas_ganadas) == (4, 2)
+        assert (fila_a.apuesta_total, fila_a.ganancia_total) == (pytest.approx(40.0), pytest.approx(27.0))
+        fila_b = Estadistica.query.filter_by(user_id=b, juego="ruleta").one()
+        assert (fila_b.partidas_jugadas, fila_b.partidas_ganadas, fila_b.apuesta_total) == (1, 0, 5.0)
+        assert Estadistica.query.filter_by(user_id=999_999).count() == 0
+
+
+def test_abonar_y_sumar_usa_las_mismas_sentencias_con_mas_usuarios(app, usuarios):
+    with app.app_context():
+        def abonar(ids):
+            return lambda: abonar_y_sumar("poker", "multiplayer", {
+                uid: {"pago": 1.0, "apostado": 1.0, "ganancia": 1.0} for uid in ids
+            })
+
+        # primera pasada: todas las filas de Estadistica son nuevas; segunda: todas existen
+        assert _sentencias(abonar(usuarios[:1])) == _sentencias(abonar(usuarios[1:]))
+        assert _sentencias(abonar(usuarios[:1])) == _sentencias(abonar(usuarios[1:]))
+        db.session.commit()
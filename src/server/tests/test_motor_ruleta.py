@@ -0,0 +1,113 @@
+import pytest
+
+from endpoints.protected.api.juegos import motor_ruleta
+
+
+def _referencia(bets, resultado):
+    apostado = ganancia = 0
+    for bet in bets:
+        apostado += bet['amount']
+        if resultado in motor_ruleta.numeros_apuesta(bet):
+            ganancia += bet['amount'] * motor_ruleta.PAGOS[bet['type']]
+    return apostado, ganancia
+
+
+APUESTAS = [
+    {'type': 'straight', 'amount': 100, 'set': [0]},
+    {'type': 'split', 'amount': 50, 'set': [1, 2]},
+    {'type': 'street', 'amount': 20, 'set': [4, 5, 6]},
+    {'type': 'corner', 'amount': 20, 'set': [8, 9, 11, 12]},
+    {'type': 'line', 'amount': 20, 'set': [13, 14, 15, 16, 17, 18]},
+    {'type': 'dozen', 'amount': 30, 'set': list(range(25, 37))},
+    {'type': 'column', 'amount': 30, 'set': list(range(2, 37, 3))},
+    {'type': 'even', 'amount': 10, 'set': [], 'label': 'Rojo'},
+    {'type': 'even', 'amount': 10, 'set': [], 'label': 'Par'},
+]
+
+
+@pytest.mark.parametrize('resultado', range(37))
+def test_coincide_con_el_bucle_apuesta_a_apuesta(resultado):
+    tabla = motor_ruleta.compilar({'a': APUESTAS, 'b': APUESTAS[:3], 'vacio': []})
+    liquidacion = tabla.liquidar(resultado)
+    for clave, bets in (('a', APUESTAS), ('b', APUESTAS[:3]), ('vacio', [])):
+        apostado, ganancia = _referencia(bets, resultado)
+        assert liquidacion[clave]['apostado'] == apostado
+        assert liquidacion[clave]['ganancia'] == ganancia
+        devuelto = sum(b['amount'] for b in bets if resultado in motor_ruleta.numeros_apuesta(b))
+        assert liquidacion[clave]['devuelto'] == devuelto + ganancia
+
+
+def test_etiquetas_de_apuestas_sencillas():
+    rango = {'type': 'even', 'amount': 100, 'set': [], 'label': '1–18'}
+    assert motor_ruleta.liquidar({1: [rango]}, 5)[1]['ganancia'] == 100
+    assert motor_ruleta.liquidar({1: [rango]}, 19)[1]['ganancia'] == 0
+
+    impar = {'type': 'even', 'amount': 100, 'set': [], 'label': 'Impar'}
+    assert motor_ruleta.liquidar({1: [impar]}, 4)[1]['ganancia'] == 0
+    assert motor_ruleta.liquidar({1: [impar]}, 7)[1]['devuelto'] == 200
+    assert motor_ruleta.liquidar({1: [impar]}, 0)[1]['devuelto'] == 0
+
+
+def test_numeros_repetidos_o_fuera_de_rango_se_ignoran():
+    bet = {'type': 'split', 'amount': 10, 'set': [3, 3, 40, 'x', '6']}
+    assert motor_ruleta.compilar_apuesta(bet) == ((1 << 3) | (1 << 6), 17, 10)
+    assert motor_ruleta.liquidar({1: [bet]}, 3)[1]['ganancia'] == 170
+
+
+def test_apuestas_ya_compiladas_y_sin_jugadores():
+    bet = {'type': 'straight', 'amount': 100, 'set': [17]}
+    compilada = motor_ruleta.compilar_apuesta(bet)
+    assert motor_ruleta.liquidar({1: [compilada]}, 17) == motor_ruleta.liquidar({1: [bet]}, 17)
+    assert motor_ruleta.liquidar({}, 17) == {}
+
+
+def test_geometria_del_pano():
+    assert len(motor_ruleta.GEOMETRIA['split']) == 60
+    assert len(motor_ruleta.GEOMETRIA['corner']) == 23
+    validas = [
+        {'type': 'split', 'amount': 20, 'set': [17, 20]},
+        {'type': 'street', 'amount': 20, 'set': [34, 35, 36]},
+        {'type': 'corner', 'amount': 20, 'set': [2, 3, 5, 6]},
+        {'type': 'line', 'amount': 20, 'set': [31, 32, 33, 34, 35, 36]},
+        {'type': 'column', 'amount': 20, 'set': list(range(3, 37, 3))},
+        {'type': 'even', 'amount': 20, 'set': [], 'label': '19–36'},
+    ]
+    compiladas = motor_ruleta.validar_apuestas(validas, min_cell=20)
+    assert compiladas == [motor_ruleta.compilar_apuesta(b) for b in validas]
+    assert motor_ruleta.total_apostado(compiladas) == 120
+
+
+@pytest.mark.parametrize('bet', [
+    {'type': 'split', 'amount': 20, 'set': [3, 4]},
+    {'type': 'split', 'amount': 20, 'set': [5, 5]},
+    {'type': 'street', 'amount': 20, 'set': [2, 3, 4]},
+    {'type': 'corner', 'amount': 20, 'set': [3, 4, 6, 7]},
+    {'type': 'straight', 'amount': 20, 'set': [37]},
+    {'type': 'straight', 'amount': 20, 'set': ['7']},
+    {'type': 'dozen', 'amount': 20, 'set': list(range(1, 13)) + [13]},
+    {'type': 'even', 'amount': 20, 'set': [], 'label': 'Verde'},
+    {'type': 'invalid', 'amount': 20, 'set': [10]},
+    {'type': 'straight', 'amount': 10, 'set': [10]},
+    {'type': 'straight', 'amount': 20.5, 'set': [10]},
+    {'type': 'straight', 'amount': 10 ** 30, 'set': [10]},
+    {'type': 'straight', 'amount': float('inf'), 'set': [10]},
+    ['straight', 20, [10]],
+])
+def test_apuestas_ilegales_se_rechazan(bet):
+    with pytest.raises(motor_ruleta.ApuestaInvalida):
+        motor_ruleta.validar_apuestas([bet], min_cell=20)
+
+
+@pytest.mark.parametrize('amount', [0, -100000])
+def test_cantidad_no_positiva_se_rechaza_con_cualquier_minimo(amount):
+    bet = {'type': 'straight', 'amount': amount, 'set': [5]}
+    with pytest.raises(motor_ruleta.ApuestaInvalida):
+        motor_ruleta.validar_apuestas([bet], min_cell=-1000000)
+
+
+def test_demasiadas_apuestas_se_rechazan():
+    bet = {'type': 'straight', 'amount': 20, 'set': [1]}
+    with pytest.raises(motor_ruleta.ApuestaInvalida):
+        motor_ruleta.validar_apuestas([bet] * (motor_ruleta.MAX_APUESTAS + 1))
+    with pytest.raises(motor_ruleta.ApuestaInvalida):
+        motor_ruleta.validar_apuestas([])
@@ -0,0 +1,148 @@
+import pytest
+
+from app import socketio
+from models import db, User, SalaMultijugador, UsuarioSala, PartidaMultijugador, AccionPoker, Apuesta, Estadistica
+from endpoints.protected.api.juegos.multiplayer.poker import mesa as mesa_mod
+
+
+def _post(app, cli, url, **kwargs):
+    # Contexto propio por petición: el de la sesión de pytest comparte ``g`` y
+    # Flask-Login reutilizaría el usuario cargado en la petición anterior
+    with app.app_context():
+        return cli.post(url, **kwargs)
+
+
+@pytest.fixture
+def mesa_en_preflop(app):
+    """Sala de dos jugadores con stack y una mano recién iniciada (ids, no instancias)."""
+    with app.app_context():
+        usuarios = []
+        for nombre in ("ack_ana", "ack_luis"):
+            u = User(username=nombre, email=f"{nombre}@example.com", balance=300.0)
+            u.set_password("password123")
+            db.session.add(u)
+            usuarios.append(u)
+        db.session.commit()
+        sala = SalaMultijugador(nombre="Mesa ack", juego="poker", capacidad=6, estado="jugando",
+                                creador_id=usuarios[0].id, apuesta_minima=20.0)
+        db.session.add(sala)
+        db.session.commit()
+        for pos, u in enumerate(usuarios):
+            db.session.add(UsuarioSala(usuario_id=u.id, sala_id=sala.id, posicion=pos))
+        db.session.commit()
+        ids = [u.id for u in usuarios]
+        sala_id = sala.id
+
+    clientes = {}
+    for uid in ids:
+        cli = app.test_client()
+        with cli.session_transaction() as sess:
+            sess["_user_id"] = str(uid)
+            sess["_fresh"] = True
+        _post(app, cli, f"/api/multijugador/poker/stack/{sala_id}", json={"stack": 100.0})
+        clientes[uid] = cli
+    resp = _post(app, clientes[ids[0]], f"/api/multijugador/poker/iniciar/{sala_id}")
+    assert resp.status_code == 200
+
+    yield sala_id, ids, clientes
+
+    with app.app_context():
+        mesa_mod.mesas_poker.pop(sala_id, None)
+        partidas = [p.id for p in PartidaMultijugador.query.filter_by(sala_id=sala_id)]
+        AccionPoker.query.filter(AccionPoker.partida_id.in_(partidas)).delete()
+        PartidaMultijugador.query.filter_by(sala_id=sala_id).delete()
+        UsuarioSala.query.filter_by(sala_id=sala_id).delete()
+        Apuesta.query.filter(Apuesta.user_id.in_(ids)).delete()
+        Estadistica.query.filter(Estadistica.user_id.in_(ids)).delete()
+        SalaMultijugador.query.filter_by(id=sala_id).delete()
+        User.query.filter(User.id.in_(ids)).delete()
+        db.session.commit()
+
+
+def _socket(app, cli):
+    with app.app_context():
+        return socketio.test_client(app, flask_test_client=cli)
+
+
+def _accion(app, sock, **datos):
+    with app.app_context():
+        return sock.emit("poker_action", datos, callback=True)
+
+
+def _turno(app, sala_id):
+    with app.app_context():
+        return mesa_mod.obtener_mesa_por_id(sala_id).estado["turno_actual"]
+
+
+def test_poker_action_devuelve_vista_personal_en_el_ack(app, mesa_en_preflop):
+    sala_id, ids, clientes = mesa_en_preflop
+    turno = _turno(app, sala_id)
+    sock = _socket(app, clientes[turno])
+
+    ack = _accion(app, sock, sala_id=sala_id, tipo="call")
+
+    assert ack["ok"] is True
+    assert ack["estado"] == "preflop"
+    assert ack["seq"] == ack["vista"]["version"]
+    otro = str(next(uid for uid in ids if uid != turno))
+    assert ack["vista"]["jugadores"][str(turno)]["cartas"]
+    assert "cartas" not in ack["vista"]["jugadores"][otro]
+    assert _turno(app, sala_id) != turno
+    sock.disconnect()
+
+
+def test_poker_action_rechaza_fuera_de_turno_sin_tocar_la_mesa(app, mesa_en_preflop):
+    sala_id, ids, clientes = mesa_en_preflop
+    turno = _turno(app, sala_id)
+    otro = next(uid for uid in ids if uid != turno)
+    sock = _socket(app, clientes[otro])
+
+    with app.app_context():
+        version = mesa_mod.obtener_mesa_por_id(sala_id).version
+    ack = _accion(app, sock, sala_id=sala_id, tipo="retirarse")
+
+    assert ack["ok"] is False
+    assert ack["error"] == "No es tu turno"
+    assert ack["seq"] == version
+    sock.disconnect()
+
+
+def test_poker_action_valida_tipo_y_cantidad(app, mesa_en_preflop):
+    sala_id, ids, clientes = mesa_en_preflop
+    sock = _socket(app, clientes[_turno(app, sala_id)])
+
+    assert _accion(app, sock, sala_id=sala_id, tipo="doblar") == {
+        "ok": False, "error": "Acción no soportada"
+    }
+    ack = _accion(app, sock, sala_id=sala_id, tipo="raise", cantidad="mucho")
+    assert ack == {"ok": False, "error": "Cantidad no válida"}
+    ack = _accion(app, sock, sala_id=sala_id, tipo="raise", cantidad=5)
+    assert ack["ok"] is False and "mínima" in ack["error"]
+    sock.disconnect()
+
+
+@pytest.mark.parametrize("cantidad", ["nan", "inf", "-inf", -20])
+def test_poker_action_rechaza_cantidades_no_finitas_o_negativas(app, mesa_en_preflop, cantidad):
+    sala_id, ids, clientes = mesa_en_preflop
+    turno = _turno(app, sala_id)
+    sock = _socket(app, clientes[turno])
+    with app.app_context():
+        antes = mesa_mod.obtener_mesa_por_id(sala_id).estado
+        bote, stack = antes["bote"], antes["jugadores"][str(turno)]["stack"]
+
+    assert _accion(app, sock, sala_id=sala_id, tipo="raise", cantidad=cantidad) == {
+        "ok": False, "error": "Cantidad no válida"
+    }
+    with app.app_context():
+        despues = mesa_mod.obtener_mesa_por_id(sala_id).estado
+        assert (despues["bote"], despues["jugadores"][str(turno)]["stack"]) == (bote, stack)
+    sock.disconnect()
+
+
+def test_raise_http_rechaza_nan(app, mesa_en_preflop):
+    sala_id, ids, clientes = mesa_en_preflop
+    turno = _turno(app, sala_id)
+    resp = _post(app, clientes[turno], f"/api/multijugador/poker/raise/{sala_id}", json={"cantidad": "nan"})
+    assert resp.status_code == 400
+    with app.app_context():
+        assert _turno(app, sala_id) == turno
@@ -0,0 +1,84 @@
+import random
+
+import numpy as np
+import pytest
+
+from endpoints.protected.api.juegos.multiplayer.poker import equity, evaluador
+from endpoints.protected.api.juegos.multiplayer.poker.routes import (
+    _equity_jugadores_vivos,
+    _equity_para_usuario,
+)
+
+
+def _c(texto: str) -> dict:
+    palos = {'s': '♠', 'h': '♥', 'd': '♦', 'c': '♣'}
+    return {'valor': texto[:-1], 'palo': palos[texto[-1]]}
+
+
+def _i(texto: str) -> int:
+    return evaluador.carta_a_int(_c(texto))
+
+
+def test_evaluar_lote_coincide_con_evaluar_rango():
+    rng = random.Random(7)
+    manos = [rng.sample(range(52), 7) for _ in range(2000)]
+    esperado = [evaluador.evaluar_rango(m) for m in manos]
+    assert equity.evaluar_lote(np.array(manos)).tolist() == esperado
+
+
+def test_river_completo_da_resultado_determinista():
+    board = tuple(_i(t) for t in ("2d", "7c", "9h", "Js", "3s"))
+    aa = (_i("As"), _i("Ah"))
+    kk = (_i("Ks"), _i("Kh"))
+    res_aa, res_kk = equity.calcular_equity((aa, kk), board)
+    assert res_aa == {'gana': 1.0, 'empata': 0.0, 'equity': 1.0}
+    assert res_kk == {'gana': 0.0, 'empata': 0.0, 'equity': 0.0}
+
+
+def test_board_que_juega_reparte_el_bote():
+    board = tuple(_i(t) for t in ("As", "Ks", "Qs", "Js", "10s"))
+    res = equity.calcular_equity(((_i("2d"), _i("3c")), (_i("4d"), _i("5c"))), board)
+    assert all(r['empata'] == 1.0 and r['equity'] == 0.5 for r in res)
+
+
+def test_flop_se_enumera_de_forma_exacta():
+    # AA vs KK en un flop sin proyectos: el K sale en 2 de los 45*44/2 runouts
+    board = tuple(_i(t) for t in ("2d", "7c", "9h"))
+    aa = (_i("As"), _i("Ah"))
+    kk = (_i("Ks"), _i("Kh"))
+    res_aa, res_kk = equity.calcular_equity((aa, kk), board)
+    assert res_aa['gana'] + res_kk['gana'] + res_aa['empata'] == pytest.approx(1.0, abs=1e-3)
+    assert res_kk['gana'] == pytest.approx(0.0838, abs=1e-3)
+
+
+def test_monte_carlo_preflop_aproxima_y_se_cachea():
+    aa = (_i("As"), _i("Ah"))
+    kk = (_i("Ks"), _i("Kh"))
+    res = equity.calcular_equity((aa, kk), (), 0, 1)
+    assert res[0]['equity'] == pytest.approx(0.82, abs=0.02)
+    assert equity.calcular_equity((aa, kk), (), 0, 1) is res
+
+
+def _estado_mano(fase: str) -> dict:
+    return {
+        'fase': fase,
+        'cartas_comunitarias_visibles': [_c("2d"), _c("7c"), _c("9h")],
+        'jugadores': {
+            '1': {'user_id': 1, 'username': 'ana', 'estado': 'activo', 'cartas': [_c("As"), _c("Ah")]},
+            '2': {'user_id': 2, 'username': 'luis', 'estado': 'all_in', 'cartas': [_c("Ks"), _c("Kh")]},
+            '3': {'user_id': 3, 'username': 'eva', 'estado': 'retirado', 'cartas': [_c("Qs"), _c("Qh")]},
+        },
+    }
+
+
+def test_equity_en_mano_activa_solo_incluye_al_propio_jugador():
+    res = _equity_para_usuario(_estado_mano('flop'), 2)
+    assert list(res) == ['2']
+    assert 0.0 <= res['2']['equity'] <= 1.0
+
+
+def test_equity_jugadores_vivos_ignora_retirados():
+    res = _equity_jugadores_vivos(_estado_mano('flop'))
+    assert set(res) == {'1', '2'}
+    assert res['1']['username'] == 'ana'
+    assert res['1']['equity'] > res['2']['equity']
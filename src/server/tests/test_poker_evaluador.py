@@ -0,0 +1,79 @@
+import random
+from itertools import combinations
+
+import pytest
+
+from endpoints.protected.api.juegos.multiplayer.poker import evaluador
+from endpoints.protected.api.juegos.multiplayer.poker.routes import (
+    HAND_NAMES,
+    _crear_mazo,
+    _evaluar_mejor_mano,
+)
+
+
+def _c(texto: str) -> dict:
+    """'Ah' -> {'valor': 'A', 'palo': '♥'} para escribir manos de forma compacta."""
+    palos = {'s': '♠', 'h': '♥', 'd': '♦', 'c': '♣'}
+    return {'valor': texto[:-1], 'palo': palos[texto[-1]]}
+
+
+def _mano(texto: str) -> list[dict]:
+    return [_c(t) for t in texto.split()]
+
+
+def _signo(a, b) -> int:
+    return (a > b) - (a < b)
+
+
+def test_codificacion_de_cartas_es_reversible():
+    for carta in _crear_mazo():
+        codigo = evaluador.carta_a_int(carta)
+        assert 0 <= codigo < 52
+        assert evaluador.int_a_carta(codigo) == carta
+
+
+@pytest.mark.parametrize("texto, categoria", [
+    ("As Ks Qs Js 10s 2d 3c", 8),
+    ("5h 4h 3h 2h Ah Kd Kc", 8),
+    ("9s 9h 9d 9c Ks 2d 3c", 7),
+    ("Qs Qh Qd 7c 7s 2d 3c", 6),
+    ("Qs Qh Qd 7c 7s 7d 3c", 6),
+    ("2h 7h 9h Jh Kh Ad Ac", 5),
+    ("As 2d 3c 4h 5s Kd Qc", 4),
+    ("8s 8h 8d Kc 4s 2d 3c", 3),
+    ("8s 8h Kd Kc 4s 4d 3c", 2),
+    ("8s 8h Kd 9c 4s 2d 3c", 1),
+    ("As Jh 9d 7c 4s 3d 2h", 0),
+])
+def test_categorias_coinciden_con_hand_names(texto, categoria):
+    cartas = _mano(texto)
+    rango, mejor, cat = evaluador.evaluar_mejor_mano(cartas)
+    assert cat == categoria
+    assert cat in HAND_NAMES
+    assert len(mejor) == 5
+    assert _evaluar_mejor_mano(cartas)[0][0] == categoria
+
+
+def test_mejor_mano_es_la_misma_combinacion_que_la_referencia():
+    rng = random.Random(1234)
+    mazo = _crear_mazo()
+    for _ in range(500):
+        cartas = rng.sample(mazo, 7)
+        _, mejor_ref = _evaluar_mejor_mano(cartas)
+        _, mejor, _ = evaluador.evaluar_mejor_mano(cartas)
+        assert mejor == mejor_ref
+
+
+def test_orden_entre_manos_identico_a_la_referencia():
+    rng = random.Random(98765)
+    mazo = _crear_mazo()
+    manos = [rng.sample(mazo, rng.choice((5, 6, 7))) for _ in range(400)]
+    ref = [_evaluar_mejor_mano(m)[0] for m in manos]
+    nuevo = [evaluador.evaluar_mejor_mano(m)[0] for m in manos]
+    for (r1, n1), (r2, n2) in combinations(zip(ref, nuevo), 2):
+        assert _signo(r1, r2) == _signo(n1, n2)
+
+
+def test_menos_de_cinco_cartas_devuelve_rango_cero():
+    cartas = _mano("As Ks")
+    assert evaluador.evaluar_mejor_mano(cartas) == (0, cartas, 0)
@@ -0,0 +1,126 @@
+import pytest
+
+from models import db, User, SalaMultijugador, UsuarioSala, PartidaMultijugador, AccionPoker, Apuesta, Estadistica
+from endpoints.protected.api.juegos.multiplayer.poker import historial, mesa as mesa_mod
+
+
+def _c(texto: str) -> dict:
+    palos = {'s': '♠', 'h': '♥', 'd': '♦', 'c': '♣'}
+    return {'valor': texto[:-1], 'palo': palos[texto[-1]]}
+
+
+def _post(app, cli, url, **kwargs):
+    # Contexto propio por petición para que Flask-Login no reutilice el usuario anterior
+    with app.app_context():
+        return cli.post(url, **kwargs)
+
+
+def _get(app, cli, url):
+    with app.app_context():
+        return cli.get(url)
+
+
+@pytest.fixture
+def sala_dos_jugadores(app):
+    with app.app_context():
+        usuarios = []
+        for nombre in ("hist_ana", "hist_luis"):
+            u = User(username=nombre, email=f"{nombre}@example.com", balance=300.0)
+            u.set_password("password123")
+            db.session.add(u)
+            usuarios.append(u)
+        db.session.commit()
+        sala = SalaMultijugador(nombre="Mesa historial", juego="poker", capacidad=6, estado="jugando",
+                                creador_id=usuarios[0].id, apuesta_minima=20.0)
+        db.session.add(sala)
+        db.session.commit()
+        for pos, u in enumerate(usuarios):
+            db.session.add(UsuarioSala(usuario_id=u.id, sala_id=sala.id, posicion=pos))
+        db.session.commit()
+        ids = [u.id for u in usuarios]
+        sala_id = sala.id
+
+    clientes = {}
+    for uid in ids:
+        cli = app.test_client()
+        with cli.session_transaction() as sess:
+            sess["_user_id"] = str(uid)
+            sess["_fresh"] = True
+        _post(app, cli, f"/api/multijugador/poker/stack/{sala_id}", json={"stack": 100.0})
+        clientes[uid] = cli
+
+    yield sala_id, ids, clientes
+
+    with app.app_context():
+        mesa_mod.mesas_poker.pop(sala_id, None)
+        partidas = [p.id for p in PartidaMultijugador.query.filter_by(sala_id=sala_id)]
+        AccionPoker.query.filter(AccionPoker.partida_id.in_(partidas)).delete()
+        PartidaMultijugador.query.filter_by(sala_id=sala_id).delete()
+        UsuarioSala.query.filter_by(sala_id=sala_id).delete()
+        Apuesta.query.filter(Apuesta.user_id.in_(ids)).delete()
+        Estadistica.query.filter(Estadistica.user_id.in_(ids)).delete()
+        SalaMultijugador.query.filter_by(id=sala_id).delete()
+        User.query.filter(User.id.in_(ids)).delete()
+        db.session.commit()
+
+
+def test_reconstruir_mano_se_detiene_en_la_calle_pedida():
+    mesa = mesa_mod.MesaPoker(1, 1, {'mano': 4})
+    historial.registrar_accion(mesa, 'reparto', 1, 100.0, [_c("As"), _c("Ah")])
+    historial.registrar_accion(mesa, 'reparto', 2, 80.0, [_c("Ks"), _c("Kh")])
+    historial.registrar_accion(mesa, 'ciega', 1, 10.0)
+    historial.registrar_accion(mesa, 'ciega', 2, 20.0)
+    historial.registrar_accion(mesa, 'call', 1, 10.0)
+    historial.registrar_accion(mesa, 'check', 2)
+    historial.registrar_accion(mesa, 'flop', cartas=[_c("2d"), _c("7c"), _c("9h")])
+    historial.registrar_accion(mesa, 'raise', 2, 60.0)
+    historial.registrar_accion(mesa, 'fold', 1)
+    historial.registrar_accion(mesa, 'gana', 2, 100.0)
+    filas = [AccionPoker(**fila) for fila in mesa.acciones_pendientes]
+
+    assert [f.seq for f in filas] == list(range(10))
+    assert filas[0].cartas == bytes([48, 49]) and filas[0].mano == 4
+
+    preflop = historial.reconstruir_mano(filas, 'preflop')
+    assert preflop['calle'] == 'preflop'
+    assert preflop['cartas_comunitarias'] == []
+    assert preflop['bote'] == 40.0
+    assert preflop['jugadores']['1']['cartas'] == [_c("As"), _c("Ah")]
+    assert preflop['jugadores']['1']['stack'] == 80.0
+
+    completa = historial.reconstruir_mano(filas)
+    assert completa['calle'] == 'flop'
+    assert completa['cartas_comunitarias'] == [_c("2d"), _c("7c"), _c("9h")]
+    assert completa['bote'] == 0.0
+    assert completa['jugadores']['1']['estado'] == 'retirado'
+    assert completa['jugadores']['2']['stack'] == 100.0
+    assert completa['jugadores']['2']['ganancia'] == 100.0
+
+
+def test_mano_ganada_por_retirada_queda_en_el_historial(app, sala_dos_jugadores):
+    sala_id, ids, clientes = sala_dos_jugadores
+    _post(app, clientes[ids[0]], f"/api/multijugador/poker/iniciar/{sala_id}")
+    with app.app_context():
+        estado = mesa_mod.obtener_mesa_por_id(sala_id).estado
+        turno, mano = estado["turno_actual"], estado["mano"]
+
+    resp = _get(app, clientes[ids[0]], f"/api/multijugador/poker/historial/{sala_id}/{mano}")
+    assert resp.status_code == 400  # la mano sigue en juego
+
+    assert _post(app, clientes[turno], f"/api/multijugador/poker/fold/{sala_id}").status_code == 200
+
+    replay = _get(app, clientes[ids[0]], f"/api/multijugador/poker/historial/{sala_id}/{mano}").get_json()
+    assert [a["accion"] for a in replay["acciones"]] == ["ciega", "ciega", "fold", "gana"]
+    assert replay["cartas_comunitarias"] == []  # el board no llegó a repartirse
+    ganador = next(uid for uid in ids if uid != turno)
+    assert replay["jugadores"][str(ganador)]["username"].startswith("hist_")
+    with app.app_context():
+        final = mesa_mod.obtener_mesa_por_id(sala_id).estado["jugadores"]
+    for uid, info in replay["jugadores"].items():
+        assert info["stack"] == final[uid]["stack"]
+        assert len(info["cartas"]) == 2
+
+    resp = _get(app, clientes[ids[0]], f"/api/multijugador/poker/historial/{sala_id}/{mano}?calle=pozo")
+    assert resp.status_code == 400
+    resp = _get(app, clientes[ids[0]], f"/api/multijugador/poker/historial/{sala_id}/{mano + 5}")
+    assert resp.status_code == 404
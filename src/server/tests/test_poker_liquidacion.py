@@ -0,0 +1,92 @@
+import pytest
+from sqlalchemy import event
+
+from models import db, User, Apuesta, Estadistica
+from endpoints.protected.api.juegos.multiplayer.poker.routes import _finalizar_con_ganador
+
+
+def _c(texto: str) -> dict:
+    palos = {'s': '♠', 'h': '♥', 'd': '♦', 'c': '♣'}
+    return {'valor': texto[:-1], 'palo': palos[texto[-1]]}
+
+
+MANOS = [("As", "Ah"), ("Ks", "Kh"), ("Qs", "Qh"), ("Js", "Jh"), ("9s", "9h"), ("8s", "8h")]
+BOARD = [_c(t) for t in ("2d", "7c", "3h", "4c", "10d")]
+
+
+@pytest.fixture
+def usuarios_liquidacion(app):
+    with app.app_context():
+        usuarios = []
+        for i in range(6):
+            u = User(username=f"liq_{i}", email=f"liq_{i}@example.com", balance=500.0)
+            u.set_password("password123")
+            db.session.add(u)
+            usuarios.append(u)
+        db.session.commit()
+        ids = [u.id for u in usuarios]
+        # Uno de ellos ya tiene estadísticas de póker: se actualizan en lugar de crearse
+        db.session.add(Estadistica(user_id=ids[1], juego='poker', tipo_juego='multiplayer',
+                                   partidas_jugadas=3, partidas_ganadas=1, ganancia_total=40.0, apuesta_total=60.0))
+        db.session.commit()
+    yield ids
+    with app.app_context():
+        Apuesta.query.filter(Apuesta.user_id.in_(ids)).delete()
+        Estadistica.query.filter(Estadistica.user_id.in_(ids)).delete()
+        User.query.filter(User.id.in_(ids)).delete()
+        db.session.commit()
+
+
+def _estado_showdown(ids: list[int]) -> dict:
+    jugadores = {}
+    for uid, (a, b) in zip(ids, MANOS):
+        jugadores[str(uid)] = {
+            'user_id': uid, 'username': f'u{uid}', 'estado': 'activo', 'stack': 50.0,
+            'total_aportado': 50.0, 'apuesta_actual': 0.0, 'cartas': [_c(a), _c(b)],
+        }
+    return {'fase': 'river', 'bote': 50.0 * len(ids), 'cartas_comunitarias': list(BOARD), 'jugadores': jugadores}
+
+
+def _contar_sentencias(fn) -> int:
+    sentencias = []
+
+    def _antes(conn, cursor, statement, parameters, context, executemany):
+        sentencias.append(statement)
+
+    motor = db.engine
+    event.listen(motor, 'before_cursor_execute', _antes)
+    try:
+        fn()
+    finally:
+        event.remove(motor, 'before_cursor_execute', _antes)
+    return len(sentencias)
+
+
+def test_showdown_liquida_con_sentencias_constantes(app, usuarios_liquidacion):
+    ids = usuarios_liquidacion
+    with app.app_context():
+        estado_dos = _estado_showdown(ids[:2])
+        dos = _contar_sentencias(lambda: _finalizar_con_ganador(estado_dos, None))
+        db.session.rollback()
+        estado_seis = _estado_showdown(ids)
+        seis = _contar_sentencias(lambda: _finalizar_con_ganador(estado_seis, None))
+        db.session.commit()
+
+        assert seis == dos
+        assert seis <= 6
+
+        ganador = estado_seis['jugadores'][str(ids[0])]
+        assert ganador['es_ganador'] and ganador['ultima_ganancia'] == 300.0
+        assert ganador['saldo_cuenta'] == 800.0
+        assert db.session.get(User, ids[0]).balance == 800.0
+        assert db.session.get(User, ids[2]).balance == 500.0
+
+        stats = {s.user_id: s for s in Estadistica.query.filter(Estadistica.user_id.in_(ids))}
+        assert len(stats) == 6
+        assert (stats[ids[0]].partidas_jugadas, stats[ids[0]].partidas_ganadas, stats[ids[0]].ganancia_total) == (1, 1, 300.0)
+        assert (stats[ids[1]].partidas_jugadas, stats[ids[1]].partidas_ganadas, stats[ids[1]].apuesta_total) == (4, 1, 110.0)
+
+        apuestas = {a.user_id: a for a in Apuesta.query.filter(Apuesta.user_id.in_(ids))}
+        assert apuestas[ids[0]].resultado == 'ganada' and apuestas[ids[0]].ganancia == 300.0
+        assert apuestas[ids[3]].resultado == 'perdida' and apuestas[ids[3]].cantidad == 50.0
+        assert apuestas[ids[3]].fecha is not None
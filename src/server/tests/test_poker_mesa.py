@@ -0,0 +1,182 @@
+import json
+
+import pytest
+
+from app import socketio
+from models import db, SalaMultijugador, PartidaMultijugador
+from endpoints.protected.api.juegos.multiplayer.poker import mesa as mesa_mod
+
+
+@pytest.fixture
+def sala_poker(app):
+    with app.app_context():
+        sala = SalaMultijugador(nombre="Mesa en memoria", juego="poker", capacidad=6, estado="jugando")
+        db.session.add(sala)
+        db.session.commit()
+        yield sala
+        mesa_mod.mesas_poker.pop(sala.id, None)
+        PartidaMultijugador.query.filter_by(sala_id=sala.id).delete()
+        db.session.delete(sala)
+        db.session.commit()
+
+
+@pytest.fixture
+def volcado_diferido(monkeypatch):
+    """Activa el modo en memoria y deja los volcados en cola para ejecutarlos a mano."""
+    pendientes = []
+    monkeypatch.setattr(mesa_mod, "_intervalo_snapshot", lambda: 1.0)
+    monkeypatch.setattr(socketio, "start_background_task", lambda fn, *a, **kw: pendientes.append(fn))
+    monkeypatch.setattr(socketio, "sleep", lambda segundos: None)
+    return pendientes
+
+
+def _snapshot(sala_id):
+    partida = PartidaMultijugador.query.filter_by(sala_id=sala_id, estado="activa").first()
+    return json.loads(partida.datos_juego)
+
+
+def test_modo_testing_escribe_cada_cambio(app, sala_poker):
+    with app.app_context():
+        mesa = mesa_mod.obtener_mesa(sala_poker)
+        assert sala_poker.id not in mesa_mod.mesas_poker
+        mesa.estado["bote"] = 40.0
+        mesa_mod.marcar_cambio(mesa)
+        snap = _snapshot(sala_poker.id)
+        assert snap["bote"] == 40.0
+        assert snap["version"] == 1
+
+
+def test_cambios_en_mano_se_agrupan_en_un_volcado(app, sala_poker, volcado_diferido):
+    with app.app_context():
+        mesa = mesa_mod.obtener_mesa(sala_poker)
+        assert mesa_mod.obtener_mesa(sala_poker) is mesa
+        for bote in (10.0, 20.0, 30.0):
+            mesa.estado["bote"] = bote
+            mesa_mod.marcar_cambio(mesa)
+
+        assert len(volcado_diferido) == 1
+        assert _snapshot(sala_poker.id)["version"] == 0
+
+        volcado_diferido.pop()()
+        snap = _snapshot(sala_poker.id)
+        assert snap["version"] == 3
+        assert snap["bote"] == 30.0
+        assert mesa.version_guardada == 3
+
+
+def test_cambio_inmediato_no_espera_al_volcado(app, sala_poker, volcado_diferido):
+    with app.app_context():
+        mesa = mesa_mod.obtener_mesa(sala_poker)
+        mesa.estado["fase"] = "terminada"
+        mesa_mod.marcar_cambio(mesa, inmediato=True)
+        assert volcado_diferido == []
+        assert _snapshot(sala_poker.id)["version"] == 1
+
+
+def test_mesa_se_recupera_del_ultimo_snapshot(app, sala_poker, volcado_diferido):
+    with app.app_context():
+        mesa = mesa_mod.obtener_mesa(sala_poker)
+        mesa.estado["jugadores"] = {"7": {"user_id": 7, "stack": 55.0}}
+        mesa_mod.marcar_cambio(mesa, inmediato=True)
+
+        mesa_mod.mesas_poker.clear()  # simula un reinicio del proceso
+        recuperada = mesa_mod.obtener_mesa(sala_poker)
+        assert recuperada is not mesa
+        assert recuperada.version == 1
+        assert recuperada.estado["jugadores"]["7"]["stack"] == 55.0
+
+
+def test_mesa_en_memoria_de_una_partida_cerrada_se_vuelve_a_cargar(app, sala_poker, volcado_diferido):
+    with app.app_context():
+        mesa = mesa_mod.obtener_mesa(sala_poker)
+        mesa.estado["jugadores"] = {"7": {"user_id": 7, "stack": 55.0}}
+        partida = db.session.get(PartidaMultijugador, mesa.partida_id)
+        partida.estado = "terminada"
+        db.session.commit()
+
+        nueva = mesa_mod.obtener_mesa(sala_poker)
+        assert nueva is not mesa and nueva.partida_id != mesa.partida_id
+        assert nueva.estado["jugadores"] == {}
+        assert mesa_mod.mesas_poker[sala_poker.id] is nueva
+
+
+def test_volcado_sin_partida_descarta_la_mesa(app, sala_poker, volcado_diferido):
+    with app.app_context():
+        mesa = mesa_mod.obtener_mesa(sala_poker)
+        mesa.acciones_pendientes.append({"mano": 1})
+        PartidaMultijugador.query.filter_by(id=mesa.partida_id).delete()
+        db.session.commit()
+
+        mesa_mod.marcar_cambio(mesa, inmediato=True)
+        assert sala_poker.id not in mesa_mod.mesas_poker
+        assert mesa.acciones_pendientes == []
+
+
+def test_emitir_estado_envia_a_cada_asiento_su_vista(app, sala_poker, monkeypatch):
+    enviados = []
+    monkeypatch.setattr(socketio, "emit", lambda evento, datos, room=None: enviados.append((evento, datos, room)))
+    with app.app_context():
+        mesa = mesa_mod.obtener_mesa(sala_poker)
+        mesa.estado["fase"] = "flop"
+        mesa.estado["jugadores"] = {
+            "1": {"user_id": 1, "cartas": [{"valor": "A", "palo": "♠"}], "saldo_cuenta": 10.0},
+            "2": {"user_id": 2, "cartas": [{"valor": "K", "palo": "♠"}], "saldo_cuenta": 20.0},
+        }
+        mesa_mod.marcar_cambio(mesa)
+        mesa_mod.emitir_estado(mesa)
+
+    assert [room for _, _, room in enviados] == [
+        mesa_mod.room_asiento(sala_poker.id, 1),
+        mesa_mod.room_asiento(sala_poker.id, 2),
+    ]
+    for evento, datos, _ in enviados:
+        assert evento == "poker_estado_actualizado"
+        assert datos["seq"] == 1
+    vista_1 = enviados[0][1]["estado"]["jugadores"]
+    assert vista_1["1"]["cartas"] and "saldo_cuenta" in vista_1["1"]
+    assert "cartas" not in vista_1["2"] and "saldo_cuenta" not in vista_1["2"]
+
+
+def _mesa_en_flop():
+    estado = {
+        "fase": "flop",
+        "bote": 60.0,
+        "cartas_comunitarias": [{"valor": v, "palo": "♦"} for v in ("2", "5", "9", "J", "K")],
+        "cartas_comunitarias_visibles": [{"valor": v, "palo": "♦"} for v in ("2", "5", "9")],
+        "jugadores": {
+            "1": {"user_id": 1, "stack": 50.0, "cartas": [{"valor": "A", "palo": "♠"}], "saldo_cuenta": 10.0},
+            "2": {"user_id": 2, "stack": 70.0, "cartas": [{"valor": "K", "palo": "♠"}], "saldo_cuenta": 20.0},
+        },
+    }
+    return mesa_mod.MesaPoker(1, 1, estado)
+
+
+def test_vista_json_oculta_datos_privados_y_board_pendiente():
+    mesa = _mesa_en_flop()
+    vista = json.loads(mesa_mod.vista_json(mesa, 2))
+    assert vista == mesa_mod.vista_para_usuario(mesa, 2)
+    assert vista["jugadores"]["2"]["cartas"] == [{"valor": "K", "palo": "♠"}]
+    assert vista["jugadores"]["2"]["saldo_cuenta"] == 20.0
+    assert "cartas" not in vista["jugadores"]["1"] and "saldo_cuenta" not in vista["jugadores"]["1"]
+    assert vista["cartas_comunitarias"] == vista["cartas_comunitarias_visibles"]
+    assert "cartas" in mesa.estado["jugadores"]["1"], "La proyección no debe tocar el estado real"
+
+
+def test_vistas_se_cachean_por_version_y_jugador():
+    mesa = _mesa_en_flop()
+    primera = mesa_mod.vista_json(mesa, 1)
+    assert mesa_mod.vista_json(mesa, 1) is primera
+    assert mesa_mod.vista_json(mesa, 2) is not primera
+
+    mesa.estado["bote"] = 90.0
+    mesa.version += 1
+    assert json.loads(mesa_mod.vista_json(mesa, 1))["bote"] == 90.0
+
+
+def test_en_showdown_todas_las_cartas_son_publicas():
+    mesa = _mesa_en_flop()
+    mesa.estado["fase"] = "terminada"
+    vista = json.loads(mesa_mod.vista_json(mesa, 2))
+    assert vista["jugadores"]["1"]["cartas"] == [{"valor": "A", "palo": "♠"}]
+    assert "saldo_cuenta" not in vista["jugadores"]["1"]
+    assert len(vista["cartas_comunitarias"]) == 5
@@ -9,6 +9,7 @@ from models import (
     SalaMultijugador,
     UsuarioSala,
     PartidaMultijugador,
+    AccionPoker,
     Apuesta,
     Estadistica,
 )
@@ -88,7 +89,7 @@ def _leer_estado_partida(app, sala_id: int):
 def limpiar_tablas(app):
     yield
     with app.app_context():
-        for model in (Apuesta, Estadistica, PartidaMultijugador, UsuarioSala, SalaMultijugador, User):
+        for model in (Apuesta, Estadistica, AccionPoker, PartidaMultijugador, UsuarioSala, SalaMultijugador, User):
             db.session.query(model).delete()
         db.session.commit()
 
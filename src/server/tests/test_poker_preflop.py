@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from endpoints.protected.api.juegos.multiplayer.poker import preflop
+from endpoints.protected.api.juegos.multiplayer.poker.evaluador import carta_a_int
+
+
+def _clase(a, b):
+    return preflop.clase_de_codigos(*(carta_a_int({'valor': c[:-1], 'palo': c[-1]}) for c in (a, b)))
+
+
+def test_clases_cubren_todas_las_manos_iniciales():
+    vistas = set()
+    for clase in range(preflop.N_CLASES):
+        combos = preflop.combos_de_clase(clase)
+        assert len(combos) == preflop.COMBOS_CLASE[clase]
+        for c1, c2 in combos:
+            assert preflop.clase_de_codigos(c1, c2) == clase
+            assert preflop.clase_de_codigos(c2, c1) == clase
+            vistas.add(frozenset((c1, c2)))
+    assert len(vistas) == 1326
+
+    assert preflop.nombre_clase(_clase('A♠', 'A♥')) == 'AA'
+    assert preflop.nombre_clase(_clase('A♠', 'K♠')) == 'AKs'
+    assert preflop.nombre_clase(_clase('7♦', '2♣')) == '72o'
+
+
+def test_generacion_reproducible_y_formato(tmp_path, monkeypatch):
+    # Matriz reducida (4 clases) para que el test sea rápido
+    monkeypatch.setattr(preflop, 'N_CLASES', 4)
+    a = preflop.calcular_matriz(muestras=200, semilla=7)
+    b = preflop.calcular_matriz(muestras=200, semilla=7)
+    assert a.dtype == np.float32
+    assert a.tobytes() == b.tobytes()
+    np.testing.assert_allclose(a + a.T, 1.0, atol=1e-6)
+
+    ruta = tmp_path / 'equity.bin'
+    preflop.guardar_matriz(a, 200, 7, ruta)
+    cargada = preflop.cargar_matriz(ruta)
+    assert isinstance(cargada, np.memmap)
+    np.testing.assert_array_equal(cargada, a)
+
+    ruta.write_bytes(b'XXXX' + ruta.read_bytes()[4:])
+    assert preflop.cargar_matriz(ruta) is None
+
+
+@pytest.mark.skipif(preflop.MATRIZ is None, reason="tabla de equity preflop no generada")
+def test_tabla_empaquetada():
+    m = np.asarray(preflop.MATRIZ)
+    assert m.shape == (169, 169)
+    np.testing.assert_allclose(m + m.T, 1.0, atol=1e-5)
+    aa = _clase('A♠', 'A♥')
+    kk = _clase('K♠', 'K♥')
+    siete_dos = _clase('7♦', '2♣')
+    assert 0.78 < preflop.equity_preflop(aa, kk) < 0.85
+    assert preflop.equity_preflop(aa, siete_dos) > 0.85
+    assert preflop.fuerza_preflop(aa) > 0.84
+    assert preflop.fuerza_preflop(aa) > preflop.fuerza_preflop(kk) > preflop.fuerza_preflop(siete_dos)
@@ -0,0 +1,46 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+from models import db, User, SalaMultijugador, UsuarioSala, PartidaMultijugador, AccionPoker, Apuesta, Estadistica
+from endpoints.protected.api.juegos.multiplayer.poker import mesa as mesa_mod
+
+# El arnés de bots es código de pruebas de carga y vive en utils/, fuera del paquete de la aplicación
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "utils"))
+import simulacion_poker as simulacion  # noqa: E402
+
+
+@pytest.fixture
+def mesa_bots(app):
+    sala_id, ids = simulacion.preparar_mesa(app, 4)
+    yield sala_id, ids
+    with app.app_context():
+        mesa_mod.mesas_poker.pop(sala_id, None)
+        partidas = [p.id for p in PartidaMultijugador.query.filter_by(sala_id=sala_id)]
+        AccionPoker.query.filter(AccionPoker.partida_id.in_(partidas)).delete()
+        PartidaMultijugador.query.filter_by(sala_id=sala_id).delete()
+        UsuarioSala.query.filter_by(sala_id=sala_id).delete()
+        Apuesta.query.filter(Apuesta.user_id.in_(ids)).delete()
+        Estadistica.query.filter(Estadistica.user_id.in_(ids)).delete()
+        SalaMultijugador.query.filter_by(id=sala_id).delete()
+        User.query.filter(User.id.in_(ids)).delete()
+        db.session.commit()
+
+
+@pytest.mark.parametrize("semilla", [1, 2])
+def test_bots_juegan_sin_romper_la_logica_de_turnos(app, mesa_bots, semilla):
+    sala_id, ids = mesa_bots
+    informe = simulacion.simular(app, sala_id, ids, manos=25, semilla=semilla)
+    assert informe['violaciones'] == []
+    assert informe['manos'] == 25
+    assert informe['acciones'] > 25
+    assert informe['sentencias_por_mano'] > 0
+    assert informe['latencia_p99_ms'] >= informe['latencia_p50_ms']
+
+
+def test_bot_selectivo_usa_la_tabla_preflop(app, mesa_bots):
+    sala_id, ids = mesa_bots
+    informe = simulacion.simular(app, sala_id, ids, manos=15, bots=['selectivo'], semilla=3)
+    assert informe['violaciones'] == []
+    assert informe['manos'] == 15
@@ -1,8 +1,12 @@
+import itertools
 import json
+import numpy as np
 import pytest
 
+from endpoints.protected.api.juegos import azar
 from endpoints.protected.api.juegos.singleplayer.quiniela import routes as quiniela_routes
-from models import Apuesta, Estadistica
+from endpoints.protected.api.juegos.singleplayer.quiniela import sistemas
+from models import db, Apuesta, Estadistica, User
 
 
 def login(client):
@@ -206,9 +210,15 @@ def test_apostar_con_datos_incompletos(client, test_user):
 
 
 def test_generar_resultados_reales_cubre_los_tres_resultados(monkeypatch):
-    """Force deterministic random values to validate each result bucket."""
-    values = iter([0.1, 0.6, 0.9, 0.2, 0.79, 0.81])
-    monkeypatch.setattr(quiniela_routes.random, "random", lambda: next(values))
+    """Force deterministic uniforms (one per alias column) to validate each result bucket."""
+    values = np.array([0.01, 1.01, 2.01, 0.02, 1.02, 2.02]) / 3
+
+    class FlujoFijo:
+        def uniformes(self, n):
+            assert n == len(values)
+            return values
+
+    monkeypatch.setattr(azar, "_flujo", FlujoFijo())
 
     resultados = quiniela_routes.generar_resultados_reales(6)
     assert resultados == ["1", "X", "2", "1", "X", "2"]
@@ -296,3 +306,87 @@ def test_apostar_acumula_varias_apuestas(client, app, test_user, monkeypatch):
         assert stats.partidas_jugadas >= 2
         assert stats.apuesta_total >= 100.0
         assert stats.ganancia_total >= 150.0
+
+
+def test_distribucion_aciertos_coincide_con_desarrollar_las_columnas():
+    """Bitset grading of system tickets must match expanding every column by hand."""
+    boleto = ["1X", "1X2", "2", "X2", "1", "12"]
+    resultados = ["X", "2", "2", "1", "X", "2"]
+
+    por_aciertos = [0] * (len(boleto) + 1)
+    for columna in itertools.product(*boleto):
+        por_aciertos[quiniela_routes.calcular_aciertos(columna, resultados)] += 1
+
+    codificado = sistemas.codificar(boleto)
+    distribucion = sistemas.distribucion_aciertos(codificado, sistemas.codificar(resultados), len(boleto))
+    assert distribucion[0].tolist() == por_aciertos
+    assert int(sistemas.columnas(codificado)) == 2 * 3 * 2 * 2
+    assert int(sistemas.aciertos(codificado, sistemas.codificar(resultados))) == 4
+
+
+def test_codificar_rechaza_pronosticos_invalidos():
+    """Empty, repeated or unknown signs are not valid predictions."""
+    for boleto in (["1", ""], ["11"], ["1", "3"], [], ["1"] * (sistemas.MAX_PARTIDOS + 1)):
+        with pytest.raises(ValueError):
+            sistemas.codificar(boleto)
+
+
+def test_apostar_boleto_con_dobles_cobra_todas_las_columnas(client, app, test_user, monkeypatch):
+    """A ticket with doubles and a triple costs cantidad per column and pays every winning column."""
+    pronosticos = ["1X", "1", "1X2"]
+    partidos = [{"local": f"L{i}", "visitante": f"V{i}"} for i in range(len(pronosticos))]
+    monkeypatch.setattr(quiniela_routes, "generar_resultados_reales", lambda n: ["X", "1", "2"])
+
+    with client:
+        login(client)
+        response = client.post(
+            "/api/quiniela/apostar",
+            json={"cantidad": 10.0, "pronosticos": pronosticos, "partidos": partidos},
+        )
+
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    # 6 columnas: x * (1 + x) * (2 + x) -> dos con 1 acierto, tres con 2 y un pleno
+    assert data["columnas"] == 6
+    assert data["coste"] == pytest.approx(60.0)
+    assert data["aciertos"] == 3
+    assert data["distribucion"] == {"1": 2, "2": 3, "3": 1}
+    esperada = sum(
+        n * quiniela_routes.calcular_ganancia(k, 3, 10.0) for k, n in ((1, 2), (2, 3), (3, 1))
+    )
+    assert data["ganancia"] == pytest.approx(esperada)
+    assert data["nuevo_balance"] == pytest.approx(1000.0 - 60.0 + esperada)
+
+    with app.app_context():
+        apuesta = Apuesta.query.filter_by(user_id=test_user.id, juego="quiniela").one()
+        assert apuesta.cantidad == pytest.approx(60.0)
+
+
+def test_apostar_rechaza_pronostico_invalido(client, test_user):
+    """An unknown sign in the ticket should be rejected before charging anything."""
+    with client:
+        login(client)
+        response = client.post(
+            "/api/quiniela/apostar",
+            json={"cantidad": 10.0, "pronosticos": ["1", "3"], "partidos": [{}, {}]},
+        )
+
+    assert response.status_code == 400
+    assert "Pronóstico no válido" in json.loads(response.data)["error"]
+
+
+@pytest.mark.parametrize("cantidad", [0.0, -10.0, "nan", "inf"])
+def test_apostar_rechaza_cantidad_no_positiva(client, app, test_user, cantidad):
+    """A zero, negative or non-finite stake must not charge (or credit) anything."""
+    with client:
+        login(client)
+        response = client.post(
+            "/api/quiniela/apostar",
+            json={"cantidad": cantidad, "pronosticos": ["1", "X"], "partidos": [{}, {}]},
+        )
+
+    assert response.status_code == 400
+    assert "Cantidad no válida" in json.loads(response.data)["error"]
+    with app.app_context():
+        assert Apuesta.query.filter_by(user_id=test_user.id, juego="quiniela").count() == 0
+        assert db.session.get(User, test_user.id).balance == 1000
@@ -0,0 +1,167 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import db, Apuesta, BoletoQuiniela, Estadistica, JornadaQuiniela, User
+from endpoints.protected.api.juegos.singleplayer.quiniela import jornadas, sistemas
+from endpoints.protected.api.juegos.singleplayer.quiniela import routes as quiniela_routes
+
+
+def login(client):
+    return client.post(
+        "/login",
+        data={"username": "test_user", "password": "password123"},
+        follow_redirects=True,
+    )
+
+
+@pytest.fixture
+def jornada(app, test_user):
+    with app.app_context():
+        jornada = jornadas.abrir_jornada("espana", num_partidos=4, minutos=30)
+        db.session.commit()
+        jornada_id = jornada.id
+    yield jornada_id
+    with app.app_context():
+        BoletoQuiniela.query.delete()
+        JornadaQuiniela.query.delete()
+        User.query.filter(User.username.like("jornada_%")).delete(synchronize_session=False)
+        db.session.commit()
+
+
+def _cerrar(jornada_id):
+    db.session.get(JornadaQuiniela, jornada_id).cierre = datetime.utcnow() - timedelta(seconds=1)
+    db.session.commit()
+
+
+def test_comprar_boleto_cobra_columnas_y_deja_apuesta_pendiente(client, app, test_user, jornada):
+    with client:
+        login(client)
+        listado = client.get("/api/quiniela/jornadas").get_json()
+        assert [j["id"] for j in listado["jornadas"]] == [jornada]
+        assert len(listado["jornadas"][0]["partidos"]) == 4
+
+        response = client.post(f"/api/quiniela/jornadas/{jornada}/boletos",
+                               json={"cantidad": 2.0, "pronosticos": ["1", "1X", "X2", "1X2"]})
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data["columnas"] == 12
+        assert data["coste"] == pytest.approx(24.0)
+        assert data["nuevo_balance"] == pytest.approx(976.0)
+
+        mios = client.get(f"/api/quiniela/jornadas/{jornada}/boletos").get_json()
+        assert mios["boletos"][0]["pronosticos"] == ["1", "1X", "X2", "1X2"]
+        assert mios["boletos"][0]["ganancia"] is None
+
+    with app.app_context():
+        apuesta = Apuesta.query.filter_by(user_id=test_user.id, juego="quiniela").one()
+        assert apuesta.resultado == "PENDIENTE"
+        assert apuesta.cantidad == pytest.approx(24.0)
+
+
+def test_comprar_boleto_rechaza_jornada_cerrada_boleto_incompleto_y_cantidad_invalida(client, app, test_user, jornada):
+    with client:
+        login(client)
+        incompleto = client.post(f"/api/quiniela/jornadas/{jornada}/boletos",
+                                 json={"cantidad": 1.0, "pronosticos": ["1", "X"]})
+        assert incompleto.status_code == 400
+
+        for cantidad in ("nan", "inf", 0):
+            invalida = client.post(f"/api/quiniela/jornadas/{jornada}/boletos",
+                                   json={"cantidad": cantidad, "pronosticos": ["1", "X", "2", "1"]})
+            assert invalida.status_code == 400
+
+        with app.app_context():
+            _cerrar(jornada)
+        cerrada = client.post(f"/api/quiniela/jornadas/{jornada}/boletos",
+                              json={"cantidad": 1.0, "pronosticos": ["1", "X", "2", "1"]})
+        assert cerrada.status_code == 400
+        assert "cerrada" in cerrada.get_json()["error"]
+
+    with app.app_context():
+        assert db.session.get(User, test_user.id).balance == pytest.approx(1000.0)
+
+
+def test_liquidar_vencidas_corrige_por_bloques_y_paga_en_lote(app, test_user, jornada, monkeypatch):
+    """Settling in chunks of 2 must grade every ticket exactly like a single /apostar would."""
+    resultados = ["1", "X", "2", "1"]
+    monkeypatch.setattr(quiniela_routes, "generar_resultados_reales", lambda n: resultados)
+    boletos = [["1", "X", "2", "1"], ["1X", "X", "2", "2"], ["2", "2", "1", "X"],
+               ["1X2", "1X2", "2", "1"], ["1", "X", "X2", "1X"]]
+
+    with app.app_context():
+        otro = User(username="jornada_otro", email="jornada@otro.com", balance=500.0)
+        otro.set_password("x")
+        db.session.add(otro)
+        db.session.flush()
+        j = db.session.get(JornadaQuiniela, jornada)
+        jugadores = [db.session.get(User, test_user.id), otro]
+        for i, pronosticos in enumerate(boletos):
+            jornadas.comprar_boleto(jugadores[i % 2], j, pronosticos, 1.0)
+        db.session.commit()
+        saldos = {u.id: u.balance for u in jugadores}
+        esperado = {u.id: 0.0 for u in jugadores}
+        for i, pronosticos in enumerate(boletos):
+            _, _, ganancia = quiniela_routes.corregir_boleto(sistemas.codificar(pronosticos), resultados, 1.0)
+            esperado[jugadores[i % 2].id] += ganancia
+        otro_id = otro.id
+
+        _cerrar(jornada)
+        resumen = jornadas.liquidar_vencidas(bloque=2)
+
+        assert [r["jornada"] for r in resumen] == [jornada]
+        assert resumen[0]["boletos"] == len(boletos)
+        assert resumen[0]["pagado"] == pytest.approx(sum(esperado.values()))
+        assert db.session.get(JornadaQuiniela, jornada).resultados == "1X21"
+        assert jornadas.liquidar_vencidas() == []
+        for uid in (test_user.id, otro_id):
+            assert db.session.get(User, uid).balance == pytest.approx(saldos[uid] + esperado[uid])
+
+        corregidos = BoletoQuiniela.query.filter_by(jornada_id=jornada).order_by(BoletoQuiniela.id).all()
+        assert [b.aciertos for b in corregidos] == [4, 3, 0, 4, 4]
+        pendientes = Apuesta.query.filter_by(juego="quiniela", resultado="PENDIENTE").count()
+        assert pendientes == 0
+        stats = Estadistica.query.filter_by(user_id=test_user.id, juego="quiniela",
+                                            tipo_juego="multiplayer").one()
+        assert stats.partidas_jugadas == 3
+        assert stats.ganancia_total == pytest.approx(esperado[test_user.id])
+        Apuesta.query.filter_by(user_id=otro_id).delete()
+        Estadistica.query.filter_by(user_id=otro_id).delete()
+        db.session.commit()
+
+
+def test_liquidar_jornada_ya_reclamada_no_paga_dos_veces(app, test_user, jornada, monkeypatch):
+    monkeypatch.setattr(quiniela_routes, "generar_resultados_reales", lambda n: ["1", "1", "1", "1"])
+    with app.app_context():
+        usuario = db.session.get(User, test_user.id)
+        jornadas.comprar_boleto(usuario, db.session.get(JornadaQuiniela, jornada), ["1", "1", "1", "1"], 1.0)
+        db.session.commit()
+        jornadas.liquidar_jornada(jornada)
+        db.session.commit()
+        saldo = db.session.get(User, test_user.id).balance
+
+        # una segunda liquidación (p. ej. otro worker con la jornada ya leída) no encuentra la fila abierta
+        with pytest.raises(ValueError):
+            jornadas.liquidar_jornada(jornada)
+        db.session.rollback()
+        assert db.session.get(User, test_user.id).balance == pytest.approx(saldo)
+        assert db.session.get(JornadaQuiniela, jornada).estado == "liquidada"
+        Apuesta.query.filter_by(user_id=test_user.id, juego="quiniela").delete()
+        Estadistica.query.filter_by(user_id=test_user.id, juego="quiniela").delete()
+        db.session.commit()
+
+
+def test_boleto_con_veinte_triples_guarda_columnas_de_64_bits(app, test_user):
+    """3**20 columnas no caben en un entero de 32 bits (Postgres int4)."""
+    with app.app_context():
+        jornada = jornadas.abrir_jornada("espana", num_partidos=20)
+        usuario = db.session.get(User, test_user.id)
+        boleto = jornadas.comprar_boleto(usuario, jornada, ["1X2"] * 20, 1e-9)
+        db.session.commit()
+        boleto_id, jornada_id = boleto.id, jornada.id
+        db.session.expire_all()
+        assert db.session.get(BoletoQuiniela, boleto_id).columnas == 3 ** 20 > 2 ** 31
+        BoletoQuiniela.query.filter_by(jornada_id=jornada_id).delete()
+        Apuesta.query.filter_by(user_id=test_user.id, juego="quiniela").delete()
+        JornadaQuiniela.query.filter_by(id=jornada_id).delete()
+        db.session.commit()
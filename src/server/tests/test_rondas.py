@@ -0,0 +1,116 @@
+import json
+
+import pytest
+from sqlalchemy import event
+
+from models import db, User, Apuesta, RondaJuego, Retencion
+from endpoints.protected.api.juegos.rondas import abrir_ronda, retener, liquidar_ronda
+
+
+@pytest.fixture
+def usuarios(app):
+    with app.app_context():
+        creados = []
+        for i in range(4):
+            user = User(username=f"ronda_{i}", email=f"ronda_{i}@example.com", balance=100.0)
+            user.set_password("password123")
+            db.session.add(user)
+            creados.append(user)
+        db.session.commit()
+        ids = [u.id for u in creados]
+    yield ids
+    with app.app_context():
+        Retencion.query.filter(Retencion.user_id.in_(ids)).delete()
+        Apuesta.query.filter(Apuesta.user_id.in_(ids)).delete()
+        User.query.filter(User.id.in_(ids)).delete()
+        db.session.commit()
+
+
+def _sentencias(fn):
+    sentencias = []
+
+    def contar(conn, cursor, statement, parameters, context, executemany):
+        sentencias.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", contar)
+    try:
+        fn()
+    finally:
+        event.remove(db.engine, "before_cursor_execute", contar)
+    return len(sentencias)
+
+
+def test_retener_acumula_en_una_fila_y_una_apuesta_pendiente(app, usuarios):
+    uid = usuarios[0]
+    with app.app_context():
+        ronda_id = abrir_ronda("ruleta", "multiplayer").id
+        primera = retener(ronda_id, uid, 2.0, pendiente=True)
+        segunda = retener(ronda_id, uid, 3.0, pendiente=True)
+        db.session.commit()
+        assert primera is segunda
+
+    with app.app_context():
+        retencion = db.session.get(Retencion, (ronda_id, uid))
+        assert (retencion.cantidad, retencion.estado) == (5.0, "retenida")
+        apuesta, = Apuesta.query.filter_by(user_id=uid).all()
+        assert apuesta.id == retencion.apuesta_id
+        assert (apuesta.cantidad, apuesta.resultado) == (5.0, "PENDIENTE")
+
+
+def test_liquidar_ronda_cierra_retenciones_y_apuestas_en_bloque(app, usuarios):
+    def jugar(ids):
+        with app.app_context():
+            ronda_id = abrir_ronda("caballos", "multiplayer").id
+            for uid in ids:
+                retener(ronda_id, uid, 10.0, detalle={"caballo": 2}, pendiente=True)
+            db.session.commit()
+            pagos = {ids[0]: {"pago": 30.0, "ganancia": 30.0, "resultado": "ganada"}}
+            liquidadas = {}
+            n = _sentencias(lambda: liquidadas.update(liquidar_ronda(ronda_id, pagos, 2)))
+            db.session.commit()
+        return ronda_id, liquidadas, n
+
+    _, _, n2 = jugar(usuarios[:2])
+    ronda_id, liquidadas, n4 = jugar(usuarios)
+    assert n2 == n4
+    assert liquidadas[usuarios[0]] == {"cantidad": 10.0, "pago": 30.0, "detalle": {"caballo": 2}}
+    assert liquidadas[usuarios[1]]["pago"] == 0.0
+
+    with app.app_context():
+        ronda = db.session.get(RondaJuego, ronda_id)
+        assert (ronda.estado, ronda.resultado) == ("liquidada", "2")
+        filas = Retencion.query.filter_by(ronda_id=ronda_id).order_by(Retencion.user_id).all()
+        assert [(r.estado, r.pago) for r in filas] == [("liquidada", 30.0)] + [("liquidada", 0.0)] * 3
+        ganadora = db.session.get(Apuesta, filas[0].apuesta_id)
+        perdedora = db.session.get(Apuesta, filas[1].apuesta_id)
+        assert (ganadora.resultado, ganadora.ganancia) == ("ganada", 30.0)
+        assert (perdedora.resultado, perdedora.ganancia) == ("perdida", 0.0)
+
+
+def test_ruleta_individual_liquida_su_ronda_sin_buscar_pendientes(app, usuarios):
+    uid = usuarios[0]
+    cliente = app.test_client()
+    with cliente.session_transaction() as sess:
+        sess["_user_id"] = str(uid)
+        sess["_fresh"] = True
+
+    with app.app_context():
+        for amount in (100, 200):
+            bets = [{"type": "even", "amount": amount, "set": [], "label": "Rojo"}]
+            assert cliente.post("/api/ruleta/place", json={"bets": bets}).status_code == 200
+        # lo colocado queda en una sola ronda abierta en la base de datos, no en memoria
+        retencion, = Retencion.query.filter_by(user_id=uid, estado="retenida").all()
+        ronda_id = retencion.ronda_id
+        assert len(json.loads(retencion.detalle)["apuestas"]) == 2
+        datos = cliente.post("/api/ruleta/spin", json={}).get_json()
+
+    with app.app_context():
+        assert Retencion.query.filter_by(user_id=uid, estado="retenida").count() == 0
+        assert cliente.post("/api/ruleta/spin", json={}).status_code == 400
+        retencion = db.session.get(Retencion, (ronda_id, uid))
+        assert retencion.cantidad == pytest.approx(3.0)
+        assert (retencion.estado, retencion.pago) == ("liquidada", pytest.approx(datos["payout"]))
+        apuesta, = Apuesta.query.filter_by(user_id=uid).all()
+        assert apuesta.cantidad == pytest.approx(3.0)
+        assert apuesta.resultado.startswith(f"Número {datos['result']} ")
+        assert db.session.get(User, uid).balance == pytest.approx(97.0 + datos["payout"])
@@ -18,7 +18,8 @@ def test_roulette_bet_simple(client, test_user, app):
             'set': [10]
         }]
 
-        response = client.post('/api/ruleta/spin', json={'bets': bets})
+        assert client.post('/api/ruleta/place', json={'bets': bets}).status_code == 200
+        response = client.post('/api/ruleta/spin', json={})
 
         assert response.status_code == 200
         data = json.loads(response.data)
@@ -45,7 +46,8 @@ def test_roulette_bet_split(client, test_user, app):
             'set': [10, 11]
         }]
 
-        response = client.post('/api/ruleta/spin', json={'bets': bets})
+        assert client.post('/api/ruleta/place', json={'bets': bets}).status_code == 200
+        response = client.post('/api/ruleta/spin', json={})
 
         assert response.status_code == 200
         data = json.loads(response.data)
@@ -71,12 +73,13 @@ def test_roulette_invalid_bet(client, test_user):
             'set': [10]
         }]
 
-    response = client.post('/api/ruleta/spin', json={'bets': bets})
+    # The bet type is validated when placing, so nothing is left to spin
+    response = client.post('/api/ruleta/place', json={'bets': bets})
+    assert response.status_code == 400
+    assert 'error' in json.loads(response.data)
 
-    # API currently treats numeric sets directly; expect a normal response
-    assert response.status_code == 200
-    data = json.loads(response.data)
-    assert 'result' in data
+    response = client.post('/api/ruleta/spin', json={'bets': bets})
+    assert response.status_code == 400
 
 def test_roulette_insufficient_funds(client, test_user):
     """Test betting with insufficient funds"""
@@ -114,4 +117,78 @@ def test_roulette_view_access(client, test_user):
             'password': 'password123'
         })
         response = client.get('/ruleta')
-        assert response.status_code == 200
\ No newline at end of file
+        assert response.status_code == 200
+
+def test_roulette_place_rechaza_jugada_ilegal(client, test_user):
+    """/place valida la geometría de la apuesta antes de descontar nada"""
+    with client:
+        client.post('/login', data={
+            'username': 'test_user',
+            'password': 'password123'
+        })
+        balance = client.get('/api/ruleta/state').get_json()['balance']
+
+        bets = [{'type': 'corner', 'amount': 100, 'set': [3, 4, 6, 7], 'label': '3-4-6-7'}]
+        response = client.post('/api/ruleta/place', json={'bets': bets, 'min_cell': 20})
+
+        assert response.status_code == 400
+        assert 'Jugada no válida' in response.get_json()['error']
+        assert client.get('/api/ruleta/state').get_json()['balance'] == balance
+
+
+def test_roulette_place_ignora_min_cell_del_cliente(client, test_user):
+    """Un min_cell negativo enviado por el cliente no hace válida una apuesta negativa"""
+    with client:
+        client.post('/login', data={
+            'username': 'test_user',
+            'password': 'password123'
+        })
+        balance = client.get('/api/ruleta/state').get_json()['balance']
+
+        bets = [{'type': 'straight', 'set': [5], 'amount': -100000}]
+        response = client.post('/api/ruleta/place', json={'bets': bets, 'min_cell': -1000000})
+        assert response.status_code == 400
+
+        bets = [{'type': 'straight', 'set': [5], 'amount': 10}]
+        response = client.post('/api/ruleta/place', json={'bets': bets, 'min_cell': 1})
+        assert response.status_code == 400
+        assert 'mínima' in response.get_json()['error']
+        assert client.get('/api/ruleta/state').get_json()['balance'] == balance
+
+
+def test_roulette_state_incluye_historial(client, test_user):
+    """/state devuelve los últimos números del jugador sin leer Apuesta.resultado"""
+    from endpoints.protected.api.juegos.singleplayer.ruleta.routes import historiales
+    historiales.clear()
+    with client:
+        client.post('/login', data={
+            'username': 'test_user',
+            'password': 'password123'
+        })
+        vacio = client.get('/api/ruleta/state').get_json()['historial']
+        assert vacio['tiradas'] == 0
+
+        bets = [{'type': 'straight', 'amount': 100, 'set': [10], 'label': '10'}]
+        resultados = []
+        for _ in range(3):
+            assert client.post('/api/ruleta/place', json={'bets': bets}).status_code == 200
+            resultados.append(client.post('/api/ruleta/spin', json={}).get_json()['result'])
+
+        historial = client.get('/api/ruleta/state').get_json()['historial']
+        assert historial['ultimos'][:3] == resultados[::-1]
+        assert sum(historial['frecuencias'].get(c, 0) for c in ('rojo', 'negro', 'verde')) == historial['tiradas']
+
+def test_roulette_spin_sin_place_no_liquida_apuestas_del_cuerpo(client, test_user):
+    """/spin solo liquida lo cobrado en /place: las apuestas del cuerpo no tocan el saldo"""
+    with client:
+        client.post('/login', data={
+            'username': 'test_user',
+            'password': 'password123'
+        })
+        balance = client.get('/api/ruleta/state').get_json()['balance']
+
+        bets = [{'type': 'straight', 'set': list(range(37)), 'amount': 100000}]
+        response = client.post('/api/ruleta/spin', json={'bets': bets})
+
+        assert response.status_code == 400
+        assert client.get('/api/ruleta/state').get_json()['balance'] == balance
@@ -0,0 +1,56 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+from endpoints.protected.api.juegos import rtp
+from endpoints.protected.api.juegos.multiplayer.blackjack.socket_handlers import (
+    es_blackjack, nueva_baraja, resolver_mano, valor_mano,
+)
+
+
+def test_rtp_de_todos_los_juegos_dentro_de_tolerancia():
+    filas = rtp.verificar(rondas=200_000, semilla=7)
+    fuera = [(f['juego'], f['variante'], f['rtp']) for f in filas if not f['ok']]
+    assert fuera == []
+    assert {f['juego'] for f in filas} == set(rtp.SIMULADORES)
+    for f in filas:
+        if f['teorico'] is not None:
+            assert abs(f['rtp'] - f['teorico']) <= 4 * f['error_tipico'] + 1e-9
+
+
+def test_ruleta_paga_36_37_en_cada_tipo():
+    for tipo, valor in rtp._ruleta_teorico().items():
+        assert valor == pytest.approx(36 / 37), tipo
+
+
+def _manos_reales(n, planta):
+    """Partidas de un jugador contra el crupier con las funciones del servidor."""
+    random.seed(11)
+    pagos = []
+    for _ in range(n):
+        mazo = nueva_baraja()
+        dealer = [mazo.popleft(), mazo.popleft()]
+        mano = [mazo.popleft(), mazo.popleft()]
+        while valor_mano(mano) < planta:
+            mano.append(mazo.popleft())
+        while valor_mano(dealer) < 17:
+            dealer.append(mazo.popleft())
+        pagos.append(resolver_mano(mano, 1.0, valor_mano(dealer), es_blackjack(dealer)))
+    return np.array(pagos)
+
+
+def test_blackjack_vectorizado_coincide_con_el_juego_real():
+    reales = _manos_reales(20_000, rtp.PLANTA_BLACKJACK)
+    fila, = rtp.simular('blackjack', 400_000, np.random.default_rng(5))
+    error = math.sqrt(reales.var() / len(reales) + fila['error_tipico'] ** 2)
+    assert abs(reales.mean() - fila['rtp']) <= 4 * error
+
+
+def test_cambio_de_pagos_se_detecta(monkeypatch):
+    monkeypatch.setitem(rtp.MULTIPLICADORES_CABALLOS, 1, 2 * rtp.MULTIPLICADORES_CABALLOS[1])
+    filas = {f['variante']: f for f in rtp.verificar(rondas=50_000, semilla=1, juegos=['caballos'])}
+    assert filas['1']['ok'] is False
+    assert filas['1']['teorico'] == pytest.approx(2 * rtp.RTP_ESPERADO[('caballos', '1')][0], abs=0.01)
+    assert filas['2']['ok'] is True
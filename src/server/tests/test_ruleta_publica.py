@@ -0,0 +1,180 @@
+import pytest
+
+from app import socketio
+from models import db, User, Apuesta, Estadistica, Retencion
+from endpoints.protected.api.juegos.multiplayer.ruleta import mesa_publica
+from endpoints.protected.api.juegos.multiplayer.ruleta.mesa_publica import mesas_publicas
+
+
+def _crear_usuario(app, username: str, balance: float = 100.0) -> User:
+    with app.app_context():
+        user = User(username=username, email=f"{username}@example.com", balance=balance)
+        user.set_password("password123")
+        db.session.add(user)
+        db.session.commit()
+        return user
+
+
+def _socket_client_para_usuario(app, user: User):
+    flask_client = app.test_client()
+    with flask_client.session_transaction() as sess:
+        sess["_user_id"] = str(user.id)
+        sess["_fresh"] = True
+    # Contexto propio: que el usuario de la conexión no quede en el ``g`` compartido
+    with app.app_context():
+        return socketio.test_client(app, flask_test_client=flask_client)
+
+
+def _emit(app, client, evento, datos):
+    # Contexto propio por evento: Flask-Login cachea el usuario en ``g``
+    with app.app_context():
+        client.emit(evento, datos)
+
+
+def _eventos(client, nombre):
+    return [evt["args"][0] for evt in client.get_received() if evt["name"] == nombre]
+
+
+@pytest.fixture
+def jugadores(app):
+    mesas_publicas.clear()
+    usuarios = [_crear_usuario(app, f"publica_{i}", balance=50.0) for i in range(3)]
+    clientes = [_socket_client_para_usuario(app, u) for u in usuarios]
+    for c in clientes:
+        _emit(app, c, "unirse_ruleta_publica", {"nivel": "bronce"})
+    yield usuarios, clientes
+    for c in clientes:
+        with app.app_context():
+            c.disconnect()
+    mesas_publicas.clear()
+    with app.app_context():
+        for u in usuarios:
+            Apuesta.query.filter_by(user_id=u.id).delete()
+            Estadistica.query.filter_by(user_id=u.id).delete()
+            db.session.delete(User.query.get(u.id))
+        db.session.commit()
+
+
+def test_unirse_envia_estado_de_la_ronda(jugadores):
+    _, clientes = jugadores
+    estado, = _eventos(clientes[0], "ruleta_publica_estado")
+    assert estado["nivel"] == "bronce"
+    assert estado["ronda"] == 1
+    assert estado["apostantes"] == 0
+    assert not mesas_publicas["bronce"]["bucle_activo"]  # en TESTING no hay bucle
+
+
+def test_giro_liquida_en_bloque_y_paga_por_sala_personal(app, jugadores):
+    (u1, u2, u3), (c1, c2, c3) = jugadores
+    _emit(app, c1, "ruleta_publica_apostar", {"nivel": "bronce", "apuestas": [
+        {"type": "straight", "set": [17], "label": "17", "amount": 100},
+        {"type": "even", "set": [], "label": "Rojo", "amount": 200},
+    ]})
+    _emit(app, c2, "ruleta_publica_apostar", {"nivel": "bronce", "apuestas": [
+        {"type": "dozen", "set": list(range(1, 13)), "label": "1ª Docena", "amount": 500},
+    ]})
+    aceptada, = _eventos(c1, "ruleta_publica_apuesta_aceptada")
+    assert aceptada["apostado_ronda"] == 300
+    assert aceptada["balance"] == pytest.approx(47.0)
+    assert mesas_publicas["bronce"]["apostado"] == {u1.id: 300, u2.id: 500}
+    for c in (c1, c2, c3):
+        c.get_received()
+
+    with app.app_context():
+        assert mesa_publica.girar_mesa("bronce", resultado=17) == 17
+
+    resultados = [_eventos(c, "ruleta_publica_resultado") for c in (c1, c2, c3)]
+    assert all(len(r) == 1 for r in resultados)
+    assert resultados[2][0]["total_apostado"] == 800
+    assert resultados[2][0]["apostantes"] == 2
+    assert resultados[2][0]["mesa"]["ronda"] == 2
+    assert resultados[2][0]["mesa"]["historial"]["ultimos"] == [17]
+
+    with app.app_context():
+        assert User.query.get(u1.id).balance == pytest.approx(50.0 - 3.0 + 36.0)  # el 17 es negro
+        assert User.query.get(u2.id).balance == pytest.approx(45.0)
+        assert User.query.get(u3.id).balance == pytest.approx(50.0)
+        apuesta = Apuesta.query.filter_by(user_id=u1.id, juego="ruleta").one()
+        assert apuesta.ganancia == pytest.approx(35.0)
+        assert apuesta.resultado == "Número 17 - Ganancia: 35.00€"
+        stats = Estadistica.query.filter_by(user_id=u2.id, juego="ruleta", tipo_juego="multiplayer").one()
+        assert (stats.partidas_jugadas, stats.partidas_ganadas) == (1, 0)
+        assert stats.apuesta_total == pytest.approx(5.0)
+    assert mesas_publicas["bronce"]["apuestas"] == {}
+
+
+def test_pago_llega_solo_al_apostante(app, jugadores):
+    (u1, _, _), (c1, c2, _) = jugadores
+    _emit(app, c1, "ruleta_publica_apostar", {"nivel": "bronce", "apuestas": [
+        {"type": "straight", "set": [3], "label": "3", "amount": 20},
+    ]})
+    c1.get_received()
+    c2.get_received()
+    with app.app_context():
+        mesa_publica.girar_mesa("bronce", resultado=3)
+    pago, = _eventos(c1, "ruleta_publica_pago")
+    assert (pago["apostado"], pago["devuelto"]) == (20, 720)
+    assert pago["balance"] == pytest.approx(50.0 - 0.2 + 7.2)
+    assert _eventos(c2, "ruleta_publica_pago") == []
+
+
+def test_giro_fallido_devuelve_lo_retenido(app, jugadores, monkeypatch):
+    (u1, _, _), (c1, _, _) = jugadores
+    _emit(app, c1, "ruleta_publica_apostar", {"nivel": "bronce", "apuestas": [
+        {"type": "straight", "set": [3], "label": "3", "amount": 300},
+    ]})
+    ronda_id = mesas_publicas["bronce"]["ronda_id"]
+
+    def falla(*args, **kwargs):
+        raise RuntimeError("base de datos caída")
+
+    monkeypatch.setattr(mesa_publica, "aplicar_liquidacion", falla)
+    with app.app_context():
+        with pytest.raises(RuntimeError):
+            mesa_publica.girar_mesa("bronce", resultado=3)
+        assert User.query.get(u1.id).balance == pytest.approx(50.0)
+        retencion = db.session.get(Retencion, (ronda_id, u1.id))
+        assert (retencion.estado, retencion.pago) == ("liquidada", pytest.approx(3.0))
+
+
+@pytest.mark.parametrize("apuestas, mensaje", [
+    ([{"type": "straight", "set": [3], "label": "3", "amount": 10}], "mínima"),
+    ([{"type": "split", "set": [3, 4], "label": "3-4", "amount": 20}], "no válida"),
+    ([{"type": "straight", "set": [3], "label": "3", "amount": 5_020}], "Máximo por ronda"),
+    ([{"type": "straight", "set": [3], "label": "3", "amount": 4_000}] * 2, "Máximo por ronda"),
+])
+def test_apuestas_rechazadas_no_tocan_saldo(app, jugadores, apuestas, mensaje):
+    (u1, _, _), (c1, _, _) = jugadores
+    _emit(app, c1, "ruleta_publica_apostar", {"nivel": "bronce", "apuestas": apuestas})
+    error, = _eventos(c1, "error_apuesta")
+    assert mensaje in error["message"]
+    assert mesas_publicas["bronce"]["apostado"] == {}
+    with app.app_context():
+        assert User.query.get(u1.id).balance == pytest.approx(50.0)
+
+
+def test_fondos_insuficientes(app, jugadores):
+    (u1, _, _), (c1, _, _) = jugadores
+    with app.app_context():
+        User.query.get(u1.id).balance = 0.1
+        db.session.commit()
+    _emit(app, c1, "ruleta_publica_apostar", {"nivel": "bronce", "apuestas": [
+        {"type": "straight", "set": [3], "label": "3", "amount": 20},
+    ]})
+    error, = _eventos(c1, "error_apuesta")
+    assert error["message"] == "Fondos insuficientes"
+    with app.app_context():
+        assert User.query.get(u1.id).balance == pytest.approx(0.1)
+
+
+def test_pagina_y_estado_de_mesas(app, jugadores):
+    (u1, _, _), _ = jugadores
+    cliente = app.test_client()
+    with cliente.session_transaction() as sess:
+        sess["_user_id"] = str(u1.id)
+        sess["_fresh"] = True
+    with app.app_context():
+        assert cliente.get("/ruleta/publica").status_code == 200
+        mesas = cliente.get("/ruleta/publica/mesas").get_json()
+    assert [m["nivel"] for m in mesas] == list(mesa_publica.NIVELES)
+    assert mesas[0]["ronda"] == 1
@@ -0,0 +1,66 @@
+// Modelo determinista de la carrera de caballos (gemelo de juegos/carrera.py en el servidor).
+// El servidor solo envía la semilla y la duración; con los atributos de los caballos
+// cada cliente reproduce exactamente la misma carrera, fotograma a fotograma.
+const FPS_CARRERA = 30;
+
+function mulberry32(semilla) {
+    let a = semilla >>> 0;
+    return function() {
+        a = (a + 0x6D2B79F5) >>> 0;
+        let t = Math.imul(a ^ (a >>> 15), 1 | a) >>> 0;
+        t = ((t + (Math.imul(t ^ (t >>> 7), 61 | t) >>> 0)) >>> 0) ^ t;
+        return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+    };
+}
+
+function simularCarrera(semilla, duracion, caballos) {
+    const u = mulberry32(semilla);
+    const n = Math.floor(duracion * FPS_CARRERA / 1000);
+    const orden = Object.keys(caballos).map(Number).sort((x, y) => x - y);
+    const ritmo = {};
+    const distancia = {};
+    orden.forEach(c => {
+        ritmo[c] = (0.6 + 0.4 * caballos[c].velocidad) * (0.75 + 0.5 * u());
+        distancia[c] = 0.0;
+    });
+
+    const recorrido = [];
+    for (let f = 0; f < n; f++) {
+        const avance = f / n;
+        orden.forEach(c => {
+            const fatiga = 1.0 - (1.0 - caballos[c].resistencia) * avance;
+            distancia[c] += ritmo[c] * fatiga * (0.5 + u());
+        });
+        recorrido.push(orden.map(c => distancia[c]));
+    }
+
+    const meta = Math.max(...orden.map(c => distancia[c]));
+    return {
+        ganador: orden.find(c => distancia[c] === meta),
+        posiciones: recorrido.map(fila => fila.map(d => d / meta))
+    };
+}
+
+// Mueve cada caballo (#caballo1..4) por la pista al ritmo de la simulación; resuelve al llegar a meta
+function animarCarrera(semilla, duracion, caballos, inicio = 0, margen = 60) {
+    const carrera = simularCarrera(semilla, duracion, caballos);
+    const orden = Object.keys(caballos).map(Number).sort((x, y) => x - y);
+    const largo = document.querySelector('.pista-carrera').offsetWidth - margen - inicio;
+    const msPorFotograma = 1000 / FPS_CARRERA;
+
+    return new Promise(resolve => {
+        const t0 = performance.now();
+        function pintar(ahora) {
+            const f = Math.min(Math.floor((ahora - t0) / msPorFotograma), carrera.posiciones.length - 1);
+            orden.forEach((c, i) => {
+                document.getElementById(`caballo${c}`).style.left = (inicio + carrera.posiciones[f][i] * largo) + 'px';
+            });
+            if (f < carrera.posiciones.length - 1) {
+                requestAnimationFrame(pintar);
+            } else {
+                resolve(carrera.ganador);
+            }
+        }
+        requestAnimationFrame(pintar);
+    });
+}
@@ -0,0 +1,31 @@
+# backfill_contadores.py
+# Rellena ContadorJuego (estadísticas de blackjack multijugador) desde el historial de Apuesta y
+# Estadistica, incluidas las filas antiguas guardadas como 'blackjack_multijugador'. Se puede
+# repetir: cada ejecución recalcula y sustituye los contadores.
+# Uso (desde la raíz del repositorio):
+#   python utils/backfill_contadores.py [--usuario ID ...]
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src" / "server"))
+
+from app import app  # noqa: E402
+from models import db  # noqa: E402
+from endpoints.protected.api.juegos.multiplayer.blackjack.socket_handlers import reconstruir_contadores  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconstrucción de ContadorJuego de blackjack")
+    parser.add_argument("--usuario", type=int, action="append", help="solo estos usuarios (repetible)")
+    args = parser.parse_args()
+
+    with app.app_context():
+        n = reconstruir_contadores(args.usuario)
+        db.session.commit()
+    print(f"✅ Contadores de blackjack reconstruidos para {n} usuarios")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
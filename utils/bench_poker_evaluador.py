@@ -0,0 +1,39 @@
+# bench_poker_evaluador.py
+# Compara manos/segundo del evaluador por tablas con la implementación combinatoria.
+# Uso (desde la raíz del repositorio): python utils/bench_poker_evaluador.py [n_manos]
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src" / "server"))
+
+from endpoints.protected.api.juegos.multiplayer.poker import evaluador  # noqa: E402
+from endpoints.protected.api.juegos.multiplayer.poker.routes import _crear_mazo, _evaluar_mejor_mano  # noqa: E402
+
+
+def _medir(nombre, funcion, manos):
+    inicio = time.perf_counter()
+    for mano in manos:
+        funcion(mano)
+    duracion = time.perf_counter() - inicio
+    print(f"{nombre:<38} {len(manos) / duracion:>12,.0f} manos/s")
+    return duracion
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    rng = random.Random(42)
+    mazo = _crear_mazo()
+    manos = [rng.sample(mazo, 7) for _ in range(n)]
+    codigos = [[evaluador.carta_a_int(c) for c in mano] for mano in manos]
+
+    print(f"🃏 Evaluando {n} manos de 7 cartas")
+    base = _medir("_evaluar_mejor_mano (referencia)", _evaluar_mejor_mano, manos)
+    tabla = _medir("evaluar_mejor_mano (tablas + 5 cartas)", evaluador.evaluar_mejor_mano, manos)
+    rango = _medir("evaluar_rango (solo rango, enteros)", evaluador.evaluar_rango, codigos)
+    print(f"⚡ Aceleración: x{base / tabla:.1f} con mejor mano, x{base / rango:.1f} solo rango")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# bench_ruleta.py
+# Mide la liquidación de un giro de ruleta con el motor vectorizado frente al bucle apuesta a apuesta.
+# Uso (desde la raíz del repositorio): python utils/bench_ruleta.py [n_apuestas] [n_jugadores]
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src" / "server"))
+
+from endpoints.protected.api.juegos import motor_ruleta  # noqa: E402
+
+SIMPLES = ['Rojo', 'Negro', 'Par', 'Impar', '1–18', '19–36']
+
+
+def _apuesta_aleatoria(rng):
+    tipo = rng.choice(['straight', 'split', 'street', 'corner', 'line', 'dozen', 'column', 'even'])
+    cantidad = rng.choice([20, 50, 100, 500])
+    if tipo == 'even':
+        return {'type': tipo, 'amount': cantidad, 'set': [], 'label': rng.choice(SIMPLES)}
+    if tipo == 'straight':
+        n = rng.randint(0, 36)
+        return {'type': tipo, 'amount': cantidad, 'set': [n], 'label': str(n)}
+    if tipo in ('dozen', 'column'):
+        k = rng.randint(0, 2)
+        numeros = list(range(12 * k + 1, 12 * k + 13)) if tipo == 'dozen' else list(range(k + 1, 37, 3))
+        return {'type': tipo, 'amount': cantidad, 'set': numeros, 'label': f'{tipo} {k + 1}'}
+    fila = rng.randint(0, 10)
+    numeros = {
+        'split': [3 * fila + 1, 3 * fila + 2],
+        'street': [3 * fila + 1, 3 * fila + 2, 3 * fila + 3],
+        'corner': [3 * fila + 1, 3 * fila + 2, 3 * fila + 4, 3 * fila + 5],
+        'line': list(range(3 * fila + 1, 3 * fila + 7)),
+    }[tipo]
+    return {'type': tipo, 'amount': cantidad, 'set': numeros, 'label': tipo}
+
+
+def _referencia(apuestas_por_jugador, resultado):
+    """Bucle apuesta a apuesta, como hacía cada endpoint antes del motor."""
+    salida = {}
+    for clave, bets in apuestas_por_jugador.items():
+        apostado = ganancia = devuelto = 0
+        for bet in bets:
+            cantidad = int(bet['amount'])
+            apostado += cantidad
+            if resultado in motor_ruleta.numeros_apuesta(bet):
+                cuota = motor_ruleta.PAGOS[bet['type']]
+                ganancia += cantidad * cuota
+                devuelto += cantidad * (cuota + 1)
+        salida[clave] = {'apostado': apostado, 'ganancia': ganancia, 'devuelto': devuelto}
+    return salida
+
+
+def _medir(nombre, funcion, repeticiones):
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion()
+    ms = (time.perf_counter() - inicio) / repeticiones * 1000
+    print(f"{nombre:<36} {ms:>9.2f} ms/giro")
+    return ms
+
+
+def main():
+    n_apuestas = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    n_jugadores = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    rng = random.Random(7)
+    apuestas = {j: [] for j in range(n_jugadores)}
+    for i in range(n_apuestas):
+        apuestas[i % n_jugadores].append(_apuesta_aleatoria(rng))
+
+    # Lo que se guarda al colocar: apuestas validadas y compiladas a enteros
+    colocadas = {j: motor_ruleta.validar_apuestas(bets) for j, bets in apuestas.items() if bets}
+    tabla = motor_ruleta.compilar(apuestas)
+    for resultado in range(motor_ruleta.N_CASILLAS):
+        assert tabla.liquidar(resultado) == _referencia(apuestas, resultado), resultado
+        assert motor_ruleta.liquidar(colocadas, resultado) == _referencia(apuestas, resultado), resultado
+    print(f"🎡 {n_apuestas} apuestas de {n_jugadores} jugadores (resultados idénticos a la referencia)")
+
+    base = _medir("bucle apuesta a apuesta (referencia)", lambda: _referencia(apuestas, rng.randint(0, 36)), 5)
+    completo = _medir("compilar + liquidar", lambda: motor_ruleta.liquidar(apuestas, rng.randint(0, 36)), 5)
+    giro = _medir("liquidar (compiladas al colocar)", lambda: motor_ruleta.liquidar(colocadas, rng.randint(0, 36)), 5)
+    solo = _medir("liquidar (tabla ya compilada)", lambda: tabla.liquidar(rng.randint(0, 36)), 50)
+    print(f"⚡ Aceleración: x{base / completo:.1f} compilando en el giro, x{base / giro:.1f} con apuestas"
+          f" compiladas al colocar, x{base / solo:.1f} con la tabla compilada")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+# generar_equity_preflop.py
+# Genera la tabla binaria 169x169 de equity preflop que el póker multijugador mapea en memoria.
+# Es reproducible: con la misma semilla y nº de muestras produce exactamente el mismo fichero.
+# Uso (desde la raíz del repositorio): python utils/generar_equity_preflop.py [--muestras 10000] [--semilla 169]
+import argparse
+import hashlib
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src" / "server"))
+
+from endpoints.protected.api.juegos.multiplayer.poker import preflop  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera la tabla de equity preflop")
+    parser.add_argument("--muestras", type=int, default=10000, help="boards simulados por enfrentamiento")
+    parser.add_argument("--semilla", type=int, default=169)
+    parser.add_argument("--salida", type=Path, default=preflop.RUTA_MATRIZ)
+    args = parser.parse_args()
+
+    print(f"🃏 Calculando {preflop.N_CLASES}x{preflop.N_CLASES} enfrentamientos "
+          f"({args.muestras} muestras, semilla {args.semilla})")
+    inicio = time.perf_counter()
+
+    def progreso(hechas, total):
+        if hechas % 13 == 0 or hechas == total:
+            print(f"   {hechas}/{total} clases ({time.perf_counter() - inicio:.0f} s)")
+
+    matriz = preflop.calcular_matriz(args.muestras, args.semilla, progreso)
+    preflop.guardar_matriz(matriz, args.muestras, args.semilla, args.salida)
+
+    resumen = hashlib.sha256(args.salida.read_bytes()).hexdigest()[:16]
+    print(f"✅ Guardada en {args.salida} (sha256 {resumen})")
+    aa, kk = 0, 14
+    print(f"   AA vs KK: {matriz[aa, kk]:.3f}")
+
+
+if __name__ == "__main__":
+    main()
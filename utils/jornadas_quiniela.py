@@ -0,0 +1,46 @@
+# jornadas_quiniela.py
+# Abre jornadas de quiniela comunes y liquida en lote las que ya han cerrado (pensado para cron).
+# Uso (desde la raíz del repositorio):
+#   python utils/jornadas_quiniela.py abrir [--liga espana] [--partidos 15] [--minutos 60]
+#   python utils/jornadas_quiniela.py liquidar [--bloque 50000]
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src" / "server"))
+
+from app import app  # noqa: E402
+from models import db  # noqa: E402
+from endpoints.protected.api.juegos.singleplayer.quiniela import jornadas  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Jornadas de quiniela comunes")
+    sub = parser.add_subparsers(dest="orden", required=True)
+    abrir = sub.add_parser("abrir", help="abre una jornada nueva")
+    abrir.add_argument("--liga", default="espana")
+    abrir.add_argument("--partidos", type=int, default=15)
+    abrir.add_argument("--minutos", type=float, default=jornadas.MINUTOS_JORNADA)
+    liquidar = sub.add_parser("liquidar", help="liquida las jornadas cuyo cierre ya pasó")
+    liquidar.add_argument("--bloque", type=int, default=jornadas.BLOQUE_BOLETOS)
+    args = parser.parse_args()
+
+    with app.app_context():
+        if args.orden == "abrir":
+            jornada = jornadas.abrir_jornada(args.liga, args.partidos, args.minutos)
+            db.session.commit()
+            print(f"✅ Jornada {jornada.id} abierta hasta {jornada.cierre:%Y-%m-%d %H:%M} (UTC)")
+            return 0
+
+        inicio = time.perf_counter()
+        resumenes = jornadas.liquidar_vencidas(args.bloque)
+        for r in resumenes:
+            print(f"🏁 Jornada {r['jornada']}: {''.join(r['resultados'])} | {r['boletos']} boletos, "
+                  f"{r['premiados']} premiados, {r['pagado']:.2f} pagado")
+        print(f"⏱️ {len(resumenes)} jornadas liquidadas en {time.perf_counter() - inicio:.2f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
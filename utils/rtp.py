@@ -0,0 +1,43 @@
+# rtp.py
+# Calcula por Monte Carlo el RTP (retorno al jugador) y la varianza de cada juego a partir de
+# las tablas de pagos del servidor y avisa de los que se salen de la tolerancia (código de salida 1).
+# Uso (desde la raíz del repositorio):
+#   python utils/rtp.py [--rondas 10000000] [--semilla 1] [--juegos ruleta,coinflip,caballos,quiniela,blackjack]
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src" / "server"))
+
+from endpoints.protected.api.juegos import rtp  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verificación del RTP de los juegos")
+    parser.add_argument("--rondas", type=int, default=10_000_000)
+    parser.add_argument("--semilla", type=int, default=None)
+    parser.add_argument("--juegos", default=",".join(rtp.SIMULADORES),
+                        help="juegos separados por comas")
+    args = parser.parse_args()
+
+    juegos = [j.strip() for j in args.juegos.split(",") if j.strip()]
+    desconocidos = [j for j in juegos if j not in rtp.SIMULADORES]
+    if desconocidos:
+        parser.error(f"juegos desconocidos: {', '.join(desconocidos)}")
+
+    filas = rtp.verificar(args.rondas, args.semilla, juegos)
+    print(f"{'juego':<10} {'variante':<10} {'RTP':>8} {'exacto':>8} {'esperado':>10} "
+          f"{'varianza':>10} {'err. típico':>11} {'s':>6}")
+    for f in filas:
+        exacto = f"{f['teorico']:.4f}" if f['teorico'] is not None else "-"
+        esperado = f"{f['esperado']:.3f}±{f['tolerancia']:.3f}" if f['esperado'] is not None else "-"
+        marca = "" if f['ok'] else "  ❌ fuera de tolerancia"
+        if f['ok'] and f['rtp'] > 1:
+            marca = "  ⚠️ RTP > 100%"
+        print(f"{f['juego']:<10} {f['variante']:<10} {f['rtp']:>8.4f} {exacto:>8} {esperado:>10} "
+              f"{f['varianza']:>10.4f} {f['error_tipico']:>11.5f} {f['segundos']:>6.2f}{marca}")
+    return 0 if all(f['ok'] is not False for f in filas) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
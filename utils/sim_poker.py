@@ -0,0 +1,64 @@
+# sim_poker.py
+# Simula manos de póker multijugador con bots y mide manos/s, sentencias SQL por mano
+# y latencia por acción. También detecta fallos en la lógica de turnos.
+# Uso (desde la raíz del repositorio):
+#   python utils/sim_poker.py [--manos 200] [--jugadores 6] [--bots aleatorio,call_station,agresivo,selectivo]
+#                             [--semilla 1] [--snapshot 0]
+import argparse
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+SERVER = Path(__file__).resolve().parent.parent / "src" / "server"
+sys.path.insert(0, str(SERVER))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulación de póker con bots")
+    parser.add_argument("--manos", type=int, default=200)
+    parser.add_argument("--jugadores", type=int, default=6)
+    parser.add_argument("--bots", default="aleatorio,call_station,agresivo",
+                        help="estrategias separadas por comas, repartidas entre los asientos")
+    parser.add_argument("--semilla", type=int, default=1)
+    parser.add_argument("--stack", type=float, default=200.0)
+    parser.add_argument("--snapshot", type=float, default=0.0,
+                        help="POKER_SNAPSHOT_SEGUNDOS (0 = escritura directa en cada acción)")
+    args = parser.parse_args()
+
+    # Base de datos SQLite desechable: no tocamos instance/casino.db
+    directorio = tempfile.mkdtemp(prefix="sim_poker_")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directorio, 'sim.db')}"
+    os.environ["POKER_SNAPSHOT_SEGUNDOS"] = str(args.snapshot)
+    os.chdir(SERVER)
+
+    from app import app  # noqa: E402
+    import simulacion_poker as simulacion  # noqa: E402
+
+    bots = [b.strip() for b in args.bots.split(",") if b.strip()]
+    desconocidos = [b for b in bots if b not in simulacion.BOTS]
+    if desconocidos:
+        parser.error(f"bots desconocidos: {', '.join(desconocidos)} (disponibles: {', '.join(simulacion.BOTS)})")
+
+    sala_id, ids = simulacion.preparar_mesa(app, args.jugadores)
+    print(f"🃏 Simulando {args.manos} manos con {args.jugadores} bots ({', '.join(bots)})")
+    informe = simulacion.simular(app, sala_id, ids, manos=args.manos, bots=bots,
+                                 stack=args.stack, semilla=args.semilla)
+
+    print(f"✅ Manos jugadas:          {informe['manos']}")
+    print(f"   Acciones:               {informe['acciones']}")
+    print(f"⚡ Manos/segundo:          {informe['manos_por_segundo']:,.1f}")
+    print(f"🗄️  Sentencias SQL/mano:    {informe['sentencias_por_mano']:.1f}")
+    print(f"⏱️  Latencia p50 / p99:     {informe['latencia_p50_ms']:.2f} ms / {informe['latencia_p99_ms']:.2f} ms")
+    if informe['fichas_perdidas']:
+        print(f"⚠️  Fichas que no vuelven a ningún stack al cerrar la mano: {informe['fichas_perdidas']:.2f}")
+    if informe['violaciones']:
+        print(f"❌ {len(informe['violaciones'])} fallos en la lógica de turnos:")
+        for v in informe['violaciones'][:10]:
+            print(f"   - {v}")
+        sys.exit(1)
+    print("✅ Sin fallos en la lógica de turnos")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+# simulacion_poker.py
+"""
+Simulación de mesas de póker con bots, sin navegador ni Socket.IO.
+
+Los bots juegan manos completas a través de las rutas HTTP reales
+(``/iniciar``, ``/call``, ``/raise``...), así que se ejercitan
+``iniciar_mano``, ``_accion_generica`` y ``_finalizar_con_ganador`` tal y como
+en producción. Sirve para dos cosas:
+
+- medir: manos por segundo, sentencias SQL por mano y latencia por acción;
+- buscar fallos en la lógica de turnos: tras cada acción se comprueba que la
+  mano no se queda sin turno, que el turno es de alguien que puede actuar y
+  que las fichas en mesa más el bote se conservan.
+
+Lo usan ``sim_poker.py`` (informe por consola) y los tests. Es código de
+pruebas de carga: vive en ``utils/`` y no se carga con la aplicación, así que
+necesita ``src/server`` en ``sys.path``.
+"""
+
+import random
+import time
+import uuid
+
+from sqlalchemy import event
+
+from models import db, User, SalaMultijugador, UsuarioSala
+from endpoints.protected.api.juegos.multiplayer.poker.evaluador import carta_a_int
+from endpoints.protected.api.juegos.multiplayer.poker.mesa import obtener_mesa_por_id, vista_para_usuario
+from endpoints.protected.api.juegos.multiplayer.poker.preflop import clase_de_codigos, fuerza_preflop
+
+FASES_EN_JUEGO = ('preflop', 'flop', 'turn', 'river')
+MAX_ACCIONES_POR_MANO = 300
+
+
+# ===========================
+#          BOTS
+# ===========================
+
+def _opciones(vista: dict, uid: int, apuesta_minima: float):
+    yo = vista['jugadores'][str(uid)]
+    falta = max(0.0, float(vista.get('apuesta_ronda', 0.0) or 0.0) - float(yo.get('apuesta_actual', 0.0) or 0.0))
+    stack = float(yo.get('stack', 0.0) or 0.0)
+    max_subida = stack - falta
+    return falta, stack, (max_subida if max_subida + 1e-6 >= apuesta_minima else None)
+
+
+def bot_call_station(vista, uid, apuesta_minima, rng):
+    """Nunca sube ni se retira: iguala o pasa."""
+    falta, _, _ = _opciones(vista, uid, apuesta_minima)
+    return ('call', None) if falta > 1e-6 else ('check', None)
+
+
+def bot_aleatorio(vista, uid, apuesta_minima, rng):
+    """Elige al azar entre las acciones legales."""
+    falta, _, max_subida = _opciones(vista, uid, apuesta_minima)
+    opciones = ['fold', 'call'] if falta > 1e-6 else ['check', 'check', 'fold']
+    if max_subida is not None:
+        opciones.append('raise')
+    tipo = rng.choice(opciones)
+    if tipo == 'raise':
+        return 'raise', round(rng.uniform(apuesta_minima, max_subida), 2)
+    return tipo, None
+
+
+def bot_agresivo(vista, uid, apuesta_minima, rng):
+    """Sube casi siempre que puede y de vez en cuando va all-in."""
+    falta, _, max_subida = _opciones(vista, uid, apuesta_minima)
+    if max_subida is not None and rng.random() < 0.7:
+        if rng.random() < 0.15:
+            return 'raise', max_subida
+        return 'raise', min(max_subida, apuesta_minima * rng.randint(1, 3))
+    return ('call', None) if falta > 1e-6 else ('check', None)
+
+
+def bot_selectivo(vista, uid, apuesta_minima, rng):
+    """
+    Juega según la fuerza preflop de su mano (tabla precalculada): sube las
+    mejores, se retira con las peores si le toca pagar y después iguala.
+    """
+    falta, _, max_subida = _opciones(vista, uid, apuesta_minima)
+    cartas = vista['jugadores'][str(uid)].get('cartas') or []
+    fuerza = None
+    if len(cartas) == 2:
+        fuerza = fuerza_preflop(clase_de_codigos(*(carta_a_int(c) for c in cartas)))
+    if fuerza is None or vista.get('fase') != 'preflop':
+        return ('call', None) if falta > 1e-6 else ('check', None)
+    if fuerza >= 0.62 and max_subida is not None and rng.random() < 0.8:
+        return 'raise', min(max_subida, apuesta_minima * 3)
+    if fuerza < 0.45 and falta > 1e-6:
+        return 'fold', None
+    return ('call', None) if falta > 1e-6 else ('check', None)
+
+
+BOTS = {
+    'aleatorio': bot_aleatorio,
+    'call_station': bot_call_station,
+    'agresivo': bot_agresivo,
+    'selectivo': bot_selectivo,
+}
+
+
+# ===========================
+#     PREPARACIÓN DE MESA
+# ===========================
+
+def preparar_mesa(app, n_jugadores: int, apuesta_minima: float = 20.0, balance: float = 1_000_000.0):
+    """Crea usuarios y una sala de póker para la simulación. Devuelve (sala_id, [user_ids])."""
+    prefijo = f"bot_{uuid.uuid4().hex[:6]}"
+    with app.app_context():
+        usuarios = []
+        for i in range(n_jugadores):
+            u = User(username=f"{prefijo}_{i}", email=f"{prefijo}_{i}@sim.local", balance=balance)
+            u.set_password(uuid.uuid4().hex)
+            db.session.add(u)
+            usuarios.append(u)
+        db.session.commit()
+        sala = SalaMultijugador(nombre=f"Simulación {prefijo}", juego='poker', capacidad=n_jugadores,
+                                estado='jugando', creador_id=usuarios[0].id, apuesta_minima=apuesta_minima,
+                                jugadores_actuales=n_jugadores)
+        db.session.add(sala)
+        db.session.commit()
+        for pos, u in enumerate(usuarios):
+            db.session.add(UsuarioSala(usuario_id=u.id, sala_id=sala.id, posicion=pos))
+        db.session.commit()
+        return sala.id, [u.id for u in usuarios]
+
+
+# ===========================
+#        SIMULACIÓN
+# ===========================
+
+class _ContadorSentencias:
+    def __init__(self, motor):
+        self.motor = motor
+        self.total = 0
+        self.activo = False
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        if self.activo:
+            self.total += 1
+
+    def __enter__(self):
+        event.listen(self.motor, 'before_cursor_execute', self)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.motor, 'before_cursor_execute', self)
+
+
+def _percentil(valores: list[float], p: float) -> float:
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    idx = min(len(ordenados) - 1, int(round(p / 100.0 * (len(ordenados) - 1))))
+    return ordenados[idx]
+
+
+def _comprobar_turno(estado: dict, fichas_mesa: float) -> str | None:
+    """Devuelve la descripción de la primera invariante rota, o None."""
+    fase = estado.get('fase')
+    if fase not in FASES_EN_JUEGO:
+        return None
+    jugadores = estado.get('jugadores') or {}
+    turno = estado.get('turno_actual')
+    if turno is None:
+        return f'mano bloqueada en {fase}: nadie tiene el turno'
+    jugador = jugadores.get(str(turno))
+    if not jugador or jugador.get('estado') != 'activo':
+        return f'turno en {fase} para un jugador que no está activo ({turno})'
+    if float(jugador.get('stack', 0.0) or 0.0) <= 0:
+        return f'turno en {fase} para un jugador sin stack ({turno})'
+    total = sum(float(j.get('stack', 0.0) or 0.0) for j in jugadores.values()) + float(estado.get('bote', 0.0) or 0.0)
+    if abs(total - fichas_mesa) > 1e-6:
+        return f'las fichas no cuadran en {fase}: {total:.2f} frente a {fichas_mesa:.2f}'
+    return None
+
+
+def simular(app, sala_id: int, user_ids: list[int], manos: int = 100, bots: list[str] | None = None,
+            stack: float = 200.0, semilla: int | None = None) -> dict:
+    """
+    Juega ``manos`` manos en la sala con un bot por asiento (``bots`` se
+    reparte cíclicamente entre los asientos) y devuelve el informe.
+    Solo se miden ``/iniciar`` y las acciones; las recompras de stack entre
+    manos y la lectura del estado por parte de los bots quedan fuera.
+    """
+    rng = random.Random(semilla)
+    bots = bots or list(BOTS)
+    estrategia = {uid: BOTS[bots[i % len(bots)]] for i, uid in enumerate(user_ids)}
+    with app.app_context():
+        sala = db.session.get(SalaMultijugador, sala_id)
+        apuesta_minima = float(sala.apuesta_minima or 10.0)
+        motor = db.engine
+
+    clientes = {}
+    for uid in user_ids:
+        cli = app.test_client()
+        with cli.session_transaction() as sess:
+            sess['_user_id'] = str(uid)
+            sess['_fresh'] = True
+        clientes[uid] = cli
+
+    def _post(uid, ruta, datos=None):
+        # Contexto de aplicación propio por petición: si el llamante ya tiene uno
+        # abierto (tests), Flask-Login reutilizaría el usuario de la anterior
+        with app.app_context():
+            return clientes[uid].post(f'/api/multijugador/poker/{ruta}/{sala_id}', json=datos or {})
+
+    def _estado():
+        with app.app_context():
+            return obtener_mesa_por_id(sala_id)
+
+    latencias = []
+    violaciones = []
+    rechazos = 0
+    acciones = 0
+    manos_jugadas = 0
+    fichas_perdidas = 0.0
+    duracion = 0.0
+
+    with _ContadorSentencias(motor) as contador:
+        for _ in range(manos):
+            # Recompra (no medida) para quien no llegue a la ciega grande
+            jugadores = _estado().estado.get('jugadores') or {}
+            for uid in user_ids:
+                if float((jugadores.get(str(uid)) or {}).get('stack', 0.0) or 0.0) < apuesta_minima:
+                    _post(uid, 'stack', {'stack': stack})
+
+            contador.activo = True
+            inicio = time.perf_counter()
+            resp = _post(user_ids[0], 'iniciar')
+            duracion += time.perf_counter() - inicio
+            contador.activo = False
+            if resp.status_code != 200:
+                violaciones.append(f'no se pudo iniciar la mano: {resp.get_json()}')
+                break
+
+            mesa = _estado()
+            jugadores = mesa.estado.get('jugadores') or {}
+            fichas_mesa = sum(float(j.get('stack', 0.0) or 0.0) for j in jugadores.values()) + float(mesa.estado.get('bote', 0.0) or 0.0)
+            fallo = _comprobar_turno(mesa.estado, fichas_mesa)
+
+            for _ in range(MAX_ACCIONES_POR_MANO):
+                if fallo or mesa.estado.get('fase') not in FASES_EN_JUEGO:
+                    break
+                turno = mesa.estado['turno_actual']
+                vista = vista_para_usuario(mesa, turno)
+                tipo, cantidad = estrategia[turno](vista, turno, apuesta_minima, rng)
+
+                contador.activo = True
+                inicio = time.perf_counter()
+                resp = _post(turno, tipo, {'cantidad': cantidad} if cantidad is not None else None)
+                transcurrido = time.perf_counter() - inicio
+                contador.activo = False
+                duracion += transcurrido
+                latencias.append(transcurrido * 1000.0)
+                acciones += 1
+
+                if resp.status_code != 200:
+                    rechazos += 1
+                    violaciones.append(f'acción legal rechazada ({tipo} {cantidad}): {resp.get_json()}')
+                    resp = _post(turno, 'fold')
+                    if resp.status_code != 200:
+                        fallo = f'el jugador en turno no puede ni retirarse: {resp.get_json()}'
+                        break
+                mesa = _estado()
+                fallo = _comprobar_turno(mesa.estado, fichas_mesa)
+            else:
+                fallo = f'la mano no terminó tras {MAX_ACCIONES_POR_MANO} acciones'
+
+            if fallo:
+                violaciones.append(fallo)
+                break
+            manos_jugadas += 1
+            jugadores = mesa.estado.get('jugadores') or {}
+            fichas_fin = sum(float(j.get('stack', 0.0) or 0.0) for j in jugadores.values())
+            fichas_perdidas += max(0.0, fichas_mesa - fichas_fin)
+
+        sentencias = contador.total
+
+    return {
+        'manos': manos_jugadas,
+        'acciones': acciones,
+        'segundos': round(duracion, 4),
+        'manos_por_segundo': round(manos_jugadas / duracion, 2) if duracion else 0.0,
+        'sentencias_por_mano': round(sentencias / manos_jugadas, 2) if manos_jugadas else 0.0,
+        'latencia_p50_ms': round(_percentil(latencias, 50), 3),
+        'latencia_p99_ms': round(_percentil(latencias, 99), 3),
+        'rechazos': rechazos,
+        'fichas_perdidas': round(fichas_perdidas, 2),
+        'violaciones': violaciones,
+    }